@@ -2,13 +2,14 @@
 Admin interface للمحاسبة
 """
 from django.contrib import admin
-from .models import Account, JournalEntry, JournalEntryLine, BiologicalAssetRevaluation
+from .models import Account, JournalEntry, JournalEntryLine, BiologicalAssetRevaluation, PostingOutbox
 
 
 @admin.register(Account)
 class AccountAdmin(admin.ModelAdmin):
     """Admin interface للحسابات"""
     list_display = ['code', 'arabic_name', 'account_type', 'balance', 'is_active']
+    list_select_related = ['ledger_balance']
     list_filter = ['account_type', 'is_active']
     search_fields = ['code', 'name', 'arabic_name']
     ordering = ['code']
@@ -56,3 +57,12 @@ class BiologicalAssetRevaluationAdmin(admin.ModelAdmin):
         'current_count',
         'created_at',
     ]
+
+
+@admin.register(PostingOutbox)
+class PostingOutboxAdmin(admin.ModelAdmin):
+    """Admin interface لطابور ترحيل القيود"""
+    list_display = ['reference_type', 'reference_id', 'journal_entry', 'attempts', 'created_at', 'posted_at']
+    list_filter = ['reference_type', 'posted_at']
+    search_fields = ['reference_type', 'last_error']
+    readonly_fields = ['journal_entry', 'created_at', 'posted_at']
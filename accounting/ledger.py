@@ -0,0 +1,427 @@
+"""
+أرصدة الحسابات التراكمية (Account Balance Ledger)
+
+تحافظ على AccountBalance (لكل حساب) و AccountPeriodBalance (لكل حساب
+وشهر) محدثة بفروقات تزايدية عند كتابة أو حذف بنود القيود المرحّلة أو
+ترحيل القيد، بدلاً من تجميع جميع بنود القيود مع كل قراءة لرصيد.
+
+البند يدخل في الأرصدة فقط إذا كان قيده مرحّلاً (is_posted)، وتُنسب
+حركته إلى شهر تاريخ القيد.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import connection
+from django.db.models import Sum, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Account, AccountBalance, AccountPeriodBalance, JournalEntry, JournalEntryLine
+
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+
+
+def period_start(value):
+    """بداية الشهر لتاريخ القيد (يقبل date أو نص ISO)"""
+    if isinstance(value, str):
+        value = parse_date(value)
+    return date(value.year, value.month, 1)
+
+
+def to_amount(value):
+    """المبلغ بدقة عمود amount (خانتان عشريتان) كما سيُخزن فعلياً"""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+# ==================== Rebuild (المصدر الموثوق) ====================
+
+def _posted_lines():
+    return JournalEntryLine.objects.filter(journal_entry__is_posted=True)
+
+
+def compute_account_totals(account_ids=None):
+    """
+    مجموع المدين والدائن للبنود المرحّلة من البنود الخام
+
+    Returns:
+        dict: {account_id: (total_debit, total_credit)}
+    """
+    lines = _posted_lines()
+    if account_ids is not None:
+        lines = lines.filter(account_id__in=account_ids)
+    rows = lines.order_by().values('account_id').annotate(
+        debit=Sum('amount', filter=Q(type='debit')),
+        credit=Sum('amount', filter=Q(type='credit')),
+    )
+    return {
+        row['account_id']: (row['debit'] or ZERO, row['credit'] or ZERO)
+        for row in rows
+    }
+
+
+def compute_period_totals(account_ids=None):
+    """
+    حركة المدين والدائن لكل حساب وشهر من البنود الخام
+
+    Returns:
+        dict: {(account_id, period): (debit, credit)}
+    """
+    lines = _posted_lines()
+    if account_ids is not None:
+        lines = lines.filter(account_id__in=account_ids)
+    rows = lines.order_by().annotate(
+        period=TruncMonth('journal_entry__entry_date')
+    ).values('account_id', 'period').annotate(
+        debit=Sum('amount', filter=Q(type='debit')),
+        credit=Sum('amount', filter=Q(type='credit')),
+    )
+    return {
+        (row['account_id'], row['period']): (row['debit'] or ZERO, row['credit'] or ZERO)
+        for row in rows
+    }
+
+
+def rebuild_account_balances(account_ids=None):
+    """
+    إعادة بناء AccountBalance و AccountPeriodBalance من البنود المرحّلة
+
+    Args:
+        account_ids: حسابات محددة، أو None لجميع الحسابات
+
+    Returns:
+        int: عدد الحسابات التي أعيد بناؤها
+    """
+    accounts = Account.objects.all()
+    if account_ids is not None:
+        accounts = accounts.filter(id__in=account_ids)
+    ids = list(accounts.values_list('id', flat=True))
+
+    totals = compute_account_totals(ids)
+    periods = compute_period_totals(ids)
+    now = timezone.now()
+
+    AccountBalance.objects.bulk_create(
+        [
+            AccountBalance(
+                account_id=account_id,
+                total_debit=totals.get(account_id, (ZERO, ZERO))[0],
+                total_credit=totals.get(account_id, (ZERO, ZERO))[1],
+                updated_at=now,
+            )
+            for account_id in ids
+        ],
+        update_conflicts=True,
+        unique_fields=['account'],
+        update_fields=['total_debit', 'total_credit', 'updated_at'],
+        batch_size=1000,
+    )
+
+    AccountPeriodBalance.objects.filter(account_id__in=ids).delete()
+    AccountPeriodBalance.objects.bulk_create(
+        [
+            AccountPeriodBalance(
+                account_id=account_id, period=period,
+                debit=debit, credit=credit, updated_at=now,
+            )
+            for (account_id, period), (debit, credit) in periods.items()
+        ],
+        batch_size=1000,
+    )
+    return len(ids)
+
+
+def get_account_totals(account):
+    """
+    مجموع المدين والدائن المرحّل للحساب
+
+    يستخدم القيمة المحملة مسبقاً عبر select_related('ledger_balance') إن وجدت،
+    وإلا يقرأ صفاً واحداً (ويبنيه إن لم يكن موجوداً).
+
+    Returns:
+        tuple: (total_debit, total_credit)
+    """
+    try:
+        if type(account).ledger_balance.is_cached(account):
+            balance = account.ledger_balance
+            return balance.total_debit, balance.total_credit
+    except AccountBalance.DoesNotExist:
+        pass
+
+    row = AccountBalance.objects.filter(account_id=account.pk).values_list(
+        'total_debit', 'total_credit'
+    ).first()
+    if row is None:
+        rebuild_account_balances([account.pk])
+        row = AccountBalance.objects.filter(account_id=account.pk).values_list(
+            'total_debit', 'total_credit'
+        ).get()
+    return row
+
+
+# ==================== Incremental Updates ====================
+
+def _upsert_deltas(model, key_columns, value_columns, rows):
+    """
+    INSERT ... ON CONFLICT DO UPDATE يضيف الفروقات إلى القيم الحالية
+
+    استعلام واحد لجميع الصفوف، والصفوف الناقصة تُنشأ بالفرق نفسه.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    qn = connection.ops.quote_name
+    columns = [*key_columns, *value_columns, 'updated_at']
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(rows))
+    updates = ', '.join(
+        [f'{qn(column)} = {table}.{qn(column)} + EXCLUDED.{qn(column)}' for column in value_columns]
+        + [f'{qn("updated_at")} = EXCLUDED.{qn("updated_at")}']
+    )
+    sql = (
+        f'INSERT INTO {table} ({", ".join(qn(column) for column in columns)}) '
+        f'VALUES {placeholders} '
+        f'ON CONFLICT ({", ".join(qn(column) for column in key_columns)}) DO UPDATE SET {updates}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def apply_ledger_deltas(deltas):
+    """
+    تطبيق فروقات ذرية على أرصدة الحسابات والفترات
+
+    جميع الفروقات تُطبق باستعلامين فقط (واحد لكل جدول) مهما كان عددها،
+    مرتبة حسب الحساب لتفادي deadlocks بين transactions متزامنة.
+
+    Args:
+        deltas: {(account_id, period): [debit, credit]} - قيم موجبة أو سالبة
+    """
+    now = timezone.now()
+    account_deltas = defaultdict(lambda: [ZERO, ZERO])
+    period_rows = []
+    for (account_id, period), (debit, credit) in sorted(deltas.items()):
+        if not debit and not credit:
+            continue
+        account_deltas[account_id][0] += debit
+        account_deltas[account_id][1] += credit
+        period_rows.append((account_id, period, debit, credit, now))
+
+    if not period_rows:
+        return
+    _upsert_deltas(AccountPeriodBalance, ('account_id', 'period'), ('debit', 'credit'), period_rows)
+    _upsert_deltas(
+        AccountBalance, ('account_id',), ('total_debit', 'total_credit'),
+        [(account_id, debit, credit, now) for account_id, (debit, credit) in account_deltas.items()],
+    )
+
+
+def _add(deltas, account_id, period, line_type, amount, sign):
+    entry = deltas.setdefault((account_id, period), [ZERO, ZERO])
+    entry[0 if line_type == 'debit' else 1] += sign * to_amount(amount)
+
+
+def _entry_state(entry_id, entry=None):
+    """
+    (is_posted, period) المحفوظة للقيد
+
+    تُقرأ من لقطة القيد المحمل إن كان هو نفس القيد (القيم المحفوظة وليس
+    تعديلات لم تُحفظ بعد)، وإلا من قاعدة البيانات.
+    """
+    snapshot = getattr(entry, '_ledger_snapshot', None) if entry is not None else None
+    if snapshot is not None and entry.pk == entry_id:
+        is_posted, entry_date = snapshot
+        return is_posted, period_start(entry_date)
+    row = JournalEntry.objects.filter(pk=entry_id).values_list('is_posted', 'entry_date').first()
+    if row is None:
+        return False, None
+    return row[0], period_start(row[1])
+
+
+def apply_line_change(previous, current, entry=None):
+    """
+    تحديث الأرصدة بفرق بند قيد واحد (لقطات JournalEntryLine.ledger_values)
+
+    Args:
+        previous: لقطة القيم قبل التغيير (None عند الإنشاء)
+        current: لقطة القيم بعد التغيير (None عند الحذف)
+        entry: القيد المحمل مع البند (لتفادي استعلام إضافي)
+    """
+    if previous == current:
+        return
+
+    fields = JournalEntryLine.LEDGER_FIELDS
+    deltas = {}
+    for values, sign in ((previous, -1), (current, 1)):
+        if not values:
+            continue
+        values = dict(zip(fields, values))
+        is_posted, period = _entry_state(values['journal_entry_id'], entry)
+        if is_posted:
+            _add(deltas, values['account_id'], period, values['type'], values['amount'], sign)
+
+    if deltas:
+        apply_ledger_deltas(deltas)
+
+
+def apply_entry_change(entry, previous, current):
+    """
+    تحديث الأرصدة عند ترحيل القيد أو إلغاء ترحيله أو تغيير تاريخه
+
+    Args:
+        entry: القيد
+        previous: لقطة JournalEntry.ledger_values قبل التغيير
+        current: لقطة بعد التغيير
+    """
+    if previous == current:
+        return
+
+    was_posted, old_date = previous
+    is_posted, new_date = current
+    old_period = period_start(old_date) if was_posted else None
+    new_period = period_start(new_date) if is_posted else None
+    if old_period == new_period:
+        return
+
+    lines = entry.lines.order_by().values('account_id', 'type').annotate(total=Sum('amount'))
+    deltas = {}
+    for line in lines:
+        if old_period:
+            _add(deltas, line['account_id'], old_period, line['type'], line['total'], -1)
+        if new_period:
+            _add(deltas, line['account_id'], new_period, line['type'], line['total'], 1)
+    if deltas:
+        apply_ledger_deltas(deltas)
+
+
+# ==================== Reconciliation ====================
+
+def find_balance_drift(account_ids=None):
+    """
+    مقارنة الأرصدة المخزنة بالبنود المرحّلة الخام
+
+    Returns:
+        list: [(account_id, period, stored, actual)] حيث period=None للرصيد الإجمالي
+        و stored/actual بصيغة (debit, credit)
+    """
+    accounts = Account.objects.all()
+    if account_ids:
+        accounts = accounts.filter(id__in=account_ids)
+    ids = list(accounts.values_list('id', flat=True))
+
+    drift = []
+    actual_totals = compute_account_totals(ids)
+    stored_totals = {
+        account_id: (debit, credit)
+        for account_id, debit, credit in AccountBalance.objects.filter(
+            account_id__in=ids
+        ).values_list('account_id', 'total_debit', 'total_credit')
+    }
+    for account_id in ids:
+        actual = actual_totals.get(account_id, (ZERO, ZERO))
+        stored = stored_totals.get(account_id)
+        if stored != actual:
+            drift.append((account_id, None, stored, actual))
+
+    actual_periods = compute_period_totals(ids)
+    stored_periods = {
+        (account_id, period): (debit, credit)
+        for account_id, period, debit, credit in AccountPeriodBalance.objects.filter(
+            account_id__in=ids
+        ).values_list('account_id', 'period', 'debit', 'credit')
+    }
+    for key in sorted(set(actual_periods) | set(stored_periods)):
+        actual = actual_periods.get(key, (ZERO, ZERO))
+        stored = stored_periods.get(key, (ZERO, ZERO))
+        if stored != actual:
+            drift.append((key[0], key[1], stored, actual))
+
+    return drift
+
+
+# ==================== As-Of Totals ====================
+
+def _next_period(period):
+    if period.month == 12:
+        return date(period.year + 1, 1, 1)
+    return date(period.year, period.month + 1, 1)
+
+
+def _is_month_end(value):
+    return (value + timedelta(days=1)).day == 1
+
+
+def get_ledger_totals(end_date, start_date=None, account_filter=None):
+    """
+    مجموع المدين والدائن المرحّل لكل حساب بين تاريخين في استعلام واحد
+
+    الأشهر الكاملة داخل الفترة تُقرأ من AccountPeriodBalance (لقطة شهرية
+    لكل حساب)، وفقط الأيام المتبقية من أول وآخر شهر غير كامل تُقرأ من بنود
+    القيود الخام. الجزآن يُدمجان بـ UNION ALL، فرصيد نهاية شهر أو سنة سابقة
+    يُحسب من اللقطات وحدها دون فحص أي بند.
+
+    Args:
+        end_date: تاريخ النهاية (شامل)
+        start_date: تاريخ البداية (شامل)، أو None منذ البداية
+        account_filter: dict لتصفية الحسابات (مثل {'account_type__in': [...]})
+
+    Returns:
+        dict: {account_id: {'code', 'arabic_name', 'account_type', 'debit', 'credit'}}
+    """
+    raw_ranges = []
+    first_full = start_date
+    if start_date is not None and start_date.day != 1:
+        first_full = _next_period(start_date)
+        raw_ranges.append((start_date, min(first_full - timedelta(days=1), end_date)))
+
+    # الأشهر الكاملة: first_full <= period < last_full
+    if _is_month_end(end_date):
+        last_full = _next_period(period_start(end_date))
+    else:
+        last_full = period_start(end_date)
+        same_month = start_date is not None and period_start(start_date) == last_full
+        if not (raw_ranges and same_month):
+            raw_ranges.append((max(last_full, start_date or last_full), end_date))
+
+    account_q = Q(**{f'account__{key}': value for key, value in (account_filter or {}).items()})
+    account_fields = ('account_id', 'account__code', 'account__arabic_name', 'account__account_type')
+
+    queries = []
+    if first_full is None or first_full < last_full:
+        periods = AccountPeriodBalance.objects.filter(account_q, period__lt=last_full)
+        if first_full is not None:
+            periods = periods.filter(period__gte=first_full)
+        queries.append(
+            periods.order_by().values(*account_fields).annotate(
+                debit=Sum('debit'), credit=Sum('credit'),
+            )
+        )
+
+    if raw_ranges:
+        date_q = Q()
+        for range_start, range_end in raw_ranges:
+            date_q |= Q(journal_entry__entry_date__gte=range_start, journal_entry__entry_date__lte=range_end)
+        queries.append(
+            _posted_lines().filter(account_q, date_q).order_by().values(*account_fields).annotate(
+                debit=Sum('amount', filter=Q(type='debit')),
+                credit=Sum('amount', filter=Q(type='credit')),
+            )
+        )
+
+    if not queries:
+        return {}
+    rows = queries[0].union(*queries[1:], all=True) if len(queries) > 1 else queries[0]
+
+    totals = {}
+    for row in rows:
+        account = totals.setdefault(row['account_id'], {
+            'code': row['account__code'],
+            'arabic_name': row['account__arabic_name'],
+            'account_type': row['account__account_type'],
+            'debit': ZERO,
+            'credit': ZERO,
+        })
+        account['debit'] += row['debit'] or ZERO
+        account['credit'] += row['credit'] or ZERO
+    return totals
@@ -0,0 +1,79 @@
+"""
+Management Command لإعادة بناء أرصدة الحسابات (AccountBalance) أو فحص انحرافها
+
+الاستخدام:
+    python manage.py reconcile_account_balances --schema farm1
+    python manage.py reconcile_account_balances --schema farm1 --check
+    python manage.py reconcile_account_balances --check   # جميع الـ tenants
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django_tenants.utils import schema_context, get_tenant_model, get_public_schema_name
+
+from accounting.ledger import rebuild_account_balances, find_balance_drift
+
+
+class Command(BaseCommand):
+    help = 'إعادة بناء أرصدة الحسابات من بنود القيود المرحّلة أو فحص انحرافها'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schema',
+            type=str,
+            help='Schema name (tenant name). افتراضي: جميع الـ tenants',
+        )
+        parser.add_argument(
+            '--account-id',
+            type=int,
+            action='append',
+            dest='account_ids',
+            help='معرف حساب محدد (يمكن تكراره)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='فحص الانحراف فقط دون تعديل (يفشل إذا وُجد انحراف)',
+        )
+
+    def handle(self, *args, **options):
+        if options['schema']:
+            schemas = [options['schema']]
+        else:
+            schemas = list(
+                get_tenant_model().objects.exclude(
+                    schema_name=get_public_schema_name()
+                ).values_list('schema_name', flat=True)
+            )
+
+        drifted_total = 0
+        for schema_name in schemas:
+            with schema_context(schema_name):
+                if options['check']:
+                    drifted_total += self._check(schema_name, options['account_ids'])
+                else:
+                    self._rebuild(schema_name, options['account_ids'])
+
+        if options['check'] and drifted_total:
+            raise CommandError(f'تم العثور على انحراف في {drifted_total} رصيد')
+
+    def _rebuild(self, schema_name, account_ids):
+        with transaction.atomic():
+            count = rebuild_account_balances(account_ids or None)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ [{schema_name}] تمت إعادة بناء أرصدة {count} حساب')
+        )
+
+    def _check(self, schema_name, account_ids):
+        drift = find_balance_drift(account_ids)
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f'✅ [{schema_name}] لا يوجد انحراف'))
+            return 0
+
+        for account_id, period, stored, actual in drift:
+            scope = f'شهر {period:%Y-%m}' if period else 'الإجمالي'
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  [{schema_name}] حساب {account_id} ({scope}): '
+                f'مخزن {stored} ≠ فعلي {actual}'
+            ))
+        return len(drift)
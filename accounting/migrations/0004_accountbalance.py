@@ -0,0 +1,176 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_account_balances(apps, schema_editor):
+    """بناء الأرصدة للحسابات الموجودة من بنود القيود المرحّلة"""
+    from django.db.models import Q, Sum
+    from django.db.models.functions import TruncMonth
+
+    Account = apps.get_model("accounting", "Account")
+    AccountBalance = apps.get_model("accounting", "AccountBalance")
+    AccountPeriodBalance = apps.get_model("accounting", "AccountPeriodBalance")
+    JournalEntryLine = apps.get_model("accounting", "JournalEntryLine")
+
+    zero = Decimal("0.00")
+    sums = {
+        "debit": Sum("amount", filter=Q(type="debit")),
+        "credit": Sum("amount", filter=Q(type="credit")),
+    }
+    lines = JournalEntryLine.objects.filter(journal_entry__is_posted=True).order_by()
+
+    totals = {
+        row["account_id"]: row
+        for row in lines.values("account_id").annotate(**sums)
+    }
+    AccountBalance.objects.bulk_create(
+        [
+            AccountBalance(
+                account_id=account_id,
+                total_debit=totals.get(account_id, {}).get("debit") or zero,
+                total_credit=totals.get(account_id, {}).get("credit") or zero,
+            )
+            for account_id in Account.objects.values_list("id", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+    periods = lines.annotate(
+        period=TruncMonth("journal_entry__entry_date")
+    ).values("account_id", "period").annotate(**sums)
+    AccountPeriodBalance.objects.bulk_create(
+        [
+            AccountPeriodBalance(
+                account_id=row["account_id"],
+                period=row["period"],
+                debit=row["debit"] or zero,
+                credit=row["credit"] or zero,
+            )
+            for row in periods
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounting", "0003_biologicalassetrevaluation_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_debit",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=17,
+                        verbose_name="إجمالي المدين",
+                    ),
+                ),
+                (
+                    "total_credit",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=17,
+                        verbose_name="إجمالي الدائن",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="آخر تحديث"),
+                ),
+                (
+                    "account",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_balance",
+                        to="accounting.account",
+                        verbose_name="الحساب",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "رصيد حساب",
+                "verbose_name_plural": "أرصدة الحسابات",
+            },
+        ),
+        migrations.CreateModel(
+            name="AccountPeriodBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.DateField(
+                        help_text="أول يوم في الشهر", verbose_name="الفترة"
+                    ),
+                ),
+                (
+                    "debit",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=17,
+                        verbose_name="المدين",
+                    ),
+                ),
+                (
+                    "credit",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=17,
+                        verbose_name="الدائن",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="آخر تحديث"),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="period_balances",
+                        to="accounting.account",
+                        verbose_name="الحساب",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "حركة حساب شهرية",
+                "verbose_name_plural": "حركات الحسابات الشهرية",
+                "indexes": [
+                    models.Index(
+                        fields=["period"], name="accounting__period_8b2beb_idx"
+                    )
+                ],
+                "unique_together": {("account", "period")},
+            },
+        ),
+        migrations.RunPython(backfill_account_balances, migrations.RunPython.noop),
+    ]
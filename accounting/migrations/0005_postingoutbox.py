@@ -0,0 +1,78 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounting", "0004_accountbalance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostingOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "reference_type",
+                    models.CharField(max_length=50, verbose_name="نوع المرجع"),
+                ),
+                ("reference_id", models.IntegerField(verbose_name="رقم المرجع")),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="عدد المحاولات"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, null=True, verbose_name="آخر خطأ"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ الإنشاء"
+                    ),
+                ),
+                (
+                    "posted_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="تاريخ الترحيل"
+                    ),
+                ),
+                (
+                    "journal_entry",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="accounting.journalentry",
+                        verbose_name="القيد المحاسبي",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "طلب ترحيل قيد",
+                "verbose_name_plural": "طابور ترحيل القيود",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("posted_at__isnull", True)),
+                        fields=["created_at"],
+                        name="accounting_outbox_pending",
+                    )
+                ],
+                "unique_together": {("reference_type", "reference_id")},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounting", "0005_postingoutbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="journalentry",
+            name="accounting__entry_d_79c286_idx",
+        ),
+        migrations.AddIndex(
+            model_name="journalentry",
+            index=models.Index(
+                fields=["entry_date", "id"], name="accounting__entry_d_8bad73_idx"
+            ),
+        ),
+    ]
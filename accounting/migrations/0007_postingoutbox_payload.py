@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounting", "0006_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="postingoutbox",
+            name="payload",
+            field=models.JSONField(
+                blank=True,
+                help_text="قيم تُلتقط عند تسجيل المستند وتُستخدم في بناء القيد (مثل متوسط وزن الدفعة)",
+                null=True,
+                verbose_name="بيانات وقت الطلب",
+            ),
+        ),
+    ]
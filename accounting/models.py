@@ -59,34 +59,27 @@ class Account(models.Model):
     def __str__(self):
         return f"{self.code} - {self.arabic_name}"
     
+    # الحسابات ذات الطبيعة المدينة (الرصيد = مدين - دائن)
+    DEBIT_NORMAL_TYPES = ('asset', 'expense', 'biological_asset')
+    
+    def signed_balance(self, total_debit, total_credit):
+        """الرصيد حسب طبيعة الحساب من مجموع المدين والدائن"""
+        if self.account_type in self.DEBIT_NORMAL_TYPES:
+            return total_debit - total_credit
+        return total_credit - total_debit
+    
     @property
     def balance(self):
-        """حساب رصيد الحساب"""
-        from django.db.models import Sum, Q
-        
-        # حساب مجموع المدين
-        total_debit = JournalEntryLine.objects.filter(
-            account=self
-        ).filter(
-            type='debit'
-        ).aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
+        """
+        رصيد الحساب من القيود المرحّلة
         
-        # حساب مجموع الدائن
-        total_credit = JournalEntryLine.objects.filter(
-            account=self
-        ).filter(
-            type='credit'
-        ).aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
+        يُقرأ من AccountBalance (صف واحد يُحدَّث مع كل بند مرحّل)
+        بدلاً من تجميع جميع بنود القيود.
+        """
+        from .ledger import get_account_totals
         
-        # حساب الرصيد حسب نوع الحساب
-        if self.account_type in ['asset', 'expense', 'biological_asset']:
-            return total_debit - total_credit
-        else:
-            return total_credit - total_debit
+        total_debit, total_credit = get_account_totals(self)
+        return self.signed_balance(total_debit, total_credit)
 
 
 class JournalEntry(models.Model):
@@ -134,13 +127,28 @@ class JournalEntry(models.Model):
         ordering = ['-entry_date', '-created_at']
         indexes = [
             models.Index(fields=['entry_number']),
-            models.Index(fields=['entry_date']),
+            models.Index(fields=['entry_date', 'id']),  # Keyset Pagination في API
             models.Index(fields=['reference_type', 'reference_id']),
         ]
     
     def __str__(self):
         return f"{self.entry_number} - {self.entry_date}"
     
+    # الحقول التي تحدد دخول بنود القيد في أرصدة الحسابات
+    LEDGER_FIELDS = ('is_posted', 'entry_date')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # لقطة بالقيم المحفوظة لتحديث أرصدة الحسابات عند الترحيل أو تغيير التاريخ
+        if not instance.get_deferred_fields() & set(cls.LEDGER_FIELDS):
+            instance._ledger_snapshot = instance.ledger_values()
+        return instance
+    
+    def ledger_values(self):
+        """القيم التي تحدد أثر القيد على أرصدة الحسابات"""
+        return tuple(getattr(self, field) for field in self.LEDGER_FIELDS)
+    
     def validate_balance(self):
         """التحقق من توازن القيد (المدين = الدائن)"""
         from django.db.models import Sum
@@ -209,6 +217,147 @@ class JournalEntryLine(models.Model):
     
     def __str__(self):
         return f"{self.journal_entry.entry_number} - {self.account.code} - {self.get_type_display()} {self.amount}"
+    
+    LEDGER_FIELDS = ('journal_entry_id', 'account_id', 'type', 'amount')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # لقطة بالقيم المحفوظة لحساب الفرق في أرصدة الحسابات عند التعديل
+        if not instance.get_deferred_fields() & set(cls.LEDGER_FIELDS):
+            instance._ledger_snapshot = instance.ledger_values()
+        return instance
+    
+    def ledger_values(self):
+        """القيم التي تدخل في أرصدة الحسابات"""
+        return tuple(getattr(self, field) for field in self.LEDGER_FIELDS)
+
+
+class AccountBalance(models.Model):
+    """
+    الرصيد التراكمي للحساب (Account Balance)
+    
+    مجموع المدين والدائن لجميع البنود المرحّلة، يُحدَّث تزايدياً في نفس
+    الـ transaction عند كتابة أو حذف البنود أو ترحيل القيد.
+    للفحص أو إعادة البناء: python manage.py reconcile_account_balances
+    """
+    account = models.OneToOneField(
+        Account,
+        on_delete=models.CASCADE,
+        related_name='ledger_balance',
+        verbose_name="الحساب"
+    )
+    total_debit = models.DecimalField(
+        max_digits=17,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="إجمالي المدين"
+    )
+    total_credit = models.DecimalField(
+        max_digits=17,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="إجمالي الدائن"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر تحديث")
+    
+    class Meta:
+        verbose_name = "رصيد حساب"
+        verbose_name_plural = "أرصدة الحسابات"
+    
+    def __str__(self):
+        return f"{self.account.code} - {self.total_debit} / {self.total_credit}"
+
+
+class AccountPeriodBalance(models.Model):
+    """
+    حركة الحساب خلال شهر (Period Balance)
+    
+    مجموع المدين والدائن للبنود المرحّلة حسب شهر تاريخ القيد، ويُستخدم
+    لحساب الرصيد في أي تاريخ دون المرور على جميع البنود.
+    """
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name='period_balances',
+        verbose_name="الحساب"
+    )
+    period = models.DateField(
+        verbose_name="الفترة",
+        help_text="أول يوم في الشهر"
+    )
+    debit = models.DecimalField(
+        max_digits=17,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="المدين"
+    )
+    credit = models.DecimalField(
+        max_digits=17,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="الدائن"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر تحديث")
+    
+    class Meta:
+        verbose_name = "حركة حساب شهرية"
+        verbose_name_plural = "حركات الحسابات الشهرية"
+        unique_together = [['account', 'period']]
+        indexes = [
+            models.Index(fields=['period']),
+        ]
+    
+    def __str__(self):
+        return f"{self.account.code} - {self.period:%Y-%m}"
+
+
+class PostingOutbox(models.Model):
+    """
+    طابور ترحيل القيود (Posting Outbox)
+    
+    تسجل signals العمليات (التغذية، النفوق، الحصاد، الفواتير) صفاً خفيفاً
+    هنا بدلاً من إنشاء القيد في نفس الطلب، ثم يرحّل عامل Celery الصفوف
+    المعلقة على دفعات (accounting/outbox.py). الصف فريد لكل مستند مصدر.
+    """
+    reference_type = models.CharField(
+        max_length=50,
+        verbose_name="نوع المرجع"
+    )
+    reference_id = models.IntegerField(verbose_name="رقم المرجع")
+    payload = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name="بيانات وقت الطلب",
+        help_text="قيم تُلتقط عند تسجيل المستند وتُستخدم في بناء القيد (مثل متوسط وزن الدفعة)"
+    )
+    journal_entry = models.ForeignKey(
+        JournalEntry,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="القيد المحاسبي"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="عدد المحاولات")
+    last_error = models.TextField(null=True, blank=True, verbose_name="آخر خطأ")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
+    posted_at = models.DateTimeField(null=True, blank=True, verbose_name="تاريخ الترحيل")
+    
+    class Meta:
+        verbose_name = "طلب ترحيل قيد"
+        verbose_name_plural = "طابور ترحيل القيود"
+        unique_together = [['reference_type', 'reference_id']]
+        indexes = [
+            models.Index(
+                fields=['created_at'],
+                name='accounting_outbox_pending',
+                condition=models.Q(posted_at__isnull=True),
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.reference_type}#{self.reference_id}"
 
 
 class BiologicalAssetRevaluation(models.Model):
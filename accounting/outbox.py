@@ -0,0 +1,268 @@
+"""
+ترحيل القيود المؤجل (Posting Outbox)
+
+signals العمليات لا تنشئ القيود في نفس الطلب: enqueue_posting يسجل صفاً
+خفيفاً في PostingOutbox، ويرحّل عامل Celery (accounting.process_posting_outbox)
+الصفوف المعلقة على دفعات باستخدام JournalPoster.
+
+كل نوع مرجع (feeding_log, mortality_log, harvest, invoice) له قاعدة ترحيل
+مسجلة بـ register_posting_rule تبني القيد من المستند المصدر. الترحيل
+idempotent حسب (reference_type, reference_id): المستند الذي له قيد مسبقاً
+لا يُرحّل مرة أخرى، وأرقام القيود مشتقة من المستند.
+
+قيم المستند التي قد تتغير قبل الترحيل (مثل متوسط وزن الدفعة للنفوق) تُلتقط
+عند الطلب في payload وتُمرر لقاعدة الترحيل، فلا يتغير مبلغ القيد بتأخر العامل.
+
+الطابور لا يُفحص لكل tenant في كل دورة: enqueue_posting يضع علامة في Cache
+للـ tenant بعد الـ commit، والمهمة الدورية توزع العمل على الـ tenants
+المعلَّمة فقط، مع مرور كامل على جميع الـ tenants كل
+ACCOUNTING_OUTBOX_SWEEP_SECONDS (لتعويض علامات فُقدت من Cache).
+
+ACCOUNTING_POSTING_SYNC=True يرحّل القيد فوراً داخل الـ signal (للاختبارات).
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from audit.writer import audit_batch
+from .models import JournalEntry, PostingOutbox
+from .posting import JournalPoster
+
+logger = logging.getLogger(__name__)
+
+
+# reference_type -> {'model', 'build', 'select_related', 'after_post'}
+_posting_rules = {}
+
+
+def register_posting_rule(reference_type, model, select_related=(), after_post=None):
+    """
+    تسجيل قاعدة ترحيل لنوع مرجع (decorator)
+
+    الدالة المسجلة تستقبل المستند المصدر (ومفاتيح payload إن وُجد كمعاملات
+    مسماة) وتعيد معاملات JournalPoster.add (entry_number, entry_date,
+    description, lines, created_by) بدون reference_type/reference_id، أو None
+    إذا لم يكن للمستند أثر محاسبي.
+
+    Args:
+        reference_type: نوع المرجع في JournalEntry
+        model: نموذج المستند المصدر
+        select_related: علاقات تُحمّل مع المستندات
+        after_post: دالة تُستدعى بمعرفات المستندات التي رُحّلت
+    """
+    def decorator(build):
+        _posting_rules[reference_type] = {
+            'model': model,
+            'build': build,
+            'select_related': tuple(select_related),
+            'after_post': after_post,
+        }
+        return build
+    return decorator
+
+
+def _pending_key(schema_name):
+    return f'accounting:outbox:pending:{schema_name}'
+
+
+def mark_outbox_pending(schema_name):
+    """تعليم الـ tenant بأن لديه صفوفاً معلقة في الطابور"""
+    cache.set(_pending_key(schema_name), True, None)
+
+
+def clear_outbox_pending(schema_name):
+    cache.delete(_pending_key(schema_name))
+
+
+def pending_outbox_schemas(schemas):
+    """الـ schemas المعلَّمة بصفوف معلقة من القائمة المعطاة"""
+    keys = {_pending_key(schema_name): schema_name for schema_name in schemas}
+    return [keys[key] for key in cache.get_many(list(keys))]
+
+
+def enqueue_posting(reference_type, reference_id, payload=None):
+    """
+    طلب ترحيل قيد مستند (صف واحد في الطابور، أو ترحيل فوري في الوضع المتزامن)
+
+    Args:
+        reference_type: نوع المرجع
+        reference_id: معرف المستند المصدر
+        payload: قيم وقت الطلب تُمرر لقاعدة الترحيل (قابلة للتسلسل JSON)
+    """
+    if settings.ACCOUNTING_POSTING_SYNC:
+        result = post_references(reference_type, [reference_id], {reference_id: payload})
+        _, error = result[reference_id]
+        if error:
+            logger.error(f"خطأ في ترحيل قيد {reference_type}#{reference_id}: {error}")
+        return
+
+    PostingOutbox.objects.bulk_create(
+        [PostingOutbox(reference_type=reference_type, reference_id=reference_id, payload=payload)],
+        ignore_conflicts=True,
+    )
+    schema_name = connection.schema_name
+    transaction.on_commit(lambda: mark_outbox_pending(schema_name))
+
+
+def _post_specs(reference_type, specs):
+    """ترحيل قيود جاهزة في transaction واحدة -> {reference_id: journal_entry_id}"""
+    poster = JournalPoster()
+    entries = {
+        reference_id: poster.add(reference_type=reference_type, reference_id=reference_id, **spec)
+        for reference_id, spec in specs.items()
+    }
+    with transaction.atomic():
+        poster.post()
+    return {reference_id: entry.pk for reference_id, entry in entries.items()}
+
+
+def post_references(reference_type, reference_ids, payloads=None):
+    """
+    ترحيل قيود مستندات من نوع واحد
+
+    Args:
+        reference_type: نوع المرجع
+        reference_ids: معرفات المستندات
+        payloads: {reference_id: payload} من الطابور (اختياري)
+
+    Returns:
+        dict: {reference_id: (journal_entry_id, error)} - journal_entry_id=None
+        بدون خطأ يعني أن المستند لا يحتاج قيداً
+    """
+    rule = _posting_rules.get(reference_type)
+    if rule is None:
+        return {reference_id: (None, f'لا توجد قاعدة ترحيل لـ {reference_type}') for reference_id in reference_ids}
+
+    results = dict(
+        (reference_id, (entry_id, None))
+        for reference_id, entry_id in JournalEntry.objects.filter(
+            reference_type=reference_type, reference_id__in=reference_ids
+        ).values_list('reference_id', 'id')
+    )
+    remaining = [reference_id for reference_id in reference_ids if reference_id not in results]
+    sources = rule['model'].objects.select_related(*rule['select_related']).in_bulk(remaining)
+
+    specs = {}
+    for reference_id in remaining:
+        source = sources.get(reference_id)
+        if source is None:
+            results[reference_id] = (None, 'المستند المصدر غير موجود')
+            continue
+        try:
+            spec = rule['build'](source, **((payloads or {}).get(reference_id) or {}))
+        except Exception as e:
+            results[reference_id] = (None, str(e))
+            continue
+        if spec is None:
+            results[reference_id] = (None, None)
+        else:
+            specs[reference_id] = spec
+
+    posted = {}
+    if specs:
+        try:
+            posted = _post_specs(reference_type, specs)
+        except (DatabaseError, ValueError):
+            # مستند واحد لا يجب أن يوقف الدفعة: إعادة المحاولة لكل مستند على حدة
+            for reference_id, spec in specs.items():
+                try:
+                    posted.update(_post_specs(reference_type, {reference_id: spec}))
+                except (DatabaseError, ValueError) as e:
+                    results[reference_id] = (None, str(e))
+
+    for reference_id, entry_id in posted.items():
+        results[reference_id] = (entry_id, None)
+    if posted and rule['after_post']:
+        rule['after_post'](list(posted))
+    return results
+
+
+def process_outbox(batch_size=None):
+    """
+    ترحيل صفوف الطابور المعلقة للـ tenant الحالي على دفعات
+
+    كل دفعة تُقفل صفوفها بـ SELECT ... FOR UPDATE SKIP LOCKED فيمكن تشغيل
+    أكثر من عامل بالتوازي دون ترحيل المستند نفسه مرتين.
+
+    Returns:
+        dict: posted, skipped (لا تحتاج قيداً), failed
+    """
+    batch_size = batch_size or settings.ACCOUNTING_OUTBOX_BATCH_SIZE
+    max_attempts = settings.ACCOUNTING_OUTBOX_MAX_ATTEMPTS
+    counts = {'posted': 0, 'skipped': 0, 'failed': 0}
+    last_id = 0
+
+    while True:
+        with transaction.atomic(), audit_batch():
+            rows = list(
+                PostingOutbox.objects.select_for_update(skip_locked=True).filter(
+                    posted_at__isnull=True,
+                    attempts__lt=max_attempts,
+                    id__gt=last_id,
+                ).order_by('id')[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            by_type = {}
+            payloads = {}
+            for row in rows:
+                by_type.setdefault(row.reference_type, []).append(row.reference_id)
+                payloads.setdefault(row.reference_type, {})[row.reference_id] = row.payload
+            results = {}
+            for reference_type, reference_ids in by_type.items():
+                posted = post_references(reference_type, reference_ids, payloads[reference_type])
+                for reference_id, result in posted.items():
+                    results[(reference_type, reference_id)] = result
+
+            now = timezone.now()
+            for row in rows:
+                entry_id, error = results[(row.reference_type, row.reference_id)]
+                if error:
+                    row.attempts += 1
+                    row.last_error = error
+                    counts['failed'] += 1
+                    logger.warning(f"فشل ترحيل {row} (محاولة {row.attempts}): {error}")
+                else:
+                    row.posted_at = now
+                    row.journal_entry_id = entry_id
+                    row.last_error = None
+                    counts['posted' if entry_id else 'skipped'] += 1
+            PostingOutbox.objects.bulk_update(rows, ['attempts', 'last_error', 'posted_at', 'journal_entry'])
+
+        if len(rows) < batch_size:
+            break
+
+    return counts
+
+
+def purge_posted_outbox(retention_days=None):
+    """حذف صفوف الطابور المرحّلة الأقدم من فترة الاحتفاظ"""
+    retention_days = retention_days or settings.ACCOUNTING_OUTBOX_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = PostingOutbox.objects.filter(posted_at__lt=cutoff).delete()
+    return deleted
+
+
+def get_posting_lag():
+    """
+    مؤشرات تأخر الترحيل للـ tenant الحالي
+
+    Returns:
+        dict: pending (بانتظار الترحيل), failed (تجاوزت عدد المحاولات),
+        oldest_pending_at, lag_seconds (عمر أقدم صف معلق)
+    """
+    max_attempts = settings.ACCOUNTING_OUTBOX_MAX_ATTEMPTS
+    values = PostingOutbox.objects.filter(posted_at__isnull=True).aggregate(
+        pending=Count('id', filter=Q(attempts__lt=max_attempts)),
+        failed=Count('id', filter=Q(attempts__gte=max_attempts)),
+        oldest_pending_at=Min('created_at', filter=Q(attempts__lt=max_attempts)),
+    )
+    oldest = values['oldest_pending_at']
+    values['lag_seconds'] = (timezone.now() - oldest).total_seconds() if oldest else 0.0
+    return values
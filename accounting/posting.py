@@ -0,0 +1,191 @@
+"""
+ترحيل القيود المحاسبية من العمليات (Journal Posting)
+
+JournalPoster يجمع قيود مستند أو أكثر ثم يرحّلها في transaction واحدة:
+- الحسابات تُقرأ من cache داخل العملية (حسب الـ schema ورمز الحساب)
+- بنود جميع القيود تُنشأ بـ bulk_create واحد
+- أرصدة الحسابات تُحدَّث بفروقات مجمّعة (ledger.apply_ledger_deltas)
+"""
+from collections import defaultdict
+from django.db import connection, transaction
+
+from audit.writer import audit_batch
+from .ledger import apply_ledger_deltas, period_start, to_amount, ZERO
+from .models import Account, JournalEntry, JournalEntryLine
+
+
+# الحسابات التي تُنشأ تلقائياً عند أول ترحيل: الرمز -> (name, arabic_name, account_type)
+SYSTEM_ACCOUNTS = {
+    '1130': ('Accounts Receivable', 'العملاء', 'asset'),
+    '1140': ('Feed Inventory', 'مخزون الأعلاف', 'asset'),
+    '1160': ('Finished Goods', 'مخزون منتج تام', 'asset'),
+    '1310': ('Active Batches', 'الدفعات النشطة', 'biological_asset'),
+    '2120': ('Tax Payable', 'الضرائب المستحقة', 'liability'),
+    '4110': ('Fish Sales', 'مبيعات السمك', 'revenue'),
+    '5100': ('Cost of Goods Sold', 'تكلفة البضاعة المباعة', 'expense'),
+    '5120': ('Batch Operating Costs', 'تكاليف تشغيل الدفعات', 'expense'),
+    '5210': ('Mortality Loss', 'خسائر النفوق', 'expense'),
+}
+
+# (schema_name, code) -> Account
+_account_cache = {}
+
+
+def clear_account_cache(schema_name=None):
+    """مسح cache الحسابات (لـ schema محدد أو للجميع)"""
+    if schema_name is None:
+        _account_cache.clear()
+        return
+    for key in [key for key in _account_cache if key[0] == schema_name]:
+        _account_cache.pop(key, None)
+
+
+def get_account(code):
+    """
+    الحساب حسب الرمز من cache العملية، أو إنشاؤه من SYSTEM_ACCOUNTS
+
+    Raises:
+        Account.DoesNotExist: إذا لم يكن الحساب موجوداً وليس من حسابات النظام
+    """
+    key = (connection.schema_name, code)
+    account = _account_cache.get(key)
+    if account is not None:
+        return account
+
+    if code in SYSTEM_ACCOUNTS:
+        name, arabic_name, account_type = SYSTEM_ACCOUNTS[code]
+        account, _ = Account.objects.get_or_create(
+            code=code,
+            defaults={
+                'name': name,
+                'arabic_name': arabic_name,
+                'account_type': account_type,
+                'is_active': True,
+            },
+        )
+    else:
+        account = Account.objects.get(code=code)
+
+    # التخزين بعد الـ commit فقط حتى لا يبقى في الـ cache حساب أُلغي إنشاؤه مع rollback
+    transaction.on_commit(lambda: _account_cache.__setitem__(key, account))
+    return account
+
+
+class JournalPoster:
+    """
+    ترحيل قيود عدة مستندات في transaction واحدة
+
+    الاستخدام:
+        poster = JournalPoster(created_by=user)
+        poster.add('FEED-1-20250101', date(2025, 1, 1), 'تغذية', 'feeding_log', 1, [
+            {'account': '5120', 'type': 'debit', 'amount': 100},
+            {'account': '1140', 'type': 'credit', 'amount': 100},
+        ])
+        entries = poster.post()
+
+    account في البند يقبل رمز الحساب أو كائن Account.
+
+    bulk_entries=True ينشئ رؤوس القيود أيضاً بـ bulk_create (للترحيل الدوري
+    لآلاف القيود)، دون post_save لكل قيد - أي دون سجل تدقيق لكل قيد.
+    """
+
+    def __init__(self, created_by=None, bulk_entries=False):
+        self.created_by = created_by
+        self.bulk_entries = bulk_entries
+        self._pending = []
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(
+        self,
+        entry_number,
+        entry_date,
+        description,
+        reference_type,
+        reference_id,
+        lines,
+        created_by=None,
+    ):
+        """
+        إضافة قيد للترحيل
+
+        Raises:
+            ValueError: إذا كان القيد غير متوازن
+        """
+        prepared = []
+        totals = defaultdict(lambda: ZERO)
+        for line in lines:
+            account = line['account']
+            if not isinstance(account, Account):
+                account = get_account(account)
+            amount = to_amount(line['amount'])
+            totals[line['type']] += amount
+            prepared.append((account, line['type'], amount, line.get('description')))
+
+        if totals['debit'] != totals['credit']:
+            raise ValueError(
+                f"القيد غير متوازن! المدين: {totals['debit']}, الدائن: {totals['credit']}"
+            )
+
+        entry = JournalEntry(
+            entry_number=entry_number,
+            entry_date=entry_date,
+            description=description,
+            reference_type=reference_type,
+            reference_id=reference_id,
+            is_posted=True,
+            created_by=created_by or self.created_by,
+        )
+        self._pending.append((entry, prepared))
+        return entry
+
+    def post(self):
+        """
+        ترحيل جميع القيود المضافة
+
+        Returns:
+            list: القيود المُنشأة
+        """
+        if not self._pending:
+            return []
+
+        pending, self._pending = self._pending, []
+        lines = []
+        deltas = {}
+        # سجلات تدقيق القيود (post_save) تُكتب بـ INSERT واحد داخل نفس الـ transaction
+        with transaction.atomic(), audit_batch():
+            if self.bulk_entries:
+                JournalEntry.objects.bulk_create([entry for entry, _ in pending], batch_size=1000)
+                for entry, _ in pending:
+                    entry._ledger_snapshot = entry.ledger_values()
+            else:
+                for entry, _ in pending:
+                    entry.save()
+
+            for entry, prepared in pending:
+                period = period_start(entry.entry_date)
+                for account, line_type, amount, description in prepared:
+                    lines.append(JournalEntryLine(
+                        journal_entry=entry,
+                        account=account,
+                        type=line_type,
+                        amount=amount,
+                        description=description,
+                    ))
+                    delta = deltas.setdefault((account.pk, period), [ZERO, ZERO])
+                    delta[0 if line_type == 'debit' else 1] += amount
+
+            # bulk_create لا يرسل post_save، لذلك تُطبق فروقات الأرصدة هنا مرة واحدة
+            JournalEntryLine.objects.bulk_create(lines, batch_size=1000)
+            apply_ledger_deltas(deltas)
+
+        for line in lines:
+            line._ledger_snapshot = line.ledger_values()
+
+        return [entry for entry, _ in pending]
+
+    def post_entry(self, *args, **kwargs):
+        """إضافة قيد واحد وترحيله فوراً"""
+        self.add(*args, **kwargs)
+        return self.post()[0]
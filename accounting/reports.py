@@ -0,0 +1,108 @@
+"""
+التقارير المالية حسب تاريخ محدد (Trial Balance / Balance Sheet / Income Statement)
+
+كل تقرير يُبنى من استعلام مجمّع واحد (ledger.get_ledger_totals) يعتمد على
+اللقطات الشهرية للأرصدة، بدلاً من استعلامين لكل حساب.
+"""
+from datetime import date
+from decimal import Decimal
+
+from .ledger import get_ledger_totals
+from .models import Account
+
+
+BALANCE_SHEET_SECTIONS = (
+    ('assets', 'asset'),
+    ('liabilities', 'liability'),
+    ('equity', 'equity'),
+)
+
+INCOME_STATEMENT_SECTIONS = (
+    ('revenue', 'revenue'),
+    ('expenses', 'expense'),
+)
+
+
+def _balance(row):
+    if row['account_type'] in Account.DEBIT_NORMAL_TYPES:
+        return row['debit'] - row['credit']
+    return row['credit'] - row['debit']
+
+
+def _sorted_rows(totals):
+    return sorted(
+        ({'account_id': account_id, **row} for account_id, row in totals.items()),
+        key=lambda row: row['code'],
+    )
+
+
+def _sections(totals, sections):
+    """تجميع أرصدة الحسابات غير الصفرية حسب نوع الحساب"""
+    result = []
+    for category, account_type in sections:
+        items = []
+        total = Decimal('0.00')
+        for row in _sorted_rows(totals):
+            balance = _balance(row)
+            if row['account_type'] != account_type or balance == 0:
+                continue
+            items.append({'code': row['code'], 'name': row['arabic_name'], 'balance': balance})
+            total += balance
+        result.append({'category': category, 'items': items, 'total': total})
+    return result
+
+
+def get_trial_balance(as_of_date):
+    """
+    ميزانية تجريبية حتى تاريخ محدد
+
+    Returns:
+        list: [{account_id, code, arabic_name, account_type, debit, credit, balance}]
+        للحسابات النشطة التي لها حركة، مرتبة حسب الرمز
+    """
+    rows = []
+    for row in _sorted_rows(get_ledger_totals(as_of_date, account_filter={'is_active': True})):
+        if row['debit'] > 0 or row['credit'] > 0:
+            rows.append({**row, 'balance': _balance(row)})
+    return rows
+
+
+def get_balance_sheet(as_of_date):
+    """
+    الميزانية العمومية في تاريخ محدد
+
+    Returns:
+        dict: sections (assets/liabilities/equity) و total (إجمالي الأصول)
+    """
+    types = [account_type for _, account_type in BALANCE_SHEET_SECTIONS]
+    totals = get_ledger_totals(
+        as_of_date, account_filter={'is_active': True, 'account_type__in': types}
+    )
+    sections = _sections(totals, BALANCE_SHEET_SECTIONS)
+    return {'sections': sections, 'total': sections[0]['total']}
+
+
+def get_income_statement(as_of_date, start_date=None):
+    """
+    قائمة الدخل للفترة من start_date حتى as_of_date
+
+    Args:
+        as_of_date: نهاية الفترة (شامل)
+        start_date: بداية الفترة. افتراضي: بداية سنة as_of_date
+
+    Returns:
+        dict: sections (revenue/expenses) و net_income
+    """
+    if start_date is None:
+        start_date = date(as_of_date.year, 1, 1)
+    types = [account_type for _, account_type in INCOME_STATEMENT_SECTIONS]
+    totals = get_ledger_totals(
+        as_of_date,
+        start_date=start_date,
+        account_filter={'is_active': True, 'account_type__in': types},
+    )
+    sections = _sections(totals, INCOME_STATEMENT_SECTIONS)
+    return {
+        'sections': sections,
+        'net_income': sections[0]['total'] - sections[1]['total'],
+    }
@@ -0,0 +1,306 @@
+"""
+محرك إعادة تقييم الأصول البيولوجية (IAS 41)
+
+بدلاً من معالجة الدفعات واحدة تلو الأخرى:
+- القيمة الدفترية لجميع الدفعات تُحسب باستعلام مجمّع واحد على بنود القيود
+- القيود وسجلات BiologicalAssetRevaluation تُبنى في الذاكرة ثم تُحفظ
+  بـ bulk inserts (JournalPoster و bulk_create مع upsert)
+- السعر يمكن أن يختلف حسب النوع السمكي (species)
+
+revalue_tenant تُشغَّل لكل tenant بالتوازي عبر tenants.fanout.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from audit.utils import log_action
+from .models import Account, BiologicalAssetRevaluation, JournalEntry, JournalEntryLine
+from .posting import JournalPoster
+
+
+ZERO = Decimal('0.00')
+
+# أنواع المراجع التي تدخل في القيمة الدفترية للدفعة (مدين / دائن)
+CARRYING_DEBIT_REFERENCES = ('batch', 'feeding_log', 'mortality_log')
+CARRYING_CREDIT_REFERENCES = ('batch', 'harvest')
+
+
+def compute_carrying_amounts(batches):
+    """
+    القيمة الدفترية لعدة دفعات من حسابات الأصول البيولوجية في استعلام واحد
+
+    القيمة غير الموجبة (أو عدم وجود بنود) تُستبدل بالتكلفة الأولية للدفعة.
+
+    Returns:
+        dict: {batch_id: carrying_amount}
+    """
+    batch_ids = [batch.id for batch in batches]
+    rows = JournalEntryLine.objects.filter(
+        account__account_type='biological_asset',
+        journal_entry__reference_type__in=set(CARRYING_DEBIT_REFERENCES + CARRYING_CREDIT_REFERENCES),
+        journal_entry__reference_id__in=batch_ids,
+    ).order_by().values('journal_entry__reference_id').annotate(
+        debit=Sum('amount', filter=Q(type='debit', journal_entry__reference_type__in=CARRYING_DEBIT_REFERENCES)),
+        credit=Sum('amount', filter=Q(type='credit', journal_entry__reference_type__in=CARRYING_CREDIT_REFERENCES)),
+    )
+    totals = {
+        row['journal_entry__reference_id']: (row['debit'] or ZERO) - (row['credit'] or ZERO)
+        for row in rows
+    }
+
+    carrying = {}
+    for batch in batches:
+        amount = totals.get(batch.id, ZERO)
+        if amount <= 0:
+            amount = batch.initial_cost or ZERO
+        carrying[batch.id] = amount
+    return carrying
+
+
+def resolve_species_prices(species_prices):
+    """
+    تحويل أسعار الأنواع من (معرف أو اسم) إلى معرف النوع
+
+    Args:
+        species_prices: {'3': '25.00', 'Tilapia': '18.50', 'بلطي': ...}
+
+    Returns:
+        dict: {species_id: Decimal}
+
+    Raises:
+        ValueError: إذا كان النوع غير موجود
+    """
+    from biological.models import Species
+
+    if not species_prices:
+        return {}
+
+    lookup = {}
+    for species_id, name, arabic_name in Species.objects.values_list('id', 'name', 'arabic_name'):
+        lookup[str(species_id)] = species_id
+        lookup[name.lower()] = species_id
+        lookup[arabic_name] = species_id
+
+    resolved = {}
+    for key, price in species_prices.items():
+        species_id = lookup.get(key) or lookup.get(key.lower())
+        if species_id is None:
+            raise ValueError(f'النوع السمكي "{key}" غير موجود')
+        resolved[species_id] = Decimal(str(price))
+    return resolved
+
+
+def plan_revaluations(default_price=None, species_prices=None, batch_id=None):
+    """
+    حساب إعادة التقييم لجميع الدفعات النشطة في الذاكرة (استعلامان)
+
+    Args:
+        default_price: سعر الكيلوجرام للأنواع التي ليس لها سعر محدد
+        species_prices: {species_id: Decimal}
+        batch_id: دفعة محددة (اختياري)
+
+    Returns:
+        tuple: (rows, skipped) - rows قائمة قواميس لكل دفعة، و skipped أرقام
+        الدفعات التي لا يوجد سعر لنوعها
+    """
+    from biological.models import Batch
+    from daily_operations.utils import calculate_estimated_biomass
+
+    batches = Batch.objects.filter(status='active')
+    if batch_id:
+        batches = batches.filter(id=batch_id)
+    batches = list(batches.only(
+        'id', 'batch_number', 'species_id', 'initial_cost', 'current_weight', 'current_count',
+    ).order_by('id'))
+
+    carrying = compute_carrying_amounts(batches)
+    species_prices = species_prices or {}
+
+    rows, skipped = [], []
+    for batch in batches:
+        price = species_prices.get(batch.species_id, default_price)
+        if price is None:
+            skipped.append(batch.batch_number)
+            continue
+
+        current_weight = Decimal(str(calculate_estimated_biomass(batch)))
+        fair_value = current_weight * price
+        rows.append({
+            'batch': batch,
+            'carrying_amount': carrying[batch.id],
+            'current_weight': current_weight,
+            'current_count': batch.current_count,
+            'market_price': price,
+            'fair_value': fair_value,
+            'unrealized_gain_loss': fair_value - carrying[batch.id],
+        })
+    return rows, skipped
+
+
+def resolve_revaluation_accounts():
+    """
+    حسابا الأصول البيولوجية والربح/الخسارة غير المحققة
+
+    Raises:
+        ValueError: إذا لم يُعثر على أحد الحسابين
+    """
+    biological_asset_account = (
+        Account.objects.filter(account_type='biological_asset', code__icontains='biological').first()
+        or Account.objects.filter(code='1400').first()
+    )
+    if not biological_asset_account:
+        raise ValueError(
+            'لم يتم العثور على حساب الأصول البيولوجية. '
+            'يرجى إنشاء حساب برمز يحتوي على "biological"'
+        )
+
+    unrealized_gain_loss_account = (
+        Account.objects.filter(code__icontains='unrealized').first()
+        or Account.objects.filter(code__icontains='3100').first()
+    )
+    if not unrealized_gain_loss_account:
+        raise ValueError('لم يتم العثور على حساب الربح/الخسارة غير المحققة. يرجى إنشاء حساب')
+
+    return biological_asset_account, unrealized_gain_loss_account
+
+
+def _entry_number(revaluation_date, batch_id):
+    return f'REV-{revaluation_date.strftime("%Y%m%d")}-{batch_id}'
+
+
+def apply_revaluations(rows, revaluation_date, user=None):
+    """
+    حفظ نتائج plan_revaluations: القيود وسجلات إعادة التقييم بـ bulk inserts
+
+    إعادة التشغيل لنفس التاريخ تستبدل قيود ذلك التاريخ وتحدّث سجلاته.
+
+    Returns:
+        int: عدد القيود المُنشأة
+    """
+    if not rows:
+        return 0
+
+    with transaction.atomic():
+        biological_asset_account, unrealized_gain_loss_account = resolve_revaluation_accounts()
+
+        JournalEntry.objects.filter(
+            entry_number__in=[_entry_number(revaluation_date, row['batch'].id) for row in rows]
+        ).delete()
+
+        poster = JournalPoster(created_by=user, bulk_entries=True)
+        entries = {}
+        for row in rows:
+            batch = row['batch']
+            amount = abs(row['unrealized_gain_loss'])
+            if not amount:
+                continue
+
+            if row['unrealized_gain_loss'] > 0:
+                lines = [
+                    {'account': biological_asset_account, 'type': 'debit', 'amount': amount,
+                     'description': f'زيادة قيمة الأصل البيولوجي - دفعة {batch.batch_number}'},
+                    {'account': unrealized_gain_loss_account, 'type': 'credit', 'amount': amount,
+                     'description': f'ربح غير محقق - دفعة {batch.batch_number}'},
+                ]
+            else:
+                lines = [
+                    {'account': unrealized_gain_loss_account, 'type': 'debit', 'amount': amount,
+                     'description': f'خسارة غير محققة - دفعة {batch.batch_number}'},
+                    {'account': biological_asset_account, 'type': 'credit', 'amount': amount,
+                     'description': f'انخفاض قيمة الأصل البيولوجي - دفعة {batch.batch_number}'},
+                ]
+
+            entries[batch.id] = poster.add(
+                entry_number=_entry_number(revaluation_date, batch.id),
+                entry_date=revaluation_date,
+                description=f'إعادة تقييم أصل بيولوجي - دفعة {batch.batch_number}',
+                reference_type='biological_revaluation',
+                reference_id=batch.id,
+                lines=lines,
+            )
+        poster.post()
+
+        BiologicalAssetRevaluation.objects.bulk_create(
+            [
+                BiologicalAssetRevaluation(
+                    batch=row['batch'],
+                    revaluation_date=revaluation_date,
+                    carrying_amount=row['carrying_amount'],
+                    fair_value=row['fair_value'],
+                    market_price_per_kg=row['market_price'],
+                    current_weight_kg=row['current_weight'],
+                    current_count=row['current_count'],
+                    unrealized_gain_loss=row['unrealized_gain_loss'],
+                    journal_entry=entries.get(row['batch'].id),
+                    created_by=user,
+                )
+                for row in rows
+            ],
+            update_conflicts=True,
+            unique_fields=['batch', 'revaluation_date'],
+            update_fields=[
+                'carrying_amount', 'fair_value', 'market_price_per_kg', 'current_weight_kg',
+                'current_count', 'unrealized_gain_loss', 'journal_entry', 'created_by',
+            ],
+            batch_size=1000,
+        )
+
+        # سجل تدقيق واحد للعملية بدلاً من سجل لكل قيد (القيود تُنشأ بـ bulk_create)
+        log_action(
+            action_type='post',
+            entity_type='journal_entry',
+            user=user,
+            entity_description=f'إعادة تقييم الأصول البيولوجية {revaluation_date}',
+            new_values={
+                'revaluation_date': str(revaluation_date),
+                'batches': len(rows),
+                'entries': len(entries),
+                'total_gain_loss': str(sum((row['unrealized_gain_loss'] for row in rows), ZERO)),
+            },
+            description=f'إعادة تقييم {len(rows)} دفعة وترحيل {len(entries)} قيد',
+        )
+
+    return len(entries)
+
+
+def revalue_tenant(revaluation_date, default_price=None, species_prices=None,
+                   batch_id=None, dry_run=False, user_id=None):
+    """
+    إعادة تقييم الأصول البيولوجية للـ tenant الحالي
+
+    المعاملات والنتيجة قابلة للتسلسل حتى تُستدعى من عملية منفصلة
+    (tenants.fanout.run_tenants_in_processes).
+
+    Args:
+        species_prices: {معرف أو اسم النوع: سعر}
+
+    Returns:
+        dict: batches (تفاصيل كل دفعة كنصوص), skipped, entries, total_gain_loss
+    """
+    from accounts.models import User
+
+    user = User.objects.get(id=user_id) if user_id else None
+    rows, skipped = plan_revaluations(
+        default_price=default_price,
+        species_prices=resolve_species_prices(species_prices),
+        batch_id=batch_id,
+    )
+    entries = 0 if dry_run else apply_revaluations(rows, revaluation_date, user=user)
+
+    return {
+        'batches': [
+            {
+                'batch_number': row['batch'].batch_number,
+                'carrying_amount': f"{row['carrying_amount']:.2f}",
+                'current_weight': f"{row['current_weight']:.2f}",
+                'current_count': row['current_count'],
+                'market_price': f"{row['market_price']:.2f}",
+                'fair_value': f"{row['fair_value']:.2f}",
+                'unrealized_gain_loss': f"{row['unrealized_gain_loss']:.2f}",
+            }
+            for row in rows
+        ],
+        'skipped': skipped,
+        'entries': entries,
+        'total_gain_loss': f"{sum((row['unrealized_gain_loss'] for row in rows), ZERO):.2f}",
+    }
@@ -1,205 +1,184 @@
 """
 Django Signals للربط الآلي بين العمليات والمحاسبة
 """
-from django.db.models.signals import post_save
+from django.db import connection
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.utils import timezone
 from decimal import Decimal
-from datetime import date
 
-from .models import Account, JournalEntry, JournalEntryLine
+from .models import Account, AccountBalance, JournalEntry, JournalEntryLine
+from .ledger import apply_line_change, apply_entry_change, rebuild_account_balances
+from .posting import clear_account_cache
+from .outbox import register_posting_rule, enqueue_posting
 from daily_operations.models import FeedingLog, MortalityLog
 
 
-def get_or_create_account(code: str, name: str, arabic_name: str, account_type: str):
-    """الحصول على حساب أو إنشاؤه إذا لم يكن موجوداً"""
-    account, created = Account.objects.get_or_create(
-        code=code,
-        defaults={
-            'name': name,
-            'arabic_name': arabic_name,
-            'account_type': account_type,
-            'is_active': True,
-        }
-    )
-    return account
-
-
-def create_journal_entry(
-    entry_number: str,
-    entry_date: date,
-    description: str,
-    reference_type: str,
-    reference_id: int,
-    lines: list,
-    created_by=None
-):
-    """إنشاء قيد محاسبي مع بنوده"""
-    # التحقق من التوازن
-    total_debit = sum(line['amount'] for line in lines if line['type'] == 'debit')
-    total_credit = sum(line['amount'] for line in lines if line['type'] == 'credit')
-    
-    if total_debit != total_credit:
-        raise ValueError(f"القيد غير متوازن! المدين: {total_debit}, الدائن: {total_credit}")
+# ==================== Account Balance Ledger ====================
+
+def _consume_ledger_snapshot(instance, created):
+    """
+    إرجاع لقطة القيم السابقة وتحديثها بالقيم الحالية
+
+    Returns:
+        tuple | None | False: اللقطة السابقة، أو None لسجل جديد،
+        أو False إذا كانت القيم السابقة غير معروفة (يلزم إعادة البناء)
+    """
+    if created:
+        previous = None
+    else:
+        previous = getattr(instance, '_ledger_snapshot', False)
+    instance._ledger_snapshot = instance.ledger_values()
+    return previous
+
+
+@receiver(post_save, sender=Account)
+def create_account_balance(sender, instance, created, **kwargs):
+    """إنشاء صف الرصيد مع الحساب الجديد"""
+    if created:
+        AccountBalance.objects.get_or_create(account=instance)
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def invalidate_account_cache(sender, instance, **kwargs):
+    """مسح cache رموز الحسابات عند تعديل أو حذف حساب"""
+    clear_account_cache(connection.schema_name)
+
+
+@receiver(post_save, sender=JournalEntryLine)
+def update_line_balance(sender, instance, created, **kwargs):
+    """تحديث أرصدة الحسابات عند إضافة أو تعديل بند قيد"""
+    previous = _consume_ledger_snapshot(instance, created)
+    if previous is False:
+        rebuild_account_balances([instance.account_id])
+        return
+
+    entry = instance.journal_entry if JournalEntryLine.journal_entry.is_cached(instance) else None
+    apply_line_change(previous, instance._ledger_snapshot, entry=entry)
+
+
+@receiver(post_delete, sender=JournalEntryLine)
+def remove_line_balance(sender, instance, **kwargs):
+    """خصم البند المحذوف من أرصدة الحسابات"""
+    previous = getattr(instance, '_ledger_snapshot', None) or instance.ledger_values()
+    apply_line_change(previous, None)
+
+
+@receiver(post_save, sender=JournalEntry)
+def update_entry_balance(sender, instance, created, **kwargs):
+    """تحديث أرصدة الحسابات عند ترحيل القيد أو إلغاء ترحيله أو تغيير تاريخه"""
+    previous = _consume_ledger_snapshot(instance, created)
+    if created:
+        return
+    if previous is False:
+        rebuild_account_balances(list(instance.lines.values_list('account_id', flat=True).distinct()))
+        return
+
+    apply_entry_change(instance, previous, instance._ledger_snapshot)
+
+
+# ==================== Operations Posting ====================
+
+def _mark_feeding_posted(feeding_log_ids):
+    """تحديث حالة سجلات التغذية المرحّلة دون إعادة حفظها (وإعادة تشغيل signals)"""
+    FeedingLog.objects.filter(pk__in=feeding_log_ids).update(is_posted=True)
+
+
+@register_posting_rule(
+    'feeding_log', FeedingLog,
+    select_related=('batch', 'feed_type', 'created_by'),
+    after_post=_mark_feeding_posted,
+)
+def build_feeding_entry(log):
+    """
+    قيد التغذية:
+    من: ح/ تكاليف تشغيل الدفعات (مدين)
+    إلى: ح/ مخزون الأعلاف (دائن)
+    """
+    return {
+        'entry_number': f"FEED-{log.id}-{log.feeding_date.strftime('%Y%m%d')}",
+        'entry_date': log.feeding_date,
+        'description': f"تغذية دفعة {log.batch.batch_number} - {log.feed_type.arabic_name}",
+        'lines': [
+            {
+                'account': '5120',  # تكاليف تشغيل الدفعات
+                'type': 'debit',
+                'amount': log.total_cost,
+                'description': f"علف: {log.quantity} كجم × {log.unit_price} ريال",
+            },
+            {
+                'account': '1140',  # مخزون الأعلاف
+                'type': 'credit',
+                'amount': log.total_cost,
+                'description': f"خصم من المخزون",
+            },
+        ],
+        'created_by': log.created_by,
+    }
+
+
+@register_posting_rule('mortality_log', MortalityLog, select_related=('batch', 'created_by'))
+def build_mortality_entry(log, batch_average_weight=None):
+    """
+    قيد النفوق:
+    من: ح/ خسائر النفوق (مدين)
+    إلى: ح/ الأصول البيولوجية (دائن)
     
-    # إنشاء القيد
-    entry = JournalEntry.objects.create(
-        entry_number=entry_number,
-        entry_date=entry_date,
-        description=description,
-        reference_type=reference_type,
-        reference_id=reference_id,
-        is_posted=True,
-        created_by=created_by,
-    )
+    batch_average_weight: متوسط وزن الدفعة وقت تسجيل النفوق (من payload الطابور)
+    """
+    # حساب قيمة النفوق (متوسط الوزن × العدد)
+    mortality_value = Decimal('0.00')
+    if log.average_weight and log.average_weight > 0:
+        mortality_value = Decimal(str(log.average_weight)) * log.count
+    elif batch_average_weight is not None:
+        # إذا لم يتم تحديد الوزن، نستخدم متوسط وزن الدفعة وقت النفوق
+        mortality_value = Decimal(batch_average_weight) * log.count
+    elif log.batch.current_count > 0:
+        # طلبات سُجلت في الطابور قبل التقاط متوسط الوزن
+        avg_weight = log.batch.current_weight / log.batch.current_count
+        mortality_value = avg_weight * log.count
     
-    # إنشاء بنود القيد
-    for line_data in lines:
-        JournalEntryLine.objects.create(
-            journal_entry=entry,
-            account=line_data['account'],
-            type=line_data['type'],
-            amount=Decimal(str(line_data['amount'])),
-            description=line_data.get('description'),
-        )
+    if mortality_value <= 0:
+        return None  # لا ننشئ قيداً إذا كانت القيمة صفر
     
-    return entry
+    return {
+        'entry_number': f"MORT-{log.id}-{log.mortality_date.strftime('%Y%m%d')}",
+        'entry_date': log.mortality_date,
+        'description': f"نفوق {log.count} سمكة من الدفعة {log.batch.batch_number}",
+        'lines': [
+            {
+                'account': '5210',  # خسائر النفوق
+                'type': 'debit',
+                'amount': mortality_value,
+                'description': f"{log.count} سمكة × {log.average_weight if log.average_weight else 'متوسط'} كجم",
+            },
+            {
+                'account': '1310',  # الدفعات النشطة
+                'type': 'credit',
+                'amount': mortality_value,
+                'description': f"تقليل قيمة الأصل البيولوجي",
+            },
+        ],
+        'created_by': log.created_by,
+    }
 
 
 @receiver(post_save, sender=FeedingLog)
 def create_feeding_journal_entry(sender, instance, created, **kwargs):
-    """
-    عند تسجيل تغذية، يتم إنشاء قيد محاسبي:
-    من: ح/ تكاليف تشغيل الدفعات (مدين)
-    إلى: ح/ مخزون الأعلاف (دائن)
-    """
+    """طلب ترحيل قيد التغذية عند تسجيلها"""
     if not created or instance.is_posted or getattr(instance, '_skip_accounting_signal', False):
         return
-    
-    try:
-        # الحصول على الحسابات
-        operating_cost_account = get_or_create_account(
-            '5120',
-            'Batch Operating Costs',
-            'تكاليف تشغيل الدفعات',
-            'expense'
-        )
-        
-        feed_inventory_account = get_or_create_account(
-            '1140',
-            'Feed Inventory',
-            'مخزون الأعلاف',
-            'asset'
-        )
-        
-        # إنشاء رقم القيد
-        entry_number = f"FEED-{instance.id}-{instance.feeding_date.strftime('%Y%m%d')}"
-        
-        # إنشاء القيد
-        create_journal_entry(
-            entry_number=entry_number,
-            entry_date=instance.feeding_date,
-            description=f"تغذية دفعة {instance.batch.batch_number} - {instance.feed_type.arabic_name}",
-            reference_type='feeding_log',
-            reference_id=instance.id,
-            lines=[
-                {
-                    'account': operating_cost_account,
-                    'type': 'debit',
-                    'amount': float(instance.total_cost),
-                    'description': f"علف: {instance.quantity} كجم × {instance.unit_price} ريال",
-                },
-                {
-                    'account': feed_inventory_account,
-                    'type': 'credit',
-                    'amount': float(instance.total_cost),
-                    'description': f"خصم من المخزون",
-                },
-            ],
-            created_by=instance.created_by,
-        )
-        
-        # تحديث حالة التسجيل
-        instance._state.adding = False
-        instance.is_posted = True
-        instance.save(update_fields=['is_posted'])
-        
-    except Exception as e:
-        # Log error but don't break the save
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Error creating journal entry for feeding log {instance.id}: {str(e)}")
+    enqueue_posting('feeding_log', instance.id)
 
 
 @receiver(post_save, sender=MortalityLog)
 def create_mortality_journal_entry(sender, instance, created, **kwargs):
-    """
-    عند تسجيل نفوق، يتم إنشاء قيد محاسبي:
-    من: ح/ خسائر النفوق (مدين)
-    إلى: ح/ الأصول البيولوجية (دائن)
-    """
+    """طلب ترحيل قيد النفوق عند تسجيله"""
     if not created:
         return
-    
-    try:
-        # حساب قيمة النفوق (متوسط الوزن × العدد)
-        mortality_value = Decimal('0.00')
-        if instance.average_weight and instance.average_weight > 0:
-            mortality_value = Decimal(str(instance.average_weight)) * instance.count
-        else:
-            # إذا لم يتم تحديد الوزن، نستخدم متوسط وزن الدفعة
-            if instance.batch.current_count > 0:
-                avg_weight = instance.batch.current_weight / instance.batch.current_count
-                mortality_value = avg_weight * instance.count
-        
-        if mortality_value <= 0:
-            return  # لا ننشئ قيداً إذا كانت القيمة صفر
-        
-        # الحصول على الحسابات
-        mortality_loss_account = get_or_create_account(
-            '5210',
-            'Mortality Loss',
-            'خسائر النفوق',
-            'expense'
-        )
-        
-        biological_asset_account = get_or_create_account(
-            '1310',
-            'Active Batches',
-            'الدفعات النشطة',
-            'biological_asset'
-        )
-        
-        # إنشاء رقم القيد
-        entry_number = f"MORT-{instance.id}-{instance.mortality_date.strftime('%Y%m%d')}"
-        
-        # إنشاء القيد
-        create_journal_entry(
-            entry_number=entry_number,
-            entry_date=instance.mortality_date,
-            description=f"نفوق {instance.count} سمكة من الدفعة {instance.batch.batch_number}",
-            reference_type='mortality_log',
-            reference_id=instance.id,
-            lines=[
-                {
-                    'account': mortality_loss_account,
-                    'type': 'debit',
-                    'amount': float(mortality_value),
-                    'description': f"{instance.count} سمكة × {instance.average_weight if instance.average_weight else 'متوسط'} كجم",
-                },
-                {
-                    'account': biological_asset_account,
-                    'type': 'credit',
-                    'amount': float(mortality_value),
-                    'description': f"تقليل قيمة الأصل البيولوجي",
-                },
-            ],
-            created_by=instance.created_by,
-        )
-        
-    except Exception as e:
-        # Log error but don't break the save
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Error creating journal entry for mortality log {instance.id}: {str(e)}")
-
+    # قيمة النفوق تُحسب بمتوسط وزن الدفعة الآن وليس وقت تشغيل عامل الترحيل
+    payload = None
+    batch = instance.batch
+    if not instance.average_weight and batch.current_count > 0:
+        payload = {'batch_average_weight': str(batch.current_weight / batch.current_count)}
+    enqueue_posting('mortality_log', instance.id, payload)
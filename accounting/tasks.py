@@ -0,0 +1,80 @@
+"""
+Celery Tasks للمحاسبة (ترحيل القيود المؤجل)
+"""
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django_tenants.utils import schema_context
+import logging
+
+from tenants.fanout import fan_out_tenants, tenant_schemas
+from .outbox import (
+    process_outbox, purge_posted_outbox, get_posting_lag,
+    mark_outbox_pending, clear_outbox_pending, pending_outbox_schemas,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def process_tenant_outbox(batch_size=None):
+    """
+    ترحيل طابور الـ tenant الحالي وحذف الصفوف المرحّلة القديمة
+    
+    **Returns:**
+    - dict: عدد القيود المرحّلة ومؤشرات التأخر
+    """
+    # العلامة تُحذف قبل القراءة: صف يُسجل أثناء المعالجة يعيد وضعها
+    clear_outbox_pending(connection.schema_name)
+    counts = process_outbox(batch_size=batch_size)
+    counts['purged'] = purge_posted_outbox()
+    lag = get_posting_lag()
+    if lag['pending']:
+        # صفوف فشلت ولم تتجاوز عدد المحاولات تُعاد في الدورة التالية
+        mark_outbox_pending(connection.schema_name)
+    
+    if lag['lag_seconds'] > settings.ACCOUNTING_OUTBOX_LAG_WARNING_SECONDS or lag['failed']:
+        logger.warning(
+            f"[{connection.schema_name}] تأخر ترحيل القيود: {lag['pending']} معلق، "
+            f"{lag['failed']} فاشل، أقدمها منذ {lag['lag_seconds']:.0f} ثانية"
+        )
+    return {
+        **counts,
+        'pending': lag['pending'],
+        'failed_permanently': lag['failed'],
+        'lag_seconds': round(lag['lag_seconds'], 2),
+    }
+
+
+@shared_task(name='accounting.process_posting_outbox')
+def process_posting_outbox(schema_name=None, batch_size=None):
+    """
+    ترحيل القيود المعلقة في طابور الترحيل
+    
+    بدون schema_name تُوزع المهمة بالتوازي (tenants.fanout.fan_out_tenants)
+    على الـ tenants التي لديها صفوف معلقة فقط، وعلى جميع الـ tenants مرة كل
+    ACCOUNTING_OUTBOX_SWEEP_SECONDS.
+    
+    **Parameters:**
+    - schema_name: tenant واحد فقط (افتراضي: جميع الـ tenants)
+    - batch_size: عدد المستندات في كل transaction (افتراضي: ACCOUNTING_OUTBOX_BATCH_SIZE)
+    
+    **Returns:**
+    - dict: نتيجة الـ tenant، أو معرف المهمة الموزعة
+    """
+    if schema_name is None:
+        schemas = tenant_schemas()
+        if not cache.add('accounting:outbox:sweep', True, settings.ACCOUNTING_OUTBOX_SWEEP_SECONDS):
+            schemas = pending_outbox_schemas(schemas)
+        if not schemas:
+            return {'tenants': 0, 'status': 'idle'}
+        job_id = fan_out_tenants(
+            'accounting.tasks.process_tenant_outbox', {'batch_size': batch_size}, schemas=schemas
+        )
+        return {'job_id': job_id, 'tenants': len(schemas), 'status': 'dispatched'}
+    
+    with schema_context(schema_name):
+        return {
+            'tenants': {schema_name: process_tenant_outbox(batch_size=batch_size)},
+            'status': 'success'
+        }
@@ -2,9 +2,23 @@
 Unit Tests للمحاسبة
 """
 import pytest
+from datetime import date
 from decimal import Decimal
 from django.core.exceptions import ValidationError
-from accounting.models import Account, AccountType, JournalEntry, JournalEntryLine
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from accounting.models import (
+    Account, AccountType, AccountBalance, AccountPeriodBalance, BiologicalAssetRevaluation,
+    JournalEntry, JournalEntryLine,
+)
+from accounting.ledger import find_balance_drift, rebuild_account_balances, get_ledger_totals
+from accounting import reports
+from accounting.posting import JournalPoster, clear_account_cache
+from accounting.models import PostingOutbox
+from accounting.outbox import process_outbox, get_posting_lag, enqueue_posting
+from accounting.revaluation import (
+    apply_revaluations, compute_carrying_amounts, plan_revaluations, resolve_species_prices,
+)
 
 
 @pytest.mark.django_db
@@ -135,3 +149,412 @@ class TestJournalEntryModel:
         
         # القيد غير متوازن (لا يوجد دائن)
         assert entry.validate_balance() is False
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestAccountBalanceLedger:
+    """اختبارات أرصدة الحسابات التراكمية"""
+
+    def _accounts(self):
+        cash = Account.objects.create(
+            code='1000', name='Cash', arabic_name='النقدية', account_type=AccountType.ASSET
+        )
+        revenue = Account.objects.create(
+            code='4000', name='Sales', arabic_name='المبيعات', account_type=AccountType.REVENUE
+        )
+        return cash, revenue
+
+    def _entry(self, cash, revenue, amount, entry_date='2025-01-15', is_posted=True):
+        entry = JournalEntry.objects.create(
+            entry_number=f'JE-{JournalEntry.objects.count() + 1:03d}',
+            entry_date=entry_date,
+            description='Test Entry',
+            is_posted=False,
+        )
+        JournalEntryLine.objects.create(journal_entry=entry, account=cash, type='debit', amount=amount)
+        JournalEntryLine.objects.create(journal_entry=entry, account=revenue, type='credit', amount=amount)
+        if is_posted:
+            entry.is_posted = True
+            entry.save()
+        return entry
+
+    def test_balance_row_created_with_account(self):
+        """إنشاء صف رصيد صفري مع الحساب"""
+        cash, _ = self._accounts()
+
+        assert AccountBalance.objects.filter(account=cash).exists()
+        assert cash.balance == Decimal('0.00')
+
+    def test_posting_updates_balances_and_periods(self):
+        """ترحيل القيد يضيف بنوده إلى الرصيد وحركة الشهر"""
+        cash, revenue = self._accounts()
+        self._entry(cash, revenue, Decimal('500.00'), is_posted=False)
+
+        assert Account.objects.get(pk=cash.pk).balance == Decimal('0.00')
+
+        self._entry(cash, revenue, Decimal('300.00'))
+
+        assert Account.objects.get(pk=cash.pk).balance == Decimal('300.00')
+        assert Account.objects.get(pk=revenue.pk).balance == Decimal('300.00')
+        period = AccountPeriodBalance.objects.get(account=cash, period=date(2025, 1, 1))
+        assert period.debit == Decimal('300.00')
+        assert find_balance_drift() == []
+
+    def test_unpost_date_change_and_delete(self):
+        """إلغاء الترحيل وتغيير الشهر وحذف البنود تعكس الفروقات"""
+        cash, revenue = self._accounts()
+        entry = self._entry(cash, revenue, Decimal('200.00'))
+
+        entry.entry_date = date(2025, 2, 3)
+        entry.save()
+        assert AccountPeriodBalance.objects.get(account=cash, period=date(2025, 1, 1)).debit == Decimal('0.00')
+        assert AccountPeriodBalance.objects.get(account=cash, period=date(2025, 2, 1)).debit == Decimal('200.00')
+
+        entry.is_posted = False
+        entry.save()
+        assert Account.objects.get(pk=cash.pk).balance == Decimal('0.00')
+
+        entry.is_posted = True
+        entry.save()
+        entry.delete()
+        assert Account.objects.get(pk=cash.pk).balance == Decimal('0.00')
+        assert find_balance_drift() == []
+
+    def test_drift_detected_and_rebuilt(self):
+        """اكتشاف الانحراف وإصلاحه بإعادة البناء"""
+        cash, revenue = self._accounts()
+        self._entry(cash, revenue, Decimal('100.00'))
+        AccountBalance.objects.filter(account=cash).update(total_debit=Decimal('999.00'))
+
+        drift = find_balance_drift([cash.id])
+        assert drift == [(cash.id, None, (Decimal('999.00'), Decimal('0.00')), (Decimal('100.00'), Decimal('0.00')))]
+
+        rebuild_account_balances([cash.id])
+        assert find_balance_drift() == []
+
+    def test_balance_read_with_select_related(self):
+        """قراءة أرصدة جميع الحسابات في استعلام واحد"""
+        cash, revenue = self._accounts()
+        self._entry(cash, revenue, Decimal('100.00'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            balances = [
+                account.balance
+                for account in Account.objects.select_related('ledger_balance').order_by('code')
+            ]
+
+        assert balances == [Decimal('100.00'), Decimal('100.00')]
+        assert len(ctx.captured_queries) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestFinancialReports:
+    """اختبارات التقارير المالية حسب تاريخ محدد"""
+
+    @pytest.fixture
+    def ledger(self):
+        cash = Account.objects.create(
+            code='1000', name='Cash', arabic_name='النقدية', account_type=AccountType.ASSET
+        )
+        revenue = Account.objects.create(
+            code='4000', name='Sales', arabic_name='المبيعات', account_type=AccountType.REVENUE
+        )
+        expense = Account.objects.create(
+            code='5000', name='Feed', arabic_name='العلف', account_type=AccountType.EXPENSE
+        )
+        for number, (entry_date, debit, credit, amount) in enumerate([
+            ('2024-12-20', cash, revenue, Decimal('1000.00')),
+            ('2025-01-10', cash, revenue, Decimal('500.00')),
+            ('2025-02-05', expense, cash, Decimal('200.00')),
+            ('2025-02-25', cash, revenue, Decimal('50.00')),
+        ], start=1):
+            entry = JournalEntry.objects.create(
+                entry_number=f'JE-{number:03d}', entry_date=entry_date,
+                description='Test Entry', is_posted=False,
+            )
+            JournalEntryLine.objects.create(journal_entry=entry, account=debit, type='debit', amount=amount)
+            JournalEntryLine.objects.create(journal_entry=entry, account=credit, type='credit', amount=amount)
+            entry.is_posted = True
+            entry.save()
+        return cash, revenue, expense
+
+    def test_ledger_totals_match_raw_lines(self, ledger):
+        """اللقطات الشهرية + البنود الجزئية = مجموع البنود الخام لأي فترة"""
+        cash, _, _ = ledger
+        cases = [
+            (date(2024, 12, 31), None, Decimal('1000.00'), Decimal('0.00')),
+            (date(2025, 2, 10), None, Decimal('1500.00'), Decimal('200.00')),
+            (date(2025, 2, 28), date(2025, 1, 5), Decimal('550.00'), Decimal('200.00')),
+            (date(2025, 2, 20), date(2025, 2, 1), Decimal('0.00'), Decimal('200.00')),
+        ]
+        for end_date, start_date, debit, credit in cases:
+            totals = get_ledger_totals(end_date, start_date=start_date)
+            assert (totals[cash.id]['debit'], totals[cash.id]['credit']) == (debit, credit)
+
+    def test_trial_balance_as_of_date(self, ledger):
+        """الميزانية التجريبية في نهاية سنة سابقة"""
+        rows = reports.get_trial_balance(date(2024, 12, 31))
+
+        assert [row['code'] for row in rows] == ['1000', '4000']
+        assert rows[0]['balance'] == Decimal('1000.00')
+        assert rows[1]['credit'] == Decimal('1000.00')
+
+    def test_balance_sheet_and_income_statement(self, ledger):
+        """الميزانية العمومية وقائمة الدخل حسب التاريخ"""
+        sheet = reports.get_balance_sheet(date(2025, 1, 31))
+        assert sheet['total'] == Decimal('1500.00')
+
+        income = reports.get_income_statement(date(2025, 2, 28))
+        revenue, expenses = income['sections']
+        assert revenue['total'] == Decimal('550.00')
+        assert expenses['total'] == Decimal('200.00')
+        assert income['net_income'] == Decimal('350.00')
+
+    def test_report_uses_single_query(self, ledger):
+        """التقرير يُبنى من استعلام واحد بغض النظر عن عدد الحسابات"""
+        with CaptureQueriesContext(connection) as ctx:
+            reports.get_trial_balance(date(2025, 2, 20))
+
+        assert len(ctx.captured_queries) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestJournalPoster:
+    """اختبارات ترحيل القيود المجمّع"""
+
+    def _lines(self, amount):
+        return [
+            {'account': '5120', 'type': 'debit', 'amount': amount},
+            {'account': '1140', 'type': 'credit', 'amount': amount},
+        ]
+
+    def test_post_many_documents(self, django_capture_on_commit_callbacks):
+        """ترحيل عدة مستندات في transaction واحدة مع تحديث الأرصدة"""
+        clear_account_cache()
+        poster = JournalPoster()
+        with django_capture_on_commit_callbacks(execute=True):
+            for number in range(1, 4):
+                poster.add(
+                    f'FEED-{number}', date(2025, 1, number), 'تغذية', 'feeding_log', number,
+                    self._lines(Decimal('10.005')),
+                )
+            entries = poster.post()
+
+        assert len(entries) == 3
+        assert len(poster) == 0
+        assert JournalEntryLine.objects.filter(journal_entry__in=entries).count() == 6
+        expense = Account.objects.get(code='5120')
+        assert expense.account_type == 'expense'
+        assert expense.balance == Decimal('30.03')
+        assert find_balance_drift() == []
+
+    def test_cached_accounts_skip_lookups(self, django_capture_on_commit_callbacks):
+        """الحسابات تُقرأ من الـ cache في الترحيلات التالية"""
+        clear_account_cache()
+        with django_capture_on_commit_callbacks(execute=True):
+            JournalPoster().post_entry('FEED-1', date(2025, 1, 1), 'تغذية', 'feeding_log', 1, self._lines(5))
+
+        with CaptureQueriesContext(connection) as ctx:
+            JournalPoster().post_entry('FEED-2', date(2025, 1, 2), 'تغذية', 'feeding_log', 2, self._lines(5))
+
+        assert not any(
+            query['sql'].startswith('SELECT') and 'FROM "accounting_account"' in query['sql']
+            for query in ctx.captured_queries
+        )
+        assert Account.objects.get(code='1140').balance == Decimal('-10.00')
+
+    def test_unbalanced_entry_rejected(self):
+        """رفض القيد غير المتوازن قبل أي كتابة"""
+        with pytest.raises(ValueError):
+            JournalPoster().add('BAD-1', date(2025, 1, 1), 'غير متوازن', 'manual', None, [
+                {'account': '5120', 'type': 'debit', 'amount': 10},
+                {'account': '1140', 'type': 'credit', 'amount': 9},
+            ])
+
+        assert not JournalEntry.objects.filter(entry_number='BAD-1').exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestPostingOutbox:
+    """اختبارات طابور ترحيل القيود"""
+
+    @pytest.fixture
+    def batch_setup(self):
+        from biological.models import Species, Pond, Batch
+        from inventory.models import FeedType
+
+        species = Species.objects.create(arabic_name='سمك البلطي', name='Tilapia')
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('1000.00'))
+        batch = Batch.objects.create(
+            pond=pond, species=species, batch_number='BATCH-001', start_date=date(2025, 1, 1),
+            initial_count=1000, initial_weight=Decimal('100.00'), initial_cost=Decimal('2000.00'),
+        )
+        feed_type = FeedType.objects.create(name='Feed', arabic_name='علف', unit='kg')
+        return batch, feed_type
+
+    def _feed(self, batch, feed_type, day):
+        from daily_operations.models import FeedingLog
+
+        return FeedingLog.objects.create(
+            batch=batch, feed_type=feed_type, feeding_date=date(2025, 1, day),
+            quantity=Decimal('10.00'), unit_price=Decimal('4.00'),
+        )
+
+    def test_sync_mode_posts_in_signal(self, batch_setup):
+        """الوضع المتزامن يرحّل القيد فوراً دون صف في الطابور"""
+        log = self._feed(*batch_setup, day=1)
+
+        entry = JournalEntry.objects.get(reference_type='feeding_log', reference_id=log.id)
+        assert entry.entry_number == f'FEED-{log.id}-20250101'
+        assert not PostingOutbox.objects.exists()
+        log.refresh_from_db()
+        assert log.is_posted is True
+
+    def test_outbox_posts_in_batches(self, settings, batch_setup):
+        """الطابور يرحّل المستندات المعلقة على دفعات مع مؤشرات التأخر"""
+        settings.ACCOUNTING_POSTING_SYNC = False
+        logs = [self._feed(*batch_setup, day=day) for day in range(1, 6)]
+
+        assert not JournalEntry.objects.filter(reference_type='feeding_log').exists()
+        assert get_posting_lag()['pending'] == 5
+
+        assert process_outbox(batch_size=2) == {'posted': 5, 'skipped': 0, 'failed': 0}
+
+        assert JournalEntry.objects.filter(reference_type='feeding_log').count() == 5
+        assert Account.objects.get(code='5120').balance == Decimal('200.00')
+        assert get_posting_lag() == {'pending': 0, 'failed': 0, 'oldest_pending_at': None, 'lag_seconds': 0.0}
+        assert set(PostingOutbox.objects.values_list('journal_entry__reference_id', flat=True)) == {
+            log.id for log in logs
+        }
+
+    def test_outbox_is_idempotent(self, settings, batch_setup):
+        """المستند الذي له قيد مسبقاً لا يُرحّل مرة أخرى"""
+        log = self._feed(*batch_setup, day=1)
+        entry = JournalEntry.objects.get(reference_type='feeding_log', reference_id=log.id)
+
+        settings.ACCOUNTING_POSTING_SYNC = False
+        PostingOutbox.objects.create(reference_type='feeding_log', reference_id=log.id)
+        process_outbox()
+
+        assert JournalEntry.objects.filter(reference_type='feeding_log', reference_id=log.id).count() == 1
+        assert PostingOutbox.objects.get().journal_entry_id == entry.id
+        assert find_balance_drift() == []
+
+    def test_failed_documents_are_retried_and_reported(self, settings):
+        """المستند المفقود يُحتسب فشلاً ويظهر في مؤشرات التأخر بعد آخر محاولة"""
+        settings.ACCOUNTING_POSTING_SYNC = False
+        settings.ACCOUNTING_OUTBOX_MAX_ATTEMPTS = 2
+        PostingOutbox.objects.create(reference_type='feeding_log', reference_id=999999)
+
+        assert process_outbox()['failed'] == 1
+        assert get_posting_lag()['pending'] == 1
+        process_outbox()
+
+        row = PostingOutbox.objects.get()
+        assert row.attempts == 2
+        assert row.last_error
+        assert get_posting_lag()['failed'] == 1
+
+    def test_mortality_valued_at_enqueue_time(self, settings, batch_setup):
+        """قيمة النفوق تُحسب بمتوسط وزن الدفعة وقت التسجيل وليس وقت الترحيل"""
+        from daily_operations.models import MortalityLog
+
+        settings.ACCOUNTING_POSTING_SYNC = False
+        batch, _ = batch_setup
+        log = MortalityLog.objects.create(batch=batch, mortality_date=date(2025, 1, 2), count=10)
+
+        # حصاد قبل تشغيل عامل الترحيل يغير متوسط وزن الدفعة
+        batch.current_weight = Decimal('500.00')
+        batch.current_count = 500
+        batch.save()
+        process_outbox()
+
+        # 10 × (100 كجم / ~1000 سمكة) وليس 10 × (500 / 500)
+        entry = JournalEntry.objects.get(reference_type='mortality_log', reference_id=log.id)
+        assert entry.lines.get(type='debit').amount.quantize(Decimal('0.1')) == Decimal('1.0')
+
+    def test_only_pending_tenants_are_dispatched(self, settings, monkeypatch, django_capture_on_commit_callbacks):
+        """المهمة الدورية توزع العمل على الـ tenants التي لديها صفوف معلقة فقط"""
+        from django.core.cache import cache
+        from accounting import tasks
+
+        settings.ACCOUNTING_POSTING_SYNC = False
+        cache.clear()
+        cache.set('accounting:outbox:sweep', True)
+        dispatched = []
+        monkeypatch.setattr(tasks, 'tenant_schemas', lambda: [connection.schema_name, 'idle_farm'])
+        monkeypatch.setattr(
+            tasks, 'fan_out_tenants', lambda func_path, kwargs, schemas: dispatched.append(schemas) or 'job'
+        )
+
+        assert tasks.process_posting_outbox()['status'] == 'idle'
+        with django_capture_on_commit_callbacks(execute=True):
+            enqueue_posting('feeding_log', 999999)
+        tasks.process_posting_outbox()
+
+        assert dispatched == [[connection.schema_name]]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestBiologicalRevaluation:
+    """اختبارات محرك إعادة تقييم الأصول البيولوجية"""
+
+    @pytest.fixture
+    def batches(self):
+        from biological.models import Species, Pond, Batch
+
+        Account.objects.create(code='1400', name='Biological Assets', arabic_name='أصول بيولوجية', account_type='biological_asset')
+        Account.objects.create(code='3100', name='Unrealized Gain', arabic_name='ربح غير محقق', account_type='equity')
+        tilapia = Species.objects.create(arabic_name='سمك البلطي', name='Tilapia')
+        mullet = Species.objects.create(arabic_name='سمك البوري', name='Mullet')
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('1000.00'))
+        return [
+            Batch.objects.create(
+                pond=pond, species=species, batch_number=f'BATCH-{index}', start_date=date(2025, 1, 1),
+                initial_count=1000, initial_weight=Decimal('100.00'), initial_cost=Decimal('2000.00'),
+            )
+            for index, species in enumerate([tilapia, mullet], start=1)
+        ]
+
+    def test_carrying_amounts_in_one_query(self, batches):
+        """القيمة الدفترية لجميع الدفعات من استعلام واحد مع الرجوع للتكلفة الأولية"""
+        with CaptureQueriesContext(connection) as ctx:
+            carrying = compute_carrying_amounts(batches)
+
+        assert len(ctx.captured_queries) == 1
+        assert carrying == {batch.id: Decimal('2000.00') for batch in batches}
+
+    def test_species_prices(self, batches):
+        """السعر حسب النوع مع السعر الافتراضي لباقي الأنواع"""
+        rows, skipped = plan_revaluations(
+            default_price=Decimal('25.00'),
+            species_prices=resolve_species_prices({'mullet': '30.00'}),
+        )
+
+        assert skipped == []
+        assert [row['fair_value'] for row in rows] == [Decimal('2500.0000'), Decimal('3000.0000')]
+
+        with pytest.raises(ValueError):
+            resolve_species_prices({'Salmon': '40.00'})
+
+    def test_apply_and_rerun(self, batches):
+        """الحفظ المجمّع للقيود والسجلات، وإعادة التشغيل تستبدل نتائج نفس التاريخ"""
+        revaluation_date = date(2025, 1, 31)
+        rows, _ = plan_revaluations(default_price=Decimal('25.00'))
+        assert apply_revaluations(rows, revaluation_date) == 2
+
+        rows, _ = plan_revaluations(default_price=Decimal('15.00'))
+        assert apply_revaluations(rows, revaluation_date) == 2
+
+        assert BiologicalAssetRevaluation.objects.count() == 2
+        assert set(BiologicalAssetRevaluation.objects.values_list('unrealized_gain_loss', flat=True)) == {
+            Decimal('-500.00')
+        }
+        assert JournalEntry.objects.filter(reference_type='biological_revaluation').count() == 2
+        assert Account.objects.get(code='1400').balance == Decimal('-1000.00')
+        assert find_balance_drift() == []
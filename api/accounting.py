@@ -6,11 +6,13 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import date
 from decimal import Decimal
-from django.db.models import Sum, Q
 
 from .auth import TokenAuth, ErrorResponse
 from .permissions import require_feature
+from .pagination import CursorPage, InvalidCursor, paginate_keyset, page_meta, DEFAULT_PAGE_SIZE
 from accounting.models import Account, JournalEntry, JournalEntryLine, AccountType, BiologicalAssetRevaluation
+from accounting import reports as financial_reports
+from accounting.outbox import get_posting_lag
 
 router = Router()
 
@@ -93,6 +95,21 @@ class BalanceSheetItem(BaseModel):
     total: float
 
 
+class PostingStatusSchema(BaseModel):
+    """Schema لحالة طابور ترحيل القيود"""
+    pending: int
+    failed: int
+    oldest_pending_at: Optional[str]
+    lag_seconds: float
+
+
+class IncomeStatementItem(BaseModel):
+    """Schema لـ Income Statement"""
+    category: str
+    items: List[dict]
+    net_income: float
+
+
 class BiologicalAssetRevaluationSchema(BaseModel):
     """Schema لإعادة تقييم الأصل البيولوجي"""
     id: int
@@ -124,7 +141,7 @@ def list_accounts(request, account_type: Optional[str] = None):
     **Parameters:**
     - account_type: تصفية حسب نوع الحساب (asset, liability, etc.)
     """
-    queryset = Account.objects.filter(is_active=True)
+    queryset = Account.objects.filter(is_active=True).select_related('ledger_balance')
     
     if account_type:
         queryset = queryset.filter(account_type=account_type)
@@ -186,31 +203,67 @@ def create_account(request, account_data: dict):
         return 400, ErrorResponse(detail=str(e))
 
 
+def _parse_date(value, name, default=None):
+    """
+    تاريخ من معامل الطلب (YYYY-MM-DD)
+
+    Raises:
+        ValueError: صيغة التاريخ غير صالحة
+    """
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"صيغة {name} غير صالحة (YYYY-MM-DD)")
+
+
 # ==================== Journal Entry Endpoints ====================
 
-@router.get('/journal-entries', response={200: List[JournalEntrySchema]}, auth=TokenAuth())
+@router.get('/journal-entries', response={200: CursorPage[JournalEntrySchema], 400: ErrorResponse}, auth=TokenAuth())
 @require_feature('accounting')
-def list_journal_entries(request, start_date: Optional[str] = None, end_date: Optional[str] = None):
+def list_journal_entries(
+    request,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    count: Optional[str] = None,
+):
     """
-    قائمة القيود المحاسبية
+    قائمة القيود المحاسبية (Keyset Pagination حسب entry_date, id)
     
     **Parameters:**
     - start_date: تاريخ البداية (YYYY-MM-DD)
     - end_date: تاريخ النهاية (YYYY-MM-DD)
+    - cursor: next_cursor من الصفحة السابقة
+    - page_size: عدد العناصر في الصفحة (افتراضي: 50, أقصى: 200)
+    - count: إجمالي العدد - exact أو estimate (افتراضي: بدون)
     """
+    try:
+        start = _parse_date(start_date, 'start_date')
+        end = _parse_date(end_date, 'end_date')
+    except ValueError as e:
+        return 400, ErrorResponse(detail=str(e))
+    
     queryset = JournalEntry.objects.select_related('created_by').prefetch_related('lines__account').all()
     
-    if start_date:
-        queryset = queryset.filter(entry_date__gte=start_date)
-    if end_date:
-        queryset = queryset.filter(entry_date__lte=end_date)
+    if start:
+        queryset = queryset.filter(entry_date__gte=start)
+    if end:
+        queryset = queryset.filter(entry_date__lte=end)
     
-    entries = queryset.order_by('-entry_date', '-created_at')
+    try:
+        page = paginate_keyset(queryset, ('-entry_date', '-id'), cursor=cursor, page_size=page_size, count=count)
+    except InvalidCursor as e:
+        return 400, ErrorResponse(detail=str(e))
     
     result = []
-    for entry in entries:
-        total_debit = sum(line.amount for line in entry.lines.filter(type='debit'))
-        total_credit = sum(line.amount for line in entry.lines.filter(type='credit'))
+    for entry in page['items']:
+        # من البنود المحملة مسبقاً (بدون استعلام لكل قيد)
+        lines = entry.lines.all()
+        total_debit = sum(line.amount for line in lines if line.type == 'debit')
+        total_credit = sum(line.amount for line in lines if line.type == 'credit')
         
         result.append(JournalEntrySchema(
             id=entry.id,
@@ -236,11 +289,11 @@ def list_journal_entries(request, start_date: Optional[str] = None, end_date: Op
                     amount=float(line.amount),
                     description=line.description,
                 )
-                for line in entry.lines.all()
+                for line in lines
             ],
         ))
     
-    return result
+    return CursorPage(items=result, **page_meta(page))
 
 
 @router.get('/journal-entries/{entry_id}', response={200: JournalEntrySchema, 404: ErrorResponse}, auth=TokenAuth())
@@ -375,9 +428,24 @@ def create_journal_entry(request, entry_data: CreateJournalEntrySchema):
         return 400, ErrorResponse(detail=str(e))
 
 
+@router.get('/posting-status', response={200: PostingStatusSchema}, auth=TokenAuth())
+@require_feature('accounting')
+def get_posting_status(request):
+    """
+    حالة طابور ترحيل القيود (القيود المعلقة والفاشلة وعمر أقدم قيد معلق)
+    """
+    lag = get_posting_lag()
+    return PostingStatusSchema(
+        pending=lag['pending'],
+        failed=lag['failed'],
+        oldest_pending_at=lag['oldest_pending_at'].isoformat() if lag['oldest_pending_at'] else None,
+        lag_seconds=round(lag['lag_seconds'], 2),
+    )
+
+
 # ==================== Reports Endpoints ====================
 
-@router.get('/trial-balance', response={200: List[TrialBalanceItem]}, auth=TokenAuth())
+@router.get('/trial-balance', response={200: List[TrialBalanceItem], 400: ErrorResponse}, auth=TokenAuth())
 @require_feature('accounting')
 def get_trial_balance(request, as_of_date: Optional[str] = None):
     """
@@ -386,53 +454,36 @@ def get_trial_balance(request, as_of_date: Optional[str] = None):
     **Parameters:**
     - as_of_date: التاريخ المحدد (YYYY-MM-DD). افتراضي: اليوم
     """
-    if as_of_date:
-        as_of_date_obj = date.fromisoformat(as_of_date)
-    else:
-        as_of_date_obj = date.today()
-    
-    accounts = Account.objects.filter(is_active=True).order_by('code')
+    try:
+        as_of_date_obj = _parse_date(as_of_date, 'as_of_date', date.today())
+    except ValueError as e:
+        return 400, ErrorResponse(detail=str(e))
     
-    result = []
-    for account in accounts:
-        # حساب المدين والدائن حتى التاريخ المحدد
-        debit_lines = JournalEntryLine.objects.filter(
-            account=account,
-            journal_entry__entry_date__lte=as_of_date_obj,
-            journal_entry__is_posted=True,
-            type='debit'
-        )
-        credit_lines = JournalEntryLine.objects.filter(
-            account=account,
-            journal_entry__entry_date__lte=as_of_date_obj,
-            journal_entry__is_posted=True,
-            type='credit'
+    return [
+        TrialBalanceItem(
+            account_id=row['account_id'],
+            account_code=row['code'],
+            account_name=row['arabic_name'],
+            debit=float(row['debit']),
+            credit=float(row['credit']),
+            balance=float(row['balance']),
         )
-        
-        total_debit = debit_lines.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        total_credit = credit_lines.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        # حساب الرصيد حسب نوع الحساب
-        if account.account_type in ['asset', 'expense', 'biological_asset']:
-            balance = total_debit - total_credit
-        else:
-            balance = total_credit - total_debit
-        
-        # إضافة فقط الحسابات التي لديها رصيد
-        if total_debit > 0 or total_credit > 0:
-            result.append(TrialBalanceItem(
-                account_id=account.id,
-                account_code=account.code,
-                account_name=account.arabic_name,
-                debit=float(total_debit),
-                credit=float(total_credit),
-                balance=float(balance),
-            ))
-    
-    return result
+        for row in financial_reports.get_trial_balance(as_of_date_obj)
+    ]
+
+
+def _report_sections(sections):
+    return [
+        {
+            'category': section['category'],
+            'items': [{**item, 'balance': float(item['balance'])} for item in section['items']],
+            'total': float(section['total']),
+        }
+        for section in sections
+    ]
 
 
-@router.get('/balance-sheet', response={200: BalanceSheetItem}, auth=TokenAuth())
+@router.get('/balance-sheet', response={200: BalanceSheetItem, 400: ErrorResponse}, auth=TokenAuth())
 @require_feature('accounting')
 def get_balance_sheet(request, as_of_date: Optional[str] = None):
     """
@@ -441,52 +492,46 @@ def get_balance_sheet(request, as_of_date: Optional[str] = None):
     **Parameters:**
     - as_of_date: التاريخ المحدد (YYYY-MM-DD). افتراضي: اليوم
     """
-    if as_of_date:
-        as_of_date_obj = date.fromisoformat(as_of_date)
-    else:
-        as_of_date_obj = date.today()
-    
-    # حساب الأصول
-    assets = []
-    total_assets = Decimal('0.00')
-    for account in Account.objects.filter(account_type='asset', is_active=True):
-        balance = account.balance
-        if balance != 0:
-            assets.append({'code': account.code, 'name': account.arabic_name, 'balance': float(balance)})
-            total_assets += balance
-    
-    # حساب الخصوم
-    liabilities = []
-    total_liabilities = Decimal('0.00')
-    for account in Account.objects.filter(account_type='liability', is_active=True):
-        balance = account.balance
-        if balance != 0:
-            liabilities.append({'code': account.code, 'name': account.arabic_name, 'balance': float(balance)})
-            total_liabilities += balance
-    
-    # حساب حقوق الملكية
-    equity = []
-    total_equity = Decimal('0.00')
-    for account in Account.objects.filter(account_type='equity', is_active=True):
-        balance = account.balance
-        if balance != 0:
-            equity.append({'code': account.code, 'name': account.arabic_name, 'balance': float(balance)})
-            total_equity += balance
+    try:
+        as_of_date_obj = _parse_date(as_of_date, 'as_of_date', date.today())
+    except ValueError as e:
+        return 400, ErrorResponse(detail=str(e))
     
+    report = financial_reports.get_balance_sheet(as_of_date_obj)
     return BalanceSheetItem(
         category='balance_sheet',
-        items=[
-            {'category': 'assets', 'items': assets, 'total': float(total_assets)},
-            {'category': 'liabilities', 'items': liabilities, 'total': float(total_liabilities)},
-            {'category': 'equity', 'items': equity, 'total': float(total_equity)},
-        ],
-        total=float(total_assets),
+        items=_report_sections(report['sections']),
+        total=float(report['total']),
+    )
+
+
+@router.get('/income-statement', response={200: IncomeStatementItem, 400: ErrorResponse}, auth=TokenAuth())
+@require_feature('accounting')
+def get_income_statement(request, as_of_date: Optional[str] = None, start_date: Optional[str] = None):
+    """
+    قائمة الدخل (Income Statement)
+    
+    **Parameters:**
+    - as_of_date: نهاية الفترة (YYYY-MM-DD). افتراضي: اليوم
+    - start_date: بداية الفترة (YYYY-MM-DD). افتراضي: بداية سنة as_of_date
+    """
+    try:
+        as_of_date_obj = _parse_date(as_of_date, 'as_of_date', date.today())
+        start_date_obj = _parse_date(start_date, 'start_date')
+    except ValueError as e:
+        return 400, ErrorResponse(detail=str(e))
+    
+    report = financial_reports.get_income_statement(as_of_date_obj, start_date_obj)
+    return IncomeStatementItem(
+        category='income_statement',
+        items=_report_sections(report['sections']),
+        net_income=float(report['net_income']),
     )
 
 
 # ==================== Biological Asset Revaluation Endpoints ====================
 
-@router.get('/biological-asset-revaluations', response={200: List[BiologicalAssetRevaluationSchema]}, auth=TokenAuth())
+@router.get('/biological-asset-revaluations', response={200: List[BiologicalAssetRevaluationSchema], 400: ErrorResponse}, auth=TokenAuth())
 @require_feature('accounting')
 def list_biological_asset_revaluations(
     request,
@@ -502,14 +547,20 @@ def list_biological_asset_revaluations(
     - start_date: تاريخ البداية (YYYY-MM-DD)
     - end_date: تاريخ النهاية (YYYY-MM-DD)
     """
+    try:
+        start = _parse_date(start_date, 'start_date')
+        end = _parse_date(end_date, 'end_date')
+    except ValueError as e:
+        return 400, ErrorResponse(detail=str(e))
+    
     queryset = BiologicalAssetRevaluation.objects.select_related('batch', 'journal_entry').all()
     
     if batch_id:
         queryset = queryset.filter(batch_id=batch_id)
-    if start_date:
-        queryset = queryset.filter(revaluation_date__gte=start_date)
-    if end_date:
-        queryset = queryset.filter(revaluation_date__lte=end_date)
+    if start:
+        queryset = queryset.filter(revaluation_date__gte=start)
+    if end:
+        queryset = queryset.filter(revaluation_date__lte=end)
     
     revaluations = queryset.order_by('-revaluation_date', '-created_at')
     
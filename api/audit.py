@@ -3,11 +3,17 @@ API Endpoints لسجلات التدقيق
 """
 from ninja import Router
 from pydantic import BaseModel
-from typing import List, Optional
-from datetime import date, datetime
+from typing import Optional
+from datetime import date, datetime, time, timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from .auth import TokenAuth, ErrorResponse
+from .pagination import (
+    CursorPage, InvalidCursor, paginate_keyset, page_meta, cursor_for, decode_cursor, DEFAULT_PAGE_SIZE
+)
 from .permissions import check_feature_permission
+from audit.archive import search_archived_logs
 from audit.models import AuditLog
 
 router = Router()
@@ -37,28 +43,77 @@ class AuditLogSchema(BaseModel):
         from_attributes = True
 
 
+def _audit_log_schema(log, user):
+    """تحويل سجل تدقيق (من الجدول أو الأرشيف) إلى Schema"""
+    return AuditLogSchema(
+        id=log.id,
+        action_type=log.action_type,
+        action_type_display=log.get_action_type_display(),
+        entity_type=log.entity_type,
+        entity_type_display=log.get_entity_type_display(),
+        entity_id=log.entity_id,
+        entity_description=log.entity_description,
+        user_id=log.user_id,
+        user_name=user.full_name if user else None,
+        user_ip=str(log.user_ip) if log.user_ip else None,
+        old_values=log.old_values,
+        new_values=log.new_values,
+        description=log.description,
+        notes=log.notes,
+        created_at=log.created_at.isoformat(),
+    )
+
+
+def _archived_log_schemas(logs):
+    """سجلات الأرشيف مع أسماء المستخدمين (باستعلام واحد)"""
+    users = get_user_model().objects.in_bulk({log.user_id for log in logs if log.user_id})
+    return [_audit_log_schema(log, users.get(log.user_id)) for log in logs]
+
+
+def _day_start(value, name, days=0):
+    """بداية اليوم (YYYY-MM-DD) بالتوقيت الحالي، مع إزاحة days يوم"""
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"صيغة {name} غير صالحة (YYYY-MM-DD)")
+    return timezone.make_aware(datetime.combine(day + timedelta(days=days), time.min))
+
+
 # ==================== Endpoints ====================
 
-@router.get('/logs', response={200: List[AuditLogSchema]}, auth=TokenAuth())
+AUDIT_LOG_ORDERING = ('-created_at', '-id')
+
+
+@router.get('/logs', response={200: CursorPage[AuditLogSchema], 400: ErrorResponse}, auth=TokenAuth())
 def list_audit_logs(
     request,
     action_type: Optional[str] = None,
     entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
     user_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    count: Optional[str] = None,
 ):
     """
     قائمة سجلات التدقيق - يتطلب صلاحية owner أو manager
     
+    Keyset Pagination حسب (created_at, id): الصفحات من الجدول أولاً، وبعد
+    آخر سجل فيه تُكمل من أرشيف الأشهر المحذوفة (audit/archive.py) بنفس
+    الفلاتر ونفس الـ cursor.
+    
     **Parameters:**
     - action_type: تصفية حسب نوع العملية
     - entity_type: تصفية حسب نوع الكيان
+    - entity_id: تصفية حسب معرف الكيان
     - user_id: تصفية حسب المستخدم
     - start_date: تاريخ البداية (YYYY-MM-DD)
     - end_date: تاريخ النهاية (YYYY-MM-DD)
-    - limit: عدد السجلات (افتراضي: 100)
+    - cursor: next_cursor من الصفحة السابقة
+    - page_size: عدد السجلات في الصفحة (افتراضي: 50, أقصى: 200)
+    - count: إجمالي عدد سجلات الجدول (بدون الأرشيف) - exact أو estimate
     """
     # فقط owner و manager يمكنهم الوصول
     if not request.auth:
@@ -70,43 +125,52 @@ def list_audit_logs(
     
     queryset = AuditLog.objects.select_related('user').all()
     
-    # Filters
+    # Filters (نفس الفلاتر تُطبق على الأرشيف)
+    filters = {}
     if action_type:
-        queryset = queryset.filter(action_type=action_type)
+        filters['action_type'] = action_type
     if entity_type:
-        queryset = queryset.filter(entity_type=entity_type)
+        filters['entity_type'] = entity_type
+    if entity_id is not None:
+        filters['entity_id'] = entity_id
     if user_id:
-        queryset = queryset.filter(user_id=user_id)
-    if start_date:
-        start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-        queryset = queryset.filter(created_at__gte=start_date_obj)
-    if end_date:
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-        queryset = queryset.filter(created_at__lte=end_date_obj)
+        filters['user_id'] = user_id
+    queryset = queryset.filter(**filters)
+    try:
+        start = _day_start(start_date, 'start_date') if start_date else None
+        # end_date شامل: حتى بداية اليوم التالي (غير شاملة)
+        end = _day_start(end_date, 'end_date', days=1) if end_date else None
+    except ValueError as e:
+        return 400, ErrorResponse(detail=str(e))
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__lt=end)
+    
+    try:
+        page = paginate_keyset(queryset, AUDIT_LOG_ORDERING, cursor=cursor, page_size=page_size, count=count)
+        before = decode_cursor(cursor, AUDIT_LOG_ORDERING, AuditLog) if cursor else None
+    except InvalidCursor as e:
+        return 400, ErrorResponse(detail=str(e))
     
-    # Limit and order
-    logs = queryset.order_by('-created_at')[:limit]
+    items = page['items']
+    logs = [_audit_log_schema(log, log.user) for log in items]
     
-    return [
-        AuditLogSchema(
-            id=log.id,
-            action_type=log.action_type,
-            action_type_display=log.get_action_type_display(),
-            entity_type=log.entity_type,
-            entity_type_display=log.get_entity_type_display(),
-            entity_id=log.entity_id,
-            entity_description=log.entity_description,
-            user_id=log.user.id if log.user else None,
-            user_name=log.user.full_name if log.user else None,
-            user_ip=str(log.user_ip) if log.user_ip else None,
-            old_values=log.old_values,
-            new_values=log.new_values,
-            description=log.description,
-            notes=log.notes,
-            created_at=log.created_at.isoformat(),
+    # الأرشيف أقدم من جميع سجلات الجدول، فيُكمل الصفحة بعد انتهائها
+    if not page['has_next']:
+        remaining = page['page_size'] - len(items)
+        if items:
+            before = (items[-1].created_at, items[-1].id)
+        archived = search_archived_logs(
+            start=start, end=end, before=before, limit=remaining + 1, **filters
         )
-        for log in logs
-    ]
+        page['has_next'] = len(archived) > remaining
+        archived = archived[:remaining]
+        logs.extend(_archived_log_schemas(archived))
+        if page['has_next']:
+            page['next_cursor'] = cursor_for((items + archived)[-1], AUDIT_LOG_ORDERING)
+    
+    return CursorPage(items=logs, **page_meta(page))
 
 
 @router.get('/logs/{log_id}', response={200: AuditLogSchema, 404: ErrorResponse}, auth=TokenAuth())
@@ -122,24 +186,9 @@ def get_audit_log(request, log_id: int):
     
     try:
         log = AuditLog.objects.select_related('user').get(id=log_id)
-        
-        return AuditLogSchema(
-            id=log.id,
-            action_type=log.action_type,
-            action_type_display=log.get_action_type_display(),
-            entity_type=log.entity_type,
-            entity_type_display=log.get_entity_type_display(),
-            entity_id=log.entity_id,
-            entity_description=log.entity_description,
-            user_id=log.user.id if log.user else None,
-            user_name=log.user.full_name if log.user else None,
-            user_ip=str(log.user_ip) if log.user_ip else None,
-            old_values=log.old_values,
-            new_values=log.new_values,
-            description=log.description,
-            notes=log.notes,
-            created_at=log.created_at.isoformat(),
-        )
+        return _audit_log_schema(log, log.user)
     except AuditLog.DoesNotExist:
+        archived = search_archived_logs(log_id=log_id, limit=1)
+        if archived:
+            return _archived_log_schemas(archived)[0]
         return 404, ErrorResponse(detail="سجل التدقيق غير موجود")
-
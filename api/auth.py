@@ -7,10 +7,12 @@ from ninja.security import HttpBearer
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
+from .auth_cache import get_token_user, revoke_token
+
 User = get_user_model()
 router = Router()
 
@@ -25,14 +27,11 @@ class TokenAuth(HttpBearer):
         """
         التحقق من JWT Token وإرجاع المستخدم
         
+        المستخدم يُقرأ من cache (api/auth_cache.py) بدلاً من استعلام User في كل طلب.
         يتم تسجيل الأخطاء بشكل آمن دون كشف معلومات حساسة
         """
         try:
-            from rest_framework_simplejwt.authentication import JWTAuthentication
-            jwt_auth = JWTAuthentication()
-            validated_token = jwt_auth.get_validated_token(token)
-            user = jwt_auth.get_user(validated_token)
-            return user
+            return get_token_user(token)
         except InvalidToken as e:
             # تسجيل خطأ Token غير صالح (بدون كشف محتوى Token)
             logger.warning(
@@ -45,6 +44,18 @@ class TokenAuth(HttpBearer):
                 }
             )
             return None
+        except AuthenticationFailed as e:
+            # مستخدم غير موجود أو معطل، أو Token تم إبطاله بتسجيل الخروج
+            logger.warning(
+                f"محاولة مصادقة مرفوضة: {e.get_codes()}",
+                extra={
+                    'error_type': type(e).__name__,
+                    'path': request.path,
+                    'method': request.method,
+                    'ip': self._get_client_ip(request),
+                }
+            )
+            return None
         except TokenError as e:
             # تسجيل خطأ Token عام
             logger.warning(
@@ -232,11 +243,12 @@ def get_current_user(request):
 @router.post('/logout', response={200: dict, 401: ErrorResponse}, auth=TokenAuth())
 def logout(request):
     """
-    تسجيل الخروج (إبطال Refresh Token)
+    تسجيل الخروج (إبطال Access Token الحالي)
     
     **Authentication:** Bearer Token مطلوب
     
-    **Note:** في التطبيق الفعلي، قد تحتاج لإضافة Refresh Token إلى Blacklist
+    **Note:** Access Token الحالي لا يُقبل بعد تسجيل الخروج. في التطبيق الفعلي،
+    قد تحتاج أيضاً لإضافة Refresh Token إلى Blacklist
     """
     # تسجيل تسجيل الخروج في Audit Log
     if request.auth:
@@ -256,6 +268,9 @@ def logout(request):
         except Exception:
             pass  # لا نريد أن تفشل عملية تسجيل الخروج بسبب Audit Log
     
+    if request.auth:
+        revoke_token(request.auth)
+    
     # في التطبيق الفعلي، أضف Refresh Token إلى Blacklist
     return 200, {'detail': 'تم تسجيل الخروج بنجاح'}
 
@@ -0,0 +1,170 @@
+"""
+Cache مستخدمي JWT لـ TokenAuth (بدون استعلام User في كل طلب)
+
+التحقق من التوقيع وانتهاء الصلاحية يتم محلياً (بدون قاعدة بيانات) بـ
+JWTAuthentication واحد مشترك، ثم تُقرأ بيانات المستخدم التي تحتاجها
+الصلاحيات (id, role, is_active, tenant) على مستويين: cache داخل العملية ثم
+Redis، مع إلغاء مستوى الـ token (jti) عند تسجيل الخروج:
+
+    jwt:user:{schema}:{user_id}   بيانات المستخدم (تُلغى عند تعديله أو حذفه)
+    jwt:revoked:{schema}:{jti}    Token أُبطل بتسجيل الخروج (حتى انتهاء صلاحيته)
+
+request.auth هو CachedUser: id و role و is_active و tenant من الـ cache،
+وأي خاصية أخرى (مثل full_name أو استخدامه في ForeignKey) تحمّل المستخدم
+الكامل عند أول استخدام فقط. لذلك require_roles و require_feature لا
+تحتاج أي استعلام.
+"""
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.functional import LazyObject
+from django_tenants.utils import schema_context
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from tenants.local_cache import LocalTTLCache
+
+
+# JWTAuthentication واحد لجميع الطلبات (بدلاً من إنشائه في كل طلب)
+_authenticator = JWTAuthentication()
+
+_local_cache = LocalTTLCache(
+    maxsize=settings.JWT_USER_LOCAL_CACHE_SIZE,
+    ttl=settings.JWT_USER_LOCAL_CACHE_TTL,
+)
+
+
+def _user_key(schema_name, user_id):
+    return f'jwt:user:{schema_name}:{user_id}'
+
+
+def _revoked_key(schema_name, jti):
+    return f'jwt:revoked:{schema_name}:{jti}'
+
+
+class CachedUser(LazyObject):
+    """المستخدم المصادق عليه: البيانات المخزنة فوراً، والمستخدم الكامل عند الحاجة"""
+
+    def __init__(self, snapshot, token):
+        super().__init__()
+        self.__dict__['_snapshot'] = snapshot
+        self.__dict__['token'] = token
+
+    def _setup(self):
+        with schema_context(self._snapshot['tenant']):
+            self._wrapped = get_user_model().objects.get(pk=self._snapshot['id'])
+
+    @property
+    def id(self):
+        return self._snapshot['id']
+
+    pk = id
+
+    @property
+    def role(self):
+        return self._snapshot['role']
+
+    @property
+    def is_active(self):
+        return self._snapshot['is_active']
+
+    @property
+    def tenant(self):
+        return self._snapshot['tenant']
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return f'<CachedUser id={self.id} role={self.role} tenant={self.tenant}>'
+
+
+def _load_snapshot(schema_name, user_id):
+    row = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values(
+        'id', 'role', 'is_active'
+    ).first()
+    if row is None:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    row['tenant'] = schema_name
+    return row
+
+
+def get_token_user(raw_token):
+    """
+    المستخدم صاحب الـ Access Token في الـ schema الحالي
+
+    Returns:
+        CachedUser
+
+    Raises:
+        InvalidToken: Token غير صالح أو منتهي
+        AuthenticationFailed: مستخدم غير موجود أو معطل، أو Token مُبطل
+    """
+    validated_token = _authenticator.get_validated_token(raw_token)
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken('Token contained no recognizable user identification')
+
+    schema_name = connection.schema_name
+    user_key = _user_key(schema_name, user_id)
+    revoked_key = _revoked_key(schema_name, validated_token.get(api_settings.JTI_CLAIM))
+
+    snapshot = _local_cache.get(user_key)
+    revoked = _local_cache.get(revoked_key)
+    if snapshot is None or revoked is None:
+        cached = cache.get_many([user_key, revoked_key])
+        revoked = cached.get(revoked_key, False)
+        snapshot = cached.get(user_key)
+        if snapshot is None:
+            snapshot = _load_snapshot(schema_name, user_id)
+            cache.set(user_key, snapshot, timeout=settings.JWT_USER_CACHE_TIMEOUT)
+        _local_cache.set(user_key, snapshot)
+        _local_cache.set(revoked_key, revoked)
+
+    if revoked:
+        raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+    if not snapshot['is_active']:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    return CachedUser(snapshot, validated_token)
+
+
+def revoke_token(user):
+    """
+    إبطال الـ Access Token الحالي للمستخدم (عند تسجيل الخروج) حتى انتهاء صلاحيته
+
+    Args:
+        user: request.auth (CachedUser)
+    """
+    token = user.token
+    timeout = max(int(token['exp'] - time.time()), 1)
+    key = _revoked_key(user.tenant, token.get(api_settings.JTI_CLAIM))
+    _local_cache.set(key, True)
+    cache.set(key, True, timeout=timeout)
+
+
+def invalidate_token_user(user_id):
+    """إلغاء بيانات المستخدم المخزنة (في الـ schema الحالي) بعد اكتمال الـ transaction"""
+    key = _user_key(connection.schema_name, user_id)
+
+    def invalidate():
+        _local_cache.delete(key)
+        cache.delete(key)
+
+    transaction.on_commit(invalidate)
+
+
+def clear_local_token_cache():
+    """مسح الـ cache المحلي للعملية (للاختبارات)"""
+    _local_cache.clear()
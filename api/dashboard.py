@@ -6,16 +6,14 @@ from ninja.security import HttpBearer
 from django.contrib.auth import get_user_model
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import date, timedelta
-from decimal import Decimal
-from django.core.cache import cache
-from django.db.models import Sum, Avg, Count
+from datetime import date
 
 User = get_user_model()
 router = Router()
 
 # Reuse the same TokenAuth from auth.py
 from .auth import TokenAuth
+from .dashboard_cache import dashboard_cache_key, get_dashboard_cache, set_dashboard_cache
 
 
 class StatsResponse(BaseModel):
@@ -34,7 +32,7 @@ def get_dashboard_stats(request):
     الحصول على إحصائيات لوحة التحكم
     
     **Authentication:** Bearer Token مطلوب
-    **Performance:** محسّن باستخدام Cache (60 seconds)
+    **Performance:** Cache مشترك لجميع مستخدمي الـ tenant يُلغى عند تعديل البيانات
     """
     # التحقق من authentication
     if not request.auth:
@@ -42,62 +40,25 @@ def get_dashboard_stats(request):
         return 401, ErrorResponse(detail="غير مصرح - يرجى تسجيل الدخول")
     
     # محاولة جلب من Cache
-    cache_key = f'dashboard:stats:{request.auth.id if request.auth else "anonymous"}'
-    cached_stats = cache.get(cache_key)
+    cache_key = dashboard_cache_key('stats')
+    cached_stats = get_dashboard_cache(cache_key)
     
     if cached_stats is not None:
         return cached_stats
     
-    # استيراد Models
     try:
-        from biological.models import Pond, Batch
+        from performance.dashboard_queries import get_dashboard_stats_values
         
-        # إجمالي الأحواض
-        total_ponds = Pond.objects.filter(is_active=True).count()
+        # جميع الإحصائيات تُحسب في قاعدة البيانات (استعلام واحد)
+        response = StatsResponse(**get_dashboard_stats_values())
         
-        # الدفعات النشطة
-        active_batches = Batch.objects.filter(status='active').count()
-        
-        # حساب الكمية الحي الإجمالية (من الدفعات النشطة)
-        active_batches_list = Batch.objects.filter(status='active').select_related('species')
-        total_biomass = sum(
-            float(batch.initial_weight) * (batch.current_count / batch.initial_count if batch.initial_count > 0 else 1)
-            for batch in active_batches_list
-        )
-        
-        # حساب معدل النفوق الإجمالي
-        total_initial = sum(batch.initial_count for batch in Batch.objects.filter(status='active'))
-        total_current = sum(batch.current_count for batch in Batch.objects.filter(status='active'))
-        if total_initial > 0:
-            mortality_rate = ((total_initial - total_current) / total_initial) * 100
-        else:
-            mortality_rate = 0.0
-        
-        # حساب قيمة المخزون
-        from inventory.models import FeedInventory, MedicineInventory
-        total_feed_value = sum(
-            float(item.quantity * item.unit_price) for item in FeedInventory.objects.all()
-        )
-        total_medicine_value = sum(
-            float(item.quantity * item.unit_price) for item in MedicineInventory.objects.all()
-        )
-        
-        response = StatsResponse(
-            total_ponds=total_ponds,
-            active_batches=active_batches,
-            total_biomass=total_biomass,
-            mortality_rate=mortality_rate,
-            total_feed_value=total_feed_value,
-            total_medicine_value=total_medicine_value,
-        )
-        
-        # حفظ في Cache لمدة دقيقة واحدة
-        cache.set(cache_key, response, timeout=60)
+        # حفظ في Cache حتى تعديل البيانات
+        set_dashboard_cache(cache_key, response)
         
         return response
     except Exception as e:
-        # في حالة عدم وجود Models بعد، نعيد قيم افتراضية
-        response = StatsResponse(
+        # في حالة عدم وجود Models بعد، نعيد قيم افتراضية (بدون تخزين)
+        return StatsResponse(
             total_ponds=0,
             active_batches=0,
             total_biomass=0.0,
@@ -105,8 +66,6 @@ def get_dashboard_stats(request):
             total_feed_value=0.0,
             total_medicine_value=0.0,
         )
-        cache.set(cache_key, response, timeout=60)
-        return response
 
 
 @router.get('/health', response={200: dict})
@@ -198,80 +157,28 @@ def get_farm_overview(request):
     - عدد النفوق خلال الشهر الماضي
     
     **Authentication:** Bearer Token مطلوب
-    **Performance:** محسّن باستخدام Cache (60 seconds)
+    **Performance:** Cache مشترك لجميع مستخدمي الـ tenant يُلغى عند تعديل البيانات
     """
     if not request.auth:
         from .auth import ErrorResponse
         return 401, ErrorResponse(detail="غير مصرح - يرجى تسجيل الدخول")
     
     # محاولة جلب من Cache
-    cache_key = f'dashboard:farm-overview:{request.auth.id if request.auth else "anonymous"}'
-    cached_data = cache.get(cache_key)
+    # الفترات الزمنية تعتمد على تاريخ اليوم
+    cache_key = dashboard_cache_key('farm-overview', date.today().isoformat())
+    cached_data = get_dashboard_cache(cache_key)
     
     if cached_data is not None:
         return cached_data
     
     try:
-        from biological.models import Pond, Batch
-        from daily_operations.models import FeedingLog, MortalityLog
-        
-        # عدد الأحواض النشطة
-        active_ponds = Pond.objects.filter(is_active=True, status='active').count()
+        from performance.dashboard_queries import get_farm_overview_values
         
-        # عدد الدفعات النشطة
-        active_batches = Batch.objects.filter(status='active', is_active=True).count()
-        
-        # إجمالي الكتلة الحية التقديرية (من الدفعات النشطة)
-        active_batches_list = Batch.objects.filter(
-            status='active', 
-            is_active=True
-        ).select_related('species', 'pond')
-        
-        total_biomass_kg = sum(
-            float(batch.current_weight) for batch in active_batches_list
-        )
+        # جميع المجاميع تُحسب في قاعدة البيانات (استعلام واحد)
+        response = FarmOverviewResponse(**get_farm_overview_values(date.today()))
         
-        # حساب تواريخ الفترات
-        today = date.today()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        
-        # استهلاك العلف خلال الأسبوع الماضي
-        feed_consumption_week = FeedingLog.objects.filter(
-            feeding_date__gte=week_ago,
-            feeding_date__lte=today
-        ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
-        
-        # استهلاك العلف خلال الشهر الماضي
-        feed_consumption_month = FeedingLog.objects.filter(
-            feeding_date__gte=month_ago,
-            feeding_date__lte=today
-        ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
-        
-        # عدد النفوق خلال الأسبوع الماضي
-        mortality_count_week = MortalityLog.objects.filter(
-            mortality_date__gte=week_ago,
-            mortality_date__lte=today
-        ).aggregate(total=Sum('count'))['total'] or 0
-        
-        # عدد النفوق خلال الشهر الماضي
-        mortality_count_month = MortalityLog.objects.filter(
-            mortality_date__gte=month_ago,
-            mortality_date__lte=today
-        ).aggregate(total=Sum('count'))['total'] or 0
-        
-        response = FarmOverviewResponse(
-            active_ponds=active_ponds,
-            active_batches=active_batches,
-            total_biomass_kg=float(total_biomass_kg),
-            feed_consumption_week_kg=float(feed_consumption_week),
-            feed_consumption_month_kg=float(feed_consumption_month),
-            mortality_count_week=mortality_count_week,
-            mortality_count_month=mortality_count_month,
-        )
-        
-        # حفظ في Cache لمدة دقيقة واحدة
-        cache.set(cache_key, response, timeout=60)
+        # حفظ في Cache حتى تعديل البيانات
+        set_dashboard_cache(cache_key, response)
         
         return response
     except Exception as e:
@@ -300,8 +207,13 @@ class BatchPerformanceResponse(BaseModel):
     batches: List[BatchPerformanceItem]
 
 
-@router.get('/batch-performance', response={200: BatchPerformanceResponse, 500: dict}, auth=TokenAuth())
-def get_batch_performance(request):
+@router.get('/batch-performance', response={200: BatchPerformanceResponse, 400: dict, 500: dict}, auth=TokenAuth())
+def get_batch_performance(
+    request,
+    sort_by: str = 'start_date',
+    order: str = 'desc',
+    limit: Optional[int] = None,
+):
     """
     الحصول على أداء جميع الدفعات النشطة
     
@@ -314,65 +226,68 @@ def get_batch_performance(request):
     - العدد الحالي
     - الوزن الحالي
     
+    **Query Parameters:**
+    - sort_by: start_date, fcr, average_weight, mortality_rate, weight_gain_rate_daily,
+      days_active, current_count, current_weight (الافتراضي: start_date)
+    - order: asc أو desc (الافتراضي: desc) - القيم الفارغة تظهر في النهاية
+    - limit: عدد الدفعات المطلوبة (مثال: أسوأ 20 FCR: sort_by=fcr&order=desc&limit=20)
+    
     **Authentication:** Bearer Token مطلوب
-    **Performance:** محسّن باستخدام Cache (60 seconds)
+    **Performance:** استعلام واحد (الترتيب و limit داخل قاعدة البيانات) مع Cache مشترك
+    لجميع مستخدمي الـ tenant يُلغى عند تعديل البيانات
     """
     if not request.auth:
         from .auth import ErrorResponse
         return 401, ErrorResponse(detail="غير مصرح - يرجى تسجيل الدخول")
     
+    from performance.dashboard_queries import BATCH_PERFORMANCE_SORT_FIELDS, get_batch_performance_rows
+    
+    if sort_by not in BATCH_PERFORMANCE_SORT_FIELDS:
+        return 400, {"detail": f"معيار ترتيب غير معروف: {sort_by}"}
+    if order not in ('asc', 'desc'):
+        return 400, {"detail": "order يجب أن يكون asc أو desc"}
+    if limit is not None and limit < 1:
+        return 400, {"detail": "limit يجب أن يكون أكبر من صفر"}
+    
     # محاولة جلب من Cache
-    cache_key = f'dashboard:batch-performance:{request.auth.id if request.auth else "anonymous"}'
-    cached_data = cache.get(cache_key)
+    # عدد الأيام النشطة يعتمد على تاريخ اليوم
+    today = date.today()
+    cache_key = dashboard_cache_key(
+        'batch-performance', f'{today.isoformat()}:{sort_by}:{order}:{limit or "all"}'
+    )
+    cached_data = get_dashboard_cache(cache_key)
     
     if cached_data is not None:
         return cached_data
     
     try:
-        from biological.models import Batch
-        from daily_operations.utils import calculate_fcr, calculate_weight_gain_rate
-        
-        # الحصول على جميع الدفعات النشطة
-        batches = Batch.objects.filter(
-            status='active',
-            is_active=True
-        ).select_related('species', 'pond').order_by('-start_date')
-        
-        batch_performance_list = []
-        today = date.today()
+        # FCR والنمو اليومي ومتوسط الوزن والنفوق محسوبة في نفس الاستعلام
+        batches = get_batch_performance_rows(
+            today, sort_by=sort_by, descending=(order == 'desc'), limit=limit
+        )
         
-        for batch in batches:
-            # حساب FCR
-            fcr = calculate_fcr(batch)
-            
-            # حساب معدل النمو اليومي
-            weight_gain_rate_daily = calculate_weight_gain_rate(batch, period='daily')
-            
-            # حساب عدد الأيام النشطة
-            days_active = (today - batch.start_date).days
-            
-            batch_performance_list.append(
-                BatchPerformanceItem(
-                    batch_id=batch.id,
-                    batch_number=batch.batch_number,
-                    species_name=batch.species.arabic_name,
-                    pond_name=batch.pond.name,
-                    fcr=float(fcr) if fcr else None,
-                    average_weight_kg=float(batch.average_weight),
-                    mortality_rate=float(batch.mortality_rate),
-                    weight_gain_rate_daily=float(weight_gain_rate_daily) if weight_gain_rate_daily else None,
-                    days_active=days_active,
-                    current_count=batch.current_count,
-                    current_weight_kg=float(batch.current_weight),
-                )
+        batch_performance_list = [
+            BatchPerformanceItem(
+                batch_id=batch.id,
+                batch_number=batch.batch_number,
+                species_name=batch.species.arabic_name,
+                pond_name=batch.pond.name,
+                fcr=float(batch.perf_fcr) if batch.perf_fcr else None,
+                average_weight_kg=float(batch.perf_average_weight),
+                mortality_rate=float(batch.perf_mortality_rate),
+                weight_gain_rate_daily=float(batch.perf_daily_gain) if batch.perf_daily_gain else None,
+                days_active=batch.perf_days_active,
+                current_count=batch.current_count,
+                current_weight_kg=float(batch.current_weight),
             )
+            for batch in batches
+        ]
         
         response = BatchPerformanceResponse(batches=batch_performance_list)
         
-        # حفظ في Cache لمدة دقيقة واحدة
-        cache.set(cache_key, response, timeout=60)
+        # حفظ في Cache حتى تعديل البيانات
+        set_dashboard_cache(cache_key, response)
         
         return response
     except Exception as e:
         return 500, {"detail": f"خطأ في استرجاع البيانات: {str(e)}"}
-
@@ -0,0 +1,65 @@
+"""
+Cache لوحة التحكم (Dashboard Cache) على مستوى الـ tenant
+
+المفاتيح مشتركة بين جميع مستخدمي الـ tenant وتتضمن رقم إصدار:
+    dashboard:{name}:{schema}:v{version}[:{suffix}]
+
+يتغير رقم الإصدار (بعد اكتمال الـ transaction) عند أي تعديل على الدفعات
+أو الأحواض أو سجلات التغذية والنفوق أو الحصاد أو المخزون
+(api/signals.py)، فتصبح جميع القيم السابقة غير مستخدمة فوراً وتنتهي
+صلاحيتها لاحقاً. لذلك يمكن تخزين القيم لفترة طويلة دون عرض بيانات قديمة.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+def _version_key():
+    return f'dashboard:version:{connection.schema_name}'
+
+
+def get_dashboard_version():
+    """رقم إصدار بيانات لوحة التحكم للـ tenant الحالي"""
+    version = cache.get(_version_key())
+    if version is None:
+        cache.add(_version_key(), time.time_ns(), None)
+        version = cache.get(_version_key())
+    return version
+
+
+def dashboard_cache_key(name, suffix=None):
+    """
+    مفتاح Cache لقيمة من لوحة التحكم
+
+    Args:
+        name: اسم القيمة (stats / farm-overview / batch-performance)
+        suffix: جزء إضافي (مثل تاريخ اليوم للقيم المعتمدة على فترات زمنية)
+    """
+    key = f'dashboard:{name}:{connection.schema_name}:v{get_dashboard_version()}'
+    return f'{key}:{suffix}' if suffix else key
+
+
+def get_dashboard_cache(key):
+    """قراءة قيمة من Cache لوحة التحكم (None إذا لم تكن موجودة)"""
+    return cache.get(key)
+
+
+def set_dashboard_cache(key, value):
+    """تخزين قيمة في Cache لوحة التحكم (DASHBOARD_CACHE_TIMEOUT كحد أقصى)"""
+    cache.set(key, value, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+
+
+def _bump_version(schema_name):
+    cache.set(f'dashboard:version:{schema_name}', time.time_ns(), None)
+
+
+def invalidate_dashboard_cache():
+    """
+    تغيير رقم إصدار لوحة التحكم للـ tenant الحالي بعد اكتمال الـ transaction
+
+    التغيير بعد الـ commit يمنع طلباً متزامناً من تخزين بيانات ما قبل
+    التعديل تحت الإصدار الجديد.
+    """
+    schema_name = connection.schema_name
+    transaction.on_commit(lambda: _bump_version(schema_name))
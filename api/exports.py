@@ -0,0 +1,368 @@
+"""
+API Endpoints لتصدير البيانات (CSV / XLSX)
+
+كل مجموعة بيانات تُقرأ بـ server-side cursor (.iterator(chunk_size=...))
+وتُكتب صفاً بعد صف (performance/exports.py)، فالذاكرة ثابتة مهما كان حجم
+التصدير:
+
+- GET  /exports/{dataset}?file_format=csv     تنزيل متدفق (StreamingHttpResponse)
+- POST /exports/{dataset}/jobs                 مهمة Celery تكتب الملف في التخزين
+- GET  /exports/jobs/{job_id}                  حالة المهمة
+- GET  /exports/jobs/{job_id}/download         تنزيل الملف الناتج
+
+المهام الخلفية مناسبة للتصديرات الكبيرة (سنوات من القيود أو القراءات)
+حتى لا يبقى اتصال الطلب مفتوحاً طوال مدة التصدير.
+"""
+import uuid
+from datetime import date, datetime
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.http import FileResponse, StreamingHttpResponse
+from ninja import Router
+from pydantic import BaseModel
+
+from .auth import TokenAuth, ErrorResponse
+from .permissions import check_feature_permission
+from performance.exports import EXPORT_FORMATS, iter_export
+
+router = Router()
+
+
+# ==================== Datasets ====================
+
+def _date(value):
+    return date.fromisoformat(value) if value else None
+
+
+def _datetime(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+
+def _rows(queryset, fields):
+    return queryset.values_list(*fields).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def export_journal_entries(start_date=None, end_date=None):
+    """بنود القيود المحاسبية (صف لكل بند)"""
+    from accounting.models import JournalEntryLine
+
+    queryset = JournalEntryLine.objects.all()
+    if start_date:
+        queryset = queryset.filter(journal_entry__entry_date__gte=_date(start_date))
+    if end_date:
+        queryset = queryset.filter(journal_entry__entry_date__lte=_date(end_date))
+    queryset = queryset.order_by('journal_entry__entry_date', 'journal_entry_id', 'id')
+
+    headers = [
+        'entry_number', 'entry_date', 'entry_description', 'reference_type', 'reference_id',
+        'account_code', 'account_name', 'type', 'amount', 'line_description',
+    ]
+    return headers, _rows(queryset, [
+        'journal_entry__entry_number', 'journal_entry__entry_date', 'journal_entry__description',
+        'journal_entry__reference_type', 'journal_entry__reference_id',
+        'account__code', 'account__arabic_name', 'type', 'amount', 'description',
+    ])
+
+
+def export_trial_balance(as_of_date=None):
+    """ميزانية تجريبية حتى تاريخ محدد (صف لكل حساب)"""
+    from accounting import reports as financial_reports
+
+    rows = financial_reports.get_trial_balance(_date(as_of_date) or date.today())
+    headers = ['account_code', 'account_name', 'account_type', 'debit', 'credit', 'balance']
+    return headers, (
+        (row['code'], row['arabic_name'], row['account_type'], row['debit'], row['credit'], row['balance'])
+        for row in rows
+    )
+
+
+def export_feeding_logs(batch_id=None, start_date=None, end_date=None):
+    """سجلات التغذية"""
+    from daily_operations.models import FeedingLog
+
+    queryset = FeedingLog.objects.all()
+    if batch_id:
+        queryset = queryset.filter(batch_id=batch_id)
+    if start_date:
+        queryset = queryset.filter(feeding_date__gte=_date(start_date))
+    if end_date:
+        queryset = queryset.filter(feeding_date__lte=_date(end_date))
+    queryset = queryset.order_by('feeding_date', 'id')
+
+    headers = ['id', 'batch_number', 'feeding_date', 'feed_type', 'quantity', 'unit_price', 'total_cost', 'notes']
+    return headers, _rows(queryset, [
+        'id', 'batch__batch_number', 'feeding_date', 'feed_type__arabic_name',
+        'quantity', 'unit_price', 'total_cost', 'notes',
+    ])
+
+
+def export_mortality_logs(batch_id=None, start_date=None, end_date=None):
+    """سجلات النفوق"""
+    from daily_operations.models import MortalityLog
+
+    queryset = MortalityLog.objects.all()
+    if batch_id:
+        queryset = queryset.filter(batch_id=batch_id)
+    if start_date:
+        queryset = queryset.filter(mortality_date__gte=_date(start_date))
+    if end_date:
+        queryset = queryset.filter(mortality_date__lte=_date(end_date))
+    queryset = queryset.order_by('mortality_date', 'id')
+
+    headers = ['id', 'batch_number', 'mortality_date', 'count', 'average_weight', 'cause', 'notes']
+    return headers, _rows(queryset, [
+        'id', 'batch__batch_number', 'mortality_date', 'count', 'average_weight', 'cause', 'notes',
+    ])
+
+
+def export_sensor_readings(pond_id=None, sensor_type=None, start_date=None, end_date=None):
+    """قراءات المستشعرات (تحديد الفترة يقصر القراءة على أقسام الأشهر المطلوبة)"""
+    from biological.models import SensorReading
+
+    queryset = SensorReading.objects.all()
+    if pond_id:
+        queryset = queryset.filter(pond_id=pond_id)
+    if sensor_type:
+        queryset = queryset.filter(sensor_type=sensor_type)
+    if start_date:
+        queryset = queryset.filter(reading_date__gte=_datetime(start_date))
+    if end_date:
+        queryset = queryset.filter(reading_date__lte=_datetime(end_date))
+    queryset = queryset.order_by('reading_date', 'id')
+
+    headers = [
+        'id', 'pond', 'sensor_type', 'reading_value', 'unit', 'reading_date',
+        'is_alert', 'alert_message', 'sensor_id',
+    ]
+    return headers, _rows(queryset, [
+        'id', 'pond__name', 'sensor_type', 'reading_value', 'unit', 'reading_date',
+        'is_alert', 'alert_message', 'sensor_id',
+    ])
+
+
+def _report_export(generator_name, schema_name):
+    """تصدير تقرير من api/reports.py (نفس حسابات الـ endpoint)"""
+    def export(batch_id=None):
+        from . import reports
+
+        headers = list(getattr(reports, schema_name).model_fields)
+        items = getattr(reports, generator_name)(batch_id)
+        return headers, (tuple(item.model_dump().values()) for item in items)
+    return export
+
+
+# اسم مجموعة البيانات -> (الدالة، الميزة المطلوبة، المعاملات المقبولة)
+EXPORT_DATASETS = {
+    'journal-entries': (export_journal_entries, 'accounting', ('start_date', 'end_date')),
+    'trial-balance': (export_trial_balance, 'accounting', ('as_of_date',)),
+    'feeding-logs': (export_feeding_logs, 'daily_operations', ('batch_id', 'start_date', 'end_date')),
+    'mortality-logs': (export_mortality_logs, 'daily_operations', ('batch_id', 'start_date', 'end_date')),
+    'sensor-readings': (
+        export_sensor_readings, 'biological', ('pond_id', 'sensor_type', 'start_date', 'end_date')
+    ),
+    'cost-per-kg': (
+        _report_export('iter_cost_per_kg_report', 'CostPerKgReportItem'), 'reports', ('batch_id',)
+    ),
+    'batch-profitability': (
+        _report_export('iter_batch_profitability_report', 'BatchProfitabilityItem'), 'reports', ('batch_id',)
+    ),
+    'biological-financial': (
+        _report_export('iter_biological_financial_report', 'BiologicalFinancialReportItem'),
+        'reports', ('batch_id',)
+    ),
+    'feed-efficiency': (
+        _report_export('iter_feed_efficiency_report', 'FeedEfficiencyItem'), 'reports', ('batch_id',)
+    ),
+    'mortality-analysis': (
+        _report_export('iter_mortality_analysis_report', 'MortalityAnalysisItem'), 'reports', ('batch_id',)
+    ),
+}
+
+
+def build_export(dataset, file_format, params):
+    """
+    أجزاء ملف التصدير لمجموعة بيانات في الـ schema الحالي
+
+    Args:
+        dataset: اسم مجموعة البيانات (EXPORT_DATASETS)
+        file_format: csv أو xlsx
+        params: معاملات التصفية (تُتجاهل غير المقبولة)
+
+    Raises:
+        ValueError: مجموعة بيانات أو صيغة أو معامل غير صالح
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"مجموعة بيانات غير معروفة: {dataset}")
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"صيغة غير مدعومة: {file_format}")
+    export, _, accepted = EXPORT_DATASETS[dataset]
+    headers, rows = export(**{key: params[key] for key in accepted if params.get(key) is not None})
+    return iter_export(file_format, headers, rows, title=dataset)
+
+
+def export_filename(dataset, file_format):
+    return f'{dataset}-{date.today().isoformat()}.{file_format}'
+
+
+def _job_key(schema_name, job_id):
+    return f'export:job:{schema_name}:{job_id}'
+
+
+def get_export_job(schema_name, job_id):
+    """حالة مهمة تصدير (None إذا لم تكن موجودة أو انتهت صلاحيتها)"""
+    return cache.get(_job_key(schema_name, job_id))
+
+
+def set_export_job(schema_name, job_id, state):
+    cache.set(_job_key(schema_name, job_id), state, timeout=settings.EXPORT_JOB_TIMEOUT)
+
+
+# ==================== Schemas ====================
+
+class ExportParams(BaseModel):
+    """معاملات التصدير (كل مجموعة بيانات تستخدم ما يخصها)"""
+    file_format: str = 'csv'
+    batch_id: Optional[int] = None
+    pond_id: Optional[int] = None
+    sensor_type: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    as_of_date: Optional[str] = None
+
+
+class ExportJobSchema(BaseModel):
+    """حالة مهمة تصدير"""
+    job_id: str
+    dataset: str
+    file_format: str
+    status: str  # pending, running, completed, failed
+    size: Optional[int] = None
+    error: Optional[str] = None
+
+
+# ==================== Endpoints ====================
+
+def _check_access(request, dataset):
+    if not request.auth:
+        return 401, ErrorResponse(detail="غير مصرح - يرجى تسجيل الدخول")
+    if dataset not in EXPORT_DATASETS:
+        return 404, ErrorResponse(detail="مجموعة البيانات غير موجودة")
+    feature = EXPORT_DATASETS[dataset][1]
+    if not check_feature_permission(getattr(request.auth, 'role', None), feature):
+        return 403, ErrorResponse(detail="ليس لديك صلاحية لتصدير هذه البيانات")
+    return None
+
+
+def _job_schema(job_id, state):
+    return ExportJobSchema(
+        job_id=job_id,
+        dataset=state['dataset'],
+        file_format=state['file_format'],
+        status=state['status'],
+        size=state.get('size'),
+        error=state.get('error'),
+    )
+
+
+@router.get('/jobs/{job_id}', response={200: ExportJobSchema, 401: ErrorResponse, 403: ErrorResponse, 404: ErrorResponse}, auth=TokenAuth())
+def get_export_job_status(request, job_id: str):
+    """حالة مهمة تصدير خلفية"""
+    state = get_export_job(connection.schema_name, job_id)
+    if state is None:
+        return 404, ErrorResponse(detail="مهمة التصدير غير موجودة")
+    denied = _check_access(request, state['dataset'])
+    if denied:
+        return denied
+    return _job_schema(job_id, state)
+
+
+@router.get('/jobs/{job_id}/download', response={401: ErrorResponse, 403: ErrorResponse, 404: ErrorResponse, 409: ErrorResponse}, auth=TokenAuth())
+def download_export_job(request, job_id: str):
+    """تنزيل ملف مهمة تصدير مكتملة"""
+    state = get_export_job(connection.schema_name, job_id)
+    if state is None:
+        return 404, ErrorResponse(detail="مهمة التصدير غير موجودة")
+    denied = _check_access(request, state['dataset'])
+    if denied:
+        return denied
+    if state['status'] != 'completed':
+        return 409, ErrorResponse(detail="مهمة التصدير لم تكتمل بعد")
+
+    return FileResponse(
+        default_storage.open(state['path'], 'rb'),
+        as_attachment=True,
+        filename=export_filename(state['dataset'], state['file_format']),
+        content_type=EXPORT_FORMATS[state['file_format']]['content_type'],
+    )
+
+
+@router.get('/{dataset}', response={400: ErrorResponse, 401: ErrorResponse, 403: ErrorResponse, 404: ErrorResponse}, auth=TokenAuth())
+def stream_export(
+    request,
+    dataset: str,
+    file_format: str = 'csv',
+    batch_id: Optional[int] = None,
+    pond_id: Optional[int] = None,
+    sensor_type: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    as_of_date: Optional[str] = None,
+):
+    """
+    تنزيل متدفق لمجموعة بيانات
+
+    **Parameters:**
+    - dataset: journal-entries, trial-balance, feeding-logs, mortality-logs, sensor-readings,
+      cost-per-kg, batch-profitability, biological-financial, feed-efficiency, mortality-analysis
+    - file_format: csv أو xlsx (افتراضي: csv)
+    - batch_id, pond_id, sensor_type, start_date, end_date, as_of_date: حسب مجموعة البيانات
+    """
+    denied = _check_access(request, dataset)
+    if denied:
+        return denied
+
+    params = {
+        'batch_id': batch_id, 'pond_id': pond_id, 'sensor_type': sensor_type,
+        'start_date': start_date, 'end_date': end_date, 'as_of_date': as_of_date,
+    }
+    try:
+        chunks = build_export(dataset, file_format, params)
+    except ValueError as e:
+        return 400, ErrorResponse(detail=str(e))
+
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[file_format]['content_type'])
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(dataset, file_format)}"'
+    return response
+
+
+@router.post('/{dataset}/jobs', response={202: ExportJobSchema, 400: ErrorResponse, 401: ErrorResponse, 403: ErrorResponse, 404: ErrorResponse}, auth=TokenAuth())
+def create_export_job(request, dataset: str, data: ExportParams):
+    """
+    تصدير خلفي (Celery) يكتب الملف في التخزين - للتصديرات الكبيرة
+
+    تُتابع الحالة من /exports/jobs/{job_id} ويُنزل الملف عند اكتمالها.
+    """
+    denied = _check_access(request, dataset)
+    if denied:
+        return denied
+    if data.file_format not in EXPORT_FORMATS:
+        return 400, ErrorResponse(detail=f"صيغة غير مدعومة: {data.file_format}")
+
+    from .tasks import export_dataset
+
+    job_id = uuid.uuid4().hex
+    schema_name = connection.schema_name
+    params = data.model_dump(exclude={'file_format'}, exclude_none=True)
+    state = {'dataset': dataset, 'file_format': data.file_format, 'status': 'pending'}
+    set_export_job(schema_name, job_id, state)
+    export_dataset.delay(
+        job_id=job_id,
+        dataset=dataset,
+        file_format=data.file_format,
+        params=params,
+        schema_name=schema_name,
+    )
+    return 202, _job_schema(job_id, state)
@@ -8,8 +8,20 @@ from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
+from django.conf import settings
+from django.db import connection, transaction
+
 from .auth import TokenAuth, ErrorResponse
-from biological.models import Pond, SensorReading
+from .permissions import require_roles, require_feature, check_feature_permission
+from .pagination import CursorPage, InvalidCursor, paginate_keyset, page_meta, DEFAULT_PAGE_SIZE
+from biological.models import Pond, SensorReading, SensorAlertRule, SensorAlert
+from biological.sensor_ingest import (
+    BulkPayloadError, parse_bulk_payload, ingest_sensor_readings
+)
+from biological.sensor_rollups import RESOLUTIONS, get_sensor_series
+from biological.alerts import evaluate_sensor_readings, dispatch_sensor_alerts
+from biological.live_feed import broadcast_readings
+from .live import issue_live_ticket
 
 router = Router()
 logger = logging.getLogger('api')
@@ -43,12 +55,92 @@ class SensorReadingCreateSchema(BaseModel):
     reading_value: float
     unit: str = ''
     reading_date: Optional[datetime] = None
-    is_alert: bool = False
-    alert_message: Optional[str] = None
     sensor_id: Optional[str] = None
     notes: Optional[str] = None
 
 
+class BulkRejectSchema(BaseModel):
+    """صف مرفوض في الإدخال الجماعي"""
+    index: int
+    detail: str
+
+
+class BulkIngestResponse(BaseModel):
+    """نتيجة الإدخال الجماعي لقراءات المستشعرات"""
+    accepted: int
+    rejected: int
+    rejects: List[BulkRejectSchema]
+
+
+class SensorSeriesPoint(BaseModel):
+    """نقطة في السلسلة الزمنية لقراءات مستشعر"""
+    bucket_start: str
+    min: float
+    max: float
+    avg: float
+    count: int
+    last: float
+
+
+class SensorSeriesResponse(BaseModel):
+    """سلسلة زمنية لقراءات مستشعر بالدقة المختارة"""
+    pond_id: int
+    sensor_type: str
+    resolution: str
+    points: List[SensorSeriesPoint]
+
+
+class SensorAlertRuleSchema(BaseModel):
+    """Schema لعرض قاعدة تنبيه"""
+    id: int
+    pond_id: Optional[int] = None
+    sensor_type: str
+    rule_type: str
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    max_change: Optional[float] = None
+    window_size: int
+    severity: str
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
+class SensorAlertRuleCreateSchema(BaseModel):
+    """Schema لإنشاء قاعدة تنبيه"""
+    pond_id: Optional[int] = None
+    sensor_type: str
+    rule_type: str = 'threshold'
+    min_value: Optional[Decimal] = None
+    max_value: Optional[Decimal] = None
+    max_change: Optional[Decimal] = None
+    window_size: int = 5
+    severity: str = 'warning'
+    is_active: bool = True
+
+
+class SensorAlertSchema(BaseModel):
+    """Schema لعرض تنبيه مستشعر"""
+    id: int
+    pond_id: int
+    rule_id: Optional[int] = None
+    reading_id: Optional[int] = None
+    sensor_type: str
+    reading_value: float
+    reading_date: str
+    severity: str
+    message: str
+    is_acknowledged: bool
+    created_at: str
+
+
+class LiveTicketSchema(BaseModel):
+    """Ticket للاتصال بالبث المباشر"""
+    ticket: str
+    expires_in: int
+
+
 # ==================== Endpoints ====================
 
 @router.post('/sensor-readings', response={201: SensorReadingSchema, 400: ErrorResponse}, auth=TokenAuth())
@@ -65,18 +157,23 @@ def create_sensor_reading(request, data: SensorReadingCreateSchema):
         # استخدام التاريخ المحدد أو التاريخ الحالي
         reading_date = data.reading_date or datetime.now()
         
-        reading = SensorReading.objects.create(
+        reading = SensorReading(
             pond=pond,
             sensor_type=data.sensor_type,
             reading_value=Decimal(str(data.reading_value)),
             unit=data.unit,
             reading_date=reading_date,
-            is_alert=data.is_alert,
-            alert_message=data.alert_message,
             sensor_id=data.sensor_id,
             notes=data.notes,
         )
         
+        # is_alert و alert_message يُحسبان على الخادم من قواعد التنبيه فقط
+        with transaction.atomic():
+            fired = evaluate_sensor_readings([reading])
+            reading.save()
+            dispatch_sensor_alerts(fired)
+            broadcast_readings([reading])
+        
         logger.info(f"تم استقبال قراءة مستشعر: pond_id={pond.id}, sensor_type={data.sensor_type}, value={data.reading_value}")
         
         return 201, SensorReadingSchema(
@@ -101,7 +198,60 @@ def create_sensor_reading(request, data: SensorReadingCreateSchema):
         return 400, ErrorResponse(detail=f"خطأ في إنشاء قراءة المستشعر: {str(e)}")
 
 
-@router.get('/sensor-readings', response={200: List[SensorReadingSchema]}, auth=TokenAuth())
+@router.post('/sensor-readings/bulk', response={200: BulkIngestResponse, 400: ErrorResponse, 413: ErrorResponse}, auth=TokenAuth())
+def create_sensor_readings_bulk(request):
+    """
+    استقبال دفعة من قراءات المستشعرات في طلب واحد
+    
+    **Authentication:** Bearer Token مطلوب
+    **Content-Type:**
+    - application/json: قائمة قراءات، أو {"fields": [...], "rows": [[...], ...]}
+    - application/x-ndjson: قراءة واحدة (كائن JSON) في كل سطر
+    
+    **Returns:**
+    - عدد القراءات المقبولة والمرفوضة مع سبب رفض كل صف (index حسب ترتيب الإرسال)
+    """
+    # التحقق من الحجم قبل قراءة الجسم وتحليله
+    too_large = ErrorResponse(
+        detail=f"حجم الطلب يتجاوز الحد المسموح ({settings.IOT_BULK_MAX_BYTES} بايت)"
+    )
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > settings.IOT_BULK_MAX_BYTES:
+        return 413, too_large
+    if len(request.body) > settings.IOT_BULK_MAX_BYTES:
+        return 413, too_large
+    
+    try:
+        rows, rejects = parse_bulk_payload(request.body, request.content_type or '')
+    except (BulkPayloadError, UnicodeDecodeError) as e:
+        return 400, ErrorResponse(detail=f"صيغة الطلب غير صالحة: {str(e)}")
+    
+    total = len(rows) + len(rejects)
+    if total > settings.IOT_BULK_MAX_READINGS:
+        return 413, ErrorResponse(
+            detail=f"عدد القراءات ({total}) يتجاوز الحد المسموح ({settings.IOT_BULK_MAX_READINGS})"
+        )
+    
+    try:
+        readings, row_rejects = ingest_sensor_readings(rows)
+    except Exception as e:
+        logger.error(f"خطأ غير متوقع في الإدخال الجماعي لقراءات المستشعرات: {str(e)}", exc_info=True)
+        return 400, ErrorResponse(detail=f"خطأ في حفظ قراءات المستشعرات: {str(e)}")
+    
+    rejects = sorted(rejects + row_rejects)
+    logger.info(f"إدخال جماعي لقراءات المستشعرات: accepted={len(readings)}, rejected={len(rejects)}")
+    
+    return BulkIngestResponse(
+        accepted=len(readings),
+        rejected=len(rejects),
+        rejects=[BulkRejectSchema(index=index, detail=detail) for index, detail in rejects],
+    )
+
+
+@router.get('/sensor-readings', response={200: CursorPage[SensorReadingSchema], 400: ErrorResponse}, auth=TokenAuth())
 def get_sensor_readings(
     request,
     pond_id: Optional[int] = None,
@@ -109,10 +259,15 @@ def get_sensor_readings(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     is_alert: Optional[bool] = None,
-    limit: int = 100
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    count: Optional[str] = None,
 ):
     """
-    الحصول على قراءات المستشعرات
+    الحصول على قراءات المستشعرات (Keyset Pagination حسب reading_date, id)
+    
+    تحديد pond_id و sensor_type يستخدم الفهرس المركب (pond, sensor_type, reading_date)،
+    وتحديد start_date و end_date يقصر البحث على أقسام الأشهر المطلوبة.
     
     **Parameters:**
     - pond_id (optional): تصفية حسب حوض معين
@@ -120,10 +275,12 @@ def get_sensor_readings(
     - start_date (optional): تاريخ البداية (ISO format)
     - end_date (optional): تاريخ النهاية (ISO format)
     - is_alert (optional): تصفية حسب وجود تنبيه
-    - limit: عدد القراءات (افتراضي: 100)
+    - cursor: next_cursor من الصفحة السابقة
+    - page_size: عدد القراءات في الصفحة (افتراضي: 50, أقصى: 200)
+    - count: إجمالي العدد - exact أو estimate (افتراضي: بدون)
     
     **Returns:**
-    - قائمة بقراءات المستشعرات
+    - صفحة من قراءات المستشعرات
     """
     try:
         from datetime import datetime
@@ -147,9 +304,9 @@ def get_sensor_readings(
         if is_alert is not None:
             queryset = queryset.filter(is_alert=is_alert)
         
-        readings = queryset.order_by('-reading_date')[:limit]
+        page = paginate_keyset(queryset, ('-reading_date', '-id'), cursor=cursor, page_size=page_size, count=count)
         
-        return [
+        return CursorPage(items=[
             SensorReadingSchema(
                 id=r.id,
                 pond_id=r.pond.id,
@@ -164,13 +321,84 @@ def get_sensor_readings(
                 notes=r.notes,
                 created_at=r.created_at.isoformat(),
             )
-            for r in readings
-        ]
+            for r in page['items']
+        ], **page_meta(page))
+    except InvalidCursor as e:
+        return 400, ErrorResponse(detail=str(e))
     except Exception as e:
         logger.error(f"خطأ في استرجاع قراءات المستشعرات: {str(e)}", exc_info=True)
         return 500, ErrorResponse(detail=f"خطأ في استرجاع البيانات: {str(e)}")
 
 
+@router.get('/sensor-readings/series', response={200: SensorSeriesResponse, 400: ErrorResponse}, auth=TokenAuth())
+def get_sensor_reading_series(
+    request,
+    pond_id: int,
+    sensor_type: str,
+    start_date: str,
+    end_date: Optional[str] = None,
+    max_points: int = 500,
+    resolution: Optional[str] = None
+):
+    """
+    سلسلة زمنية لقراءات مستشعر للرسوم البيانية
+    
+    تُختار الدقة الزمنية (raw / 1m / 15m / 1h / 1d) تلقائياً حسب طول الفترة
+    وميزانية النقاط، وتُقرأ الفترات الطويلة من جداول المجاميع بدلاً من القراءات الخام.
+    
+    **Parameters:**
+    - pond_id: الحوض
+    - sensor_type: نوع المستشعر
+    - start_date: تاريخ البداية (ISO format)
+    - end_date (optional): تاريخ النهاية (افتراضي: الآن)
+    - max_points: الحد الأقصى لعدد النقاط (افتراضي: 500)
+    - resolution (optional): فرض دقة محددة
+    """
+    from django.utils import timezone
+    from django.utils.dateparse import parse_datetime
+    
+    if resolution and resolution != 'raw' and resolution not in RESOLUTIONS:
+        return 400, ErrorResponse(detail=f"دقة غير معروفة: {resolution}")
+    if not 1 <= max_points <= 5000:
+        return 400, ErrorResponse(detail="max_points يجب أن يكون بين 1 و 5000")
+    
+    start = parse_datetime(start_date.replace('Z', '+00:00'))
+    end = parse_datetime(end_date.replace('Z', '+00:00')) if end_date else timezone.now()
+    if start is None or end is None:
+        return 400, ErrorResponse(detail="صيغة التاريخ غير صالحة (ISO format)")
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end)
+    if start >= end:
+        return 400, ErrorResponse(detail="تاريخ البداية يجب أن يسبق تاريخ النهاية")
+    
+    try:
+        resolution, points = get_sensor_series(
+            pond_id, sensor_type, start, end, max_points=max_points, resolution=resolution
+        )
+    except Exception as e:
+        logger.error(f"خطأ في استرجاع السلسلة الزمنية للمستشعر: {str(e)}", exc_info=True)
+        return 400, ErrorResponse(detail=f"خطأ في استرجاع البيانات: {str(e)}")
+    
+    return SensorSeriesResponse(
+        pond_id=pond_id,
+        sensor_type=sensor_type,
+        resolution=resolution,
+        points=[
+            SensorSeriesPoint(
+                bucket_start=point['bucket_start'].isoformat(),
+                min=float(point['min']),
+                max=float(point['max']),
+                avg=float(point['avg']),
+                count=point['count'],
+                last=float(point['last']),
+            )
+            for point in points
+        ],
+    )
+
+
 @router.get('/sensor-readings/{reading_id}', response={200: SensorReadingSchema, 404: ErrorResponse}, auth=TokenAuth())
 def get_sensor_reading(request, reading_id: int):
     """
@@ -202,3 +430,127 @@ def get_sensor_reading(request, reading_id: int):
     except Exception as e:
         logger.error(f"خطأ في استرجاع قراءة المستشعر: {str(e)}", exc_info=True)
         return 500, ErrorResponse(detail=f"خطأ في استرجاع البيانات: {str(e)}")
+
+
+# ==================== Live Feed ====================
+
+@router.post('/live/ticket', response={200: LiveTicketSchema, 401: ErrorResponse, 403: ErrorResponse}, auth=TokenAuth())
+@require_feature('biological')
+def create_live_ticket(request):
+    """
+    Ticket قصير العمر للاتصال بالبث المباشر مرة واحدة
+    
+    **Usage:** new EventSource(`/api/iot/live?ticket=${ticket}`)
+    """
+    return LiveTicketSchema(
+        ticket=issue_live_ticket(connection.schema_name, request.auth),
+        expires_in=settings.IOT_LIVE_TICKET_TTL,
+    )
+
+
+# ==================== Alert Rules ====================
+
+@router.get('/alert-rules', response={200: List[SensorAlertRuleSchema]}, auth=TokenAuth())
+def list_alert_rules(request, pond_id: Optional[int] = None, sensor_type: Optional[str] = None):
+    """
+    قائمة قواعد تنبيه المستشعرات
+    """
+    queryset = SensorAlertRule.objects.all()
+    if pond_id:
+        queryset = queryset.filter(pond_id=pond_id)
+    if sensor_type:
+        queryset = queryset.filter(sensor_type=sensor_type)
+    return [SensorAlertRuleSchema.model_validate(rule) for rule in queryset]
+
+
+@router.post('/alert-rules', response={201: SensorAlertRuleSchema, 400: ErrorResponse, 401: ErrorResponse, 403: ErrorResponse}, auth=TokenAuth())
+@require_roles(['owner', 'manager'])
+def create_alert_rule(request, data: SensorAlertRuleCreateSchema):
+    """
+    إنشاء قاعدة تنبيه للمستشعرات
+    
+    **Rule types:**
+    - threshold: يتطلب min_value و/أو max_value
+    - rate_of_change: يتطلب max_change (لكل دقيقة)
+    - moving_average: يتطلب min_value و/أو max_value و window_size
+    """
+    if data.rule_type in ('threshold', 'moving_average') and data.min_value is None and data.max_value is None:
+        return 400, ErrorResponse(detail="يجب تحديد min_value أو max_value")
+    if data.rule_type == 'rate_of_change' and data.max_change is None:
+        return 400, ErrorResponse(detail="يجب تحديد max_change لقاعدة معدل التغير")
+    
+    try:
+        rule = SensorAlertRule(**data.model_dump())
+        rule.full_clean()
+        rule.save()
+        return 201, SensorAlertRuleSchema.model_validate(rule)
+    except Exception as e:
+        return 400, ErrorResponse(detail=f"خطأ في إنشاء قاعدة التنبيه: {str(e)}")
+
+
+@router.delete('/alert-rules/{rule_id}', response={200: dict, 401: ErrorResponse, 403: ErrorResponse, 404: ErrorResponse}, auth=TokenAuth())
+@require_roles(['owner', 'manager'])
+def delete_alert_rule(request, rule_id: int):
+    """
+    حذف قاعدة تنبيه
+    """
+    try:
+        SensorAlertRule.objects.get(id=rule_id).delete()
+        return {'detail': 'تم حذف قاعدة التنبيه بنجاح'}
+    except SensorAlertRule.DoesNotExist:
+        return 404, ErrorResponse(detail="قاعدة التنبيه غير موجودة")
+
+
+# ==================== Alerts ====================
+
+def _alert_schema(alert):
+    return SensorAlertSchema(
+        id=alert.id,
+        pond_id=alert.pond_id,
+        rule_id=alert.rule_id,
+        reading_id=alert.reading_id,
+        sensor_type=alert.sensor_type,
+        reading_value=float(alert.reading_value),
+        reading_date=alert.reading_date.isoformat(),
+        severity=alert.severity,
+        message=alert.message,
+        is_acknowledged=alert.is_acknowledged,
+        created_at=alert.created_at.isoformat(),
+    )
+
+
+@router.get('/alerts', response={200: List[SensorAlertSchema]}, auth=TokenAuth())
+def list_sensor_alerts(
+    request,
+    pond_id: Optional[int] = None,
+    is_acknowledged: Optional[bool] = None,
+    limit: int = 100
+):
+    """
+    قائمة تنبيهات المستشعرات الصادرة من قواعد التنبيه
+    """
+    queryset = SensorAlert.objects.all()
+    if pond_id:
+        queryset = queryset.filter(pond_id=pond_id)
+    if is_acknowledged is not None:
+        queryset = queryset.filter(is_acknowledged=is_acknowledged)
+    return [_alert_schema(alert) for alert in queryset[:limit]]
+
+
+@router.post('/alerts/{alert_id}/acknowledge', response={200: SensorAlertSchema, 401: ErrorResponse, 403: ErrorResponse, 404: ErrorResponse}, auth=TokenAuth())
+def acknowledge_sensor_alert(request, alert_id: int):
+    """
+    تأكيد معالجة تنبيه
+    """
+    if not request.auth:
+        return 401, ErrorResponse(detail="غير مصرح - يرجى تسجيل الدخول")
+    if not check_feature_permission(getattr(request.auth, 'role', None), 'biological'):
+        return 403, ErrorResponse(detail="ليس لديك صلاحية لمعالجة تنبيهات المستشعرات")
+    
+    try:
+        alert = SensorAlert.objects.get(id=alert_id)
+        alert.is_acknowledged = True
+        alert.save(update_fields=['is_acknowledged'])
+        return _alert_schema(alert)
+    except SensorAlert.DoesNotExist:
+        return 404, ErrorResponse(detail="التنبيه غير موجود")
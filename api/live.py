@@ -0,0 +1,145 @@
+"""
+البث المباشر لقياسات الأحواض (Server-Sent Events)
+
+View غير متزامن (async) خارج Django Ninja حتى يبقى الاتصال مفتوحاً على
+حلقة الأحداث في عامل ASGI دون حجز thread لكل لوحة تحكم.
+
+GET /api/iot/live?pond_id=1&pond_id=2&ticket=<ticket>
+- الأحداث: readings (قراءات جديدة) و alerts (تنبيهات جديدة)
+- EventSource لا يدعم headers، لذلك يطلب المتصفح أولاً ticket قصير العمر
+  يُستخدم مرة واحدة (POST /api/iot/live/ticket) بدلاً من وضع JWT في الرابط
+  حيث يظهر في سجلات الخادم والـ proxy. العملاء الآخرون يستخدمون Authorization header.
+"""
+import logging
+import secrets
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django_tenants.utils import schema_context
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError, AuthenticationFailed
+
+from biological.live_feed import stream_events
+from biological.sensor_ingest import get_active_pond_ids
+from .auth_cache import get_token_user
+from .permissions import check_feature_permission
+
+logger = logging.getLogger('api')
+
+LIVE_FEATURE = 'biological'
+
+
+def _ticket_key(schema_name, ticket):
+    return f'iot:live-ticket:{schema_name}:{ticket}'
+
+
+def issue_live_ticket(schema_name, user):
+    """
+    Ticket لاتصال واحد بالبث المباشر (صالح IOT_LIVE_TICKET_TTL ثانية)
+
+    Args:
+        schema_name: الـ tenant
+        user: المستخدم (request.auth)
+    """
+    ticket = secrets.token_urlsafe(32)
+    cache.set(
+        _ticket_key(schema_name, ticket),
+        {'user_id': user.id, 'role': user.role},
+        settings.IOT_LIVE_TICKET_TTL,
+    )
+    return ticket
+
+
+def consume_live_ticket(schema_name, ticket):
+    """
+    بيانات الـ ticket وحذفه (None إذا كان غير صالح أو مستخدماً)
+
+    الحذف هو ما يحسم الاستخدام: من اتصالين متزامنين بنفس الـ ticket
+    ينجح من حذف المفتاح فقط.
+    """
+    key = _ticket_key(schema_name, ticket)
+    data = cache.get(key)
+    if data is None or not cache.delete(key):
+        return None
+    return data
+
+
+def _get_bearer_token(request):
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):].strip()
+    return None
+
+
+def _authorize(schema_name, token, ticket, pond_ids):
+    """
+    التحقق من المستخدم والأحواض المطلوبة (sync - يُستدعى عبر sync_to_async)
+
+    Returns:
+        tuple: (user_id, role, unknown_pond_ids) - user_id=None إذا لم يُقبل الـ ticket
+    """
+    with schema_context(schema_name):
+        if token:
+            user = get_token_user(token)
+            user_id, role = user.id, user.role
+        else:
+            data = consume_live_ticket(schema_name, ticket) or {}
+            user_id, role = data.get('user_id'), data.get('role')
+        unknown = sorted(set(pond_ids) - get_active_pond_ids())
+    return user_id, role, unknown
+
+
+@require_GET
+async def sensor_live_feed(request):
+    """
+    بث قراءات المستشعرات والتنبيهات الجديدة للـ tenant الحالي
+
+    **Authentication:** Bearer Token في الـ header، أو ?ticket= من POST /api/iot/live/ticket
+    **Permission:** ميزة biological
+    **Query:** pond_id (اختياري، يمكن تكراره) - بدون تحديد تُبث جميع الأحواض
+    """
+    tenant = getattr(request, 'tenant', None)
+    if tenant is None or tenant.schema_name == 'public':
+        return JsonResponse({'detail': 'البث المباشر متاح لحسابات المزارع فقط'}, status=404)
+
+    token = _get_bearer_token(request)
+    ticket = request.GET.get('ticket')
+    if not token and not ticket:
+        return JsonResponse({'detail': 'Unauthorized'}, status=401)
+
+    try:
+        pond_ids = sorted({int(value) for value in request.GET.getlist('pond_id')})
+    except ValueError:
+        return JsonResponse({'detail': 'pond_id يجب أن يكون رقماً'}, status=400)
+
+    try:
+        user_id, role, unknown = await sync_to_async(_authorize)(
+            tenant.schema_name, token, ticket, pond_ids
+        )
+    except (InvalidToken, TokenError, AuthenticationFailed) as e:
+        logger.warning(f"محاولة اتصال بالبث المباشر بـ Token غير صالح: {type(e).__name__}")
+        return JsonResponse({'detail': 'Unauthorized'}, status=401)
+
+    if user_id is None:
+        logger.warning(f"[{tenant.schema_name}] محاولة اتصال بالبث المباشر بـ ticket غير صالح أو مستخدم")
+        return JsonResponse({'detail': 'Unauthorized'}, status=401)
+
+    if not check_feature_permission(role, LIVE_FEATURE):
+        return JsonResponse({'detail': 'ليس لديك صلاحية لمتابعة قراءات المستشعرات'}, status=403)
+
+    if unknown:
+        return JsonResponse(
+            {'detail': f'الأحواض غير موجودة أو غير نشطة: {unknown}'}, status=404
+        )
+
+    logger.info(
+        f"[{tenant.schema_name}] اتصال بالبث المباشر: user_id={user_id}, ponds={pond_ids or 'all'}"
+    )
+    response = StreamingHttpResponse(
+        stream_events(tenant.schema_name, pond_ids),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -5,11 +5,12 @@ import logging
 from ninja import Router
 from ninja.security import HttpBearer
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Optional
 from datetime import date
 from decimal import Decimal
 
 from .auth import TokenAuth, ErrorResponse
+from .pagination import CursorPage, InvalidCursor, paginate_keyset, page_meta, DEFAULT_PAGE_SIZE
 from daily_operations.models import FeedingLog, MortalityLog
 from daily_operations.utils import get_batch_statistics
 from biological.models import Batch
@@ -113,17 +114,34 @@ class BatchStatisticsSchema(BaseModel):
 
 # ==================== Feeding Log Endpoints ====================
 
-@router.get('/feeding', response={200: List[FeedingLogSchema]}, auth=TokenAuth())
-def list_feeding_logs(request, batch_id: Optional[int] = None):
-    """قائمة سجلات التغذية"""
+@router.get('/feeding', response={200: CursorPage[FeedingLogSchema], 400: ErrorResponse}, auth=TokenAuth())
+def list_feeding_logs(
+    request,
+    batch_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    count: Optional[str] = None,
+):
+    """
+    قائمة سجلات التغذية (Keyset Pagination حسب feeding_date, id)
+    
+    **Parameters:**
+    - batch_id: تصفية حسب الدفعة
+    - cursor: next_cursor من الصفحة السابقة
+    - page_size: عدد العناصر في الصفحة (افتراضي: 50, أقصى: 200)
+    - count: إجمالي العدد - exact أو estimate (افتراضي: بدون)
+    """
     queryset = FeedingLog.objects.select_related('batch', 'feed_type', 'created_by').all()
     
     if batch_id:
         queryset = queryset.filter(batch_id=batch_id)
     
-    logs = queryset.order_by('-feeding_date', '-created_at')
+    try:
+        page = paginate_keyset(queryset, ('-feeding_date', '-id'), cursor=cursor, page_size=page_size, count=count)
+    except InvalidCursor as e:
+        return 400, ErrorResponse(detail=str(e))
     
-    return [
+    return CursorPage(items=[
         FeedingLogSchema(
             id=log.id,
             batch_id=log.batch.id,
@@ -138,8 +156,8 @@ def list_feeding_logs(request, batch_id: Optional[int] = None):
             created_by_id=log.created_by.id if log.created_by else None,
             created_at=log.created_at.isoformat(),
         )
-        for log in logs
-    ]
+        for log in page['items']
+    ], **page_meta(page))
 
 
 @router.get('/feeding/{log_id}', response={200: FeedingLogSchema, 404: ErrorResponse}, auth=TokenAuth())
@@ -269,17 +287,34 @@ def delete_feeding_log(request, log_id: int):
 
 # ==================== Mortality Log Endpoints ====================
 
-@router.get('/mortality', response={200: List[MortalityLogSchema]}, auth=TokenAuth())
-def list_mortality_logs(request, batch_id: Optional[int] = None):
-    """قائمة سجلات النفوق"""
+@router.get('/mortality', response={200: CursorPage[MortalityLogSchema], 400: ErrorResponse}, auth=TokenAuth())
+def list_mortality_logs(
+    request,
+    batch_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    count: Optional[str] = None,
+):
+    """
+    قائمة سجلات النفوق (Keyset Pagination حسب mortality_date, id)
+    
+    **Parameters:**
+    - batch_id: تصفية حسب الدفعة
+    - cursor: next_cursor من الصفحة السابقة
+    - page_size: عدد العناصر في الصفحة (افتراضي: 50, أقصى: 200)
+    - count: إجمالي العدد - exact أو estimate (افتراضي: بدون)
+    """
     queryset = MortalityLog.objects.select_related('batch', 'created_by').all()
     
     if batch_id:
         queryset = queryset.filter(batch_id=batch_id)
     
-    logs = queryset.order_by('-mortality_date', '-created_at')
+    try:
+        page = paginate_keyset(queryset, ('-mortality_date', '-id'), cursor=cursor, page_size=page_size, count=count)
+    except InvalidCursor as e:
+        return 400, ErrorResponse(detail=str(e))
     
-    return [
+    return CursorPage(items=[
         MortalityLogSchema(
             id=log.id,
             batch_id=log.batch.id,
@@ -292,8 +327,8 @@ def list_mortality_logs(request, batch_id: Optional[int] = None):
             created_by_id=log.created_by.id if log.created_by else None,
             created_at=log.created_at.isoformat(),
         )
-        for log in logs
-    ]
+        for log in page['items']
+    ], **page_meta(page))
 
 
 @router.get('/mortality/{log_id}', response={200: MortalityLogSchema, 404: ErrorResponse}, auth=TokenAuth())
@@ -405,7 +440,7 @@ def delete_mortality_log(request, log_id: int):
 def get_batch_statistics_endpoint(request, batch_id: int):
     """الحصول على إحصائيات شاملة للدفعة"""
     try:
-        batch = Batch.objects.select_related('pond', 'species').get(id=batch_id, is_active=True)
+        batch = Batch.objects.select_related('pond', 'species', 'rollup').get(id=batch_id, is_active=True)
         stats = get_batch_statistics(batch)
         
         return BatchStatisticsSchema(
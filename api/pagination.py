@@ -1,11 +1,37 @@
 """
 Pagination Utilities for API
+
+- PaginatedResponse: ترقيم بالصفحات (COUNT + OFFSET) - انظر
+  performance.query_optimization.paginate_queryset
+- CursorPage: ترقيم بالمؤشر (Keyset Pagination) لقوائم السجلات الكبيرة
+
+Keyset Pagination:
+
+    page = paginate_keyset(queryset, ('-feeding_date', '-id'), cursor=cursor, page_size=50)
+    return CursorPage(items=[...page['items']...], **page_meta(page))
+
+الصفحة التالية تُجلب بشرط على مفاتيح الترتيب (WHERE (feeding_date, id) < (...))
+بدلاً من OFFSET، فكلفة الصفحة العميقة مثل الأولى مع فهرس على مفاتيح الترتيب.
+الـ cursor نص معتم (base64) يحفظ قيم مفاتيح الترتيب لآخر عنصر، ولا يصلح إلا
+لنفس الترتيب. إجمالي العدد اختياري: count='exact' (COUNT(*)) أو
+count='estimate' (تقدير مخطط PostgreSQL بدون قراءة الجدول).
 """
-from typing import Generic, TypeVar, List
+import base64
+import binascii
+import json
+from typing import Generic, TypeVar, List, Optional
+from django.core.exceptions import ValidationError
+from django.db.models import Q
 from pydantic import BaseModel
 
 T = TypeVar('T')
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+
 
 class PaginatedResponse(BaseModel, Generic[T]):
     """Response schema للـ Pagination"""
@@ -17,3 +43,146 @@ class PaginatedResponse(BaseModel, Generic[T]):
     has_next: bool
     has_previous: bool
 
+
+class CursorPage(BaseModel, Generic[T]):
+    """Response schema للـ Keyset Pagination"""
+    items: List[T]
+    page_size: int
+    next_cursor: Optional[str] = None
+    has_next: bool
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+
+class InvalidCursor(ValueError):
+    """Cursor غير صالح أو لا يطابق ترتيب القائمة"""
+
+
+def _field_name(key):
+    return key.lstrip('-')
+
+
+def _serialize(value):
+    # isoformat كاملاً للتواريخ (بدون اقتطاع الـ microseconds)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    return str(value)
+
+
+def encode_cursor(values, ordering):
+    """Cursor معتم من قيم مفاتيح الترتيب"""
+    payload = {'o': list(ordering), 'v': [_serialize(value) for value in values]}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, ordering, model):
+    """
+    قيم مفاتيح الترتيب من الـ cursor (محولة لأنواع حقول النموذج)
+
+    Raises:
+        InvalidCursor: cursor تالف أو لترتيب مختلف
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload['o'] != list(ordering) or len(payload['v']) != len(ordering):
+            raise InvalidCursor('Cursor لا يطابق ترتيب القائمة')
+        return [
+            model._meta.get_field(_field_name(key)).to_python(value)
+            for key, value in zip(ordering, payload['v'])
+        ]
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+        raise InvalidCursor('Cursor غير صالح')
+
+
+def cursor_for(obj, ordering):
+    """Cursor يبدأ بعد الكائن obj"""
+    return encode_cursor([getattr(obj, _field_name(key)) for key in ordering], ordering)
+
+
+def keyset_filter(ordering, values):
+    """
+    شرط العناصر بعد القيم values حسب الترتيب
+
+    (a, b) بعد (va, vb) تنازلياً: a <= va AND (a < va OR (a = va AND b < vb))
+
+    الشرط a <= va مكرر منطقياً لكنه ضروري: PostgreSQL لا يحوّل OR إلى حد على
+    فهرس (a, b)، فبدونه يمسح الفهرس من البداية ويستبعد كل العناصر السابقة
+    (بتكلفة OFFSET). معه يبدأ المسح من va مباشرة (Index Cond على a).
+    """
+    condition = Q()
+    equal = Q()
+    for key, value in zip(ordering, values):
+        name = _field_name(key)
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    first = ordering[0]
+    bound = Q(**{f"{_field_name(first)}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+    return bound & condition
+
+
+def estimate_count(queryset):
+    """عدد تقديري من مخطط PostgreSQL (EXPLAIN) بدون تنفيذ الاستعلام"""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def paginate_keyset(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE, count=None):
+    """
+    Keyset Pagination للـ QuerySet
+
+    Args:
+        queryset: QuerySet (بدون ترتيب أو slicing)
+        ordering: مفاتيح الترتيب، آخرها فريد وجميعها NOT NULL (مثل ('-entry_date', '-id'))
+        cursor: next_cursor من الصفحة السابقة (None للصفحة الأولى)
+        page_size: عدد العناصر (حد أقصى MAX_PAGE_SIZE)
+        count: None (بدون إجمالي)، 'exact' أو 'estimate'
+
+    Returns:
+        dict يحتوي على:
+        - items: العناصر في الصفحة
+        - page_size: حجم الصفحة
+        - next_cursor: cursor الصفحة التالية (None إذا كانت الأخيرة)
+        - has_next: هل هناك صفحة تالية
+        - total: إجمالي عدد العناصر (None بدون count)
+        - total_is_estimate: هل الإجمالي تقديري
+
+    Raises:
+        InvalidCursor: cursor غير صالح
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    total = None
+    if count == COUNT_EXACT:
+        total = queryset.count()
+    elif count == COUNT_ESTIMATE:
+        total = estimate_count(queryset)
+
+    page_queryset = queryset
+    if cursor:
+        values = decode_cursor(cursor, ordering, queryset.model)
+        page_queryset = page_queryset.filter(keyset_filter(ordering, values))
+
+    items = list(page_queryset.order_by(*ordering)[:page_size + 1])
+    has_next = len(items) > page_size
+    items = items[:page_size]
+
+    return {
+        'items': items,
+        'page_size': page_size,
+        'next_cursor': cursor_for(items[-1], ordering) if has_next else None,
+        'has_next': has_next,
+        'total': total,
+        'total_is_estimate': count == COUNT_ESTIMATE,
+    }
+
+
+def page_meta(page):
+    """حقول CursorPage عدا items"""
+    return {key: value for key, value in page.items() if key != 'items'}
@@ -23,6 +23,7 @@ from .billing import router as billing_router
 from .farm import router as farm_router
 from .traceability import router as traceability_router
 from .iot import router as iot_router
+from .exports import router as exports_router
 
 # إنشاء Router رئيسي
 api_router = Router()
@@ -49,4 +50,5 @@ api_router.add_router('/billing', billing_router, tags=['Billing & Subscriptions
 api_router.add_router('/farm', farm_router, tags=['Farm'])
 api_router.add_router('/traceability', traceability_router, tags=['Traceability'])
 api_router.add_router('/iot', iot_router, tags=['IoT'])
+api_router.add_router('/exports', exports_router, tags=['Exports'])
 
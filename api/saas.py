@@ -5,16 +5,18 @@ API Endpoints لإدارة SaaS - Super Admin Dashboard
 """
 from ninja import Router
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from django.db.models import Q, Count, Sum
+from typing import Optional
+from django.db.models import Q, Count, Sum, Case, When, F, Value, DecimalField
 from django.db import connection
 from django_tenants.utils import schema_context
-from tenants.models import Client, Domain, Plan, Subscription, PlatformInvoice
+from tenants.models import Client, Plan, Subscription, PlatformInvoice, TenantDirectory
 from django.contrib.auth import get_user_model
 from datetime import date, timedelta, datetime
+from decimal import Decimal
 from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
 from .auth import TokenAuth, ErrorResponse
+from .pagination import PaginatedResponse
 
 User = get_user_model()
 router = Router()
@@ -37,6 +39,7 @@ class TenantSummary(BaseModel):
     is_active: bool
     created_on: date
     user_count: Optional[int] = 0
+    storage_bytes: Optional[int] = 0
 
 
 class SaaSStatsResponse(BaseModel):
@@ -62,56 +65,70 @@ def is_super_admin(request):
     return request.user.is_superuser or getattr(request.user, 'is_staff', False)
 
 
-@router.get('/tenants', response=List[TenantSummary], auth=TokenAuth())
-def list_tenants(request):
+@router.get('/tenants', response=PaginatedResponse[TenantSummary], auth=TokenAuth())
+def list_tenants(
+    request,
+    page: int = 1,
+    page_size: int = 50,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+):
     """
     قائمة جميع المزارع (Tenants) المشتركة
     
+    تُقرأ من دليل الـ Tenants (TenantDirectory) باستعلام واحد، دون
+    استعلامات لكل tenant أو التنقل بين الـ schemas.
+    
     **Authentication:** Super Admin only
     **Schema:** Public Schema
+    
+    **Parameters:**
+    - page: رقم الصفحة (افتراضي: 1)
+    - page_size: عدد العناصر في الصفحة (افتراضي: 50, أقصى: 200)
+    - status: تصفية حسب حالة الاشتراك (none للعملاء بدون اشتراك)
+    - search: بحث في الاسم أو البريد أو الـ schema أو النطاق
+    
+    **Returns:**
+    - PaginatedResponse: الصفحة مع الإجمالي وعدد الصفحات
     """
     # التحقق من أن المستخدم هو super admin
     if not request.user.is_superuser:
         return 403, {'error': 'Unauthorized - Super Admin only'}
     
-    # الانتقال إلى public schema
+    from performance.query_optimization import paginate_queryset
+    
+    page = max(page, 1)
+    page_size = min(max(page_size, 1), 200)
+    
     with schema_context('public'):
-        tenants_list = []
-        
-        for tenant in Client.objects.all().order_by('-created_on'):
-            # الحصول على Domain
-            domain = Domain.objects.filter(tenant=tenant, is_primary=True).first()
-            domain_name = domain.domain if domain else 'N/A'
-            
-            # الحصول على Subscription
-            subscription = Subscription.objects.filter(client=tenant).first()
-            subscription_status = subscription.status if subscription else 'none'
-            plan_name = subscription.plan.display_name if subscription and subscription.plan else 'None'
-            end_date = subscription.end_date if subscription else None
-            
-            # حساب عدد المستخدمين (في tenant schema)
-            user_count = 0
-            try:
-                with schema_context(tenant.schema_name):
-                    user_count = User.objects.count()
-            except Exception:
-                pass
-            
-            tenants_list.append(TenantSummary(
-                id=tenant.id,
-                name=tenant.name,
-                email=tenant.email,
-                schema_name=tenant.schema_name,
-                domain=domain_name,
-                subscription_status=subscription_status,
-                plan_name=plan_name,
-                end_date=end_date,
-                is_active=tenant.is_active,
-                created_on=tenant.created_on,
-                user_count=user_count
-            ))
+        queryset = TenantDirectory.objects.all()
+        if status:
+            queryset = queryset.filter(subscription_status=status)
+        if search:
+            queryset = queryset.filter(
+                Q(name__icontains=search) | Q(email__icontains=search) |
+                Q(schema_name__icontains=search) | Q(domain__icontains=search)
+            )
         
-        return tenants_list
+        paginated = paginate_queryset(queryset.order_by('-created_on', '-id'), page=page, page_size=page_size)
+        paginated['items'] = [
+            TenantSummary(
+                id=row.client_id,
+                name=row.name,
+                email=row.email,
+                schema_name=row.schema_name,
+                domain=row.domain or 'N/A',
+                subscription_status=row.subscription_status,
+                plan_name=row.plan_name or 'None',
+                end_date=row.current_period_end.date() if row.current_period_end else None,
+                is_active=row.is_active,
+                created_on=row.created_on,
+                user_count=row.user_count,
+                storage_bytes=row.storage_bytes,
+            )
+            for row in paginated['items']
+        ]
+        return PaginatedResponse[TenantSummary](**paginated)
 
 
 @router.get('/stats', response=SaaSStatsResponse, auth=TokenAuth())
@@ -119,48 +136,55 @@ def saas_stats(request):
     """
     إحصائيات SaaS Dashboard
     
+    جميع المؤشرات (ومنها MRR) تُحسب كمجاميع SQL في استعلام واحد.
+    
     **Authentication:** Super Admin only
     **Schema:** Public Schema
     """
+    from performance.dashboard_queries import aggregate_query, fetch_aggregates
+    
     # التحقق من أن المستخدم هو super admin
     if not is_super_admin(request):
         return 403, ErrorResponse(detail='غير مصرح - Super Admin فقط')
     
+    now = timezone.now()
+    # الاشتراكات المنتهية قريباً (خلال 7 أيام)
+    soon_date = now + timedelta(days=7)
+    active = Q(status='active', current_period_end__gte=now)
+    
     with schema_context('public'):
-        total_tenants = Client.objects.filter(is_active=True).count()
-        
-        subscriptions = Subscription.objects.all()
-        active_subscriptions = subscriptions.filter(status='active', current_period_end__gte=timezone.now()).count()
-        expired_subscriptions = subscriptions.filter(
-            Q(status='cancelled') | Q(current_period_end__lt=timezone.now())
-        ).count()
-        trial_subscriptions = subscriptions.filter(status='trial').count()
-        
-        # حساب MRR (Monthly Recurring Revenue)
-        monthly_revenue = 0.0
-        for sub in subscriptions.filter(status='active', current_period_end__gte=timezone.now()):
-            if sub.plan:
-                if sub.billing_cycle == 'monthly':
-                    monthly_revenue += float(sub.plan.price_monthly)
-                else:  # yearly
-                    monthly_revenue += float(sub.plan.price_yearly) / 12
-        
-        # الاشتراكات المنتهية قريباً (خلال 7 أيام)
-        soon_date = timezone.now() + timedelta(days=7)
-        tenants_expiring_soon = subscriptions.filter(
-            current_period_end__lte=soon_date,
-            current_period_end__gte=timezone.now(),
-            status__in=['active', 'trial']
-        ).count()
-        
-        return SaaSStatsResponse(
-            total_tenants=total_tenants,
-            active_subscriptions=active_subscriptions,
-            expired_subscriptions=expired_subscriptions,
-            trial_subscriptions=trial_subscriptions,
-            monthly_revenue=monthly_revenue,
-            tenants_expiring_soon=tenants_expiring_soon
+        values = fetch_aggregates(
+            aggregate_query(Client.objects.filter(is_active=True), total_tenants=Count('id')),
+            aggregate_query(
+                Subscription.objects.all(),
+                active_subscriptions=Count('id', filter=active),
+                expired_subscriptions=Count('id', filter=Q(status='cancelled') | Q(current_period_end__lt=now)),
+                trial_subscriptions=Count('id', filter=Q(status='trial')),
+                # MRR (Monthly Recurring Revenue) - الاشتراك السنوي يُحتسب شهرياً
+                monthly_revenue=Sum(
+                    Case(
+                        When(billing_cycle='monthly', then=F('plan__price_monthly')),
+                        default=F('plan__price_yearly') / Value(Decimal('12')),
+                        output_field=DecimalField(),
+                    ),
+                    filter=active,
+                ),
+                tenants_expiring_soon=Count('id', filter=Q(
+                    current_period_end__lte=soon_date,
+                    current_period_end__gte=now,
+                    status__in=['active', 'trial'],
+                )),
+            ),
         )
+    
+    return SaaSStatsResponse(
+        total_tenants=values['total_tenants'],
+        active_subscriptions=values['active_subscriptions'],
+        expired_subscriptions=values['expired_subscriptions'],
+        trial_subscriptions=values['trial_subscriptions'],
+        monthly_revenue=float(values['monthly_revenue'] or 0),
+        tenants_expiring_soon=values['tenants_expiring_soon'],
+    )
 
 
 @router.post('/tenants/{tenant_id}/suspend', auth=TokenAuth())
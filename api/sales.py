@@ -11,6 +11,7 @@ from django.utils import timezone
 
 from .auth import TokenAuth, ErrorResponse
 from .permissions import require_feature
+from .pagination import CursorPage, InvalidCursor, paginate_keyset, page_meta, DEFAULT_PAGE_SIZE
 from sales.models import Harvest, SalesOrder, SalesOrderLine, Invoice
 from biological.models import Batch
 from sales.pdf_generator import InvoicePDFGenerator
@@ -121,9 +122,25 @@ class InvoiceSchema(BaseModel):
 
 # ==================== Harvest Endpoints ====================
 
-@router.get('/harvests', response={200: List[HarvestSchema]}, auth=TokenAuth())
-def list_harvests(request, batch_id: Optional[int] = None, status: Optional[str] = None):
-    """قائمة الحصاد - يتطلب صلاحية sales"""
+@router.get('/harvests', response={200: CursorPage[HarvestSchema], 400: ErrorResponse}, auth=TokenAuth())
+def list_harvests(
+    request,
+    batch_id: Optional[int] = None,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    count: Optional[str] = None,
+):
+    """
+    قائمة الحصاد - يتطلب صلاحية sales (Keyset Pagination حسب harvest_date, id)
+    
+    **Parameters:**
+    - batch_id: تصفية حسب الدفعة
+    - status: تصفية حسب الحالة
+    - cursor: next_cursor من الصفحة السابقة
+    - page_size: عدد العناصر في الصفحة (افتراضي: 50, أقصى: 200)
+    - count: إجمالي العدد - exact أو estimate (افتراضي: بدون)
+    """
     from .permissions import check_feature_permission
     if not request.auth:
         return 401, ErrorResponse(detail="غير مصرح - يرجى تسجيل الدخول")
@@ -138,9 +155,12 @@ def list_harvests(request, batch_id: Optional[int] = None, status: Optional[str]
     if status:
         queryset = queryset.filter(status=status)
     
-    harvests = queryset.order_by('-harvest_date', '-created_at')
+    try:
+        page = paginate_keyset(queryset, ('-harvest_date', '-id'), cursor=cursor, page_size=page_size, count=count)
+    except InvalidCursor as e:
+        return 400, ErrorResponse(detail=str(e))
     
-    return [
+    return CursorPage(items=[
         HarvestSchema(
             id=h.id,
             batch_id=h.batch.id,
@@ -156,8 +176,8 @@ def list_harvests(request, batch_id: Optional[int] = None, status: Optional[str]
             created_by_id=h.created_by.id if h.created_by else None,
             created_at=h.created_at.isoformat(),
         )
-        for h in harvests
-    ]
+        for h in page['items']
+    ], **page_meta(page))
 
 
 @router.post('/harvests', response={201: HarvestSchema, 400: ErrorResponse}, auth=TokenAuth())
@@ -366,9 +386,23 @@ def create_sales_order(request, data: SalesOrderCreateSchema):
 
 # ==================== Invoice Endpoints ====================
 
-@router.get('/invoices', response={200: List[InvoiceSchema]}, auth=TokenAuth())
-def list_invoices(request, status: Optional[str] = None):
-    """قائمة الفواتير - يتطلب صلاحية sales"""
+@router.get('/invoices', response={200: CursorPage[InvoiceSchema], 400: ErrorResponse}, auth=TokenAuth())
+def list_invoices(
+    request,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    count: Optional[str] = None,
+):
+    """
+    قائمة الفواتير - يتطلب صلاحية sales (Keyset Pagination حسب invoice_date, id)
+    
+    **Parameters:**
+    - status: تصفية حسب الحالة
+    - cursor: next_cursor من الصفحة السابقة
+    - page_size: عدد العناصر في الصفحة (افتراضي: 50, أقصى: 200)
+    - count: إجمالي العدد - exact أو estimate (افتراضي: بدون)
+    """
     from .permissions import check_feature_permission
     if not request.auth:
         return 401, ErrorResponse(detail="غير مصرح - يرجى تسجيل الدخول")
@@ -381,9 +415,12 @@ def list_invoices(request, status: Optional[str] = None):
     if status:
         queryset = queryset.filter(status=status)
     
-    invoices = queryset.order_by('-invoice_date', '-created_at')
+    try:
+        page = paginate_keyset(queryset, ('-invoice_date', '-id'), cursor=cursor, page_size=page_size, count=count)
+    except InvalidCursor as e:
+        return 400, ErrorResponse(detail=str(e))
     
-    return [
+    return CursorPage(items=[
         InvoiceSchema(
             id=inv.id,
             invoice_number=inv.invoice_number,
@@ -399,8 +436,8 @@ def list_invoices(request, status: Optional[str] = None):
             created_by_id=inv.created_by.id if inv.created_by else None,
             created_at=inv.created_at.isoformat(),
         )
-        for inv in invoices
-    ]
+        for inv in page['items']
+    ], **page_meta(page))
 
 
 class InvoiceCreateSchema(BaseModel):
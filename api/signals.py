@@ -0,0 +1,33 @@
+"""
+Django Signals لتحديث Cache لوحة التحكم وCache مستخدمي JWT
+"""
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from biological.models import Pond, Batch
+from daily_operations.models import FeedingLog, MortalityLog
+from sales.models import Harvest
+from inventory.models import FeedInventory, MedicineInventory
+from .dashboard_cache import invalidate_dashboard_cache
+from .auth_cache import invalidate_token_user
+
+
+DASHBOARD_MODELS = (Pond, Batch, FeedingLog, MortalityLog, Harvest, FeedInventory, MedicineInventory)
+
+
+def invalidate_dashboard(sender, instance, **kwargs):
+    """تحديث إصدار Cache لوحة التحكم عند تعديل البيانات التي تعتمد عليها"""
+    invalidate_dashboard_cache()
+
+
+for model in DASHBOARD_MODELS:
+    post_save.connect(invalidate_dashboard, sender=model, dispatch_uid=f'dashboard-cache-save-{model.__name__}')
+    post_delete.connect(invalidate_dashboard, sender=model, dispatch_uid=f'dashboard-cache-delete-{model.__name__}')
+
+
+def invalidate_user_cache(sender, instance, **kwargs):
+    """إلغاء بيانات المستخدم المخزنة للمصادقة عند تعديله (الدور أو التعطيل) أو حذفه"""
+    invalidate_token_user(instance.pk)
+
+
+post_save.connect(invalidate_user_cache, sender=settings.AUTH_USER_MODEL, dispatch_uid='jwt-user-cache-save')
+post_delete.connect(invalidate_user_cache, sender=settings.AUTH_USER_MODEL, dispatch_uid='jwt-user-cache-delete')
@@ -0,0 +1,91 @@
+"""
+Celery Tasks لتصدير البيانات في الخلفية
+"""
+import logging
+import tempfile
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django_tenants.utils import schema_context
+
+from .exports import build_export, set_export_job
+
+logger = logging.getLogger('api')
+
+EXPORT_STORAGE_DIR = 'exports'
+
+
+@shared_task(name='api.export_dataset')
+def export_dataset(job_id, dataset, file_format, params, schema_name):
+    """
+    تصدير مجموعة بيانات إلى ملف في التخزين (default_storage)
+    
+    الملف يُكتب أولاً في ملف مؤقت على القرص صفاً بعد صف ثم يُرفع للتخزين،
+    فذاكرة العامل ثابتة مهما كان حجم التصدير.
+    
+    **Parameters:**
+    - job_id: معرف المهمة (حالة المهمة في Cache)
+    - dataset: اسم مجموعة البيانات (api.exports.EXPORT_DATASETS)
+    - file_format: csv أو xlsx
+    - params: معاملات التصفية
+    - schema_name: الـ tenant
+    
+    **Returns:**
+    - dict: حالة المهمة النهائية
+    """
+    state = {'dataset': dataset, 'file_format': file_format, 'status': 'running'}
+    with schema_context(schema_name):
+        set_export_job(schema_name, job_id, state)
+        try:
+            with tempfile.TemporaryFile() as output:
+                for chunk in build_export(dataset, file_format, params):
+                    output.write(chunk)
+                state['size'] = output.tell()
+                output.seek(0)
+                state['path'] = default_storage.save(
+                    f'{EXPORT_STORAGE_DIR}/{schema_name}/{job_id}.{file_format}',
+                    File(output),
+                )
+            state['status'] = 'completed'
+            logger.info(f"[{schema_name}] اكتمل تصدير {dataset} ({file_format}): {state['size']} بايت")
+        except Exception as e:
+            logger.error(f"[{schema_name}] فشل تصدير {dataset}: {str(e)}", exc_info=True)
+            state['status'] = 'failed'
+            state['error'] = str(e)
+        set_export_job(schema_name, job_id, state)
+    return state
+
+
+@shared_task(name='api.cleanup_export_files')
+def cleanup_export_files(max_age_hours=None):
+    """
+    حذف ملفات التصدير الأقدم من max_age_hours من التخزين
+    
+    **Parameters:**
+    - max_age_hours: عمر الملف بالساعات (افتراضي: EXPORT_FILE_RETENTION_HOURS)
+    
+    **Returns:**
+    - dict: عدد الملفات المحذوفة
+    """
+    if max_age_hours is None:
+        max_age_hours = settings.EXPORT_FILE_RETENTION_HOURS
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    deleted = 0
+    if not default_storage.exists(EXPORT_STORAGE_DIR):
+        return {'deleted': deleted, 'status': 'success'}
+    
+    schemas, _ = default_storage.listdir(EXPORT_STORAGE_DIR)
+    for schema_name in schemas:
+        directory = f'{EXPORT_STORAGE_DIR}/{schema_name}'
+        _, files = default_storage.listdir(directory)
+        for name in files:
+            path = f'{directory}/{name}'
+            if default_storage.get_modified_time(path) < cutoff:
+                default_storage.delete(path)
+                deleted += 1
+    
+    logger.info(f"تم حذف {deleted} ملف تصدير قديم")
+    return {'deleted': deleted, 'status': 'success'}
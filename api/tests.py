@@ -172,6 +172,511 @@ class TestPondAPI:
         assert len(data) >= 1
 
 
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestReportQueries:
+    """اختبارات طبقة استعلامات التقارير"""
+    
+    def _create_batch_with_activity(self, index, species, pond, feed_type):
+        from datetime import date, timedelta
+        from biological.models import Batch
+        from daily_operations.models import FeedingLog, MortalityLog
+        from sales.models import Harvest, SalesOrder, SalesOrderLine
+        
+        batch = Batch.objects.create(
+            pond=pond,
+            species=species,
+            batch_number=f'BATCH-REP-{index}',
+            start_date=date.today() - timedelta(days=30),
+            initial_count=1000,
+            initial_weight=Decimal('100.00'),
+            initial_cost=Decimal('2000.00')
+        )
+        for day in range(index + 1):
+            FeedingLog.objects.create(
+                batch=batch,
+                feed_type=feed_type,
+                feeding_date=date.today() - timedelta(days=day),
+                quantity=Decimal('12.50'),
+                unit_price=Decimal('4.00')
+            )
+        MortalityLog.objects.create(
+            batch=batch,
+            mortality_date=date.today(),
+            count=index * 3 + 1
+        )
+        
+        order = SalesOrder.objects.create(
+            order_number=f'SO-REP-{index}',
+            order_date=date.today(),
+            customer_name='عميل'
+        )
+        for status in ('completed', 'pending'):
+            harvest = Harvest.objects.create(
+                batch=batch,
+                harvest_date=date.today(),
+                quantity_kg=Decimal('50.00'),
+                count=100,
+                average_weight=Decimal('0.500'),
+                fair_value=Decimal('1000.00'),
+                status=status
+            )
+            SalesOrderLine.objects.create(
+                sales_order=order,
+                harvest=harvest,
+                quantity_kg=Decimal('10.00'),
+                unit_price=Decimal('25.00') * (index + 1)
+            )
+        return batch
+    
+    def test_report_batches_match_per_batch_aggregates(self):
+        """المجاميع المحسوبة في الاستعلام تطابق التجميع لكل دفعة"""
+        from django.db import connection
+        from django.db.models import Sum
+        from django.test.utils import CaptureQueriesContext
+        from biological.models import Species, Pond
+        from inventory.models import FeedType
+        from daily_operations.models import FeedingLog, MortalityLog
+        from sales.models import SalesOrderLine
+        from performance.report_queries import get_report_batches
+        
+        species = Species.objects.create(arabic_name='سمك البلطي', name='Tilapia')
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('1000.00'))
+        feed_type = FeedType.objects.create(name='Feed', arabic_name='علف', unit='kg')
+        for index in range(3):
+            self._create_batch_with_activity(index, species, pond, feed_type)
+        
+        with CaptureQueriesContext(connection) as queries:
+            batches = list(get_report_batches(feed=True, mortality=True, revenue=True))
+            for batch in batches:
+                batch.species.arabic_name, batch.pond.name
+        assert len(queries) == 1
+        
+        for batch in batches:
+            feeding = FeedingLog.objects.filter(batch=batch)
+            assert batch.report_feed_kg == feeding.aggregate(total=Sum('quantity'))['total']
+            assert batch.report_feed_cost == feeding.aggregate(total=Sum('total_cost'))['total']
+            assert batch.report_feeding_count == feeding.count()
+            assert batch.report_mortality == MortalityLog.objects.filter(
+                batch=batch
+            ).aggregate(total=Sum('count'))['total']
+            assert batch.report_revenue == SalesOrderLine.objects.filter(
+                harvest__batch=batch, harvest__status='completed'
+            ).aggregate(total=Sum('line_total'))['total']
+    
+    def test_report_batches_fall_back_to_raw_logs(self):
+        """الدفعات بدون صف مجاميع تُحسب من السجلات الخام"""
+        from biological.models import Species, Pond
+        from inventory.models import FeedType
+        from daily_operations.models import BatchRollup
+        from performance.report_queries import get_report_batches
+        
+        species = Species.objects.create(arabic_name='سمك البلطي', name='Tilapia')
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('1000.00'))
+        feed_type = FeedType.objects.create(name='Feed', arabic_name='علف', unit='kg')
+        batch = self._create_batch_with_activity(1, species, pond, feed_type)
+        BatchRollup.objects.filter(batch=batch).delete()
+        
+        batch = get_report_batches(batch.id, feed=True, mortality=True).get()
+        assert batch.report_feed_kg == Decimal('25.00')
+        assert batch.report_feeding_count == 2
+        assert batch.report_mortality == 4
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestDashboardCache:
+    """اختبارات Cache لوحة التحكم على مستوى الـ tenant"""
+    
+    def test_key_is_shared_and_bumped_after_commit(self, django_capture_on_commit_callbacks):
+        """المفتاح مشترك بين المستخدمين ويتغير بعد حفظ سجل تغذية"""
+        from datetime import date
+        from django.core.cache import cache
+        from biological.models import Species, Pond, Batch
+        from inventory.models import FeedType
+        from daily_operations.models import FeedingLog
+        from api.dashboard_cache import dashboard_cache_key, set_dashboard_cache, get_dashboard_cache
+        
+        cache.clear()
+        species = Species.objects.create(arabic_name='سمك البلطي', name='Tilapia')
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        feed_type = FeedType.objects.create(name='Feed', arabic_name='علف', unit='kg')
+        batch = Batch.objects.create(
+            pond=pond,
+            species=species,
+            batch_number='BATCH-CACHE-1',
+            start_date=date.today(),
+            initial_count=1000,
+            initial_weight=Decimal('100.00'),
+            initial_cost=Decimal('2000.00')
+        )
+        
+        key = dashboard_cache_key('stats')
+        set_dashboard_cache(key, {'total_ponds': 1})
+        assert dashboard_cache_key('stats') == key
+        
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            FeedingLog.objects.create(
+                batch=batch,
+                feed_type=feed_type,
+                feeding_date=date.today(),
+                quantity=Decimal('10.00'),
+                unit_price=Decimal('2.00')
+            )
+        # لا يتغير الإصدار قبل اكتمال الـ transaction
+        assert dashboard_cache_key('stats') == key
+        
+        for callback in callbacks:
+            callback()
+        assert dashboard_cache_key('stats') != key
+        assert get_dashboard_cache(dashboard_cache_key('stats')) is None
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestDashboardQueries:
+    """اختبارات مجاميع لوحة التحكم داخل قاعدة البيانات"""
+    
+    def _create_farm(self):
+        from datetime import date, timedelta
+        from biological.models import Species, Pond, Batch
+        from inventory.models import FeedType, FeedInventory, Medicine, MedicineInventory
+        from daily_operations.models import FeedingLog, MortalityLog
+        
+        species = Species.objects.create(arabic_name='سمك البلطي', name='Tilapia')
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('1000.00'))
+        feed_type = FeedType.objects.create(name='Feed', arabic_name='علف', unit='kg')
+        FeedInventory.objects.create(feed_type=feed_type, quantity=Decimal('10.00'), unit_price=Decimal('3.00'))
+        FeedInventory.objects.create(feed_type=feed_type, quantity=Decimal('5.00'), unit_price=Decimal('2.00'))
+        medicine = Medicine.objects.create(name='Salt', arabic_name='ملح', unit='kg')
+        MedicineInventory.objects.create(medicine=medicine, quantity=Decimal('4.00'), unit_price=Decimal('2.50'))
+        
+        today = date.today()
+        for index in range(2):
+            batch = Batch.objects.create(
+                pond=pond,
+                species=species,
+                batch_number=f'BATCH-DASH-{index}',
+                start_date=today - timedelta(days=40),
+                initial_count=1000,
+                initial_weight=Decimal('100.00'),
+                initial_cost=Decimal('2000.00')
+            )
+            for days_ago in (1, 20):
+                FeedingLog.objects.create(
+                    batch=batch,
+                    feed_type=feed_type,
+                    feeding_date=today - timedelta(days=days_ago),
+                    quantity=Decimal('10.00'),
+                    unit_price=Decimal('4.00')
+                )
+                MortalityLog.objects.create(
+                    batch=batch,
+                    mortality_date=today - timedelta(days=days_ago),
+                    count=50
+                )
+        return today
+    
+    def test_dashboard_stats_in_one_query(self, django_assert_num_queries):
+        """جميع إحصائيات لوحة التحكم في استعلام واحد"""
+        from performance.dashboard_queries import get_dashboard_stats_values
+        
+        self._create_farm()
+        with django_assert_num_queries(1):
+            stats = get_dashboard_stats_values()
+        
+        assert stats['total_ponds'] == 1
+        assert stats['active_batches'] == 2
+        assert stats['total_biomass'] == pytest.approx(180.0)
+        assert stats['mortality_rate'] == pytest.approx(10.0)
+        assert stats['total_feed_value'] == pytest.approx(40.0)
+        assert stats['total_medicine_value'] == pytest.approx(10.0)
+    
+    def test_farm_overview_windows_in_one_query(self, django_assert_num_queries):
+        """مجاميع الأسبوع والشهر كمجموع شرطي في نفس الاستعلام"""
+        from performance.dashboard_queries import get_farm_overview_values
+        
+        today = self._create_farm()
+        with django_assert_num_queries(1):
+            overview = get_farm_overview_values(today)
+        
+        assert overview['active_batches'] == 2
+        assert overview['total_biomass_kg'] == pytest.approx(200.0)
+        assert overview['feed_consumption_week_kg'] == pytest.approx(20.0)
+        assert overview['feed_consumption_month_kg'] == pytest.approx(40.0)
+        assert overview['mortality_count_week'] == 100
+        assert overview['mortality_count_month'] == 200
+    
+    def test_batch_performance_sorted_top_n_in_one_query(self, django_assert_num_queries):
+        """أسوأ N دفعات حسب FCR في استعلام واحد وبنفس نتيجة calculate_fcr"""
+        from biological.models import Batch
+        from daily_operations.utils import calculate_fcr, calculate_weight_gain_rate
+        from performance.dashboard_queries import get_batch_performance_rows
+        
+        today = self._create_farm()
+        first, second = Batch.objects.order_by('id')
+        Batch.objects.filter(id=first.id).update(current_weight=Decimal('120.00'))
+        Batch.objects.filter(id=second.id).update(current_weight=Decimal('110.00'))
+        
+        with django_assert_num_queries(1):
+            rows = [
+                (batch.id, batch.perf_fcr, batch.perf_daily_gain, batch.perf_days_active, batch.pond.name)
+                for batch in get_batch_performance_rows(today, sort_by='fcr', limit=1)
+            ]
+        
+        second.refresh_from_db()
+        assert rows == [(
+            second.id,
+            calculate_fcr(second),
+            calculate_weight_gain_rate(second),
+            40,
+            'حوض 1',
+        )]
+        assert rows[0][1] == Decimal('2')
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.api
+class TestTokenUserCache:
+    """اختبارات Cache مستخدمي JWT لـ TokenAuth"""
+    
+    def setup_method(self):
+        from django.core.cache import cache
+        from api.auth_cache import clear_local_token_cache
+        cache.clear()
+        clear_local_token_cache()
+    
+    def test_cached_user_needs_no_query_for_role(self, test_user, django_assert_num_queries):
+        """بعد أول طلب، الدور والمعرف يُقرآن من الـ cache بدون استعلام"""
+        from api.auth_cache import get_token_user
+        
+        token = str(RefreshToken.for_user(test_user).access_token)
+        get_token_user(token)
+        
+        with django_assert_num_queries(0):
+            user = get_token_user(token)
+            assert (user.id, user.role, bool(user)) == (test_user.id, 'owner', True)
+        
+        # باقي الخصائص تحمّل المستخدم الكامل عند الحاجة فقط
+        assert user.username == test_user.username
+    
+    def test_deactivation_and_logout_invalidate(self, client, test_user, django_capture_on_commit_callbacks):
+        """تعطيل المستخدم وتسجيل الخروج يمنعان استخدام الـ Token المخزن"""
+        from rest_framework_simplejwt.exceptions import AuthenticationFailed
+        from api.auth_cache import get_token_user
+        
+        token = str(RefreshToken.for_user(test_user).access_token)
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        assert client.get('/api/auth/me', **auth).status_code == 200
+        
+        assert client.post('/api/auth/logout', **auth).status_code == 200
+        assert client.get('/api/auth/me', **auth).status_code == 401
+        
+        other_token = str(RefreshToken.for_user(test_user).access_token)
+        get_token_user(other_token)
+        with django_capture_on_commit_callbacks(execute=True):
+            test_user.is_active = False
+            test_user.save()
+        with pytest.raises(AuthenticationFailed):
+            get_token_user(other_token)
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestKeysetPagination:
+    """اختبارات Keyset Pagination للقوائم"""
+    
+    def _entries(self):
+        from datetime import date
+        from accounting.models import JournalEntry
+        # قيدان في نفس التاريخ للتحقق من الترتيب الثانوي حسب id
+        for number, day in enumerate([1, 2, 2, 3, 4]):
+            JournalEntry.objects.create(
+                entry_number=f'JE-{number}', entry_date=date(2025, 1, day), description='قيد'
+            )
+        return JournalEntry.objects.all()
+    
+    def test_pages_follow_cursor_without_gaps(self):
+        """الصفحات المتتالية تغطي جميع العناصر بالترتيب بدون تكرار"""
+        from api.pagination import paginate_keyset
+        
+        queryset = self._entries()
+        ordering = ('-entry_date', '-id')
+        expected = list(queryset.order_by(*ordering).values_list('id', flat=True))
+        
+        seen = []
+        cursor = None
+        while True:
+            page = paginate_keyset(queryset, ordering, cursor=cursor, page_size=2, count='exact')
+            assert page['total'] == 5
+            seen.extend(entry.id for entry in page['items'])
+            if not page['has_next']:
+                break
+            cursor = page['next_cursor']
+        
+        assert seen == expected
+        assert page['next_cursor'] is None
+    
+    def test_cursor_bounds_leading_index_key(self):
+        """شرط الـ cursor يحد المسح بالمفتاح الأول في الفهرس (Index Cond) بدلاً من تصفية كل ما قبله"""
+        from django.db import connection
+        from api.pagination import keyset_filter
+        
+        queryset = self._entries()
+        ordering = ('-entry_date', '-id')
+        last = queryset.order_by(*ordering)[1]
+        page_queryset = queryset.filter(
+            keyset_filter(ordering, [last.entry_date, last.id])
+        ).order_by(*ordering)[:3]
+        
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = page_queryset.explain()
+        
+        index_conditions = [line for line in plan.splitlines() if 'Index Cond' in line]
+        assert any('entry_date' in line for line in index_conditions), plan
+        assert [entry.id for entry in page_queryset] == list(
+            queryset.order_by(*ordering).values_list('id', flat=True)[2:5]
+        )
+    
+    def test_invalid_cursor_rejected(self):
+        """Cursor تالف أو لترتيب مختلف يُرفض"""
+        from api.pagination import paginate_keyset, InvalidCursor
+        
+        queryset = self._entries()
+        page = paginate_keyset(queryset, ('-entry_date', '-id'), page_size=2)
+        
+        with pytest.raises(InvalidCursor):
+            paginate_keyset(queryset, ('entry_date', 'id'), cursor=page['next_cursor'])
+        with pytest.raises(InvalidCursor):
+            paginate_keyset(queryset, ('-entry_date', '-id'), cursor='not-a-cursor')
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.api
+class TestAccountingReportParams:
+    """اختبارات التحقق من معاملات تقارير المحاسبة"""
+    
+    def test_malformed_dates_return_400(self, rf):
+        """تاريخ بصيغة غير صالحة يُرجع 400 بدلاً من خطأ في الخادم"""
+        from types import SimpleNamespace
+        from api import accounting
+        
+        request = rf.get('/')
+        request.auth = SimpleNamespace(role='owner')
+        
+        for response in (
+            accounting.get_trial_balance(request, as_of_date='2025-13-01'),
+            accounting.get_balance_sheet(request, as_of_date='yesterday'),
+            accounting.get_income_statement(request, start_date='01/01/2025'),
+            accounting.list_journal_entries(request, end_date='2025-02-30'),
+        ):
+            status, error = response
+            assert status == 400
+            assert 'YYYY-MM-DD' in error.detail
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.api
+class TestAuditLogDateFilters:
+    """اختبارات فلاتر التاريخ في قائمة سجلات التدقيق"""
+
+    def _request(self, rf):
+        from types import SimpleNamespace
+        request = rf.get('/')
+        request.auth = SimpleNamespace(role='owner')
+        return request
+
+    def test_end_date_includes_whole_day(self, rf):
+        """end_date يشمل سجلات اليوم كاملاً"""
+        from datetime import datetime, time
+        from django.utils import timezone
+        from api.audit import list_audit_logs
+        from audit.models import AuditLog
+        from audit.utils import log_action
+
+        log_action('create', 'account', None, entity_id=1)
+        log_action('create', 'account', None, entity_id=2)
+        AuditLog.objects.filter(entity_id=1).update(
+            created_at=timezone.make_aware(datetime(2025, 3, 10, 15, 30))
+        )
+        AuditLog.objects.filter(entity_id=2).update(
+            created_at=timezone.make_aware(datetime.combine(datetime(2025, 3, 11), time.min))
+        )
+
+        page = list_audit_logs(self._request(rf), start_date='2025-03-10', end_date='2025-03-10')
+        assert [log.entity_id for log in page.items] == [1]
+
+    def test_malformed_dates_return_400(self, rf):
+        """تاريخ بصيغة غير صالحة يُرجع 400 بدلاً من خطأ في الخادم"""
+        from api.audit import list_audit_logs
+
+        for params in ({'start_date': '2025-13-01'}, {'end_date': '10/03/2025'}):
+            status, error = list_audit_logs(self._request(rf), **params)
+            assert status == 400
+            assert 'YYYY-MM-DD' in error.detail
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestStreamingExports:
+    """اختبارات التصدير المتدفق (CSV / XLSX)"""
+
+    def _entries(self):
+        from datetime import date
+        from decimal import Decimal
+        from accounting.models import Account, AccountType, JournalEntry, JournalEntryLine
+        account = Account.objects.create(
+            code='1000', name='Cash', arabic_name='النقدية', account_type=AccountType.ASSET
+        )
+        for number in range(3):
+            entry = JournalEntry.objects.create(
+                entry_number=f'JE-{number}', entry_date=date(2025, 1, number + 1), description='قيد'
+            )
+            JournalEntryLine.objects.create(
+                journal_entry=entry, account=account, type='debit', amount=Decimal('100.00')
+            )
+
+    def test_csv_export_streams_all_rows(self):
+        """ملف CSV يحتوي العناوين وجميع القيود"""
+        import csv
+        import io
+        from api.exports import build_export
+
+        self._entries()
+        content = b''.join(build_export('journal-entries', 'csv', {})).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+
+        assert len(rows) == 4
+        assert {row[0] for row in rows[1:]} == {'JE-0', 'JE-1', 'JE-2'}
+
+    def test_xlsx_export_is_valid_workbook(self):
+        """ملف XLSX أرشيف zip صالح بورقة واحدة"""
+        import io
+        import zipfile
+        from api.exports import build_export
+
+        self._entries()
+        content = b''.join(build_export('journal-entries', 'xlsx', {'start_date': '2025-01-02'}))
+
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            assert archive.testzip() is None
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        assert sheet.count('<row>') == 3
+        assert 'JE-0' not in sheet
+
+    def test_unknown_dataset_rejected(self):
+        from api.exports import build_export
+
+        with pytest.raises(ValueError):
+            build_export('unknown', 'csv', {})
+        with pytest.raises(ValueError):
+            build_export('journal-entries', 'parquet', {})
+
+
 @pytest.mark.django_db
 @pytest.mark.integration
 @pytest.mark.api
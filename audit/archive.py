@@ -0,0 +1,302 @@
+"""
+أرشيف سجلات التدقيق الباردة (Cold Archive)
+
+قبل حذف قسم شهر منتهي (audit/partitions.py) تُصدَّر سجلاته إلى ملف
+JSON Lines مضغوط (gzip) لكل tenant، مع ملف فهرس جانبي، في التخزين المشترك
+(default_storage - نفس تخزين ملفات التصدير في api/tasks.py) حتى يبقى الأرشيف
+بعد إعادة نشر عامل Celery ويقرؤه خادم الـ API:
+
+    AUDIT_ARCHIVE_DIR/{schema}/audit_auditlog_p2025_01.jsonl.gz
+    AUDIT_ARCHIVE_DIR/{schema}/audit_auditlog_p2025_01.index.json
+
+السجلات المنتهية في القسم الافتراضي تُصدَّر بنفس الطريقة لكل شهر على حدة
+(audit_auditlog_default_p2025_01) قبل حذفها.
+
+السجلات مرتبة حسب created_at ومقسمة إلى كتل، كل كتلة gzip member مستقل
+(الملف كاملاً يبقى gzip صالحاً). الفهرس يحفظ لكل كتلة موقعها وحدود
+التاريخ والـ id وقيم entity_type و entity_id و user_id و action_type
+الموجودة فيها، فالبحث يقرأ ويفك ضغط الكتل المطابقة فقط.
+
+القراءة من قاعدة البيانات بـ server-side cursor (connection.chunked_cursor)
+فتبقى الذاكرة ثابتة مهما كان حجم القسم، والكتابة إلى ملف مؤقت على القرص ثم
+رفعه للتخزين (البيانات أولاً ثم الفهرس)، فلا يظهر أرشيف بدون فهرسه. بعد الرفع
+يُتحقق من حجم الملفين في التخزين، وفشل التحقق يمنع حذف القسم.
+"""
+import gzip
+import json
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from biological.partitions import add_months
+from .models import AuditLog
+from .partitions import DEFAULT_PARTITION
+
+
+ARCHIVE_COLUMNS = [
+    'id', 'action_type', 'entity_type', 'entity_id', 'entity_description', 'user_id',
+    'user_ip', 'user_agent', 'old_values', 'new_values', 'description', 'notes', 'created_at',
+]
+JSON_COLUMNS = {'old_values', 'new_values'}
+
+# عدد الصفوف المقروءة من الـ cursor في كل دفعة (= حجم كتلة الأرشيف)
+ARCHIVE_FETCH_SIZE = 2000
+
+# الحقول المفهرسة لكل كتلة: حقل الفلتر -> مفتاح القيم في الفهرس
+INDEXED_FIELDS = {
+    'action_type': 'action_types',
+    'entity_type': 'entity_types',
+    'entity_id': 'entity_ids',
+    'user_id': 'user_ids',
+}
+
+
+def archive_path(schema_name, name):
+    """اسم ملف أرشيف القسم في التخزين"""
+    return f'{settings.AUDIT_ARCHIVE_DIR}/{schema_name}/{name}.jsonl.gz'
+
+
+def index_path(schema_name, name):
+    """اسم ملف فهرس أرشيف القسم في التخزين"""
+    return f'{settings.AUDIT_ARCHIVE_DIR}/{schema_name}/{name}.index.json'
+
+
+def _store(name, content, size):
+    """
+    حفظ ملف في التخزين باسم ثابت والتحقق من وصوله كاملاً
+
+    Raises:
+        RuntimeError: إذا لم يُحفظ الملف بالاسم والحجم المتوقعين
+    """
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    saved = default_storage.save(name, content)
+    if saved != name or default_storage.size(saved) != size:
+        raise RuntimeError(f"لم يُحفظ ملف الأرشيف {name} في التخزين كاملاً")
+
+
+def _isoformat(value):
+    # بتوقيت UTC وبطول ثابت (DjangoJSONEncoder يقتطع الـ microseconds)، فالمقارنة النصية صحيحة
+    return value.astimezone(dt_timezone.utc).isoformat(timespec='microseconds')
+
+
+def _row_to_record(row):
+    record = dict(zip(ARCHIVE_COLUMNS, row))
+    for column in JSON_COLUMNS:
+        # jsonb يُعاد كنص من محرك PostgreSQL في Django
+        if isinstance(record[column], str):
+            record[column] = json.loads(record[column])
+    record['created_at'] = _isoformat(record['created_at'])
+    return record
+
+
+def _block_index(records, offset, length):
+    """ملخص كتلة للفهرس (السجلات مرتبة حسب created_at ثم id)"""
+    block = {
+        'offset': offset,
+        'length': length,
+        'rows': len(records),
+        'min_created_at': records[0]['created_at'],
+        'max_created_at': records[-1]['created_at'],
+        'min_id': min(record['id'] for record in records),
+        'max_id': max(record['id'] for record in records),
+    }
+    for field, key in INDEXED_FIELDS.items():
+        block[key] = sorted({record[field] for record in records}, key=lambda value: (value is None, value))
+    return block
+
+
+def _write_archive(name, month, table, bounds=None):
+    """
+    تصدير سجلات جدول (قسم) إلى ملف الأرشيف name مع فهرسه
+
+    Args:
+        name: اسم الأرشيف
+        month: الشهر (يُحفظ في الفهرس لترتيب الأرشيفات)
+        table: الجدول المقروء
+        bounds: (start, end) لحصر created_at (اختياري)
+    """
+    path = archive_path(connection.schema_name, name)
+    index_file = index_path(connection.schema_name, name)
+
+    qn = connection.ops.quote_name
+    where = 'WHERE created_at >= %s AND created_at < %s ' if bounds else ''
+    blocks = []
+    rows = 0
+    with tempfile.TemporaryFile() as output:
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(
+                f'SELECT {", ".join(ARCHIVE_COLUMNS)} FROM {qn(table)} {where}ORDER BY created_at, id',
+                [bound.isoformat() for bound in bounds] if bounds else None,
+            )
+            while True:
+                chunk = cursor.fetchmany(ARCHIVE_FETCH_SIZE)
+                if not chunk:
+                    break
+                records = [_row_to_record(row) for row in chunk]
+                data = gzip.compress(''.join(
+                    json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+                    for record in records
+                ).encode('utf-8'))
+                blocks.append(_block_index(records, output.tell(), len(data)))
+                output.write(data)
+                rows += len(records)
+        size = output.tell()
+        output.seek(0)
+        # الفهرس القديم يُحذف أولاً: أرشيف بدون فهرس لا يظهر في البحث
+        if default_storage.exists(index_file):
+            default_storage.delete(index_file)
+        _store(path, File(output), size)
+
+    index = {
+        'partition': name,
+        'month': month.date().isoformat(),
+        'rows': rows,
+        'blocks': blocks,
+    }
+    content = json.dumps(index).encode('utf-8')
+    _store(index_file, ContentFile(content), len(content))
+
+    return {'partition': name, 'month': index['month'], 'path': path, 'rows': rows}
+
+
+def archive_audit_partition(name, month):
+    """
+    تصدير قسم شهر من سجلات التدقيق للـ tenant الحالي إلى الأرشيف مع فهرسه
+
+    Returns:
+        dict: partition, month, path, rows
+    """
+    return _write_archive(name, month, name)
+
+
+def default_archive_name(month):
+    """اسم أرشيف سجلات شهر من القسم الافتراضي"""
+    return f'{DEFAULT_PARTITION}_p{month.year:04d}_{month.month:02d}'
+
+
+def archive_default_partition_month(month):
+    """
+    تصدير سجلات شهر منتهي من القسم الافتراضي إلى الأرشيف مع فهرسه
+
+    الأشهر التي لها قسم لا تبقى سجلاتها في القسم الافتراضي
+    (create_audit_partition ينقلها)، فلا يتداخل هذا الأرشيف مع أرشيف قسم.
+
+    Returns:
+        dict: partition, month, path, rows
+    """
+    return _write_archive(
+        default_archive_name(month), month, DEFAULT_PARTITION, (month, add_months(month, 1))
+    )
+
+
+@lru_cache(maxsize=256)
+def _load_index(name, modified, size):
+    # وقت التعديل والحجم جزء من المفتاح: إعادة كتابة الأرشيف تُبطل النسخة المخزنة
+    with default_storage.open(name, 'rb') as index_file:
+        return json.loads(index_file.read().decode('utf-8'))
+
+
+def list_archives(schema_name=None):
+    """
+    فهارس أرشيفات الـ tenant (الحالي افتراضياً)
+
+    القراءة من نفس التخزين الذي يكتب فيه عامل Celery (default_storage).
+
+    Returns:
+        list: [(data_path, index)] من الأحدث للأقدم
+    """
+    schema_name = schema_name or connection.schema_name
+    directory = f'{settings.AUDIT_ARCHIVE_DIR}/{schema_name}'
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return []
+    archives = []
+    for file_name in files:
+        if not file_name.endswith('.index.json'):
+            continue
+        name = f'{directory}/{file_name}'
+        index = _load_index(name, default_storage.get_modified_time(name), default_storage.size(name))
+        archives.append((archive_path(schema_name, index['partition']), index))
+    return sorted(archives, key=lambda archive: archive[1]['month'], reverse=True)
+
+
+def _block_matches(block, filters, start, end, log_id, before):
+    if start is not None and block['max_created_at'] < start:
+        return False
+    if end is not None and block['min_created_at'] >= end:
+        return False
+    if before is not None and block['min_created_at'] > before[0]:
+        return False
+    if log_id is not None and not block['min_id'] <= log_id <= block['max_id']:
+        return False
+    return all(
+        value in block[INDEXED_FIELDS[field]]
+        for field, value in filters.items()
+    )
+
+
+def _record_matches(record, filters, start, end, log_id, before):
+    if start is not None and record['created_at'] < start:
+        return False
+    if end is not None and record['created_at'] >= end:
+        return False
+    if before is not None and (record['created_at'], record['id']) >= before:
+        return False
+    if log_id is not None and record['id'] != log_id:
+        return False
+    return all(record[field] == value for field, value in filters.items())
+
+
+def _read_block(path, block):
+    with default_storage.open(path, 'rb') as archive_file:
+        archive_file.seek(block['offset'])
+        data = gzip.decompress(archive_file.read(block['length']))
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+def _to_audit_log(record):
+    """سجل من الأرشيف ككائن AuditLog (غير محفوظ)"""
+    record = dict(record)
+    record['created_at'] = datetime.fromisoformat(record['created_at'])
+    log = AuditLog(**record)
+    log._state.adding = False
+    return log
+
+
+def search_archived_logs(start=None, end=None, log_id=None, before=None, limit=100, **filters):
+    """
+    البحث في أرشيف سجلات التدقيق للـ tenant الحالي
+
+    Args:
+        start, end: حدود created_at (datetime aware، start شاملة و end غير شاملة)
+        log_id: سجل محدد
+        before: (created_at, id) - السجلات الأقدم منه فقط (للـ Keyset Pagination)
+        limit: أقصى عدد للنتائج
+        **filters: action_type, entity_type, entity_id, user_id (مطابقة تامة)
+
+    Returns:
+        list: كائنات AuditLog (غير محفوظة) من الأحدث للأقدم
+    """
+    start = _isoformat(start) if start is not None else None
+    end = _isoformat(end) if end is not None else None
+    before = (_isoformat(before[0]), before[1]) if before is not None else None
+
+    results = []
+    for path, index in list_archives():
+        for block in reversed(index['blocks']):
+            if not _block_matches(block, filters, start, end, log_id, before):
+                continue
+            for record in reversed(_read_block(path, block)):
+                if _record_matches(record, filters, start, end, log_id, before):
+                    results.append(_to_audit_log(record))
+                    if len(results) >= limit:
+                        return results
+    return results
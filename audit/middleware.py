@@ -1,14 +1,19 @@
 """
 Audit Logging Middleware
-لتسجيل IP و User Agent للمستخدم
+لتسجيل IP و User Agent للمستخدم وتجميع سجلات التدقيق لكل طلب
 """
 import threading
 
+from .writer import audit_batch
+
 
 class AuditLoggingMiddleware:
     """
     Middleware لحفظ request في thread local
     لاستخدامه في signals
+    
+    سجلات التدقيق الناتجة عن الطلب تُكتب بـ bulk_create واحد في نهايته، أما
+    المسجلة داخل transaction.atomic() في الـ view فتُكتب داخل تلك الـ transaction
     """
     
     def __init__(self, get_response):
@@ -20,7 +25,8 @@ class AuditLoggingMiddleware:
         thread_local.request = request
         
         try:
-            response = self.get_response(request)
+            with audit_batch():
+                response = self.get_response(request)
             return response
         finally:
             # تنظيف بعد انتهاء request
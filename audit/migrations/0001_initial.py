@@ -0,0 +1,162 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditLog",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "action_type",
+                    models.CharField(
+                        choices=[
+                            ("create", "إنشاء"),
+                            ("update", "تعديل"),
+                            ("delete", "حذف"),
+                            ("view", "عرض"),
+                            ("export", "تصدير"),
+                            ("login", "تسجيل دخول"),
+                            ("logout", "تسجيل خروج"),
+                            ("approve", "موافقة"),
+                            ("reject", "رفض"),
+                            ("post", "ترحيل"),
+                            ("cancel", "إلغاء"),
+                        ],
+                        max_length=20,
+                        verbose_name="نوع العملية",
+                    ),
+                ),
+                (
+                    "entity_type",
+                    models.CharField(
+                        choices=[
+                            ("account", "حساب"),
+                            ("journal_entry", "قيد محاسبي"),
+                            ("harvest", "حصاد"),
+                            ("sales_order", "طلب بيع"),
+                            ("invoice", "فاتورة"),
+                            ("feeding_log", "سجل تغذية"),
+                            ("mortality_log", "سجل نفوق"),
+                            ("batch", "دفعة"),
+                            ("pond", "حوض"),
+                            ("species", "نوع سمكي"),
+                            ("user", "مستخدم"),
+                            ("settings", "إعدادات"),
+                        ],
+                        max_length=50,
+                        verbose_name="نوع الكيان",
+                    ),
+                ),
+                (
+                    "entity_id",
+                    models.IntegerField(
+                        blank=True, null=True, verbose_name="معرف الكيان"
+                    ),
+                ),
+                (
+                    "entity_description",
+                    models.CharField(
+                        blank=True, max_length=255, null=True, verbose_name="وصف الكيان"
+                    ),
+                ),
+                (
+                    "user_ip",
+                    models.GenericIPAddressField(
+                        blank=True, null=True, verbose_name="عنوان IP"
+                    ),
+                ),
+                (
+                    "user_agent",
+                    models.TextField(blank=True, null=True, verbose_name="User Agent"),
+                ),
+                (
+                    "old_values",
+                    models.JSONField(
+                        blank=True,
+                        help_text="القيم قبل التغيير (JSON)",
+                        null=True,
+                        verbose_name="القيم القديمة",
+                    ),
+                ),
+                (
+                    "new_values",
+                    models.JSONField(
+                        blank=True,
+                        help_text="القيم بعد التغيير (JSON)",
+                        null=True,
+                        verbose_name="القيم الجديدة",
+                    ),
+                ),
+                (
+                    "description",
+                    models.TextField(blank=True, null=True, verbose_name="وصف العملية"),
+                ),
+                (
+                    "notes",
+                    models.TextField(blank=True, null=True, verbose_name="ملاحظات"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ العملية"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="audit_logs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="المستخدم",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "سجل تدقيق",
+                "verbose_name_plural": "سجلات التدقيق",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["action_type"], name="audit_audit_action__dd3a3c_idx"
+                    ),
+                    models.Index(
+                        fields=["entity_type"], name="audit_audit_entity__5b2f60_idx"
+                    ),
+                    models.Index(
+                        fields=["entity_id"], name="audit_audit_entity__5b5b4c_idx"
+                    ),
+                    models.Index(
+                        fields=["user"], name="audit_audit_user_id_292c79_idx"
+                    ),
+                    models.Index(
+                        fields=["created_at"], name="audit_audit_created_2c1626_idx"
+                    ),
+                    models.Index(
+                        fields=["action_type", "entity_type"],
+                        name="audit_audit_action__f7ae5f_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+TABLE = "audit_auditlog"
+OLD_TABLE = "audit_auditlog_unpartitioned"
+COLUMNS = (
+    "id, action_type, entity_type, entity_id, entity_description, user_ip, user_agent, "
+    "old_values, new_values, description, notes, created_at, user_id"
+)
+COLUMN_DEFINITIONS = """
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    action_type varchar(20) NOT NULL,
+    entity_type varchar(50) NOT NULL,
+    entity_id integer NULL,
+    entity_description varchar(255) NULL,
+    user_ip inet NULL,
+    user_agent text NULL,
+    old_values jsonb NULL,
+    new_values jsonb NULL,
+    description text NULL,
+    notes text NULL,
+    created_at timestamp with time zone NOT NULL,
+    user_id bigint NULL
+"""
+CONSTRAINTS_AND_INDEXES = [
+    f"ALTER TABLE {TABLE} ADD CONSTRAINT audit_auditlog_user_id_fk_accounts_user_id "
+    f"FOREIGN KEY (user_id) REFERENCES accounts_user (id) DEFERRABLE INITIALLY DEFERRED",
+    f"CREATE INDEX audit_audit_action__dd3a3c_idx ON {TABLE} (action_type)",
+    f"CREATE INDEX audit_audit_entity__5b2f60_idx ON {TABLE} (entity_type)",
+    f"CREATE INDEX audit_audit_entity__5b5b4c_idx ON {TABLE} (entity_id)",
+    f"CREATE INDEX audit_audit_user_id_292c79_idx ON {TABLE} (user_id)",
+    f"CREATE INDEX audit_audit_created_2c1626_idx ON {TABLE} (created_at)",
+    f"CREATE INDEX audit_audit_action__f7ae5f_idx ON {TABLE} (action_type, entity_type)",
+]
+
+
+def _reset_identity(cursor):
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+        f"FROM {TABLE}"
+    )
+
+
+def partition_audit_logs(apps, schema_editor):
+    """تحويل جدول سجلات التدقيق إلى جدول مقسم شهرياً ونقل السجلات الحالية"""
+    from datetime import datetime, timezone
+    from biological.partitions import add_months, month_start
+    from audit.partitions import DEFAULT_PARTITION, create_audit_partition
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} ({COLUMN_DEFINITIONS}) PARTITION BY RANGE (created_at)"
+        )
+
+        # أقسام للأشهر التي تحتوي سجلات + الشهر الحالي والأشهر الثلاثة القادمة
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM {OLD_TABLE}"
+        )
+        months = {month.replace(tzinfo=timezone.utc) for (month,) in cursor.fetchall()}
+        current = month_start(datetime.now(timezone.utc))
+        months.update(add_months(current, offset) for offset in range(4))
+        for month in sorted(months):
+            create_audit_partition(cursor, month)
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE}")
+        _reset_identity(cursor)
+        cursor.execute(f"DROP TABLE {OLD_TABLE}")
+
+        # المفتاح الأساسي في الجدول المقسم يجب أن يتضمن عمود التقسيم
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT audit_auditlog_pkey PRIMARY KEY (id, created_at)"
+        )
+        for statement in CONSTRAINTS_AND_INDEXES:
+            cursor.execute(statement)
+
+
+def unpartition_audit_logs(apps, schema_editor):
+    """إعادة جدول سجلات التدقيق إلى جدول عادي غير مقسم"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(f"CREATE TABLE {TABLE} ({COLUMN_DEFINITIONS})")
+        cursor.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE}")
+        _reset_identity(cursor)
+        cursor.execute(f"DROP TABLE {OLD_TABLE} CASCADE")
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT audit_auditlog_pkey PRIMARY KEY (id)")
+        for statement in CONSTRAINTS_AND_INDEXES:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="auditlog",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="audit_logs",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="المستخدم",
+            ),
+        ),
+        migrations.RunPython(partition_audit_logs, unpartition_audit_logs),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0002_partition_auditlog"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="auditlog",
+            name="audit_audit_created_2c1626_idx",
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["created_at", "id"], name="audit_audit_created_c58561_idx"
+            ),
+        ),
+    ]
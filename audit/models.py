@@ -70,6 +70,7 @@ class AuditLog(models.Model):
         'accounts.User',
         on_delete=models.SET_NULL,
         null=True,
+        db_index=False,  # مغطى بالفهرس (user) في Meta.indexes
         related_name='audit_logs',
         verbose_name="المستخدم"
     )
@@ -120,12 +121,14 @@ class AuditLog(models.Model):
         verbose_name = "سجل تدقيق"
         verbose_name_plural = "سجلات التدقيق"
         ordering = ['-created_at']
+        # الجدول مقسم شهرياً حسب created_at (انظر audit/partitions.py)،
+        # والمفتاح الأساسي في قاعدة البيانات هو (id, created_at)
         indexes = [
             models.Index(fields=['action_type']),
             models.Index(fields=['entity_type']),
             models.Index(fields=['entity_id']),
             models.Index(fields=['user']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),  # Keyset Pagination في API
             models.Index(fields=['action_type', 'entity_type']),
         ]
     
@@ -0,0 +1,208 @@
+"""
+تقسيم جدول سجلات التدقيق (Range Partitioning) حسب الشهر
+
+جدول audit_auditlog مقسم شهرياً حسب created_at داخل كل tenant schema
+(حدود الأشهر بتوقيت UTC، نفس أسلوب biological/partitions.py):
+- audit_auditlog_p2025_01 ... قسم لكل شهر
+- audit_auditlog_default: للسجلات خارج الأقسام المنشأة
+
+الاحتفاظ: يُصدَّر القسم المنتهي (اختيارياً) إلى أرشيف مضغوط (audit/archive.py)
+ثم يُفصل ويُحذف كاملاً (DETACH + DROP TABLE)، فتنتهي العملية خلال ثوانٍ
+مهما كان عدد السجلات، دون DELETE صفاً صفاً ودون ضغط على WAL و VACUUM.
+السجلات المنتهية في القسم الافتراضي تُؤرشف بنفس الطريقة (لكل شهر) ثم تُحذف.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+from django.db import connection, transaction
+
+from biological.partitions import month_start, add_months
+
+
+AUDIT_LOG_TABLE = 'audit_auditlog'
+DEFAULT_PARTITION = f'{AUDIT_LOG_TABLE}_default'
+PARTITION_NAME_RE = re.compile(rf'^{AUDIT_LOG_TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def partition_name(month):
+    """اسم قسم الشهر"""
+    return f'{AUDIT_LOG_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def _table_exists(cursor, name):
+    """هل الجدول موجود في الـ schema الحالي؟"""
+    cursor.execute(
+        'SELECT to_regclass(quote_ident(current_schema()) || %s || quote_ident(%s))',
+        ['.', name],
+    )
+    return cursor.fetchone()[0] is not None
+
+
+def is_partitioned(cursor):
+    """هل جدول سجلات التدقيق مقسم في الـ schema الحالي؟"""
+    cursor.execute(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+        )
+        """,
+        [AUDIT_LOG_TABLE],
+    )
+    return cursor.fetchone()[0]
+
+
+def list_audit_partitions(cursor):
+    """
+    أقسام الأشهر الموجودة في الـ schema الحالي
+
+    Returns:
+        list: [(name, month)] مرتبة حسب الشهر (بدون القسم الافتراضي)
+    """
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = %s AND parent.relnamespace = current_schema()::regnamespace
+        """,
+        [AUDIT_LOG_TABLE],
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+            partitions.append((name, month))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_audit_partition(cursor, month):
+    """
+    إنشاء قسم شهر واحد (إن لم يكن موجوداً)
+
+    إذا كان القسم الافتراضي يحتوي سجلات من نفس الشهر، يُفصل مؤقتاً
+    وتُنقل السجلات إلى القسم الجديد ثم يُعاد ربطه.
+
+    Returns:
+        bool: True إذا تم إنشاء القسم
+    """
+    name = partition_name(month)
+    if _table_exists(cursor, name):
+        return False
+
+    start, end = month, add_months(month, 1)
+    qn = connection.ops.quote_name
+    bounds = [start.isoformat(), end.isoformat()]
+
+    moved = False
+    if _table_exists(cursor, DEFAULT_PARTITION):
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {qn(DEFAULT_PARTITION)} '
+            f'WHERE created_at >= %s AND created_at < %s)',
+            bounds,
+        )
+        moved = cursor.fetchone()[0]
+
+    if moved:
+        cursor.execute(
+            f'ALTER TABLE {qn(AUDIT_LOG_TABLE)} DETACH PARTITION {qn(DEFAULT_PARTITION)}'
+        )
+
+    cursor.execute(
+        f'CREATE TABLE {qn(name)} PARTITION OF {qn(AUDIT_LOG_TABLE)} '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        bounds,
+    )
+
+    if moved:
+        cursor.execute(
+            f'INSERT INTO {qn(name)} SELECT * FROM {qn(DEFAULT_PARTITION)} '
+            f'WHERE created_at >= %s AND created_at < %s',
+            bounds,
+        )
+        cursor.execute(
+            f'DELETE FROM {qn(DEFAULT_PARTITION)} WHERE created_at >= %s AND created_at < %s',
+            bounds,
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(AUDIT_LOG_TABLE)} ATTACH PARTITION {qn(DEFAULT_PARTITION)} DEFAULT'
+        )
+    return True
+
+
+def ensure_audit_partitions(months_ahead=3, now=None):
+    """
+    إنشاء أقسام الشهر الحالي والأشهر القادمة للـ tenant الحالي
+
+    Returns:
+        list: أسماء الأقسام التي تم إنشاؤها
+    """
+    current = month_start(now or datetime.now(dt_timezone.utc))
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return created
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if create_audit_partition(cursor, month):
+                created.append(partition_name(month))
+    return created
+
+
+def drop_expired_audit_partitions(retention_months=12, archive=True, now=None):
+    """
+    حذف أقسام الأشهر الأقدم بالكامل من فترة الاحتفاظ للـ tenant الحالي
+
+    لكل قسم منتهي: تصدير سجلاته إلى الأرشيف (إذا archive=True) قبل أي قفل
+    على الجدول، ثم DETACH و DROP في transaction قصيرة. القسم لا يستقبل
+    سجلات جديدة (created_at وقت الإنشاء)، فلا يفوت التصدير شيئاً. فشل
+    التصدير يُبقي القسم كما هو. السجلات المنتهية في القسم الافتراضي
+    (إن وجدت) تُصدَّر لكل شهر بنفس الطريقة ثم تُحذف.
+
+    Returns:
+        dict: الأقسام المحذوفة، ملفات الأرشيف، وعدد السجلات المحذوفة من القسم الافتراضي
+    """
+    from .archive import archive_audit_partition, archive_default_partition_month
+
+    cutoff = add_months(month_start(now or datetime.now(dt_timezone.utc)), -retention_months)
+    qn = connection.ops.quote_name
+    result = {'dropped': [], 'archived': [], 'default_deleted': 0, 'cutoff': cutoff}
+
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return result
+        expired = [
+            (name, month) for name, month in list_audit_partitions(cursor)
+            if add_months(month, 1) <= cutoff
+        ]
+        default_months = []
+        if _table_exists(cursor, DEFAULT_PARTITION):
+            cursor.execute(
+                f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') "
+                f'FROM {qn(DEFAULT_PARTITION)} WHERE created_at < %s',
+                [cutoff.isoformat()],
+            )
+            default_months = sorted(row[0].replace(tzinfo=dt_timezone.utc) for row in cursor.fetchall())
+
+    for name, month in expired:
+        if archive:
+            result['archived'].append(archive_audit_partition(name, month))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {qn(AUDIT_LOG_TABLE)} DETACH PARTITION {qn(name)}')
+            cursor.execute(f'DROP TABLE {qn(name)}')
+        result['dropped'].append(name)
+
+    # cutoff بداية شهر، فكل شهر هنا منتهٍ بالكامل
+    for month in default_months:
+        if archive:
+            result['archived'].append(archive_default_partition_month(month))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {qn(DEFAULT_PARTITION)} WHERE created_at >= %s AND created_at < %s',
+                [month.isoformat(), add_months(month, 1).isoformat()],
+            )
+            result['default_deleted'] += cursor.rowcount
+
+    return result
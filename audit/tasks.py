@@ -2,83 +2,120 @@
 Celery Tasks لتطبيق Audit Logging
 """
 from celery import shared_task
+from django.conf import settings
+from django.db import connection
 from django.utils import timezone
-from datetime import timedelta
+from django_tenants.utils import schema_context
 import logging
 
-from .models import AuditLog
+from tenants.fanout import fan_out_tenants
+from .partitions import ensure_audit_partitions, drop_expired_audit_partitions
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(name='audit.cleanup_old_logs')
-def cleanup_old_audit_logs(retention_months=12, batch_size=1000):
+def create_tenant_audit_partitions(months_ahead=3):
     """
-    حذف/أرشفة سجلات التدقيق الأقدم من فترة الاحتفاظ المحددة
+    إنشاء أقسام الـ tenant الحالي للشهر الحالي والأشهر القادمة
+    
+    **Returns:**
+    - list: أسماء الأقسام التي تم إنشاؤها
+    """
+    created = ensure_audit_partitions(months_ahead=months_ahead)
+    if created:
+        logger.info(f"[{connection.schema_name}] تم إنشاء أقسام سجلات التدقيق: {', '.join(created)}")
+    return created
+
+
+@shared_task(name='audit.create_audit_partitions')
+def create_audit_partitions(months_ahead=3, schema_name=None):
+    """
+    إنشاء أقسام جدول سجلات التدقيق للشهر الحالي والأشهر القادمة
+    
+    بدون schema_name تُوزع المهمة بالتوازي على جميع الـ tenants
+    (tenants.fanout.fan_out_tenants).
     
     **Parameters:**
-    - retention_months: عدد الأشهر للاحتفاظ بالسجلات (افتراضي: 12 شهر)
-    - batch_size: عدد السجلات للحذف في كل دفعة (افتراضي: 1000)
+    - months_ahead: عدد الأشهر القادمة التي تُنشأ أقسامها مسبقاً (افتراضي: 3)
+    - schema_name: tenant واحد فقط (افتراضي: جميع الـ tenants)
     
     **Returns:**
-    - dict: إحصائيات العملية (عدد السجلات المحذوفة، المدة المستغرقة)
+    - dict: الأقسام التي تم إنشاؤها، أو معرف المهمة الموزعة
     """
-    start_time = timezone.now()
+    if schema_name is None:
+        job_id = fan_out_tenants(
+            'audit.tasks.create_tenant_audit_partitions', {'months_ahead': months_ahead}
+        )
+        return {'job_id': job_id, 'status': 'dispatched'}
     
-    # حساب تاريخ القطع (أقدم من هذا التاريخ سيتم حذفه)
-    cutoff_date = timezone.now() - timedelta(days=retention_months * 30)
+    with schema_context(schema_name):
+        created = create_tenant_audit_partitions(months_ahead=months_ahead)
+    return {
+        'created': {schema_name: created},
+        'created_count': len(created),
+        'status': 'success'
+    }
+
+
+def cleanup_tenant_audit_logs(retention_months=12, archive=True):
+    """
+    حذف أقسام سجلات التدقيق المنتهية للـ tenant الحالي (مع أرشفتها اختيارياً)
     
-    logger.info(
-        f"بدء تنظيف سجلات التدقيق الأقدم من {cutoff_date.strftime('%Y-%m-%d')} "
-        f"(الاحتفاظ بآخر {retention_months} شهر)"
-    )
+    **Returns:**
+    - dict: الأقسام المحذوفة والمؤرشفة وعدد سجلات القسم الافتراضي المحذوفة
+    """
+    result = drop_expired_audit_partitions(retention_months=retention_months, archive=archive)
+    if result['dropped']:
+        logger.info(f"[{connection.schema_name}] تم حذف الأقسام: {', '.join(result['dropped'])}")
+    return {
+        'dropped': result['dropped'],
+        'archived': result['archived'],
+        'default_deleted': result['default_deleted'],
+        'cutoff_date': result['cutoff'].isoformat(),
+    }
+
+
+@shared_task(name='audit.cleanup_old_logs')
+def cleanup_old_audit_logs(retention_months=12, archive=None, schema_name=None):
+    """
+    حذف سجلات التدقيق الأقدم من فترة الاحتفاظ بحذف أقسام الأشهر كاملة
     
-    # حساب عدد السجلات المراد حذفها
-    total_to_delete = AuditLog.objects.filter(created_at__lt=cutoff_date).count()
-    
-    if total_to_delete == 0:
-        logger.info("لا توجد سجلات قديمة للحذف")
-        return {
-            'deleted_count': 0,
-            'cutoff_date': cutoff_date.isoformat(),
-            'duration_seconds': 0,
-            'status': 'no_records_to_delete'
-        }
-    
-    logger.info(f"تم العثور على {total_to_delete} سجل قديم للحذف")
-    
-    # حذف السجلات على دفعات لتجنب الضغط على قاعدة البيانات
-    deleted_count = 0
-    while True:
-        # جلب دفعة من السجلات القديمة
-        old_logs = AuditLog.objects.filter(
-            created_at__lt=cutoff_date
-        ).order_by('created_at')[:batch_size]
-        
-        if not old_logs.exists():
-            break
-        
-        # حذف الدفعة
-        batch_ids = list(old_logs.values_list('id', flat=True))
-        deleted_batch = AuditLog.objects.filter(id__in=batch_ids).delete()[0]
-        deleted_count += deleted_batch
-        
-        logger.info(
-            f"تم حذف {deleted_batch} سجل "
-            f"(إجمالي: {deleted_count}/{total_to_delete})"
-        )
+    بدلاً من حذف السجلات على دفعات (SELECT ids ثم DELETE) يُصدَّر قسم الشهر
+    المنتهي إلى الأرشيف المضغوط (اختيارياً) ثم يُفصل ويُحذف بـ DROP TABLE،
+    فتنتهي العملية خلال ثوانٍ مهما كان عدد السجلات. بدون schema_name تُوزع
+    المهمة بالتوازي على جميع الـ tenants (tenants.fanout.fan_out_tenants).
+    
+    **Parameters:**
+    - retention_months: عدد الأشهر للاحتفاظ بالسجلات (افتراضي: 12 شهر)
+    - archive: تصدير الأقسام قبل حذفها (افتراضي: AUDIT_ARCHIVE_BEFORE_DROP)
+    - schema_name: tenant واحد فقط (افتراضي: جميع الـ tenants)
     
+    **Returns:**
+    - dict: نتيجة الـ tenant والمدة المستغرقة، أو معرف المهمة الموزعة
+    """
+    if archive is None:
+        archive = settings.AUDIT_ARCHIVE_BEFORE_DROP
+    kwargs = {'retention_months': retention_months, 'archive': archive}
+    
+    if schema_name is None:
+        job_id = fan_out_tenants('audit.tasks.cleanup_tenant_audit_logs', kwargs)
+        return {'job_id': job_id, 'retention_months': retention_months, 'status': 'dispatched'}
+    
+    start_time = timezone.now()
+    with schema_context(schema_name):
+        result = cleanup_tenant_audit_logs(**kwargs)
     duration = (timezone.now() - start_time).total_seconds()
     
+    archived_rows = sum(item['rows'] for item in result['archived'])
     logger.info(
-        f"اكتمل تنظيف سجلات التدقيق: تم حذف {deleted_count} سجل "
-        f"خلال {duration:.2f} ثانية"
+        f"[{schema_name}] اكتمل تنظيف سجلات التدقيق: تم حذف {len(result['dropped'])} قسم "
+        f"(أرشفة {archived_rows} سجل) خلال {duration:.2f} ثانية"
     )
     
     return {
-        'deleted_count': deleted_count,
-        'total_found': total_to_delete,
-        'cutoff_date': cutoff_date.isoformat(),
+        'tenants': {schema_name: result},
+        'dropped_count': len(result['dropped']),
+        'archived_rows': archived_rows,
         'retention_months': retention_months,
         'duration_seconds': round(duration, 2),
         'status': 'success'
@@ -86,30 +123,21 @@ def cleanup_old_audit_logs(retention_months=12, batch_size=1000):
 
 
 @shared_task(name='audit.archive_old_logs')
-def archive_old_audit_logs(retention_months=12, archive_table_name='audit_auditlog_archive'):
+def archive_old_audit_logs(retention_months=12, schema_name=None):
     """
-    أرشفة سجلات التدقيق القديمة (بدلاً من حذفها)
+    أرشفة سجلات التدقيق القديمة ثم حذفها من الجدول
     
-    **ملاحظة:** هذه الدالة تتطلب إنشاء جدول أرشيف مسبقاً
-    يمكن استخدامها كبديل للحذف إذا كان هناك متطلبات قانونية للاحتفاظ بالسجلات
+    نفس cleanup_old_audit_logs مع التصدير إلى الأرشيف دائماً (بغض النظر عن
+    AUDIT_ARCHIVE_BEFORE_DROP)، للـ tenants التي تتطلب الاحتفاظ بالسجل الكامل.
+    الأرشيف يبقى قابلاً للبحث من API سجلات التدقيق (audit/archive.py).
     
     **Parameters:**
-    - retention_months: عدد الأشهر للاحتفاظ بالسجلات النشطة
-    - archive_table_name: اسم جدول الأرشيف
+    - retention_months: عدد الأشهر للاحتفاظ بالسجلات في الجدول
+    - schema_name: tenant واحد فقط (افتراضي: جميع الـ tenants)
     
     **Returns:**
     - dict: إحصائيات العملية
     """
-    # TODO: تنفيذ منطق الأرشفة عند الحاجة
-    # يمكن استخدام django-archive أو إنشاء جدول أرشيف يدوياً
-    
-    logger.warning(
-        "أرشفة سجلات التدقيق غير مُنفذة حالياً. "
-        "استخدم cleanup_old_audit_logs للحذف المباشر."
+    return cleanup_old_audit_logs(
+        retention_months=retention_months, archive=True, schema_name=schema_name
     )
-    
-    return {
-        'status': 'not_implemented',
-        'message': 'الأرشفة غير مُنفذة حالياً'
-    }
-
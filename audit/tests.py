@@ -0,0 +1,224 @@
+"""
+Unit Tests لتطبيق Audit Logging
+"""
+import pytest
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from audit.models import AuditLog
+from audit.utils import log_action
+from audit.writer import audit_batch
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestAuditBatchWriter:
+    """اختبارات كتابة سجلات التدقيق المجمّعة"""
+
+    def test_events_written_once_at_block_exit(self):
+        """الأحداث داخل الكتلة لا تنفذ استعلامات، وتُكتب جميعها عند الخروج"""
+        with audit_batch():
+            with CaptureQueriesContext(connection) as queries:
+                for entity_id in range(3):
+                    log_action('create', 'account', None, entity_id=entity_id)
+            assert len(queries) == 0
+            assert AuditLog.objects.count() == 0
+
+        assert sorted(AuditLog.objects.values_list('entity_id', flat=True)) == [0, 1, 2]
+
+    def test_rolled_back_transaction_is_not_audited(self, django_capture_on_commit_callbacks):
+        """أحداث transaction أُلغيت لا تُكتب، وأحداث المكتملة تُكتب"""
+        with django_capture_on_commit_callbacks(execute=True):
+            with audit_batch():
+                with transaction.atomic():
+                    log_action('create', 'account', None, entity_id=1)
+                with pytest.raises(ValueError):
+                    with transaction.atomic():
+                        log_action('create', 'account', None, entity_id=2)
+                        raise ValueError('rollback')
+
+        assert list(AuditLog.objects.values_list('entity_id', flat=True)) == [1]
+
+    def test_view_transaction_writes_events_before_commit(self):
+        """أحداث atomic() داخل كتلة الطلب تُكتب داخل نفس الـ transaction قبل الـ commit"""
+        with audit_batch():
+            with transaction.atomic():
+                log_action('create', 'journal_entry', None, entity_id=1)
+                assert AuditLog.objects.filter(entity_id=1).exists()
+            log_action('update', 'journal_entry', None, entity_id=2)
+            assert not AuditLog.objects.filter(entity_id=2).exists()
+
+        assert sorted(AuditLog.objects.values_list('entity_id', flat=True)) == [1, 2]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestAuditPartitions:
+    """اختبارات تقسيم جدول سجلات التدقيق شهرياً وحذف الأقسام المنتهية"""
+
+    def test_future_partitions_created(self):
+        """إنشاء أقسام الشهر الحالي والأشهر القادمة"""
+        from datetime import datetime, timezone
+        from audit.partitions import (
+            is_partitioned, list_audit_partitions, ensure_audit_partitions, partition_name
+        )
+
+        now = datetime.now(timezone.utc)
+        ensure_audit_partitions(months_ahead=3, now=now)
+
+        with connection.cursor() as cursor:
+            assert is_partitioned(cursor)
+            names = [name for name, _ in list_audit_partitions(cursor)]
+        assert partition_name(datetime(now.year, now.month, 1, tzinfo=timezone.utc)) in names
+        assert ensure_audit_partitions(months_ahead=3, now=now) == []
+
+    def test_expired_partition_archived_then_dropped(self, settings, tmp_path):
+        """القسم المنتهي يُصدَّر إلى الأرشيف ثم يُحذف كاملاً"""
+        import gzip
+        import json
+        from datetime import datetime, timedelta, timezone
+        from audit.partitions import (
+            add_months, month_start, create_audit_partition, drop_expired_audit_partitions,
+            partition_name
+        )
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        now = datetime.now(timezone.utc)
+        old_month = add_months(month_start(now), -24)
+        with connection.cursor() as cursor:
+            create_audit_partition(cursor, old_month)
+
+        log_action('create', 'account', None, entity_id=1)
+        log_action('create', 'account', None, entity_id=2)
+        AuditLog.objects.filter(entity_id=1).update(created_at=old_month + timedelta(days=3))
+
+        result = drop_expired_audit_partitions(retention_months=12, archive=True, now=now)
+
+        assert partition_name(old_month) in result['dropped']
+        assert list(AuditLog.objects.values_list('entity_id', flat=True)) == [2]
+        archived = result['archived'][0]
+        assert archived['rows'] == 1
+        # الأرشيف في التخزين المشترك (MEDIA_ROOT) وليس على قرص العامل
+        assert archived['path'].startswith(f'{settings.AUDIT_ARCHIVE_DIR}/')
+        with default_storage.open(archived['path'], 'rb') as stored:
+            with gzip.open(stored, 'rt', encoding='utf-8') as archive_file:
+                records = [json.loads(line) for line in archive_file]
+        assert [record['entity_id'] for record in records] == [1]
+
+    def test_partition_kept_when_archive_not_stored(self, settings, tmp_path, monkeypatch):
+        """فشل التحقق من حفظ الأرشيف في التخزين يمنع حذف القسم"""
+        from datetime import datetime, timedelta, timezone
+        from audit.partitions import (
+            add_months, month_start, create_audit_partition, drop_expired_audit_partitions
+        )
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        now = datetime.now(timezone.utc)
+        old_month = add_months(month_start(now), -24)
+        with connection.cursor() as cursor:
+            create_audit_partition(cursor, old_month)
+        log_action('create', 'account', None, entity_id=1)
+        AuditLog.objects.filter(entity_id=1).update(created_at=old_month + timedelta(days=3))
+
+        monkeypatch.setattr(default_storage, 'size', lambda name: 0)
+        with pytest.raises(RuntimeError):
+            drop_expired_audit_partitions(retention_months=12, archive=True, now=now)
+
+        assert list(AuditLog.objects.values_list('entity_id', flat=True)) == [1]
+
+    def test_expired_default_partition_rows_archived(self, settings, tmp_path):
+        """سجلات القسم الافتراضي المنتهية تُصدَّر إلى الأرشيف قبل حذفها"""
+        from datetime import datetime, timedelta, timezone
+        from audit.archive import default_archive_name, search_archived_logs
+        from audit.partitions import add_months, month_start, drop_expired_audit_partitions
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        now = datetime.now(timezone.utc)
+        # لا يوجد قسم لهذا الشهر فيبقى السجل في القسم الافتراضي
+        old_month = add_months(month_start(now), -30)
+
+        log_action('create', 'account', None, entity_id=7)
+        log_action('create', 'account', None, entity_id=8)
+        AuditLog.objects.filter(entity_id=7).update(created_at=old_month + timedelta(days=3))
+
+        result = drop_expired_audit_partitions(retention_months=12, archive=True, now=now)
+
+        assert result['default_deleted'] == 1
+        assert list(AuditLog.objects.values_list('entity_id', flat=True)) == [8]
+        assert [item['partition'] for item in result['archived']] == [default_archive_name(old_month)]
+        assert default_storage.exists(result['archived'][0]['path'])
+        assert [log.entity_id for log in search_archived_logs(entity_id=7)] == [7]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestAuditArchiveSearch:
+    """اختبارات البحث في أرشيف سجلات التدقيق باستخدام الفهرس الجانبي"""
+
+    def test_search_uses_block_index(self, settings, tmp_path, monkeypatch):
+        """البحث يقرأ الكتل المطابقة فقط ويعيد النتائج من الأحدث للأقدم"""
+        from datetime import datetime, timedelta, timezone
+        from audit import archive
+        from audit.partitions import (
+            add_months, month_start, create_audit_partition, drop_expired_audit_partitions
+        )
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        monkeypatch.setattr(archive, 'ARCHIVE_FETCH_SIZE', 2)
+        now = datetime.now(timezone.utc)
+        old_month = add_months(month_start(now), -24)
+        with connection.cursor() as cursor:
+            create_audit_partition(cursor, old_month)
+
+        for entity_id in range(6):
+            log_action('update', 'account', None, entity_id=entity_id)
+        for offset, log in enumerate(AuditLog.objects.order_by('entity_id')):
+            AuditLog.objects.filter(pk=log.pk).update(created_at=old_month + timedelta(days=offset))
+        drop_expired_audit_partitions(retention_months=12, archive=True, now=now)
+        assert AuditLog.objects.count() == 0
+
+        read_blocks = []
+        read_block = archive._read_block
+        monkeypatch.setattr(
+            archive, '_read_block',
+            lambda path, block: read_blocks.append(block) or read_block(path, block),
+        )
+
+        found = archive.search_archived_logs(entity_type='account', entity_id=4)
+        assert [log.entity_id for log in found] == [4]
+        assert len(read_blocks) == 1
+
+        recent = archive.search_archived_logs(start=old_month + timedelta(days=3))
+        assert [log.entity_id for log in recent] == [5, 4, 3]
+
+        by_id = archive.search_archived_logs(log_id=found[0].id, limit=1)
+        assert by_id[0].get_action_type_display() == found[0].get_action_type_display()
+
+    def test_api_reads_archives_from_shared_storage(self, settings, tmp_path, rf):
+        """API سجلات التدقيق يقرأ الأرشيف من التخزين المشترك الذي كتبه العامل"""
+        from datetime import datetime, timedelta, timezone
+        from types import SimpleNamespace
+        from api.audit import get_audit_log, list_audit_logs
+        from audit.partitions import (
+            add_months, month_start, create_audit_partition, drop_expired_audit_partitions
+        )
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        now = datetime.now(timezone.utc)
+        old_month = add_months(month_start(now), -24)
+        with connection.cursor() as cursor:
+            create_audit_partition(cursor, old_month)
+        log_action('create', 'account', None, entity_id=1)
+        log_action('create', 'account', None, entity_id=2)
+        AuditLog.objects.filter(entity_id=1).update(created_at=old_month + timedelta(days=3))
+        drop_expired_audit_partitions(retention_months=12, archive=True, now=now)
+        assert (tmp_path / settings.AUDIT_ARCHIVE_DIR / connection.schema_name).is_dir()
+
+        request = rf.get('/')
+        request.auth = SimpleNamespace(role='owner')
+        page = list_audit_logs(request, entity_type='account')
+        assert [log.entity_id for log in page.items] == [2, 1]
+
+        archived = get_audit_log(request, page.items[1].id)
+        assert archived.entity_id == 1
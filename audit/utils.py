@@ -4,6 +4,7 @@ Audit Logging Utilities
 """
 from typing import Optional, Dict, Any
 from .models import AuditLog
+from .writer import record_audit_event
 
 
 def log_action(
@@ -23,6 +24,9 @@ def log_action(
     """
     تسجيل عملية في سجل التدقيق
     
+    داخل audit_batch() (كل طلب API) يُكتب السجل مع باقي سجلات الكتلة عند
+    انتهائها، وبدونها أو داخل transaction فُتحت بعد الكتلة يُكتب فوراً.
+    
     Args:
         action_type: نوع العملية (create, update, delete, etc.)
         entity_type: نوع الكيان (account, journal_entry, etc.)
@@ -42,26 +46,21 @@ def log_action(
     if request and not user_agent:
         user_agent = request.META.get('HTTP_USER_AGENT', '')
     
-    try:
-        AuditLog.objects.create(
-            action_type=action_type,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            entity_description=entity_description,
-            user=user,
-            old_values=old_values,
-            new_values=new_values,
-            description=description,
-            user_ip=user_ip,
-            user_agent=user_agent,
-            notes=notes,
-        )
-    except Exception as e:
-        # لا نريد أن تفشل العمليات بسبب مشاكل في Audit Logging
-        # يمكن إضافة logging هنا للتسجيل في ملف log
-        import logging
-        logger = logging.getLogger('audit')
-        logger.error(f"فشل في تسجيل Audit Log: {str(e)}")
+    # الحدث يُجمع مع أحداث الطلب أو الدفعة ويُكتب بـ bulk_create (audit/writer.py)
+    # user_id بدلاً من user حتى لا يُحمّل المستخدم الكامل من request.auth
+    record_audit_event(AuditLog(
+        action_type=action_type,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        entity_description=entity_description,
+        user_id=getattr(user, 'pk', None),
+        old_values=old_values,
+        new_values=new_values,
+        description=description,
+        user_ip=user_ip,
+        user_agent=user_agent,
+        notes=notes,
+    ))
 
 
 def log_financial_transaction(
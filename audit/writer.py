@@ -0,0 +1,118 @@
+"""
+كاتب سجلات التدقيق المجمّع (Audit Batch Writer)
+
+بدلاً من INSERT لكل عملية مدققة، تُجمع الأحداث داخل audit_batch() وتُكتب
+بـ bulk_create عند الخروج من الكتلة (أو كلما بلغت AUDIT_BULK_BATCH_SIZE):
+
+    with audit_batch():
+        ...  # signals التدقيق تضيف الأحداث للذاكرة فقط
+
+- AuditLoggingMiddleware يفتح كتلة لكل طلب، و JournalPoster وطابور الترحيل
+  لكل دفعة، فتُكتب سجلات الطلب أو الدفعة في INSERT واحد
+- الكتابة تتم داخل الـ transaction المحيطة بالكتلة (إن وُجدت)، فتُحفظ السجلات
+  مع العمليات المدققة أو لا تُحفظ معاً (Outbox semantics): لا يضيع حدث
+  بتعطل العامل بعد الـ commit، ولا يُسجل حدث لعملية أُلغيت
+- الحدث المسجل داخل transaction فُتحت داخل الكتلة (مثل transaction.atomic في
+  view تحت كتلة الطلب) يُكتب فوراً داخل تلك الـ transaction: Django لا يوفر
+  hook قبل الـ commit، وتأجيله إلى ما بعده يُضيعه إذا تعطل العامل بينهما.
+  للتجميع داخل transaction تُفتح الكتلة داخلها:
+  with transaction.atomic(), audit_batch()
+- بدون كتلة مفتوحة (مثل Shell أو مهمة لا تستخدم audit_batch) يُكتب الحدث فوراً
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection, transaction
+from django_tenants.utils import schema_context
+
+from .models import AuditLog
+
+logger = logging.getLogger('audit')
+
+_state = threading.local()
+
+
+def _stack():
+    if not hasattr(_state, 'stack'):
+        _state.stack = []
+    return _state.stack
+
+
+def write_audit_events(events):
+    """
+    كتابة أحداث التدقيق بـ bulk_create (مجمعة حسب الـ schema)
+
+    الكتابة داخل savepoint حتى لا يفسد فشلها الـ transaction المحيطة؛ الفشل
+    يُسجل في log ولا يوقف العملية (كما في log_action سابقاً).
+    """
+    by_schema = {}
+    for schema_name, event in events:
+        by_schema.setdefault(schema_name, []).append(event)
+
+    for schema_name, schema_events in by_schema.items():
+        try:
+            with schema_context(schema_name), transaction.atomic():
+                AuditLog.objects.bulk_create(schema_events, batch_size=settings.AUDIT_BULK_BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"فشل في تسجيل {len(schema_events)} Audit Log في {schema_name}: {str(e)}")
+
+
+class AuditBuffer:
+    """أحداث التدقيق المعلقة لكتلة audit_batch واحدة"""
+
+    def __init__(self):
+        self.events = []
+        self.depth = len(connection.atomic_blocks)
+
+    def record(self, event):
+        entry = (connection.schema_name, event)
+        if len(connection.atomic_blocks) > self.depth:
+            # transaction فُتحت داخل الكتلة: يُكتب الحدث داخلها ليُحفظ أو يُلغى معها
+            write_audit_events([entry])
+            return
+        self.events.append(entry)
+        if len(self.events) >= settings.AUDIT_BULK_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        events, self.events = self.events, []
+        if events:
+            write_audit_events(events)
+
+
+@contextmanager
+def audit_batch():
+    """
+    تجميع أحداث التدقيق داخل الكتلة وكتابتها بـ bulk_create عند الخروج
+
+    الكتلة المتداخلة على نفس مستوى الـ transaction تستخدم الكتلة الخارجية،
+    أما داخل transaction أعمق فتُفتح كتلة جديدة تُكتب قبل انتهاء تلك
+    الـ transaction. إذا خرجت الكتلة باستثناء داخل transaction (ستُلغى)
+    تُهمل الأحداث المعلقة، أما بدون transaction فالعمليات حُفظت فتُكتب أحداثها.
+    """
+    stack = _stack()
+    if stack and stack[-1].depth == len(connection.atomic_blocks):
+        yield stack[-1]
+        return
+
+    buffer = AuditBuffer()
+    stack.append(buffer)
+    try:
+        yield buffer
+    except BaseException:
+        if buffer.depth or connection.needs_rollback:
+            buffer.events = []
+        raise
+    finally:
+        stack.pop()
+        buffer.flush()
+
+
+def record_audit_event(event):
+    """إضافة حدث (AuditLog غير محفوظ) للكتلة المفتوحة، أو كتابته فوراً بدونها"""
+    stack = _stack()
+    if stack:
+        stack[-1].record(event)
+    else:
+        write_audit_events([(connection.schema_name, event)])
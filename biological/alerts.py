@@ -0,0 +1,247 @@
+"""
+محرك تقييم تنبيهات المستشعرات (Alert Rule Engine)
+
+- تُجمَّع قواعد SensorAlertRule النشطة لكل tenant في صيغة مُترجمة داخل
+  الذاكرة (قاموس حسب (pond_id, sensor_type))، ويُعاد تحميلها فقط عند
+  تغير رقم الإصدار المخزن في Cache (يتغير مع أي تعديل على القواعد).
+- حالة كل سلسلة (آخر قيمة، نافذة المتوسط المتحرك، القواعد المفعلة)
+  تُحفظ في Cache وتُقرأ/تُكتب مرة واحدة لكل دفعة قراءات.
+- التقييم لكل قراءة O(عدد القواعد) دون أي استعلام لقاعدة البيانات.
+- is_alert يُضبط على كل قراءة تخالف قاعدة، أما التنبيه (SensorAlert) فيُطلق
+  عند الانتقال إلى حالة التنبيه فقط، ويُحفظ ويُرسل للمشتركين بشكل غير
+  متزامن عبر Celery.
+- الحالة الجديدة تُكتب في Cache بعد اكتمال الـ transaction التي تحفظ القراءات.
+"""
+import time
+from collections import namedtuple
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.dispatch import Signal
+
+
+# يُرسل بعد حفظ التنبيهات: sender=SensorAlert, alerts=[SensorAlert], schema_name=str
+sensor_alerts_fired = Signal()
+
+STATE_TIMEOUT = 24 * 60 * 60
+
+CompiledRule = namedtuple(
+    'CompiledRule',
+    'id rule_type severity min_value max_value max_change window_size',
+)
+FiredAlert = namedtuple('FiredAlert', 'reading rule message')
+
+# schema_name -> (version, {(pond_id, sensor_type): (CompiledRule, ...)})
+_compiled_rules = {}
+
+
+def _version_key():
+    return f'iot:alert-rules:version:{connection.schema_name}'
+
+
+def _state_key(pond_id, sensor_type):
+    return f'iot:alert-state:{connection.schema_name}:{pond_id}:{sensor_type}'
+
+
+def invalidate_alert_rules():
+    """تغيير رقم إصدار القواعد ليُعاد تحميلها في جميع العمليات (workers)"""
+    cache.set(_version_key(), time.time_ns(), None)
+
+
+def _optional_float(value):
+    return float(value) if value is not None else None
+
+
+def compile_alert_rules():
+    """
+    تحميل القواعد النشطة وترجمتها
+
+    Returns:
+        dict: {(pond_id, sensor_type): (CompiledRule, ...)} حيث pond_id=None للقواعد العامة
+    """
+    from .models import SensorAlertRule
+
+    compiled = {}
+    for rule in SensorAlertRule.objects.filter(is_active=True).order_by('id'):
+        key = (rule.pond_id, rule.sensor_type)
+        compiled[key] = compiled.get(key, ()) + (CompiledRule(
+            id=rule.id,
+            rule_type=rule.rule_type,
+            severity=rule.severity,
+            min_value=_optional_float(rule.min_value),
+            max_value=_optional_float(rule.max_value),
+            max_change=_optional_float(rule.max_change),
+            window_size=max(1, rule.window_size),
+        ),)
+    return compiled
+
+
+def get_compiled_rules(version):
+    """
+    القواعد المترجمة للـ tenant الحالي (من الذاكرة إن كان الإصدار مطابقاً)
+
+    Args:
+        version: رقم الإصدار المقروء من Cache (None إذا لم يكن موجوداً)
+    """
+    schema_name = connection.schema_name
+    if version is None:
+        cache.add(_version_key(), time.time_ns(), None)
+        version = cache.get(_version_key())
+
+    cached = _compiled_rules.get(schema_name)
+    if cached is None or cached[0] != version:
+        cached = (version, compile_alert_rules())
+        _compiled_rules[schema_name] = cached
+    return cached[1]
+
+
+def _outside(value, rule):
+    return (
+        (rule.min_value is not None and value < rule.min_value)
+        or (rule.max_value is not None and value > rule.max_value)
+    )
+
+
+def _range_text(rule):
+    low = rule.min_value if rule.min_value is not None else '-'
+    high = rule.max_value if rule.max_value is not None else '-'
+    return f'[{low} - {high}]'
+
+
+def _check(rule, value, state, in_order):
+    """
+    تقييم قاعدة واحدة
+
+    Returns:
+        str | None: رسالة التنبيه إذا تحقق الشرط
+    """
+    if rule.rule_type == 'threshold':
+        if _outside(value, rule):
+            return f'القيمة {value} خارج النطاق المسموح {_range_text(rule)}'
+
+    elif rule.rule_type == 'rate_of_change':
+        if in_order and state['last'] is not None and rule.max_change is not None:
+            minutes = max(state['elapsed'], 1) / 60
+            rate = abs(value - state['last']) / minutes
+            if rate > rule.max_change:
+                return f'تغير سريع في القيمة: {rate:.3f} لكل دقيقة (الحد {rule.max_change})'
+
+    elif rule.rule_type == 'moving_average':
+        window = state['window']
+        if in_order and len(window) >= rule.window_size:
+            average = sum(window[-rule.window_size:]) / rule.window_size
+            if _outside(average, rule):
+                return (
+                    f'متوسط آخر {rule.window_size} قراءات {average:.3f} '
+                    f'خارج النطاق المسموح {_range_text(rule)}'
+                )
+    return None
+
+
+def evaluate_sensor_readings(readings):
+    """
+    تقييم دفعة قراءات مقابل قواعد التنبيه (قبل الحفظ)
+
+    يضبط is_alert و alert_message على كل قراءة حسب القواعد التي تخالفها.
+    يُستدعى داخل الـ transaction التي تحفظ القراءات، فحالة السلاسل لا تُكتب
+    في Cache إلا بعد اكتمالها.
+
+    Args:
+        readings: قائمة SensorReading (محفوظة أو غير محفوظة)
+
+    Returns:
+        list: FiredAlert لكل تنبيه جديد
+    """
+    if not readings:
+        return []
+
+    series_keys = {(r.pond_id, r.sensor_type) for r in readings}
+    state_keys = {key: _state_key(*key) for key in series_keys}
+    cached = cache.get_many([_version_key(), *state_keys.values()])
+    rules = get_compiled_rules(cached.get(_version_key()))
+    if not rules:
+        return []
+
+    series_rules = {
+        key: rules.get(key, ()) + rules.get((None, key[1]), ())
+        for key in series_keys
+    }
+    states = {}
+    fired = []
+
+    for reading in sorted(readings, key=lambda r: r.reading_date):
+        key = (reading.pond_id, reading.sensor_type)
+        applicable = series_rules[key]
+        if not applicable:
+            continue
+
+        state = states.get(key)
+        if state is None:
+            state = cached.get(state_keys[key]) or {
+                'last': None, 'last_at': None, 'window': [], 'active': [],
+            }
+            states[key] = state
+
+        value = float(reading.reading_value)
+        moment = reading.reading_date.timestamp()
+        # القراءات المتأخرة (أقدم من آخر قراءة) تُقيَّم بالحدود فقط
+        in_order = state['last_at'] is None or moment >= state['last_at']
+        if in_order:
+            state['elapsed'] = moment - state['last_at'] if state['last_at'] is not None else 0
+            window_size = max(rule.window_size for rule in applicable)
+            state['window'] = (state['window'] + [value])[-window_size:]
+
+        # active: القواعد المفعلة حالياً، لإرسال تنبيه واحد لكل فترة مخالفة
+        active = set(state['active'])
+        messages = []
+        for rule in applicable:
+            message = _check(rule, value, state, in_order)
+            if message:
+                messages.append(message)
+                if rule.id not in active:
+                    active.add(rule.id)
+                    fired.append(FiredAlert(reading, rule, message))
+            elif in_order:
+                active.discard(rule.id)
+        state['active'] = sorted(active)
+
+        if in_order:
+            state['last'] = value
+            state['last_at'] = moment
+        state.pop('elapsed', None)
+
+        reading.is_alert = bool(messages)
+        reading.alert_message = ' | '.join(messages) or None
+
+    if states:
+        new_states = {state_keys[key]: state for key, state in states.items()}
+        transaction.on_commit(lambda: cache.set_many(new_states, STATE_TIMEOUT))
+    return fired
+
+
+def dispatch_sensor_alerts(fired):
+    """
+    جدولة حفظ التنبيهات وإرسالها للمشتركين بعد اكتمال الـ transaction
+
+    Args:
+        fired: قائمة FiredAlert (بعد حفظ القراءات للحصول على معرفاتها)
+    """
+    if not fired:
+        return
+
+    from .tasks import persist_sensor_alerts
+
+    schema_name = connection.schema_name
+    payload = [
+        {
+            'pond_id': alert.reading.pond_id,
+            'rule_id': alert.rule.id,
+            'reading_id': alert.reading.pk,
+            'sensor_type': alert.reading.sensor_type,
+            'reading_value': str(alert.reading.reading_value),
+            'reading_date': alert.reading.reading_date.isoformat(),
+            'severity': alert.rule.severity,
+            'message': alert.message,
+        }
+        for alert in fired
+    ]
+    transaction.on_commit(lambda: persist_sensor_alerts.delay(schema_name, payload))
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BiologicalConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "biological"
+    
+    def ready(self):
+        import biological.signals  # noqa
@@ -0,0 +1,311 @@
+"""
+البث المباشر لقراءات المستشعرات والتنبيهات (Live Telemetry Feed)
+
+بدلاً من استطلاع GET /iot/sensor-readings بشكل دوري (استعلام لقاعدة
+البيانات في كل مرة)، تُنشر القراءات الجديدة والتنبيهات عبر Redis pub/sub
+بعد اكتمال الـ transaction، وتُرسل للوحات المشتركة كـ Server-Sent Events.
+
+القنوات لكل tenant:
+- aquaerp:iot:{schema}             جميع أحواض الـ tenant
+- aquaerp:iot:{schema}:pond:{id}   حوض واحد
+
+جهة النشر (sync) تعمل داخل عمليات الـ API و Celery. جهة الاشتراك (async)
+تعمل على عامل ASGI: اتصال pub/sub واحد لكل عملية (LiveFeedHub) يوزع
+الرسائل على طوابير المتصلين، فلا يستهلك الاتصال الخامل أي thread.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from django.conf import settings
+from django.db import connection, transaction
+
+import redis
+import redis.asyncio as aioredis
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'aquaerp:iot'
+RECONNECT_DELAY = 1.0
+
+_publisher = None
+
+
+def tenant_channel(schema_name):
+    """قناة جميع أحواض الـ tenant"""
+    return f'{CHANNEL_PREFIX}:{schema_name}'
+
+
+def pond_channel(schema_name, pond_id):
+    """قناة حوض واحد"""
+    return f'{CHANNEL_PREFIX}:{schema_name}:pond:{pond_id}'
+
+
+# ==================== Publishing ====================
+
+def _get_publisher():
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(
+            settings.IOT_PUBSUB_REDIS_URL,
+            socket_timeout=settings.IOT_PUBSUB_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.IOT_PUBSUB_SOCKET_TIMEOUT,
+        )
+    return _publisher
+
+
+def reading_event(reading):
+    """تمثيل القراءة في رسالة البث"""
+    return {
+        'id': reading.pk,
+        'sensor_type': reading.sensor_type,
+        'reading_value': float(reading.reading_value),
+        'unit': reading.unit,
+        'reading_date': reading.reading_date.isoformat(),
+        'is_alert': reading.is_alert,
+        'alert_message': reading.alert_message,
+    }
+
+
+def alert_event(alert):
+    """تمثيل التنبيه في رسالة البث"""
+    return {
+        'id': alert.pk,
+        'rule_id': alert.rule_id,
+        'reading_id': alert.reading_id,
+        'sensor_type': alert.sensor_type,
+        'reading_value': float(alert.reading_value),
+        'reading_date': alert.reading_date.isoformat(),
+        'severity': alert.severity,
+        'message': alert.message,
+    }
+
+
+def build_messages(schema_name, event, items_by_pond):
+    """
+    رسائل النشر: رسالة واحدة لكل حوض في الدفعة
+
+    Args:
+        schema_name: اسم الـ tenant schema
+        event: نوع الحدث ('readings' / 'alerts')
+        items_by_pond: {pond_id: [dict, ...]}
+
+    Returns:
+        list: [(channel, message)] - كل رسالة تُنشر على قناة الحوض وقناة الـ tenant
+    """
+    messages = []
+    for pond_id, items in items_by_pond.items():
+        message = json.dumps(
+            {'event': event, 'pond_id': pond_id, 'items': items},
+            ensure_ascii=False,
+        )
+        messages.append((pond_channel(schema_name, pond_id), message))
+        messages.append((tenant_channel(schema_name), message))
+    return messages
+
+
+def _publish(messages):
+    """نشر الرسائل عبر pipeline واحد (أخطاء Redis لا توقف الإدخال)"""
+    if not messages:
+        return 0
+    try:
+        pipeline = _get_publisher().pipeline(transaction=False)
+        for channel, message in messages:
+            pipeline.publish(channel, message)
+        pipeline.execute()
+    except redis.RedisError as e:
+        logger.warning(f"تعذر نشر رسائل البث المباشر: {type(e).__name__}: {e}")
+        return 0
+    return len(messages)
+
+
+def publish_readings(schema_name, readings):
+    """نشر دفعة قراءات محفوظة (رسالة لكل حوض)"""
+    items_by_pond = defaultdict(list)
+    for reading in readings:
+        items_by_pond[reading.pond_id].append(reading_event(reading))
+    return _publish(build_messages(schema_name, 'readings', items_by_pond))
+
+
+def publish_alerts(schema_name, alerts):
+    """نشر التنبيهات المحفوظة (رسالة لكل حوض)"""
+    items_by_pond = defaultdict(list)
+    for alert in alerts:
+        items_by_pond[alert.pond_id].append(alert_event(alert))
+    return _publish(build_messages(schema_name, 'alerts', items_by_pond))
+
+
+def broadcast_readings(readings):
+    """
+    جدولة نشر القراءات بعد اكتمال الـ transaction الحالي
+
+    يُستدعى داخل transaction.atomic بعد حفظ القراءات.
+    """
+    if not readings:
+        return
+    schema_name = connection.schema_name
+    transaction.on_commit(lambda: publish_readings(schema_name, readings))
+
+
+# ==================== Subscribing (ASGI) ====================
+
+def format_sse(data, event=None):
+    """تنسيق رسالة Server-Sent Event"""
+    frame = f'event: {event}\n' if event else ''
+    for line in data.splitlines() or ['']:
+        frame += f'data: {line}\n'
+    return frame + '\n'
+
+
+class LiveFeedHub:
+    """
+    موزع رسائل البث داخل عملية ASGI واحدة
+
+    يحتفظ باتصال pub/sub واحد مشترك، ويشترك في القناة عند أول متصل
+    ويلغي الاشتراك عند مغادرة آخر متصل. كل رسالة تُنسق مرة واحدة
+    وتُضاف إلى طوابير المتصلين؛ المتصل البطيء تُسقط أقدم رسائله.
+    """
+
+    def __init__(self, url, queue_size):
+        self.url = url
+        self.queue_size = queue_size
+        self.loop = asyncio.get_running_loop()
+        self._channels = defaultdict(set)
+        self._client = None
+        self._pubsub = None
+        self._reader = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        self._client = aioredis.Redis.from_url(self.url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        if self._channels:
+            await self._pubsub.subscribe(*self._channels)
+
+    async def _disconnect(self):
+        pubsub, client = self._pubsub, self._client
+        self._pubsub = self._client = None
+        try:
+            if pubsub is not None:
+                await pubsub.aclose()
+            if client is not None:
+                await client.aclose()
+        except redis.RedisError:
+            pass
+
+    async def subscribe(self, channels):
+        """
+        اشتراك متصل جديد
+
+        Returns:
+            asyncio.Queue: طابور رسائل SSE المنسقة لهذا المتصل
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        async with self._lock:
+            new_channels = [channel for channel in channels if not self._channels[channel]]
+            for channel in channels:
+                self._channels[channel].add(queue)
+            if self._pubsub is not None and new_channels:
+                try:
+                    await self._pubsub.subscribe(*new_channels)
+                except redis.RedisError:
+                    # يعيد القارئ الاتصال والاشتراك في جميع القنوات
+                    await self._disconnect()
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._listen())
+        return queue
+
+    async def unsubscribe(self, queue, channels):
+        """إلغاء اشتراك متصل (عند قطع الاتصال)"""
+        async with self._lock:
+            empty = []
+            for channel in channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._channels[channel]
+                    empty.append(channel)
+            if empty and self._pubsub is not None:
+                try:
+                    await self._pubsub.unsubscribe(*empty)
+                except redis.RedisError:
+                    pass
+
+    def _dispatch(self, message):
+        queues = self._channels.get(message['channel'].decode())
+        if not queues:
+            return
+        data = message['data'].decode()
+        try:
+            event = json.loads(data).get('event')
+        except ValueError:
+            event = None
+        frame = format_sse(data, event)
+        for queue in list(queues):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
+    async def _listen(self):
+        """قراءة الرسائل وتوزيعها طالما يوجد متصلون"""
+        while True:
+            try:
+                async with self._lock:
+                    if not self._channels:
+                        await self._disconnect()
+                        return
+                    if self._pubsub is None:
+                        await self._connect()
+                    pubsub = self._pubsub
+                message = await pubsub.get_message(timeout=1.0)
+                if message and message['type'] == 'message':
+                    self._dispatch(message)
+            except (redis.RedisError, OSError) as e:
+                logger.warning(f"انقطع اتصال البث المباشر مع Redis: {type(e).__name__}: {e}")
+                async with self._lock:
+                    await self._disconnect()
+                await asyncio.sleep(RECONNECT_DELAY)
+
+
+_hub = None
+
+
+def get_hub():
+    """موزع البث لحلقة الأحداث الحالية"""
+    global _hub
+    if _hub is None or _hub.loop is not asyncio.get_running_loop():
+        _hub = LiveFeedHub(settings.IOT_PUBSUB_REDIS_URL, settings.IOT_LIVE_QUEUE_SIZE)
+    return _hub
+
+
+async def stream_events(schema_name, pond_ids=None):
+    """
+    مولد async لرسائل SSE لمتصل واحد
+
+    Args:
+        schema_name: اسم الـ tenant schema
+        pond_ids: أحواض محددة، أو None لجميع أحواض الـ tenant
+
+    Yields:
+        str: رسائل SSE، مع تعليق keep-alive عند عدم وجود رسائل
+    """
+    if pond_ids:
+        channels = [pond_channel(schema_name, pond_id) for pond_id in pond_ids]
+    else:
+        channels = [tenant_channel(schema_name)]
+
+    hub = get_hub()
+    queue = await hub.subscribe(channels)
+    heartbeat = settings.IOT_LIVE_HEARTBEAT_SECONDS
+    try:
+        yield f'retry: {settings.IOT_LIVE_RETRY_MS}\n\n'
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+    finally:
+        await hub.unsubscribe(queue, channels)
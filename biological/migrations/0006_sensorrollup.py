@@ -0,0 +1,147 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "biological",
+            "0005_rename_biological_s_pond_i_123abc_idx_biological__pond_id_b2ad41_idx_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorRollupState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "last_reading_id",
+                    models.BigIntegerField(
+                        default=0, verbose_name="آخر قراءة تمت معالجتها"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="آخر تحديث"),
+                ),
+            ],
+            options={
+                "verbose_name": "حالة مجاميع المستشعرات",
+                "verbose_name_plural": "حالة مجاميع المستشعرات",
+            },
+        ),
+        migrations.CreateModel(
+            name="SensorRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[
+                            ("1m", "دقيقة"),
+                            ("15m", "15 دقيقة"),
+                            ("1h", "ساعة"),
+                            ("1d", "يوم"),
+                        ],
+                        max_length=3,
+                        verbose_name="الدقة الزمنية",
+                    ),
+                ),
+                (
+                    "sensor_type",
+                    models.CharField(
+                        choices=[
+                            ("temperature", "درجة الحرارة"),
+                            ("oxygen", "الأكسجين المذاب"),
+                            ("ph", "درجة الحموضة (pH)"),
+                            ("ammonia", "الأمونيا"),
+                            ("nitrite", "النتريت"),
+                            ("nitrate", "النتريت"),
+                            ("turbidity", "العكارة"),
+                            ("salinity", "الملوحة"),
+                            ("other", "أخرى"),
+                        ],
+                        max_length=20,
+                        verbose_name="نوع المستشعر",
+                    ),
+                ),
+                ("bucket_start", models.DateTimeField(verbose_name="بداية الفترة")),
+                (
+                    "min_value",
+                    models.DecimalField(
+                        decimal_places=3, max_digits=10, verbose_name="أدنى قيمة"
+                    ),
+                ),
+                (
+                    "max_value",
+                    models.DecimalField(
+                        decimal_places=3, max_digits=10, verbose_name="أعلى قيمة"
+                    ),
+                ),
+                (
+                    "avg_value",
+                    models.DecimalField(
+                        decimal_places=3, max_digits=10, verbose_name="متوسط القيمة"
+                    ),
+                ),
+                (
+                    "sum_value",
+                    models.DecimalField(
+                        decimal_places=3,
+                        help_text="يُستخدم لإعادة حساب المتوسط عند دمج قراءات جديدة",
+                        max_digits=18,
+                        verbose_name="مجموع القيم",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(verbose_name="عدد القراءات")),
+                (
+                    "last_value",
+                    models.DecimalField(
+                        decimal_places=3, max_digits=10, verbose_name="آخر قيمة"
+                    ),
+                ),
+                ("last_reading_at", models.DateTimeField(verbose_name="وقت آخر قراءة")),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="آخر تحديث"),
+                ),
+                (
+                    "pond",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sensor_rollups",
+                        to="biological.pond",
+                        verbose_name="الحوض",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "مجموع قراءات مستشعر",
+                "verbose_name_plural": "مجاميع قراءات المستشعرات",
+                "ordering": ["resolution", "pond", "sensor_type", "bucket_start"],
+                "unique_together": {
+                    ("resolution", "pond", "sensor_type", "bucket_start")
+                },
+            },
+        ),
+    ]
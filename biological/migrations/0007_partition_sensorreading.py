@@ -0,0 +1,133 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+TABLE = "biological_sensorreading"
+OLD_TABLE = "biological_sensorreading_unpartitioned"
+COLUMNS = (
+    "id, pond_id, sensor_type, reading_value, unit, reading_date, is_alert, "
+    "alert_message, sensor_id, notes, created_at"
+)
+COLUMN_DEFINITIONS = """
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    pond_id bigint NOT NULL,
+    sensor_type varchar(20) NOT NULL,
+    reading_value numeric(10, 3) NOT NULL,
+    unit varchar(20) NOT NULL,
+    reading_date timestamp with time zone NOT NULL,
+    is_alert boolean NOT NULL,
+    alert_message text NULL,
+    sensor_id varchar(100) NULL,
+    notes text NULL,
+    created_at timestamp with time zone NOT NULL
+"""
+CONSTRAINTS_AND_INDEXES = [
+    f"ALTER TABLE {TABLE} ADD CONSTRAINT biological_sensorreading_pond_id_fk_biological_pond_id "
+    f"FOREIGN KEY (pond_id) REFERENCES biological_pond (id) DEFERRABLE INITIALLY DEFERRED",
+    f"CREATE INDEX biological__pond_id_b2ad41_idx ON {TABLE} (pond_id, sensor_type, reading_date)",
+    f"CREATE INDEX biological_sensor_alert_idx ON {TABLE} (reading_date) WHERE is_alert",
+]
+
+
+def _reset_identity(cursor):
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+        f"FROM {TABLE}"
+    )
+
+
+def partition_sensor_readings(apps, schema_editor):
+    """تحويل جدول القراءات إلى جدول مقسم شهرياً ونقل البيانات الحالية"""
+    from datetime import datetime, timezone
+    from biological.partitions import (
+        DEFAULT_PARTITION, add_months, month_start, create_sensor_partition
+    )
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} ({COLUMN_DEFINITIONS}) PARTITION BY RANGE (reading_date)"
+        )
+
+        # أقسام للأشهر التي تحتوي بيانات + الشهر الحالي والأشهر الثلاثة القادمة
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', reading_date AT TIME ZONE 'UTC') FROM {OLD_TABLE}"
+        )
+        months = {month.replace(tzinfo=timezone.utc) for (month,) in cursor.fetchall()}
+        current = month_start(datetime.now(timezone.utc))
+        months.update(add_months(current, offset) for offset in range(4))
+        for month in sorted(months):
+            create_sensor_partition(cursor, month)
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE}")
+        _reset_identity(cursor)
+        cursor.execute(f"DROP TABLE {OLD_TABLE}")
+
+        # المفتاح الأساسي في الجدول المقسم يجب أن يتضمن عمود التقسيم
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT biological_sensorreading_pkey "
+            f"PRIMARY KEY (id, reading_date)"
+        )
+        for statement in CONSTRAINTS_AND_INDEXES:
+            cursor.execute(statement)
+
+
+def unpartition_sensor_readings(apps, schema_editor):
+    """إعادة جدول القراءات إلى جدول عادي غير مقسم"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(f"CREATE TABLE {TABLE} ({COLUMN_DEFINITIONS})")
+        cursor.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE}")
+        _reset_identity(cursor)
+        cursor.execute(f"DROP TABLE {OLD_TABLE} CASCADE")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT biological_sensorreading_pkey PRIMARY KEY (id)"
+        )
+        for statement in CONSTRAINTS_AND_INDEXES:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("biological", "0006_sensorrollup"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="sensorreading",
+            name="biological__reading_1dee75_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="sensorreading",
+            name="biological__sensor__92b4b4_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="sensorreading",
+            name="biological__is_aler_93bb0f_idx",
+        ),
+        migrations.AlterField(
+            model_name="sensorreading",
+            name="pond",
+            field=models.ForeignKey(
+                db_index=False,
+                help_text="الحوض الذي تم أخذ القراءة منه",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sensor_readings",
+                to="biological.pond",
+                verbose_name="الحوض",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sensorreading",
+            index=models.Index(
+                condition=models.Q(("is_alert", True)),
+                fields=["reading_date"],
+                name="biological_sensor_alert_idx",
+            ),
+        ),
+        migrations.RunPython(partition_sensor_readings, unpartition_sensor_readings),
+    ]
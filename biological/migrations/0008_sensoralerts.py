@@ -0,0 +1,237 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("biological", "0007_partition_sensorreading"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorAlertRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sensor_type",
+                    models.CharField(
+                        choices=[
+                            ("temperature", "درجة الحرارة"),
+                            ("oxygen", "الأكسجين المذاب"),
+                            ("ph", "درجة الحموضة (pH)"),
+                            ("ammonia", "الأمونيا"),
+                            ("nitrite", "النتريت"),
+                            ("nitrate", "النتريت"),
+                            ("turbidity", "العكارة"),
+                            ("salinity", "الملوحة"),
+                            ("other", "أخرى"),
+                        ],
+                        max_length=20,
+                        verbose_name="نوع المستشعر",
+                    ),
+                ),
+                (
+                    "rule_type",
+                    models.CharField(
+                        choices=[
+                            ("threshold", "حد أدنى/أعلى"),
+                            ("rate_of_change", "معدل التغير"),
+                            ("moving_average", "المتوسط المتحرك"),
+                        ],
+                        default="threshold",
+                        max_length=20,
+                        verbose_name="نوع القاعدة",
+                    ),
+                ),
+                (
+                    "min_value",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=3,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="الحد الأدنى",
+                    ),
+                ),
+                (
+                    "max_value",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=3,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="الحد الأعلى",
+                    ),
+                ),
+                (
+                    "max_change",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=3,
+                        help_text="لقواعد معدل التغير",
+                        max_digits=10,
+                        null=True,
+                        verbose_name="أقصى تغير لكل دقيقة",
+                    ),
+                ),
+                (
+                    "window_size",
+                    models.PositiveIntegerField(
+                        default=5,
+                        help_text="عدد القراءات في المتوسط المتحرك",
+                        verbose_name="حجم النافذة",
+                    ),
+                ),
+                (
+                    "severity",
+                    models.CharField(
+                        choices=[("warning", "تحذير"), ("critical", "حرج")],
+                        default="warning",
+                        max_length=10,
+                        verbose_name="الخطورة",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True, verbose_name="نشط")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ الإنشاء"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="آخر تحديث"),
+                ),
+                (
+                    "pond",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="اتركه فارغاً لتطبيق القاعدة على جميع الأحواض",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sensor_alert_rules",
+                        to="biological.pond",
+                        verbose_name="الحوض",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "قاعدة تنبيه مستشعر",
+                "verbose_name_plural": "قواعد تنبيه المستشعرات",
+                "ordering": ["sensor_type", "pond", "rule_type"],
+            },
+        ),
+        migrations.CreateModel(
+            name="SensorAlert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "reading_id",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="معرف القراءة"
+                    ),
+                ),
+                (
+                    "sensor_type",
+                    models.CharField(
+                        choices=[
+                            ("temperature", "درجة الحرارة"),
+                            ("oxygen", "الأكسجين المذاب"),
+                            ("ph", "درجة الحموضة (pH)"),
+                            ("ammonia", "الأمونيا"),
+                            ("nitrite", "النتريت"),
+                            ("nitrate", "النتريت"),
+                            ("turbidity", "العكارة"),
+                            ("salinity", "الملوحة"),
+                            ("other", "أخرى"),
+                        ],
+                        max_length=20,
+                        verbose_name="نوع المستشعر",
+                    ),
+                ),
+                (
+                    "reading_value",
+                    models.DecimalField(
+                        decimal_places=3, max_digits=10, verbose_name="قيمة القراءة"
+                    ),
+                ),
+                (
+                    "reading_date",
+                    models.DateTimeField(verbose_name="تاريخ ووقت القراءة"),
+                ),
+                (
+                    "severity",
+                    models.CharField(
+                        choices=[("warning", "تحذير"), ("critical", "حرج")],
+                        max_length=10,
+                        verbose_name="الخطورة",
+                    ),
+                ),
+                ("message", models.TextField(verbose_name="رسالة التنبيه")),
+                (
+                    "is_acknowledged",
+                    models.BooleanField(default=False, verbose_name="تمت المعالجة"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ الإنشاء"
+                    ),
+                ),
+                (
+                    "pond",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sensor_alerts",
+                        to="biological.pond",
+                        verbose_name="الحوض",
+                    ),
+                ),
+                (
+                    "rule",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="alerts",
+                        to="biological.sensoralertrule",
+                        verbose_name="القاعدة",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "تنبيه مستشعر",
+                "verbose_name_plural": "تنبيهات المستشعرات",
+                "ordering": ["-reading_date", "-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["pond", "reading_date"],
+                        name="biological__pond_id_a1b17f_idx",
+                    ),
+                    models.Index(
+                        fields=["is_acknowledged"],
+                        name="biological__is_ackn_38057a_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -378,7 +378,8 @@ class SensorReading(models.Model):
         on_delete=models.CASCADE,
         related_name='sensor_readings',
         verbose_name="الحوض",
-        help_text="الحوض الذي تم أخذ القراءة منه"
+        help_text="الحوض الذي تم أخذ القراءة منه",
+        db_index=False,  # يغطيه الفهرس المركب (pond, sensor_type, reading_date)
     )
     sensor_type = models.CharField(
         max_length=20,
@@ -430,12 +431,218 @@ class SensorReading(models.Model):
         verbose_name = "قراءة مستشعر"
         verbose_name_plural = "قراءات المستشعرات"
         ordering = ['-reading_date', '-created_at']
+        # الجدول مقسم شهرياً حسب reading_date (انظر biological/partitions.py)،
+        # لذلك يكفي فهرس مركب واحد + فهرس جزئي للتنبيهات لتقليل كلفة الإدراج
         indexes = [
             models.Index(fields=['pond', 'sensor_type', 'reading_date']),
-            models.Index(fields=['reading_date']),
-            models.Index(fields=['sensor_type']),
-            models.Index(fields=['is_alert']),
+            models.Index(
+                fields=['reading_date'],
+                condition=models.Q(is_alert=True),
+                name='biological_sensor_alert_idx',
+            ),
         ]
     
     def __str__(self):
         return f"{self.get_sensor_type_display()} - {self.reading_value} {self.unit} - {self.pond.name} - {self.reading_date}"
+
+
+class SensorRollup(models.Model):
+    """
+    مجاميع قراءات المستشعرات حسب الفترة الزمنية (Downsampled Rollups)
+    
+    صف واحد لكل (دقة زمنية، حوض، نوع مستشعر، بداية الفترة) يحفظ
+    أدنى/أعلى/متوسط القيم وعددها وآخر قيمة، لرسم الفترات الطويلة
+    دون المرور على جدول القراءات الخام.
+    """
+    RESOLUTION_CHOICES = [
+        ('1m', 'دقيقة'),
+        ('15m', '15 دقيقة'),
+        ('1h', 'ساعة'),
+        ('1d', 'يوم'),
+    ]
+    
+    resolution = models.CharField(
+        max_length=3,
+        choices=RESOLUTION_CHOICES,
+        verbose_name="الدقة الزمنية"
+    )
+    pond = models.ForeignKey(
+        Pond,
+        on_delete=models.CASCADE,
+        related_name='sensor_rollups',
+        verbose_name="الحوض"
+    )
+    sensor_type = models.CharField(
+        max_length=20,
+        choices=SensorReading.SENSOR_TYPES,
+        verbose_name="نوع المستشعر"
+    )
+    bucket_start = models.DateTimeField(verbose_name="بداية الفترة")
+    min_value = models.DecimalField(max_digits=10, decimal_places=3, verbose_name="أدنى قيمة")
+    max_value = models.DecimalField(max_digits=10, decimal_places=3, verbose_name="أعلى قيمة")
+    avg_value = models.DecimalField(max_digits=10, decimal_places=3, verbose_name="متوسط القيمة")
+    sum_value = models.DecimalField(
+        max_digits=18,
+        decimal_places=3,
+        verbose_name="مجموع القيم",
+        help_text="يُستخدم لإعادة حساب المتوسط عند دمج قراءات جديدة"
+    )
+    count = models.PositiveIntegerField(verbose_name="عدد القراءات")
+    last_value = models.DecimalField(max_digits=10, decimal_places=3, verbose_name="آخر قيمة")
+    last_reading_at = models.DateTimeField(verbose_name="وقت آخر قراءة")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر تحديث")
+    
+    class Meta:
+        verbose_name = "مجموع قراءات مستشعر"
+        verbose_name_plural = "مجاميع قراءات المستشعرات"
+        ordering = ['resolution', 'pond', 'sensor_type', 'bucket_start']
+        unique_together = [['resolution', 'pond', 'sensor_type', 'bucket_start']]
+    
+    def __str__(self):
+        return f"{self.get_sensor_type_display()} ({self.resolution}) - {self.pond_id} - {self.bucket_start}"
+
+
+class SensorRollupState(models.Model):
+    """
+    مؤشر تقدم تحديث مجاميع المستشعرات (صف واحد لكل tenant)
+    
+    يحفظ آخر معرف قراءة تم دمجه في SensorRollup.
+    """
+    last_reading_id = models.BigIntegerField(default=0, verbose_name="آخر قراءة تمت معالجتها")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر تحديث")
+    
+    class Meta:
+        verbose_name = "حالة مجاميع المستشعرات"
+        verbose_name_plural = "حالة مجاميع المستشعرات"
+    
+    def __str__(self):
+        return f"آخر قراءة: {self.last_reading_id}"
+
+
+class SensorAlertRule(models.Model):
+    """
+    قاعدة تنبيه لقراءات المستشعرات
+    
+    أنواع القواعد:
+    - threshold: القراءة خارج النطاق [min_value, max_value]
+    - rate_of_change: تغير القيمة أسرع من max_change لكل دقيقة
+    - moving_average: متوسط آخر window_size قراءة خارج النطاق [min_value, max_value]
+    
+    القاعدة بدون حوض تنطبق على جميع الأحواض لنفس نوع المستشعر.
+    """
+    RULE_TYPES = [
+        ('threshold', 'حد أدنى/أعلى'),
+        ('rate_of_change', 'معدل التغير'),
+        ('moving_average', 'المتوسط المتحرك'),
+    ]
+    SEVERITY_CHOICES = [
+        ('warning', 'تحذير'),
+        ('critical', 'حرج'),
+    ]
+    
+    pond = models.ForeignKey(
+        Pond,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='sensor_alert_rules',
+        verbose_name="الحوض",
+        help_text="اتركه فارغاً لتطبيق القاعدة على جميع الأحواض"
+    )
+    sensor_type = models.CharField(
+        max_length=20,
+        choices=SensorReading.SENSOR_TYPES,
+        verbose_name="نوع المستشعر"
+    )
+    rule_type = models.CharField(
+        max_length=20,
+        choices=RULE_TYPES,
+        default='threshold',
+        verbose_name="نوع القاعدة"
+    )
+    min_value = models.DecimalField(
+        max_digits=10, decimal_places=3, null=True, blank=True, verbose_name="الحد الأدنى"
+    )
+    max_value = models.DecimalField(
+        max_digits=10, decimal_places=3, null=True, blank=True, verbose_name="الحد الأعلى"
+    )
+    max_change = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        verbose_name="أقصى تغير لكل دقيقة",
+        help_text="لقواعد معدل التغير"
+    )
+    window_size = models.PositiveIntegerField(
+        default=5,
+        verbose_name="حجم النافذة",
+        help_text="عدد القراءات في المتوسط المتحرك"
+    )
+    severity = models.CharField(
+        max_length=10,
+        choices=SEVERITY_CHOICES,
+        default='warning',
+        verbose_name="الخطورة"
+    )
+    is_active = models.BooleanField(default=True, verbose_name="نشط")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر تحديث")
+    
+    class Meta:
+        verbose_name = "قاعدة تنبيه مستشعر"
+        verbose_name_plural = "قواعد تنبيه المستشعرات"
+        ordering = ['sensor_type', 'pond', 'rule_type']
+    
+    def __str__(self):
+        target = self.pond.name if self.pond else 'جميع الأحواض'
+        return f"{self.get_sensor_type_display()} - {self.get_rule_type_display()} - {target}"
+
+
+class SensorAlert(models.Model):
+    """
+    تنبيه صادر من تقييم قواعد التنبيه لقراءة مستشعر
+    """
+    pond = models.ForeignKey(
+        Pond,
+        on_delete=models.CASCADE,
+        related_name='sensor_alerts',
+        verbose_name="الحوض"
+    )
+    rule = models.ForeignKey(
+        SensorAlertRule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='alerts',
+        verbose_name="القاعدة"
+    )
+    # بدون ForeignKey لأن جدول القراءات مقسم (المفتاح الأساسي id + reading_date)
+    reading_id = models.BigIntegerField(null=True, blank=True, verbose_name="معرف القراءة")
+    sensor_type = models.CharField(
+        max_length=20,
+        choices=SensorReading.SENSOR_TYPES,
+        verbose_name="نوع المستشعر"
+    )
+    reading_value = models.DecimalField(max_digits=10, decimal_places=3, verbose_name="قيمة القراءة")
+    reading_date = models.DateTimeField(verbose_name="تاريخ ووقت القراءة")
+    severity = models.CharField(
+        max_length=10,
+        choices=SensorAlertRule.SEVERITY_CHOICES,
+        verbose_name="الخطورة"
+    )
+    message = models.TextField(verbose_name="رسالة التنبيه")
+    is_acknowledged = models.BooleanField(default=False, verbose_name="تمت المعالجة")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
+    
+    class Meta:
+        verbose_name = "تنبيه مستشعر"
+        verbose_name_plural = "تنبيهات المستشعرات"
+        ordering = ['-reading_date', '-created_at']
+        indexes = [
+            models.Index(fields=['pond', 'reading_date']),
+            models.Index(fields=['is_acknowledged']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_severity_display()} - {self.pond_id} - {self.message}"
@@ -0,0 +1,193 @@
+"""
+تقسيم جدول قراءات المستشعرات (Range Partitioning) حسب الشهر
+
+جدول biological_sensorreading مقسم شهرياً حسب reading_date داخل كل
+tenant schema (حدود الأشهر بتوقيت UTC):
+- biological_sensorreading_p2025_01 ... قسم لكل شهر
+- biological_sensorreading_default: للقراءات خارج الأقسام المنشأة
+
+تُنشأ أقسام الأشهر القادمة مسبقاً، وتُحذف الأقسام المنتهية كاملة
+(DROP TABLE) بدلاً من حذف القراءات صفاً صفاً.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+from django.db import connection, transaction
+
+
+SENSOR_READING_TABLE = 'biological_sensorreading'
+DEFAULT_PARTITION = f'{SENSOR_READING_TABLE}_default'
+PARTITION_NAME_RE = re.compile(rf'^{SENSOR_READING_TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def month_start(moment):
+    """بداية الشهر (UTC) الذي تقع فيه اللحظة"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, months):
+    """إضافة عدد من الأشهر إلى بداية شهر"""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    """اسم قسم الشهر"""
+    return f'{SENSOR_READING_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def _table_exists(cursor, name):
+    """هل الجدول موجود في الـ schema الحالي؟"""
+    cursor.execute(
+        'SELECT to_regclass(quote_ident(current_schema()) || %s || quote_ident(%s))',
+        ['.', name],
+    )
+    return cursor.fetchone()[0] is not None
+
+
+def is_partitioned(cursor):
+    """هل جدول القراءات مقسم في الـ schema الحالي؟"""
+    cursor.execute(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+        )
+        """,
+        [SENSOR_READING_TABLE],
+    )
+    return cursor.fetchone()[0]
+
+
+def list_sensor_partitions(cursor):
+    """
+    أقسام الأشهر الموجودة في الـ schema الحالي
+
+    Returns:
+        list: [(name, month)] مرتبة حسب الشهر (بدون القسم الافتراضي)
+    """
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = %s AND parent.relnamespace = current_schema()::regnamespace
+        """,
+        [SENSOR_READING_TABLE],
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+            partitions.append((name, month))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_sensor_partition(cursor, month):
+    """
+    إنشاء قسم شهر واحد (إن لم يكن موجوداً)
+
+    إذا كان القسم الافتراضي يحتوي قراءات من نفس الشهر، يُفصل مؤقتاً
+    وتُنقل القراءات إلى القسم الجديد ثم يُعاد ربطه.
+
+    Returns:
+        bool: True إذا تم إنشاء القسم
+    """
+    name = partition_name(month)
+    if _table_exists(cursor, name):
+        return False
+
+    start, end = month, add_months(month, 1)
+    qn = connection.ops.quote_name
+    bounds = [start.isoformat(), end.isoformat()]
+
+    moved = False
+    if _table_exists(cursor, DEFAULT_PARTITION):
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {qn(DEFAULT_PARTITION)} '
+            f'WHERE reading_date >= %s AND reading_date < %s)',
+            bounds,
+        )
+        moved = cursor.fetchone()[0]
+
+    if moved:
+        cursor.execute(
+            f'ALTER TABLE {qn(SENSOR_READING_TABLE)} DETACH PARTITION {qn(DEFAULT_PARTITION)}'
+        )
+
+    cursor.execute(
+        f'CREATE TABLE {qn(name)} PARTITION OF {qn(SENSOR_READING_TABLE)} '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        bounds,
+    )
+
+    if moved:
+        cursor.execute(
+            f'INSERT INTO {qn(name)} SELECT * FROM {qn(DEFAULT_PARTITION)} '
+            f'WHERE reading_date >= %s AND reading_date < %s',
+            bounds,
+        )
+        cursor.execute(
+            f'DELETE FROM {qn(DEFAULT_PARTITION)} WHERE reading_date >= %s AND reading_date < %s',
+            bounds,
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(SENSOR_READING_TABLE)} ATTACH PARTITION {qn(DEFAULT_PARTITION)} DEFAULT'
+        )
+    return True
+
+
+def ensure_sensor_partitions(months_ahead=3, now=None):
+    """
+    إنشاء أقسام الشهر الحالي والأشهر القادمة للـ tenant الحالي
+
+    Returns:
+        list: أسماء الأقسام التي تم إنشاؤها
+    """
+    current = month_start(now or datetime.now(dt_timezone.utc))
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return created
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if create_sensor_partition(cursor, month):
+                created.append(partition_name(month))
+    return created
+
+
+def drop_expired_sensor_partitions(retention_months=12, now=None):
+    """
+    حذف أقسام الأشهر الأقدم بالكامل من فترة الاحتفاظ للـ tenant الحالي
+
+    يُحذف القسم فقط إذا كان الشهر كله أقدم من تاريخ القطع، وتُحذف
+    القراءات المنتهية في القسم الافتراضي (إن وجدت) بشكل مباشر.
+
+    Returns:
+        dict: الأقسام المحذوفة وعدد القراءات المحذوفة من القسم الافتراضي
+    """
+    cutoff = add_months(month_start(now or datetime.now(dt_timezone.utc)), -retention_months)
+    qn = connection.ops.quote_name
+    result = {'dropped': [], 'default_deleted': 0, 'cutoff': cutoff}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return result
+
+        for name, month in list_sensor_partitions(cursor):
+            if add_months(month, 1) <= cutoff:
+                cursor.execute(f'DROP TABLE {qn(name)}')
+                result['dropped'].append(name)
+
+        if _table_exists(cursor, DEFAULT_PARTITION):
+            cursor.execute(
+                f'DELETE FROM {qn(DEFAULT_PARTITION)} WHERE reading_date < %s',
+                [cutoff.isoformat()],
+            )
+            result['default_deleted'] = cursor.rowcount
+
+    return result
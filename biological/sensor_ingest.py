@@ -0,0 +1,233 @@
+"""
+الإدخال الجماعي لقراءات المستشعرات (Bulk IoT Ingestion)
+
+يستقبل آلاف القراءات في طلب واحد بأحد الصيغ التالية:
+- JSON array: [{"pond_id": 1, "sensor_type": "oxygen", "reading_value": 6.2}, ...]
+- JSON مضغوط (أعمدة + صفوف):
+  {"fields": ["pond_id", "sensor_type", "reading_value", "reading_date"],
+   "rows": [[1, "oxygen", 6.2, "2025-01-01T10:00:00Z"], ...]}
+- NDJSON (application/x-ndjson): كائن JSON في كل سطر
+
+يتم التحقق من الأحواض مقابل قائمة مخزنة في Cache لكل tenant،
+وتقييم قواعد التنبيه (biological/alerts.py)، والكتابة عبر bulk_create
+على دفعات مع إرجاع الصفوف المرفوضة، ثم بث القراءات للوحات المشتركة
+(biological/live_feed.py).
+"""
+import json
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Pond, SensorReading
+from .alerts import evaluate_sensor_readings, dispatch_sensor_alerts
+from .live_feed import broadcast_readings
+
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+SENSOR_TYPES = frozenset(choice for choice, _ in SensorReading.SENSOR_TYPES)
+# قيمة القراءة: max_digits=10, decimal_places=3
+READING_VALUE_LIMIT = Decimal('10') ** 7
+READING_VALUE_QUANTUM = Decimal('0.001')
+
+
+class BulkPayloadError(ValueError):
+    """خطأ في بنية الطلب ككل (وليس في صف واحد)"""
+
+
+# ==================== Pond Cache ====================
+
+def _active_ponds_cache_key():
+    return f'iot:active-ponds:{connection.schema_name}'
+
+
+def get_active_pond_ids():
+    """
+    معرفات الأحواض النشطة للـ tenant الحالي (مخزنة في Cache)
+
+    Returns:
+        frozenset: معرفات الأحواض النشطة
+    """
+    cache_key = _active_ponds_cache_key()
+    pond_ids = cache.get(cache_key)
+    if pond_ids is None:
+        pond_ids = list(Pond.objects.filter(is_active=True).values_list('id', flat=True))
+        cache.set(cache_key, pond_ids, settings.IOT_POND_CACHE_TIMEOUT)
+    return frozenset(pond_ids)
+
+
+def invalidate_active_pond_ids():
+    """حذف قائمة الأحواض النشطة من Cache (عند تعديل أو حذف حوض)"""
+    cache.delete(_active_ponds_cache_key())
+
+
+# ==================== Parsing ====================
+
+def parse_bulk_payload(body, content_type=''):
+    """
+    تحويل جسم الطلب إلى قائمة صفوف
+
+    Args:
+        body: جسم الطلب (bytes)
+        content_type: نوع المحتوى
+
+    Returns:
+        tuple: (rows, rejects) حيث rows قائمة (index, dict)
+        و rejects قائمة (index, message) للأسطر غير الصالحة في NDJSON
+
+    Raises:
+        BulkPayloadError: إذا كانت بنية الطلب غير صالحة
+    """
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+
+    rows, rejects = [], []
+
+    if content_type.split(';')[0].strip().lower() in NDJSON_CONTENT_TYPES:
+        index = 0
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                rejects.append((index, f'JSON غير صالح: {e}'))
+            else:
+                rows.append((index, row))
+            index += 1
+        return rows, rejects
+
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise BulkPayloadError(f'JSON غير صالح: {e}')
+
+    if isinstance(payload, dict) and 'rows' in payload:
+        fields = payload.get('fields')
+        if not isinstance(fields, list) or not fields:
+            raise BulkPayloadError('الصيغة المضغوطة تتطلب قائمة "fields"')
+        for index, values in enumerate(payload['rows']):
+            if not isinstance(values, list) or len(values) != len(fields):
+                rejects.append((index, f'عدد القيم يجب أن يساوي {len(fields)}'))
+            else:
+                rows.append((index, dict(zip(fields, values))))
+        return rows, rejects
+
+    if isinstance(payload, dict) and 'readings' in payload:
+        payload = payload['readings']
+
+    if not isinstance(payload, list):
+        raise BulkPayloadError('يجب أن يكون الطلب قائمة قراءات')
+
+    return list(enumerate(payload)), rejects
+
+
+# ==================== Validation & Insert ====================
+
+def _to_decimal(value):
+    if isinstance(value, bool):
+        raise ValueError('قيمة القراءة يجب أن تكون رقماً')
+    try:
+        value = Decimal(str(value)).quantize(READING_VALUE_QUANTUM)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError('قيمة القراءة يجب أن تكون رقماً')
+    if not value.is_finite() or abs(value) >= READING_VALUE_LIMIT:
+        raise ValueError('قيمة القراءة خارج النطاق المسموح')
+    return value
+
+
+def _to_pond_id(value):
+    # قيم مثل 3.7 أو true لا تُقرّب إلى معرف حوض
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    raise ValueError('pond_id مطلوب ويجب أن يكون عدداً صحيحاً')
+
+
+def _to_datetime(value, default):
+    if value in (None, ''):
+        return default
+    reading_date = parse_datetime(str(value).replace('Z', '+00:00'))
+    if reading_date is None:
+        raise ValueError('تاريخ القراءة غير صالح (ISO format)')
+    if timezone.is_naive(reading_date):
+        reading_date = timezone.make_aware(reading_date)
+    return reading_date
+
+
+def _optional_text(row, field, max_length=None):
+    value = row.get(field)
+    if value is None:
+        return None
+    value = str(value)
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{field} أطول من {max_length} حرفاً')
+    return value
+
+
+def build_sensor_reading(row, pond_ids, now):
+    """
+    تحويل صف إلى SensorReading (غير محفوظ) بعد التحقق منه
+
+    Raises:
+        ValueError: رسالة سبب الرفض
+    """
+    if not isinstance(row, dict):
+        raise ValueError('كل قراءة يجب أن تكون كائناً')
+
+    pond_id = _to_pond_id(row.get('pond_id'))
+    if pond_id not in pond_ids:
+        raise ValueError('الحوض غير موجود أو غير نشط')
+
+    sensor_type = row.get('sensor_type')
+    if sensor_type not in SENSOR_TYPES:
+        raise ValueError(f'نوع المستشعر غير معروف: {sensor_type}')
+
+    if row.get('reading_value') is None:
+        raise ValueError('reading_value مطلوب')
+
+    return SensorReading(
+        pond_id=pond_id,
+        sensor_type=sensor_type,
+        reading_value=_to_decimal(row['reading_value']),
+        unit=_optional_text(row, 'unit', 20) or '',
+        reading_date=_to_datetime(row.get('reading_date'), now),
+        sensor_id=_optional_text(row, 'sensor_id', 100),
+        notes=_optional_text(row, 'notes'),
+    )
+
+
+def ingest_sensor_readings(rows):
+    """
+    التحقق من الصفوف وإدراج الصالح منها دفعة واحدة
+
+    Args:
+        rows: قائمة (index, dict) من parse_bulk_payload
+
+    Returns:
+        tuple: (readings, rejects) - القراءات المحفوظة وقائمة (index, message)
+    """
+    pond_ids = get_active_pond_ids()
+    now = timezone.now()
+
+    readings, rejects = [], []
+    for index, row in rows:
+        try:
+            readings.append(build_sensor_reading(row, pond_ids, now))
+        except ValueError as e:
+            rejects.append((index, str(e)))
+
+    if readings:
+        with transaction.atomic():
+            # تقييم قواعد التنبيه قبل الحفظ ليُحفظ is_alert مع القراءة
+            fired = evaluate_sensor_readings(readings)
+            SensorReading.objects.bulk_create(
+                readings, batch_size=settings.IOT_BULK_INSERT_BATCH_SIZE
+            )
+            dispatch_sensor_alerts(fired)
+            broadcast_readings(readings)
+
+    return readings, rejects
@@ -0,0 +1,291 @@
+"""
+مجاميع قراءات المستشعرات (Sensor Rollups)
+
+تُحدَّث المجاميع تزايدياً: في كل تشغيل تُجمَّع القراءات الجديدة فقط
+(بعد آخر معرف تمت معالجته) على مستوى الدقيقة داخل قاعدة البيانات،
+ثم تُشتق منها فترات 15 دقيقة والساعة واليوم وتُدمج مع الصفوف المخزنة.
+
+min/max/sum/count/last قابلة للدمج، لذلك لا يُعاد مسح القراءات القديمة
+وتبقى المجاميع صالحة حتى بعد حذف القراءات الخام (سياسة الاحتفاظ).
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Min, Max, Sum, Count
+from django.db.models.functions import TruncMinute
+from django.utils import timezone
+
+from .models import SensorReading, SensorRollup, SensorRollupState
+
+
+RESOLUTIONS = ('1m', '15m', '1h', '1d')
+BUCKET_SECONDS = {
+    '1m': 60,
+    '15m': 15 * 60,
+    '1h': 60 * 60,
+    '1d': 24 * 60 * 60,
+}
+# أقصر فترة تُقرأ من الجدول الخام مباشرة في الاستعلامات التلقائية
+RAW_MAX_SPAN = timedelta(hours=1)
+AVG_QUANTUM = Decimal('0.001')
+UPDATE_FIELDS = [
+    'min_value', 'max_value', 'avg_value', 'sum_value',
+    'count', 'last_value', 'last_reading_at', 'updated_at',
+]
+
+
+def bucket_start(moment, resolution):
+    """
+    بداية الفترة التي تقع فيها اللحظة (بالتوقيت المحلي للـ farm)
+
+    Args:
+        moment: datetime (aware)
+        resolution: '1m' / '15m' / '1h' / '1d'
+    """
+    local = timezone.localtime(moment).replace(second=0, microsecond=0)
+    if resolution == '15m':
+        return local.replace(minute=local.minute - local.minute % 15)
+    if resolution == '1h':
+        return local.replace(minute=0)
+    if resolution == '1d':
+        return local.replace(hour=0, minute=0)
+    return local
+
+
+# ==================== Incremental Update ====================
+
+def _aggregate_minutes(first_id, last_id):
+    """
+    تجميع القراءات الجديدة على مستوى الدقيقة (استعلام واحد)
+
+    Returns:
+        dict: {(pond_id, sensor_type, minute): values}
+    """
+    groups = SensorReading.objects.filter(
+        id__gt=first_id, id__lte=last_id
+    ).annotate(
+        minute=TruncMinute('reading_date')
+    ).order_by().values('pond_id', 'sensor_type', 'minute').annotate(
+        min_value=Min('reading_value'),
+        max_value=Max('reading_value'),
+        sum_value=Sum('reading_value'),
+        count=Count('id'),
+        last_reading_at=Max('reading_date'),
+        values_desc=ArrayAgg('reading_value', ordering=('-reading_date', '-id')),
+    )
+
+    return {
+        (g['pond_id'], g['sensor_type'], g['minute']): {
+            'min_value': g['min_value'],
+            'max_value': g['max_value'],
+            'sum_value': g['sum_value'],
+            'count': g['count'],
+            'last_value': g['values_desc'][0],
+            'last_reading_at': g['last_reading_at'],
+        }
+        for g in groups
+    }
+
+
+def _merge(target, values):
+    """دمج مجاميع values في target (قاموسين بنفس المفاتيح)"""
+    target['min_value'] = min(target['min_value'], values['min_value'])
+    target['max_value'] = max(target['max_value'], values['max_value'])
+    target['sum_value'] += values['sum_value']
+    target['count'] += values['count']
+    if values['last_reading_at'] >= target['last_reading_at']:
+        target['last_value'] = values['last_value']
+        target['last_reading_at'] = values['last_reading_at']
+
+
+def _roll_up(minutes, resolution):
+    """اشتقاق مجاميع دقة أكبر من مجاميع الدقيقة"""
+    if resolution == '1m':
+        return minutes
+
+    buckets = {}
+    for (pond_id, sensor_type, minute), values in minutes.items():
+        key = (pond_id, sensor_type, bucket_start(minute, resolution))
+        if key in buckets:
+            _merge(buckets[key], values)
+        else:
+            buckets[key] = dict(values)
+    return buckets
+
+
+def _store(resolution, deltas):
+    """دمج الفروقات مع الصفوف المخزنة وكتابتها (upsert دفعة واحدة)"""
+    if not deltas:
+        return 0
+
+    pond_ids = {key[0] for key in deltas}
+    sensor_types = {key[1] for key in deltas}
+    starts = [key[2] for key in deltas]
+    stored = SensorRollup.objects.filter(
+        resolution=resolution,
+        pond_id__in=pond_ids,
+        sensor_type__in=sensor_types,
+        bucket_start__gte=min(starts),
+        bucket_start__lte=max(starts),
+    ).values('pond_id', 'sensor_type', 'bucket_start', *UPDATE_FIELDS[:-1])
+
+    merged = {key: dict(values) for key, values in deltas.items()}
+    for row in stored:
+        key = (row['pond_id'], row['sensor_type'], row['bucket_start'])
+        if key in merged:
+            existing = {field: row[field] for field in UPDATE_FIELDS[:-1]}
+            _merge(existing, merged[key])
+            merged[key] = existing
+
+    now = timezone.now()
+    rollups = [
+        SensorRollup(
+            resolution=resolution,
+            pond_id=pond_id,
+            sensor_type=sensor_type,
+            bucket_start=start,
+            min_value=values['min_value'],
+            max_value=values['max_value'],
+            avg_value=(values['sum_value'] / values['count']).quantize(AVG_QUANTUM),
+            sum_value=values['sum_value'],
+            count=values['count'],
+            last_value=values['last_value'],
+            last_reading_at=values['last_reading_at'],
+            updated_at=now,
+        )
+        for (pond_id, sensor_type, start), values in merged.items()
+    ]
+    SensorRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=['resolution', 'pond', 'sensor_type', 'bucket_start'],
+        update_fields=UPDATE_FIELDS,
+    )
+    return len(rollups)
+
+
+def update_sensor_rollups(chunk_size=None, lag_seconds=None):
+    """
+    دمج القراءات الجديدة في SensorRollup للـ tenant الحالي
+
+    تُعالج فقط القراءات الأقدم من lag_seconds لتفادي تخطي قراءات
+    من transactions لم تُكتمل بعد.
+
+    Returns:
+        dict: عدد القراءات المعالجة وعدد صفوف المجاميع المحدثة
+    """
+    chunk_size = chunk_size or settings.SENSOR_ROLLUP_CHUNK_SIZE
+    lag_seconds = settings.SENSOR_ROLLUP_LAG_SECONDS if lag_seconds is None else lag_seconds
+    cutoff = timezone.now() - timedelta(seconds=lag_seconds)
+
+    processed = 0
+    rollups_updated = 0
+    while True:
+        with transaction.atomic():
+            # قفل صف الحالة يمنع تشغيلين متزامنين لنفس الـ tenant
+            SensorRollupState.objects.get_or_create(pk=1)
+            state = SensorRollupState.objects.select_for_update().get(pk=1)
+
+            window = SensorReading.objects.filter(
+                id__gt=state.last_reading_id,
+                created_at__lte=cutoff,
+            ).order_by('id').values_list('id', flat=True)
+            last_id = window[chunk_size - 1:chunk_size].first()
+            has_more = last_id is not None
+            if not has_more:
+                last_id = window.aggregate(last=Max('id'))['last']
+            if not last_id:
+                break
+
+            minutes = _aggregate_minutes(state.last_reading_id, last_id)
+            for resolution in RESOLUTIONS:
+                rollups_updated += _store(resolution, _roll_up(minutes, resolution))
+            processed += sum(values['count'] for values in minutes.values())
+
+            state.last_reading_id = last_id
+            state.save(update_fields=['last_reading_id', 'updated_at'])
+
+        if not has_more:
+            break
+
+    return {'processed': processed, 'rollups_updated': rollups_updated}
+
+
+# ==================== Query API ====================
+
+def pick_resolution(start, end, max_points):
+    """
+    اختيار أدق دقة زمنية لا تتجاوز ميزانية النقاط للفترة المطلوبة
+
+    Returns:
+        str: 'raw' أو إحدى RESOLUTIONS
+    """
+    span = end - start
+    if span <= RAW_MAX_SPAN:
+        return 'raw'
+    for resolution in RESOLUTIONS:
+        if span.total_seconds() / BUCKET_SECONDS[resolution] <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def get_sensor_series(pond_id, sensor_type, start, end, max_points=500, resolution=None):
+    """
+    سلسلة زمنية لقراءات مستشعر بالدقة المناسبة
+
+    Args:
+        pond_id: معرف الحوض
+        sensor_type: نوع المستشعر
+        start, end: حدود الفترة (aware datetimes)
+        max_points: الحد الأقصى لعدد النقاط
+        resolution: دقة محددة، أو None للاختيار التلقائي
+
+    Returns:
+        tuple: (resolution, points) حيث كل نقطة قاموس
+        bucket_start/min/max/avg/count/last
+    """
+    resolution = resolution or pick_resolution(start, end, max_points)
+
+    if resolution == 'raw':
+        readings = SensorReading.objects.filter(
+            pond_id=pond_id,
+            sensor_type=sensor_type,
+            reading_date__gte=start,
+            reading_date__lte=end,
+        ).order_by('-reading_date').values_list('reading_date', 'reading_value')[:max_points]
+        points = [
+            {
+                'bucket_start': reading_date,
+                'min': value,
+                'max': value,
+                'avg': value,
+                'count': 1,
+                'last': value,
+            }
+            for reading_date, value in reversed(list(readings))
+        ]
+        return resolution, points
+
+    rollups = SensorRollup.objects.filter(
+        resolution=resolution,
+        pond_id=pond_id,
+        sensor_type=sensor_type,
+        bucket_start__gte=bucket_start(start, resolution),
+        bucket_start__lte=end,
+    ).order_by('bucket_start').values_list(
+        'bucket_start', 'min_value', 'max_value', 'avg_value', 'count', 'last_value'
+    )[:max_points]
+    points = [
+        {
+            'bucket_start': start_at,
+            'min': min_value,
+            'max': max_value,
+            'avg': avg_value,
+            'count': count,
+            'last': last_value,
+        }
+        for start_at, min_value, max_value, avg_value, count, last_value in rollups
+    ]
+    return resolution, points
@@ -0,0 +1,29 @@
+"""
+Django Signals للنماذج الحيوية
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Pond, SensorAlertRule
+from .sensor_ingest import invalidate_active_pond_ids
+from .alerts import invalidate_alert_rules, sensor_alerts_fired
+from .live_feed import publish_alerts
+
+
+@receiver(post_save, sender=Pond)
+@receiver(post_delete, sender=Pond)
+def invalidate_pond_cache(sender, instance, **kwargs):
+    """تحديث قائمة الأحواض النشطة المخزنة عند إضافة أو تعديل أو حذف حوض"""
+    invalidate_active_pond_ids()
+
+
+@receiver(post_save, sender=SensorAlertRule)
+@receiver(post_delete, sender=SensorAlertRule)
+def invalidate_alert_rules_cache(sender, instance, **kwargs):
+    """إعادة تحميل قواعد التنبيه المترجمة عند تعديلها"""
+    invalidate_alert_rules()
+
+
+@receiver(sensor_alerts_fired)
+def broadcast_sensor_alerts(sender, alerts, schema_name, **kwargs):
+    """بث التنبيهات الجديدة للوحات المشتركة"""
+    publish_alerts(schema_name, alerts)
@@ -0,0 +1,198 @@
+"""
+Celery Tasks للبيانات البيولوجية (قراءات المستشعرات)
+"""
+from celery import shared_task
+from django.db import connection
+from django.utils import timezone
+from django_tenants.utils import schema_context
+import logging
+
+from tenants.fanout import fan_out_tenants
+from .sensor_rollups import update_sensor_rollups
+from .partitions import ensure_sensor_partitions, drop_expired_sensor_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='biological.update_sensor_rollups')
+def update_sensor_rollups_task(schema_name=None):
+    """
+    دمج قراءات المستشعرات الجديدة في جداول المجاميع لجميع الـ tenants
+    
+    بدون schema_name تُوزع المهمة بالتوازي على جميع الـ tenants
+    (tenants.fanout.fan_out_tenants).
+    
+    **Parameters:**
+    - schema_name: تحديث tenant واحد فقط (افتراضي: جميع الـ tenants)
+    
+    **Returns:**
+    - dict: نتيجة الـ tenant، أو معرف المهمة الموزعة
+    """
+    if schema_name is None:
+        job_id = fan_out_tenants('biological.sensor_rollups.update_sensor_rollups')
+        return {'job_id': job_id, 'status': 'dispatched'}
+    
+    start_time = timezone.now()
+    with schema_context(schema_name):
+        result = update_sensor_rollups()
+    duration = (timezone.now() - start_time).total_seconds()
+    logger.info(f"[{schema_name}] اكتمل تحديث مجاميع المستشعرات خلال {duration:.2f} ثانية")
+    
+    return {
+        'tenants': {schema_name: result},
+        'duration_seconds': round(duration, 2),
+        'status': 'success'
+    }
+
+
+def create_tenant_sensor_partitions(months_ahead=3):
+    """
+    إنشاء أقسام قراءات المستشعرات للـ tenant الحالي للشهر الحالي والأشهر القادمة
+    
+    **Returns:**
+    - list: أسماء الأقسام التي تم إنشاؤها
+    """
+    created = ensure_sensor_partitions(months_ahead=months_ahead)
+    if created:
+        logger.info(f"[{connection.schema_name}] تم إنشاء أقسام قراءات المستشعرات: {', '.join(created)}")
+    return created
+
+
+@shared_task(name='biological.create_sensor_partitions')
+def create_sensor_partitions(months_ahead=3, schema_name=None):
+    """
+    إنشاء أقسام جدول قراءات المستشعرات للشهر الحالي والأشهر القادمة
+    
+    بدون schema_name تُوزع المهمة بالتوازي على جميع الـ tenants
+    (tenants.fanout.fan_out_tenants).
+    
+    **Parameters:**
+    - months_ahead: عدد الأشهر القادمة التي تُنشأ أقسامها مسبقاً (افتراضي: 3)
+    - schema_name: tenant واحد فقط (افتراضي: جميع الـ tenants)
+    
+    **Returns:**
+    - dict: الأقسام التي تم إنشاؤها، أو معرف المهمة الموزعة
+    """
+    if schema_name is None:
+        job_id = fan_out_tenants(
+            'biological.tasks.create_tenant_sensor_partitions', {'months_ahead': months_ahead}
+        )
+        return {'job_id': job_id, 'status': 'dispatched'}
+    
+    with schema_context(schema_name):
+        created = create_tenant_sensor_partitions(months_ahead=months_ahead)
+    return {
+        'created': {schema_name: created},
+        'created_count': len(created),
+        'status': 'success'
+    }
+
+
+def cleanup_tenant_sensor_readings(retention_months=12):
+    """
+    حذف أقسام قراءات المستشعرات المنتهية للـ tenant الحالي
+    
+    **Returns:**
+    - dict: الأقسام المحذوفة وعدد سجلات القسم الافتراضي المحذوفة
+    """
+    result = drop_expired_sensor_partitions(retention_months=retention_months)
+    if result['dropped']:
+        logger.info(f"[{connection.schema_name}] تم حذف الأقسام: {', '.join(result['dropped'])}")
+    return {
+        'dropped': result['dropped'],
+        'default_deleted': result['default_deleted'],
+        'cutoff_date': result['cutoff'].isoformat(),
+    }
+
+
+@shared_task(name='biological.cleanup_old_sensor_readings')
+def cleanup_old_sensor_readings(retention_months=12, schema_name=None):
+    """
+    حذف قراءات المستشعرات الأقدم من فترة الاحتفاظ بحذف أقسام الأشهر كاملة
+    
+    بدلاً من DELETE صفاً صفاً (كما في audit.cleanup_old_logs) يتم حذف
+    قسم الشهر المنتهي بـ DROP TABLE، دون ضغط على VACUUM.
+    تبقى مجاميع المستشعرات (SensorRollup) محفوظة للفترات المحذوفة.
+    بدون schema_name تُوزع المهمة بالتوازي على جميع الـ tenants
+    (tenants.fanout.fan_out_tenants).
+    
+    **Parameters:**
+    - retention_months: عدد الأشهر للاحتفاظ بالقراءات الخام (افتراضي: 12 شهر)
+    - schema_name: tenant واحد فقط (افتراضي: جميع الـ tenants)
+    
+    **Returns:**
+    - dict: نتيجة الـ tenant والمدة المستغرقة، أو معرف المهمة الموزعة
+    """
+    if schema_name is None:
+        job_id = fan_out_tenants(
+            'biological.tasks.cleanup_tenant_sensor_readings', {'retention_months': retention_months}
+        )
+        return {'job_id': job_id, 'retention_months': retention_months, 'status': 'dispatched'}
+    
+    start_time = timezone.now()
+    with schema_context(schema_name):
+        result = cleanup_tenant_sensor_readings(retention_months=retention_months)
+    duration = (timezone.now() - start_time).total_seconds()
+    
+    logger.info(
+        f"[{schema_name}] اكتمل حذف أقسام قراءات المستشعرات: تم حذف {len(result['dropped'])} قسم "
+        f"خلال {duration:.2f} ثانية"
+    )
+    
+    return {
+        'tenants': {schema_name: result},
+        'dropped_count': len(result['dropped']),
+        'retention_months': retention_months,
+        'duration_seconds': round(duration, 2),
+        'status': 'success'
+    }
+
+
+@shared_task(name='biological.persist_sensor_alerts')
+def persist_sensor_alerts(schema_name, alerts):
+    """
+    حفظ تنبيهات المستشعرات الصادرة من محرك القواعد وإرسالها للمشتركين
+    
+    **Parameters:**
+    - schema_name: الـ tenant
+    - alerts: قائمة قواميس التنبيهات (من dispatch_sensor_alerts)
+    
+    **Returns:**
+    - dict: عدد التنبيهات المحفوظة
+    """
+    from django.utils.dateparse import parse_datetime
+    from .models import Pond, SensorAlert, SensorAlertRule
+    from .alerts import sensor_alerts_fired
+    
+    with schema_context(schema_name):
+        # القواعد أو الأحواض قد تُحذف بين التقييم وتنفيذ المهمة: التنبيه يُحفظ
+        # بدون القاعدة (كما في on_delete=SET_NULL) ويُتجاهل إذا حُذف الحوض
+        rule_ids = set(SensorAlertRule.objects.filter(
+            id__in={alert['rule_id'] for alert in alerts}
+        ).values_list('id', flat=True))
+        pond_ids = set(Pond.objects.filter(
+            id__in={alert['pond_id'] for alert in alerts}
+        ).values_list('id', flat=True))
+        
+        created = SensorAlert.objects.bulk_create([
+            SensorAlert(
+                pond_id=alert['pond_id'],
+                rule_id=alert['rule_id'] if alert['rule_id'] in rule_ids else None,
+                reading_id=alert['reading_id'],
+                sensor_type=alert['sensor_type'],
+                reading_value=alert['reading_value'],
+                reading_date=parse_datetime(alert['reading_date']),
+                severity=alert['severity'],
+                message=alert['message'],
+            )
+            for alert in alerts
+            if alert['pond_id'] in pond_ids
+        ])
+        sensor_alerts_fired.send(sender=SensorAlert, alerts=created, schema_name=schema_name)
+    
+    logger.info(f"[{schema_name}] تم حفظ {len(created)} تنبيه مستشعر")
+    
+    return {
+        'created_count': len(created),
+        'status': 'success'
+    }
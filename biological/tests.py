@@ -149,3 +149,451 @@ class TestBatchModel:
         # متوسط الوزن = الوزن الحالي / العدد الحالي
         expected_avg = Decimal('200.00') / Decimal('950')
         assert batch.average_weight == expected_avg
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSensorIngest:
+    """اختبارات الإدخال الجماعي لقراءات المستشعرات"""
+    
+    def test_parse_compact_and_ndjson_payloads(self):
+        """تحليل الصيغة المضغوطة و NDJSON مع الاحتفاظ بترتيب الصفوف"""
+        from biological.sensor_ingest import parse_bulk_payload
+        
+        rows, rejects = parse_bulk_payload(
+            b'{"fields": ["pond_id", "sensor_type", "reading_value"],'
+            b' "rows": [[1, "oxygen", 6.5], [1, "ph"]]}',
+            'application/json'
+        )
+        assert rows == [(0, {'pond_id': 1, 'sensor_type': 'oxygen', 'reading_value': 6.5})]
+        assert [index for index, _ in rejects] == [1]
+        
+        rows, rejects = parse_bulk_payload(
+            b'{"pond_id": 1}\nnot-json\n{"pond_id": 2}\n',
+            'application/x-ndjson'
+        )
+        assert [index for index, _ in rows] == [0, 2]
+        assert [index for index, _ in rejects] == [1]
+    
+    def test_ingest_inserts_valid_rows_and_rejects_invalid(self, django_assert_max_num_queries):
+        """إدراج الصفوف الصالحة دفعة واحدة وإرجاع سبب رفض الباقي"""
+        from django.core.cache import cache
+        from biological.models import SensorReading
+        from biological.sensor_ingest import ingest_sensor_readings
+        
+        cache.clear()
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        inactive = Pond.objects.create(
+            name='حوض 2', pond_type='concrete', capacity=Decimal('100.00'), is_active=False
+        )
+        
+        rows = [
+            (0, {'pond_id': pond.id, 'sensor_type': 'oxygen', 'reading_value': 6.25}),
+            (1, {'pond_id': inactive.id, 'sensor_type': 'oxygen', 'reading_value': 5}),
+            (2, {'pond_id': pond.id, 'sensor_type': 'unknown', 'reading_value': 5}),
+            (3, {'pond_id': pond.id, 'sensor_type': 'ph', 'reading_value': 'abc'}),
+            (4, {'pond_id': pond.id + 0.7, 'sensor_type': 'ph', 'reading_value': 7.0}),
+            (5, {'pond_id': str(pond.id), 'sensor_type': 'ph', 'reading_value': 7.1,
+                 'reading_date': '2025-01-01T10:00:00Z'}),
+        ]
+        rows += [
+            (6 + i, {'pond_id': pond.id, 'sensor_type': 'temperature', 'reading_value': 25 + i})
+            for i in range(50)
+        ]
+        
+        # استعلام الأحواض + الإدراج (داخل transaction)
+        with django_assert_max_num_queries(6):
+            readings, rejects = ingest_sensor_readings(rows)
+        
+        assert len(readings) == 52
+        assert [index for index, _ in rejects] == [1, 2, 3, 4]
+        assert SensorReading.objects.filter(pond=pond).count() == 52
+        assert SensorReading.objects.get(sensor_type='oxygen').reading_value == Decimal('6.250')
+    
+    def test_oversized_payload_rejected_before_parsing(self, settings, rf, monkeypatch):
+        """الطلب الأكبر من IOT_BULK_MAX_BYTES يُرفض دون تحليله"""
+        from api import iot
+        
+        settings.IOT_BULK_MAX_BYTES = 100
+        monkeypatch.setattr(iot, 'parse_bulk_payload', lambda *args: pytest.fail('parsed'))
+        request = rf.post(
+            '/api/iot/sensor-readings/bulk', data=b'[' + b'{},' * 100 + b'{}]',
+            content_type='application/json'
+        )
+        
+        status, _ = iot.create_sensor_readings_bulk(request)
+        assert status == 413
+    
+    def test_pond_cache_invalidated_on_pond_change(self):
+        """تحديث قائمة الأحواض المخزنة عند تعطيل حوض"""
+        from django.core.cache import cache
+        from biological.sensor_ingest import get_active_pond_ids
+        
+        cache.clear()
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        assert pond.id in get_active_pond_ids()
+        
+        pond.is_active = False
+        pond.save()
+        assert pond.id not in get_active_pond_ids()
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSensorRollups:
+    """اختبارات مجاميع قراءات المستشعرات"""
+    
+    def _reading(self, pond, value, moment):
+        from biological.models import SensorReading
+        return SensorReading.objects.create(
+            pond=pond,
+            sensor_type='oxygen',
+            reading_value=Decimal(value),
+            reading_date=moment
+        )
+    
+    def test_incremental_update_merges_new_readings(self):
+        """الدمج التزايدي يطابق التجميع الكامل في جميع الدقات"""
+        from datetime import datetime
+        from django.utils import timezone
+        from biological.models import SensorRollup
+        from biological.sensor_rollups import update_sensor_rollups
+        
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        base = timezone.make_aware(datetime(2025, 1, 1, 10, 0, 0))
+        self._reading(pond, '6.000', base.replace(second=10))
+        self._reading(pond, '5.000', base.replace(second=20))
+        self._reading(pond, '7.000', base.replace(minute=20))
+        
+        result = update_sensor_rollups(lag_seconds=0)
+        assert result['processed'] == 3
+        
+        minute = SensorRollup.objects.get(resolution='1m', bucket_start=base)
+        assert (minute.min_value, minute.max_value, minute.count) == (Decimal('5.000'), Decimal('6.000'), 2)
+        assert minute.last_value == Decimal('5.000')
+        assert SensorRollup.objects.filter(resolution='15m').count() == 2
+        
+        # قراءة متأخرة تصل بعد التشغيل الأول لنفس الساعة
+        self._reading(pond, '4.000', base.replace(minute=5))
+        assert update_sensor_rollups(lag_seconds=0)['processed'] == 1
+        
+        hour = SensorRollup.objects.get(resolution='1h', bucket_start=base)
+        assert hour.count == 4
+        assert hour.min_value == Decimal('4.000')
+        assert hour.max_value == Decimal('7.000')
+        assert hour.avg_value == Decimal('5.500')
+        assert hour.last_value == Decimal('7.000')
+        
+        # لا توجد قراءات جديدة
+        assert update_sensor_rollups(lag_seconds=0)['processed'] == 0
+    
+    def test_series_picks_resolution_for_point_budget(self):
+        """اختيار الدقة حسب طول الفترة وميزانية النقاط"""
+        from datetime import datetime, timedelta
+        from django.utils import timezone
+        from biological.sensor_rollups import update_sensor_rollups, get_sensor_series
+        
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        base = timezone.make_aware(datetime(2025, 1, 1, 0, 0, 0))
+        for hour in range(48):
+            self._reading(pond, '6.500', base + timedelta(hours=hour))
+        update_sensor_rollups(lag_seconds=0)
+        
+        resolution, points = get_sensor_series(
+            pond.id, 'oxygen', base, base + timedelta(minutes=30)
+        )
+        assert resolution == 'raw'
+        assert len(points) == 1
+        
+        resolution, points = get_sensor_series(
+            pond.id, 'oxygen', base, base + timedelta(days=2), max_points=100
+        )
+        assert resolution == '1h'
+        assert len(points) == 48
+        
+        resolution, points = get_sensor_series(
+            pond.id, 'oxygen', base, base + timedelta(days=2), max_points=10
+        )
+        assert resolution == '1d'
+        assert [point['count'] for point in points] == [24, 24]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSensorPartitions:
+    """اختبارات تقسيم جدول قراءات المستشعرات شهرياً"""
+    
+    def test_future_partitions_created(self):
+        """إنشاء أقسام الشهر الحالي والأشهر القادمة"""
+        from datetime import datetime, timezone
+        from django.db import connection
+        from biological.partitions import (
+            is_partitioned, list_sensor_partitions, ensure_sensor_partitions, partition_name
+        )
+        
+        now = datetime.now(timezone.utc)
+        ensure_sensor_partitions(months_ahead=6, now=now)
+        
+        with connection.cursor() as cursor:
+            assert is_partitioned(cursor)
+            names = [name for name, _ in list_sensor_partitions(cursor)]
+        assert partition_name(datetime(now.year, now.month, 1, tzinfo=timezone.utc)) in names
+        assert ensure_sensor_partitions(months_ahead=6, now=now) == []
+    
+    def test_expired_partitions_dropped(self):
+        """حذف أقسام الأشهر المنتهية كاملة والاحتفاظ بالحديثة"""
+        from datetime import datetime, timedelta, timezone
+        from django.db import connection
+        from biological.models import SensorReading
+        from biological.partitions import (
+            add_months, month_start, create_sensor_partition, drop_expired_sensor_partitions,
+            partition_name
+        )
+        
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        now = datetime.now(timezone.utc)
+        old_month = add_months(month_start(now), -24)
+        with connection.cursor() as cursor:
+            create_sensor_partition(cursor, old_month)
+        
+        for moment in (old_month + timedelta(days=3), now):
+            SensorReading.objects.create(
+                pond=pond, sensor_type='ph', reading_value=Decimal('7.000'), reading_date=moment
+            )
+        
+        result = drop_expired_sensor_partitions(retention_months=12, now=now)
+        
+        assert partition_name(old_month) in result['dropped']
+        assert SensorReading.objects.count() == 1
+        assert SensorReading.objects.get().reading_date >= add_months(month_start(now), -12)
+    
+    def test_maintenance_tasks_fan_out_per_tenant(self, monkeypatch):
+        """مهام الصيانة بدون schema_name توزع دالة الـ tenant بالتوازي، ومع schema_name تعمل مباشرة"""
+        from django.db import connection
+        from django.utils.module_loading import import_string
+        from biological import tasks
+        
+        dispatched = []
+        monkeypatch.setattr(
+            tasks, 'fan_out_tenants', lambda func_path, kwargs=None: dispatched.append(func_path) or 'job'
+        )
+        
+        assert tasks.update_sensor_rollups_task()['status'] == 'dispatched'
+        assert tasks.create_sensor_partitions(months_ahead=3)['status'] == 'dispatched'
+        assert tasks.cleanup_old_sensor_readings(retention_months=12)['status'] == 'dispatched'
+        assert [import_string(path) for path in dispatched] == [
+            tasks.update_sensor_rollups,
+            tasks.create_tenant_sensor_partitions,
+            tasks.cleanup_tenant_sensor_readings,
+        ]
+        
+        result = tasks.cleanup_old_sensor_readings(retention_months=12, schema_name=connection.schema_name)
+        assert result['status'] == 'success'
+        assert len(dispatched) == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSensorAlertEngine:
+    """اختبارات محرك تقييم تنبيهات المستشعرات"""
+    
+    def _readings(self, pond, values, start):
+        from datetime import timedelta
+        from biological.models import SensorReading
+        return [
+            SensorReading(
+                pond=pond,
+                sensor_type='oxygen',
+                reading_value=Decimal(value),
+                reading_date=start + timedelta(minutes=index)
+            )
+            for index, value in enumerate(values)
+        ]
+    
+    def test_rules_fire_on_transition_without_db_queries(self, django_assert_num_queries, django_capture_on_commit_callbacks):
+        """التنبيه يُطلق عند دخول حالة التنبيه فقط، و is_alert على كل قراءة مخالفة"""
+        from datetime import datetime
+        from django.core.cache import cache
+        from django.utils import timezone
+        from biological.models import SensorAlertRule
+        from biological.alerts import evaluate_sensor_readings
+        
+        cache.clear()
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        SensorAlertRule.objects.create(
+            sensor_type='oxygen', rule_type='threshold', min_value=Decimal('4.000'), severity='critical'
+        )
+        SensorAlertRule.objects.create(
+            pond=pond, sensor_type='oxygen', rule_type='rate_of_change', max_change=Decimal('1.000')
+        )
+        start = timezone.make_aware(datetime(2025, 1, 1, 6, 0))
+        
+        # التحميل الأول للقواعد المترجمة (الحالة تُكتب في Cache بعد الـ commit)
+        with django_capture_on_commit_callbacks(execute=True):
+            evaluate_sensor_readings(self._readings(pond, ['6.0'], start))
+        
+        readings = self._readings(pond, ['6.0', '3.5', '3.4', '6.0'], start.replace(hour=7))
+        with django_assert_num_queries(0):
+            fired = evaluate_sensor_readings(readings)
+        
+        assert [(alert.reading.reading_value, alert.rule.rule_type) for alert in fired] == [
+            (Decimal('3.5'), 'rate_of_change'),
+            (Decimal('3.5'), 'threshold'),
+            (Decimal('6.0'), 'rate_of_change'),
+        ]
+        assert [reading.is_alert for reading in readings] == [False, True, True, True]
+        assert readings[2].alert_message.startswith('القيمة 3.4')
+    
+    def test_state_not_advanced_without_commit(self, django_capture_on_commit_callbacks):
+        """حالة السلسلة لا تتقدم إذا لم تُحفظ القراءات"""
+        from datetime import datetime
+        from django.core.cache import cache
+        from django.utils import timezone
+        from biological.models import SensorAlertRule
+        from biological.alerts import evaluate_sensor_readings
+        
+        cache.clear()
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        SensorAlertRule.objects.create(sensor_type='oxygen', min_value=Decimal('4.000'))
+        start = timezone.make_aware(datetime(2025, 1, 1, 6, 0))
+        
+        with django_capture_on_commit_callbacks(execute=False):
+            assert len(evaluate_sensor_readings(self._readings(pond, ['3.0'], start))) == 1
+        # الدفعة السابقة لم تُحفظ، فالتنبيه يُطلق مجدداً
+        with django_capture_on_commit_callbacks(execute=True):
+            assert len(evaluate_sensor_readings(self._readings(pond, ['3.0'], start))) == 1
+        assert evaluate_sensor_readings(self._readings(pond, ['3.0'], start.replace(hour=7))) == []
+    
+    def test_rule_changes_invalidate_compiled_rules(self):
+        """تعديل القواعد يعيد تحميلها في الدفعة التالية"""
+        from datetime import datetime
+        from django.core.cache import cache
+        from django.utils import timezone
+        from biological.models import SensorAlertRule
+        from biological.alerts import evaluate_sensor_readings
+        
+        cache.clear()
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        start = timezone.make_aware(datetime(2025, 1, 1, 6, 0))
+        assert evaluate_sensor_readings(self._readings(pond, ['2.0'], start)) == []
+        
+        SensorAlertRule.objects.create(sensor_type='oxygen', max_value=Decimal('1.000'))
+        fired = evaluate_sensor_readings(self._readings(pond, ['2.0'], start.replace(hour=7)))
+        assert len(fired) == 1
+    
+    def test_bulk_ingest_persists_alerts(self, django_capture_on_commit_callbacks, monkeypatch):
+        """الإدخال الجماعي يحفظ التنبيهات بشكل غير متزامن ويتجاهل is_alert المرسل"""
+        from django.core.cache import cache
+        from biological.models import SensorAlertRule, SensorAlert, SensorReading
+        from biological.sensor_ingest import ingest_sensor_readings
+        from biological.tasks import persist_sensor_alerts
+        
+        monkeypatch.setattr(persist_sensor_alerts, 'delay', persist_sensor_alerts)
+        cache.clear()
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        SensorAlertRule.objects.create(sensor_type='ph', max_value=Decimal('8.500'))
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            readings, rejects = ingest_sensor_readings([
+                (0, {'pond_id': pond.id, 'sensor_type': 'ph', 'reading_value': 7.0, 'is_alert': True}),
+                (1, {'pond_id': pond.id, 'sensor_type': 'ph', 'reading_value': 9.1}),
+            ])
+        
+        assert list(SensorReading.objects.filter(is_alert=True).values_list('pk', flat=True)) == [readings[1].pk]
+        alert = SensorAlert.objects.get()
+        assert alert.reading_id == readings[1].pk
+        assert alert.reading_value == Decimal('9.100')
+    
+    def test_persist_alerts_for_deleted_rule(self):
+        """قاعدة محذوفة بعد التقييم لا تمنع حفظ التنبيه"""
+        from biological.models import SensorAlertRule, SensorAlert
+        from biological.tasks import persist_sensor_alerts
+        from django.db import connection
+        
+        pond = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        rule = SensorAlertRule.objects.create(sensor_type='ph', max_value=Decimal('8.500'))
+        alert = {
+            'pond_id': pond.id, 'rule_id': rule.id, 'reading_id': 1, 'sensor_type': 'ph',
+            'reading_value': '9.100', 'reading_date': '2025-01-01T06:00:00+00:00',
+            'severity': 'warning', 'message': 'ph',
+        }
+        rule.delete()
+        
+        result = persist_sensor_alerts(connection.schema_name, [alert, {**alert, 'pond_id': pond.id + 1}])
+        
+        assert result['created_count'] == 1
+        assert SensorAlert.objects.get().rule_id is None
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSensorLiveFeed:
+    """اختبارات بث القراءات المباشر عبر Redis pub/sub"""
+    
+    class FakePipeline:
+        def __init__(self):
+            self.published = []
+        
+        def publish(self, channel, message):
+            self.published.append((channel, message))
+        
+        def execute(self):
+            return [1] * len(self.published)
+    
+    def test_bulk_ingest_publishes_one_message_per_pond(self, django_capture_on_commit_callbacks, monkeypatch):
+        """نشر رسالة واحدة لكل حوض على قناة الحوض وقناة الـ tenant بعد الحفظ"""
+        import json
+        from types import SimpleNamespace
+        from django.core.cache import cache
+        from django.db import connection
+        from biological import live_feed
+        from biological.sensor_ingest import ingest_sensor_readings
+        
+        pipeline = self.FakePipeline()
+        monkeypatch.setattr(
+            live_feed, '_get_publisher', lambda: SimpleNamespace(pipeline=lambda transaction: pipeline)
+        )
+        cache.clear()
+        pond_1 = Pond.objects.create(name='حوض 1', pond_type='concrete', capacity=Decimal('100.00'))
+        pond_2 = Pond.objects.create(name='حوض 2', pond_type='concrete', capacity=Decimal('100.00'))
+        
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            ingest_sensor_readings([
+                (0, {'pond_id': pond_1.id, 'sensor_type': 'oxygen', 'reading_value': 6.1}),
+                (1, {'pond_id': pond_2.id, 'sensor_type': 'oxygen', 'reading_value': 5.9}),
+                (2, {'pond_id': pond_1.id, 'sensor_type': 'ph', 'reading_value': 7.2}),
+            ])
+        assert pipeline.published == []
+        for callback in callbacks:
+            callback()
+        
+        schema_name = connection.schema_name
+        channels = [channel for channel, _ in pipeline.published]
+        assert channels == [
+            live_feed.pond_channel(schema_name, pond_1.id), live_feed.tenant_channel(schema_name),
+            live_feed.pond_channel(schema_name, pond_2.id), live_feed.tenant_channel(schema_name),
+        ]
+        message = json.loads(pipeline.published[0][1])
+        assert message['event'] == 'readings'
+        assert message['pond_id'] == pond_1.id
+        assert [item['sensor_type'] for item in message['items']] == ['oxygen', 'ph']
+    
+    def test_format_sse(self):
+        """تنسيق رسالة Server-Sent Event"""
+        from biological.live_feed import format_sse
+        
+        assert format_sse('{"a": 1}', 'readings') == 'event: readings\ndata: {"a": 1}\n\n'
+        assert format_sse('a\nb') == 'data: a\ndata: b\n\n'
+    
+    def test_live_ticket_is_single_use(self):
+        """ticket البث يُستخدم مرة واحدة فقط"""
+        from types import SimpleNamespace
+        from django.core.cache import cache
+        from api.live import issue_live_ticket, consume_live_ticket
+        
+        cache.clear()
+        ticket = issue_live_ticket('farm', SimpleNamespace(id=7, role='worker'))
+        
+        assert consume_live_ticket('other', ticket) is None
+        assert consume_live_ticket('farm', ticket) == {'user_id': 7, 'role': 'worker'}
+        assert consume_live_ticket('farm', ticket) is None
@@ -186,3 +186,17 @@ def tenant_user(test_tenant):
             role="owner",
         )
     return user
+
+
+# ============================================================
+# 🧾 6) Synchronous Accounting Posting
+# ============================================================
+@pytest.fixture(autouse=True)
+def sync_accounting_posting(settings):
+    """
+    ترحيل قيود العمليات فوراً داخل الـ signal بدلاً من طابور الترحيل،
+    حتى تجد الاختبارات القيود مباشرة بعد إنشاء المستند.
+    
+    لاختبار الطابور نفسه: settings.ACCOUNTING_POSTING_SYNC = False
+    """
+    settings.ACCOUNTING_POSTING_SYNC = True
@@ -0,0 +1,87 @@
+"""
+Management Command لإعادة بناء مجاميع الدفعات (BatchRollup) أو فحص انحرافها
+
+الاستخدام:
+    python manage.py rebuild_batch_rollups --schema farm1
+    python manage.py rebuild_batch_rollups --schema farm1 --check
+    python manage.py rebuild_batch_rollups --check   # جميع الـ tenants
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django_tenants.utils import schema_context, get_tenant_model, get_public_schema_name
+
+from biological.models import Batch
+from daily_operations.rollups import rebuild_batch_rollup, find_rollup_drift
+
+
+class Command(BaseCommand):
+    help = 'إعادة بناء مجاميع الدفعات من سجلات التغذية والنفوق أو فحص انحرافها'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schema',
+            type=str,
+            help='Schema name (tenant name). افتراضي: جميع الـ tenants',
+        )
+        parser.add_argument(
+            '--batch-id',
+            type=int,
+            action='append',
+            dest='batch_ids',
+            help='معرف دفعة محددة (يمكن تكراره)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='فحص الانحراف فقط دون تعديل (يفشل إذا وُجد انحراف)',
+        )
+
+    def handle(self, *args, **options):
+        if options['schema']:
+            schemas = [options['schema']]
+        else:
+            schemas = list(
+                get_tenant_model().objects.exclude(
+                    schema_name=get_public_schema_name()
+                ).values_list('schema_name', flat=True)
+            )
+
+        drifted_total = 0
+        for schema_name in schemas:
+            with schema_context(schema_name):
+                if options['check']:
+                    drifted_total += self._check(schema_name, options['batch_ids'])
+                else:
+                    self._rebuild(schema_name, options['batch_ids'])
+
+        if options['check'] and drifted_total:
+            raise CommandError(f'تم العثور على انحراف في {drifted_total} دفعة')
+
+    def _rebuild(self, schema_name, batch_ids):
+        batches = Batch.objects.all()
+        if batch_ids:
+            batches = batches.filter(id__in=batch_ids)
+
+        count = 0
+        with transaction.atomic():
+            for batch_id in batches.values_list('id', flat=True).iterator():
+                rebuild_batch_rollup(batch_id)
+                count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ [{schema_name}] تمت إعادة بناء مجاميع {count} دفعة')
+        )
+
+    def _check(self, schema_name, batch_ids):
+        drift = find_rollup_drift(batch_ids)
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f'✅ [{schema_name}] لا يوجد انحراف'))
+            return 0
+
+        for batch_id, differences in drift:
+            details = ', '.join(
+                f'{field}: {stored} ≠ {actual}'
+                for field, (stored, actual) in differences.items()
+            )
+            self.stdout.write(self.style.WARNING(f'⚠️  [{schema_name}] دفعة {batch_id}: {details}'))
+        return len(drift)
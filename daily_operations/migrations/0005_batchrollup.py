@@ -0,0 +1,140 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_batch_rollups(apps, schema_editor):
+    """بناء المجاميع للدفعات الموجودة من السجلات الحالية"""
+    from django.db.models import Count, Max, Sum
+
+    Batch = apps.get_model("biological", "Batch")
+    BatchRollup = apps.get_model("daily_operations", "BatchRollup")
+    FeedingLog = apps.get_model("daily_operations", "FeedingLog")
+    MortalityLog = apps.get_model("daily_operations", "MortalityLog")
+
+    feeding = {
+        row["batch_id"]: row
+        for row in FeedingLog.objects.values("batch_id").annotate(
+            total_feed_kg=Sum("quantity"),
+            total_feed_cost=Sum("total_cost"),
+            feeding_days=Count("id"),
+            last_date=Max("feeding_date"),
+        )
+    }
+    mortality = {
+        row["batch_id"]: row
+        for row in MortalityLog.objects.values("batch_id").annotate(
+            total_mortality=Sum("count"),
+            mortality_days=Count("id"),
+            last_date=Max("mortality_date"),
+        )
+    }
+
+    rollups = []
+    for batch_id in Batch.objects.values_list("id", flat=True):
+        feed = feeding.get(batch_id, {})
+        mort = mortality.get(batch_id, {})
+        dates = [d for d in (feed.get("last_date"), mort.get("last_date")) if d]
+        rollups.append(
+            BatchRollup(
+                batch_id=batch_id,
+                total_feed_kg=feed.get("total_feed_kg") or Decimal("0.00"),
+                total_feed_cost=feed.get("total_feed_cost") or Decimal("0.00"),
+                total_mortality=mort.get("total_mortality") or 0,
+                feeding_days=feed.get("feeding_days", 0),
+                mortality_days=mort.get("mortality_days", 0),
+                last_log_date=max(dates) if dates else None,
+            )
+        )
+    BatchRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "biological",
+            "0005_rename_biological_s_pond_i_123abc_idx_biological__pond_id_b2ad41_idx_and_more",
+        ),
+        (
+            "daily_operations",
+            "0004_remove_feedinglog_daily_operat_batch_f_idx_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BatchRollup",
+            fields=[
+                (
+                    "batch",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rollup",
+                        serialize=False,
+                        to="biological.batch",
+                        verbose_name="الدفعة",
+                    ),
+                ),
+                (
+                    "total_feed_kg",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=14,
+                        verbose_name="إجمالي العلف (كجم)",
+                    ),
+                ),
+                (
+                    "total_feed_cost",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=14,
+                        verbose_name="إجمالي تكلفة العلف",
+                    ),
+                ),
+                (
+                    "total_mortality",
+                    models.IntegerField(default=0, verbose_name="إجمالي النفوق"),
+                ),
+                (
+                    "feeding_days",
+                    models.IntegerField(
+                        default=0,
+                        help_text="عدد سجلات التغذية",
+                        verbose_name="عدد أيام التغذية",
+                    ),
+                ),
+                (
+                    "mortality_days",
+                    models.IntegerField(
+                        default=0,
+                        help_text="عدد سجلات النفوق",
+                        verbose_name="عدد أيام النفوق",
+                    ),
+                ),
+                (
+                    "last_log_date",
+                    models.DateField(
+                        blank=True,
+                        help_text="آخر تاريخ تغذية أو نفوق",
+                        null=True,
+                        verbose_name="تاريخ آخر سجل",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="آخر تحديث"),
+                ),
+            ],
+            options={
+                "verbose_name": "مجاميع دفعة",
+                "verbose_name_plural": "مجاميع الدفعات",
+            },
+        ),
+        migrations.RunPython(backfill_batch_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("biological", "0008_sensoralerts"),
+        ("daily_operations", "0005_batchrollup"),
+        ("inventory", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="feedinglog",
+            name="daily_opera_feeding_523713_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="mortalitylog",
+            name="daily_opera_mortali_86e54f_idx",
+        ),
+        migrations.AddIndex(
+            model_name="feedinglog",
+            index=models.Index(
+                fields=["feeding_date", "id"], name="daily_opera_feeding_f15d70_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mortalitylog",
+            index=models.Index(
+                fields=["mortality_date", "id"], name="daily_opera_mortali_ef540d_idx"
+            ),
+        ),
+    ]
@@ -70,12 +70,26 @@ class FeedingLog(models.Model):
         ordering = ['-feeding_date', '-created_at']
         indexes = [
             models.Index(fields=['batch', 'feeding_date']),
-            models.Index(fields=['feeding_date']),
+            models.Index(fields=['feeding_date', 'id']),  # Keyset Pagination في API
         ]
     
     def __str__(self):
         return f"{self.batch.batch_number} - {self.feeding_date} - {self.quantity} كجم"
     
+    ROLLUP_FIELDS = ('batch_id', 'quantity', 'total_cost', 'feeding_date')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # لقطة بالقيم المحفوظة لحساب الفرق في BatchRollup عند التعديل
+        if not instance.get_deferred_fields() & set(cls.ROLLUP_FIELDS):
+            instance._rollup_snapshot = instance.rollup_values()
+        return instance
+    
+    def rollup_values(self):
+        """القيم التي تدخل في BatchRollup"""
+        return tuple(getattr(self, field) for field in self.ROLLUP_FIELDS)
+    
     def save(self, *args, **kwargs):
         # حساب التكلفة الإجمالية تلقائياً
         if self.quantity and self.unit_price:
@@ -131,8 +145,79 @@ class MortalityLog(models.Model):
         ordering = ['-mortality_date', '-created_at']
         indexes = [
             models.Index(fields=['batch', 'mortality_date']),
-            models.Index(fields=['mortality_date']),
+            models.Index(fields=['mortality_date', 'id']),  # Keyset Pagination في API
         ]
     
     def __str__(self):
         return f"{self.batch.batch_number} - {self.mortality_date} - {self.count} سمكة"
+    
+    ROLLUP_FIELDS = ('batch_id', 'count', 'mortality_date')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # لقطة بالقيم المحفوظة لحساب الفرق في BatchRollup عند التعديل
+        if not instance.get_deferred_fields() & set(cls.ROLLUP_FIELDS):
+            instance._rollup_snapshot = instance.rollup_values()
+        return instance
+    
+    def rollup_values(self):
+        """القيم التي تدخل في BatchRollup"""
+        return tuple(getattr(self, field) for field in self.ROLLUP_FIELDS)
+
+
+class BatchRollup(models.Model):
+    """
+    مجاميع تراكمية لكل دفعة (Batch Rollup)
+    
+    تُحدَّث تزايدياً عند حفظ أو حذف FeedingLog و MortalityLog،
+    بحيث تُقرأ إحصائيات الدفعة بصف واحد بدلاً من تجميع كامل السجلات.
+    لإعادة البناء أو فحص الانحراف: python manage.py rebuild_batch_rollups
+    """
+    batch = models.OneToOneField(
+        Batch,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rollup',
+        verbose_name="الدفعة"
+    )
+    total_feed_kg = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="إجمالي العلف (كجم)"
+    )
+    total_feed_cost = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="إجمالي تكلفة العلف"
+    )
+    total_mortality = models.IntegerField(
+        default=0,
+        verbose_name="إجمالي النفوق"
+    )
+    feeding_days = models.IntegerField(
+        default=0,
+        verbose_name="عدد أيام التغذية",
+        help_text="عدد سجلات التغذية"
+    )
+    mortality_days = models.IntegerField(
+        default=0,
+        verbose_name="عدد أيام النفوق",
+        help_text="عدد سجلات النفوق"
+    )
+    last_log_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="تاريخ آخر سجل",
+        help_text="آخر تاريخ تغذية أو نفوق"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر تحديث")
+    
+    class Meta:
+        verbose_name = "مجاميع دفعة"
+        verbose_name_plural = "مجاميع الدفعات"
+    
+    def __str__(self):
+        return f"{self.batch_id} - {self.total_feed_kg} كجم - {self.total_mortality} نفوق"
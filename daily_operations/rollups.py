@@ -0,0 +1,191 @@
+"""
+مجاميع الدفعات التراكمية (Batch Rollups)
+
+تحافظ على BatchRollup محدثاً بفروقات تزايدية عند حفظ أو حذف سجلات
+التغذية والنفوق، بدلاً من إعادة تجميع كامل السجلات مع كل طلب.
+"""
+from decimal import Decimal
+from django.db.models import F, Sum, Count, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import BatchRollup, FeedingLog, MortalityLog
+
+
+# الحقول المجمعة لكل نوع سجل: (حقل السجل، حقل BatchRollup، حقل عدد السجلات)
+FEEDING_ROLLUP = {
+    'amounts': (('quantity', 'total_feed_kg'), ('total_cost', 'total_feed_cost')),
+    'counter': 'feeding_days',
+}
+MORTALITY_ROLLUP = {
+    'amounts': (('count', 'total_mortality'),),
+    'counter': 'mortality_days',
+}
+
+
+def compute_batch_totals(batch_id):
+    """
+    حساب مجاميع الدفعة من السجلات الخام (المصدر الموثوق)
+
+    Returns:
+        dict: قيم حقول BatchRollup
+    """
+    feeding = FeedingLog.objects.filter(batch_id=batch_id).aggregate(
+        total_feed_kg=Sum('quantity'),
+        total_feed_cost=Sum('total_cost'),
+        feeding_days=Count('id'),
+        last_date=Max('feeding_date'),
+    )
+    mortality = MortalityLog.objects.filter(batch_id=batch_id).aggregate(
+        total_mortality=Sum('count'),
+        mortality_days=Count('id'),
+        last_date=Max('mortality_date'),
+    )
+    dates = [d for d in (feeding['last_date'], mortality['last_date']) if d]
+
+    return {
+        'total_feed_kg': feeding['total_feed_kg'] or Decimal('0.00'),
+        'total_feed_cost': feeding['total_feed_cost'] or Decimal('0.00'),
+        'total_mortality': mortality['total_mortality'] or 0,
+        'feeding_days': feeding['feeding_days'],
+        'mortality_days': mortality['mortality_days'],
+        'last_log_date': max(dates) if dates else None,
+    }
+
+
+def rebuild_batch_rollup(batch_id):
+    """إعادة بناء مجاميع دفعة واحدة من الصفر"""
+    rollup, _ = BatchRollup.objects.update_or_create(
+        batch_id=batch_id,
+        defaults=compute_batch_totals(batch_id),
+    )
+    return rollup
+
+
+def get_batch_rollup(batch):
+    """
+    الحصول على مجاميع الدفعة
+
+    يستخدم القيمة المحملة مسبقاً عبر select_related('rollup') إن وجدت،
+    وإلا يقرأ صفاً واحداً (ويبنيه إن لم يكن موجوداً).
+    """
+    try:
+        if type(batch).rollup.is_cached(batch):
+            return batch.rollup
+    except BatchRollup.DoesNotExist:
+        pass
+
+    rollup = BatchRollup.objects.filter(batch_id=batch.pk).first()
+    return rollup or rebuild_batch_rollup(batch.pk)
+
+
+def _apply_delta(batch_id, deltas, log_date=None):
+    """تطبيق فروقات ذرية (F expressions) على صف BatchRollup"""
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if log_date:
+        updates['last_log_date'] = Greatest(
+            Coalesce('last_log_date', Value(log_date)),
+            Value(log_date),
+        )
+    if not updates:
+        return
+
+    updates['updated_at'] = timezone.now()
+    if not BatchRollup.objects.filter(batch_id=batch_id).update(**updates):
+        # لا يوجد صف بعد - البناء من السجلات يشمل التغيير الحالي
+        rebuild_batch_rollup(batch_id)
+
+
+def _refresh_last_log_date(batch_id, removed_date):
+    """إعادة حساب تاريخ آخر سجل فقط عند إزالة السجل الأحدث"""
+    if not BatchRollup.objects.filter(batch_id=batch_id, last_log_date__lte=removed_date).exists():
+        return
+
+    dates = [
+        FeedingLog.objects.filter(batch_id=batch_id).aggregate(last=Max('feeding_date'))['last'],
+        MortalityLog.objects.filter(batch_id=batch_id).aggregate(last=Max('mortality_date'))['last'],
+    ]
+    dates = [d for d in dates if d]
+    BatchRollup.objects.filter(batch_id=batch_id).update(
+        last_log_date=max(dates) if dates else None,
+        updated_at=timezone.now(),
+    )
+
+
+def _apply_change(spec, fields, previous, current):
+    """
+    تطبيق الفرق بين القيم السابقة والحالية لسجل واحد
+
+    Args:
+        spec: FEEDING_ROLLUP أو MORTALITY_ROLLUP
+        fields: أسماء الحقول في لقطة السجل (ROLLUP_FIELDS)
+        previous: لقطة القيم قبل التغيير (None عند الإنشاء)
+        current: لقطة القيم بعد التغيير (None عند الحذف)
+    """
+    if previous == current:
+        return
+
+    previous = dict(zip(fields, previous)) if previous else None
+    current = dict(zip(fields, current)) if current else None
+    date_field = fields[-1]
+
+    deltas = {}
+    for values, sign in ((previous, -1), (current, 1)):
+        if not values:
+            continue
+        batch_deltas = deltas.setdefault(values['batch_id'], {spec['counter']: 0})
+        batch_deltas[spec['counter']] += sign
+        for log_field, rollup_field in spec['amounts']:
+            amount = values[log_field] or 0
+            batch_deltas[rollup_field] = batch_deltas.get(rollup_field, 0) + sign * amount
+
+    for batch_id, batch_deltas in deltas.items():
+        log_date = current[date_field] if current and current['batch_id'] == batch_id else None
+        _apply_delta(batch_id, batch_deltas, log_date=log_date)
+
+    if previous and (
+        not current
+        or previous['batch_id'] != current['batch_id']
+        or previous[date_field] != current[date_field]
+    ):
+        _refresh_last_log_date(previous['batch_id'], previous[date_field])
+
+
+def apply_feeding_change(previous, current):
+    """تحديث BatchRollup بفرق سجل تغذية (لقطات FeedingLog.rollup_values)"""
+    _apply_change(FEEDING_ROLLUP, FeedingLog.ROLLUP_FIELDS, previous, current)
+
+
+def apply_mortality_change(previous, current):
+    """تحديث BatchRollup بفرق سجل نفوق (لقطات MortalityLog.rollup_values)"""
+    _apply_change(MORTALITY_ROLLUP, MortalityLog.ROLLUP_FIELDS, previous, current)
+
+
+def find_rollup_drift(batch_ids=None):
+    """
+    مقارنة BatchRollup بالسجلات الخام
+
+    Returns:
+        list: [(batch_id, {field: (stored, actual)})] للدفعات المنحرفة
+    """
+    from biological.models import Batch
+
+    batches = Batch.objects.all()
+    if batch_ids:
+        batches = batches.filter(id__in=batch_ids)
+    stored = {
+        r.batch_id: r for r in BatchRollup.objects.filter(batch_id__in=batches.values('id'))
+    }
+
+    drift = []
+    for batch_id in batches.values_list('id', flat=True).order_by('id'):
+        actual = compute_batch_totals(batch_id)
+        rollup = stored.get(batch_id)
+        differences = {
+            field: (getattr(rollup, field) if rollup else None, value)
+            for field, value in actual.items()
+            if rollup is None or getattr(rollup, field) != value
+        }
+        if differences:
+            drift.append((batch_id, differences))
+    return drift
@@ -3,23 +3,79 @@ Django Signals للعمليات اليومية
 """
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import Sum
-from .models import FeedingLog, MortalityLog
+from biological.models import Batch
+from .models import FeedingLog, MortalityLog, BatchRollup
+from .rollups import apply_feeding_change, apply_mortality_change, rebuild_batch_rollup
+
+
+def _consume_rollup_snapshot(instance, created):
+    """
+    إرجاع لقطة القيم السابقة للسجل وتحديثها بالقيم الحالية
+
+    Returns:
+        tuple | None | False: اللقطة السابقة، أو None لسجل جديد،
+        أو False إذا كانت القيم السابقة غير معروفة (يلزم إعادة البناء)
+    """
+    # حفظ متداخل من signal آخر أعاد بناء المجاميع قبل معالجة الإنشاء الأصلي
+    rebuilt = instance.__dict__.pop('_rollup_rebuilt', False)
+    if created:
+        previous = instance.rollup_values() if rebuilt else None
+    elif hasattr(instance, '_rollup_snapshot'):
+        previous = instance._rollup_snapshot
+    else:
+        previous = False
+        instance._rollup_rebuilt = True
+    instance._rollup_snapshot = instance.rollup_values()
+    return previous
+
+
+@receiver(post_save, sender=Batch)
+def create_batch_rollup(sender, instance, created, **kwargs):
+    """إنشاء صف المجاميع مع الدفعة الجديدة"""
+    if created:
+        BatchRollup.objects.get_or_create(batch=instance)
+
+
+@receiver(post_save, sender=FeedingLog)
+def update_feeding_rollup(sender, instance, created, **kwargs):
+    """تحديث مجاميع الدفعة عند إضافة أو تعديل سجل تغذية"""
+    previous = _consume_rollup_snapshot(instance, created)
+    if previous is False:
+        rebuild_batch_rollup(instance.batch_id)
+    else:
+        apply_feeding_change(previous, instance._rollup_snapshot)
+
+
+@receiver(post_delete, sender=FeedingLog)
+def remove_feeding_rollup(sender, instance, **kwargs):
+    """خصم سجل التغذية المحذوف من مجاميع الدفعة"""
+    previous = getattr(instance, '_rollup_snapshot', None) or instance.rollup_values()
+    apply_feeding_change(previous, None)
 
 
 @receiver(post_save, sender=MortalityLog)
 @receiver(post_delete, sender=MortalityLog)
 def update_batch_mortality(sender, instance, **kwargs):
     """
-    تحديث العدد الحالي للدفعة عند إضافة أو حذف سجل نفوق
+    تحديث مجاميع النفوق والعدد الحالي للدفعة عند إضافة أو تعديل أو حذف سجل نفوق
     """
+    if kwargs['signal'] is post_delete:
+        previous = getattr(instance, '_rollup_snapshot', None) or instance.rollup_values()
+        apply_mortality_change(previous, None)
+    else:
+        previous = _consume_rollup_snapshot(instance, kwargs.get('created', False))
+        if previous is False:
+            rebuild_batch_rollup(instance.batch_id)
+        else:
+            apply_mortality_change(previous, instance._rollup_snapshot)
+
     batch = instance.batch
-    
-    # حساب إجمالي النفوق من جميع السجلات
-    total_mortality = MortalityLog.objects.filter(batch=batch).aggregate(
-        total=Sum('count')
-    )['total'] or 0
-    
+
+    # إجمالي النفوق من المجاميع المحدثة (بدلاً من تجميع جميع السجلات)
+    total_mortality = BatchRollup.objects.filter(batch_id=batch.id).values_list(
+        'total_mortality', flat=True
+    ).first() or 0
+
     # تحديث العدد الحالي
     new_count = max(0, batch.initial_count - total_mortality)
     if batch.current_count != new_count:
@@ -35,4 +91,3 @@ def update_feed_inventory(sender, instance, created, **kwargs):
     """
     # سيتم تطبيقه لاحقاً عند إضافة خوارزمية خصم من المخزون
     pass
-
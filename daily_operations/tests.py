@@ -317,3 +317,161 @@ class TestBiologicalUtils:
         
         total_mortality = calculate_total_mortality(batch)
         assert total_mortality == 15
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestBatchRollup:
+    """اختبارات مجاميع الدفعة التراكمية (BatchRollup)"""
+    
+    def _create_batch(self, batch_number='BATCH-R1'):
+        species = Species.objects.create(
+            arabic_name='سمك البلطي',
+            name='Tilapia'
+        )
+        pond = Pond.objects.create(
+            name='حوض 1',
+            pond_type='concrete',
+            capacity=Decimal('100.00')
+        )
+        return Batch.objects.create(
+            pond=pond,
+            species=species,
+            batch_number=batch_number,
+            start_date=date.today() - timedelta(days=10),
+            initial_count=1000,
+            initial_weight=Decimal('100.00'),
+            initial_cost=Decimal('5000.00')
+        )
+    
+    def _create_feed_type(self):
+        from inventory.models import FeedType
+        return FeedType.objects.create(
+            name='Feed',
+            arabic_name='علف',
+            unit='kg'
+        )
+    
+    def test_rollup_tracks_feeding_create_update_delete(self):
+        """المجاميع تتبع إنشاء وتعديل وحذف سجلات التغذية"""
+        from daily_operations.models import BatchRollup
+        from daily_operations.rollups import compute_batch_totals
+        
+        batch = self._create_batch()
+        feed_type = self._create_feed_type()
+        
+        log = FeedingLog.objects.create(
+            batch=batch,
+            feed_type=feed_type,
+            feeding_date=date.today() - timedelta(days=1),
+            quantity=Decimal('50.00'),
+            unit_price=Decimal('5.00')
+        )
+        FeedingLog.objects.create(
+            batch=batch,
+            feed_type=feed_type,
+            feeding_date=date.today(),
+            quantity=Decimal('30.00'),
+            unit_price=Decimal('5.00')
+        )
+        
+        rollup = BatchRollup.objects.get(batch=batch)
+        assert rollup.total_feed_kg == Decimal('80.00')
+        assert rollup.total_feed_cost == Decimal('400.00')
+        assert rollup.feeding_days == 2
+        assert rollup.last_log_date == date.today()
+        
+        log = FeedingLog.objects.get(id=log.id)
+        log.quantity = Decimal('20.00')
+        log.save()
+        
+        rollup.refresh_from_db()
+        assert rollup.total_feed_kg == Decimal('50.00')
+        assert rollup.total_feed_cost == Decimal('250.00')
+        assert rollup.feeding_days == 2
+        
+        FeedingLog.objects.filter(feeding_date=date.today()).get().delete()
+        
+        rollup.refresh_from_db()
+        assert rollup.total_feed_kg == Decimal('20.00')
+        assert rollup.feeding_days == 1
+        assert rollup.last_log_date == date.today() - timedelta(days=1)
+        
+        totals = compute_batch_totals(batch.id)
+        for field, value in totals.items():
+            assert getattr(rollup, field) == value
+    
+    def test_rollup_tracks_mortality_and_current_count(self):
+        """المجاميع تتبع النفوق وتحدّث العدد الحالي للدفعة"""
+        from daily_operations.models import BatchRollup
+        
+        batch = self._create_batch()
+        
+        log = MortalityLog.objects.create(
+            batch=batch,
+            mortality_date=date.today(),
+            count=10
+        )
+        MortalityLog.objects.create(
+            batch=batch,
+            mortality_date=date.today(),
+            count=5
+        )
+        
+        rollup = BatchRollup.objects.get(batch=batch)
+        assert rollup.total_mortality == 15
+        assert rollup.mortality_days == 2
+        batch.refresh_from_db()
+        assert batch.current_count == 985
+        
+        log.delete()
+        
+        rollup.refresh_from_db()
+        assert rollup.total_mortality == 5
+        batch.refresh_from_db()
+        assert batch.current_count == 995
+    
+    def test_statistics_read_from_rollup(self):
+        """الإحصائيات تطابق السجلات وتُقرأ من المجاميع"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        batch = self._create_batch()
+        feed_type = self._create_feed_type()
+        for day in range(3):
+            FeedingLog.objects.create(
+                batch=batch,
+                feed_type=feed_type,
+                feeding_date=date.today() - timedelta(days=day),
+                quantity=Decimal('10.00'),
+                unit_price=Decimal('2.00')
+            )
+        
+        batch = Batch.objects.select_related('rollup').get(id=batch.id)
+        with CaptureQueriesContext(connection) as queries:
+            stats = get_batch_statistics(batch)
+        
+        assert len(queries) == 0
+        assert stats['total_feed_consumed'] == Decimal('30.00')
+        assert stats['total_feed_cost'] == Decimal('60.00')
+        assert stats['feeding_days'] == 3
+    
+    def test_find_rollup_drift(self):
+        """فحص الانحراف يكتشف المجاميع غير المتطابقة ويصلحها إعادة البناء"""
+        from daily_operations.models import BatchRollup
+        from daily_operations.rollups import find_rollup_drift, rebuild_batch_rollup
+        
+        batch = self._create_batch()
+        MortalityLog.objects.create(
+            batch=batch,
+            mortality_date=date.today(),
+            count=7
+        )
+        assert find_rollup_drift() == []
+        
+        BatchRollup.objects.filter(batch=batch).update(total_mortality=0)
+        drift = find_rollup_drift()
+        assert drift == [(batch.id, {'total_mortality': (0, 7)})]
+        
+        rebuild_batch_rollup(batch.id)
+        assert find_rollup_drift() == []
@@ -3,8 +3,7 @@ Utilities للعمليات اليومية - حساب FCR والكتلة الحي
 """
 from decimal import Decimal
 from datetime import date, timedelta
-from django.db.models import Sum, Avg
-from .models import FeedingLog, MortalityLog
+from .rollups import get_batch_rollup
 
 
 def calculate_fcr(batch):
@@ -16,9 +15,7 @@ def calculate_fcr(batch):
     Returns:
         Decimal: قيمة FCR، أو None إذا لم يكن هناك بيانات كافية
     """
-    total_feed = FeedingLog.objects.filter(batch=batch).aggregate(
-        total=Sum('quantity')
-    )['total'] or Decimal('0.00')
+    total_feed = get_batch_rollup(batch).total_feed_kg
     
     if total_feed == 0:
         return None
@@ -124,10 +121,7 @@ def calculate_total_feed_cost(batch):
     Returns:
         Decimal: إجمالي التكلفة
     """
-    total = FeedingLog.objects.filter(batch=batch).aggregate(
-        total=Sum('total_cost')
-    )['total'] or Decimal('0.00')
-    return total
+    return get_batch_rollup(batch).total_feed_cost
 
 
 def calculate_total_mortality(batch):
@@ -137,41 +131,38 @@ def calculate_total_mortality(batch):
     Returns:
         int: إجمالي عدد النفوق
     """
-    total = MortalityLog.objects.filter(batch=batch).aggregate(
-        total=Sum('count')
-    )['total'] or 0
-    return total
+    return get_batch_rollup(batch).total_mortality
 
 
 def get_batch_statistics(batch):
     """
     الحصول على إحصائيات شاملة للدفعة
     
+    تُقرأ المجاميع من BatchRollup (صف واحد) بدلاً من تجميع سجلات التغذية والنفوق.
+    
     Returns:
         dict: إحصائيات الدفعة
     """
-    total_feed = FeedingLog.objects.filter(batch=batch).aggregate(
-        total=Sum('quantity')
-    )['total'] or Decimal('0.00')
+    rollup = get_batch_rollup(batch)
+    total_feed = rollup.total_feed_kg
     
-    total_feed_cost = calculate_total_feed_cost(batch)
-    total_mortality = calculate_total_mortality(batch)
-    fcr = calculate_fcr(batch)
+    fcr = None
     weight_gain = calculate_weight_gain(batch)
+    if total_feed != 0 and weight_gain > 0:
+        fcr = total_feed / weight_gain
     weight_gain_rate_daily = calculate_weight_gain_rate(batch, period='daily')
     weight_gain_rate_weekly = calculate_weight_gain_rate(batch, period='weekly')
     weight_gain_rate_monthly = calculate_weight_gain_rate(batch, period='monthly')
     
     avg_daily_feed = Decimal('0.00')
-    feeding_count = FeedingLog.objects.filter(batch=batch).count()
     days_active = (date.today() - batch.start_date).days
     if days_active > 0:
         avg_daily_feed = total_feed / days_active
     
     return {
         'total_feed_consumed': total_feed,
-        'total_feed_cost': total_feed_cost,
-        'total_mortality': total_mortality,
+        'total_feed_cost': rollup.total_feed_cost,
+        'total_mortality': rollup.total_mortality,
         'current_count': batch.current_count,
         'current_weight': batch.current_weight,
         'average_weight': batch.average_weight,
@@ -182,7 +173,6 @@ def get_batch_statistics(batch):
         'weight_gain_rate_weekly': float(weight_gain_rate_weekly) if weight_gain_rate_weekly else None,
         'weight_gain_rate_monthly': float(weight_gain_rate_monthly) if weight_gain_rate_monthly else None,
         'avg_daily_feed': avg_daily_feed,
-        'feeding_days': feeding_count,
+        'feeding_days': rollup.feeding_days,
         'days_active': days_active,
     }
-
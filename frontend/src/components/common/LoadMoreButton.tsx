@@ -0,0 +1,25 @@
+import LoadingSpinner from './LoadingSpinner'
+
+interface LoadMoreButtonProps {
+  hasMore: boolean
+  loading: boolean
+  onClick: () => void
+  label?: string
+}
+
+export default function LoadMoreButton({
+  hasMore,
+  loading,
+  onClick,
+  label = 'تحميل المزيد',
+}: LoadMoreButtonProps) {
+  if (!hasMore) return null
+
+  return (
+    <div className="flex justify-center py-4">
+      <button onClick={onClick} disabled={loading} className="btn-secondary text-sm py-2 px-6">
+        {loading ? <LoadingSpinner size="sm" /> : label}
+      </button>
+    </div>
+  )
+}
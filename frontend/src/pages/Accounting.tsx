@@ -5,6 +5,7 @@ import SearchInput from '../components/common/SearchInput'
 import { apiService } from '../services/api'
 import type { Account, JournalEntry, TrialBalance, BalanceSheet } from '../types'
 import LoadingSpinner from '../components/common/LoadingSpinner'
+import LoadMoreButton from '../components/common/LoadMoreButton'
 import EmptyState from '../components/common/EmptyState'
 
 export default function Accounting() {
@@ -18,6 +19,8 @@ export default function Accounting() {
 
   // Journal Entries
   const [journalEntries, setJournalEntries] = useState<JournalEntry[]>([])
+  const [entriesCursor, setEntriesCursor] = useState<string | null>(null)
+  const [loadingMoreEntries, setLoadingMoreEntries] = useState(false)
   const [startDate, setStartDate] = useState('')
   const [endDate, setEndDate] = useState('')
 
@@ -51,14 +54,19 @@ export default function Accounting() {
     }
   }
 
+  const journalEntryParams = () => {
+    const params: any = {}
+    if (startDate) params.start_date = startDate
+    if (endDate) params.end_date = endDate
+    return params
+  }
+
   const fetchJournalEntries = async () => {
     try {
       setLoading(true)
-      const params: any = {}
-      if (startDate) params.start_date = startDate
-      if (endDate) params.end_date = endDate
-      const data = await apiService.getJournalEntries(params)
-      setJournalEntries(data)
+      const page = await apiService.getJournalEntries(journalEntryParams())
+      setJournalEntries(page.items)
+      setEntriesCursor(page.has_next ? page.next_cursor ?? null : null)
     } catch (err) {
       console.error('Error fetching journal entries:', err)
     } finally {
@@ -66,6 +74,20 @@ export default function Accounting() {
     }
   }
 
+  const loadMoreJournalEntries = async () => {
+    if (!entriesCursor) return
+    try {
+      setLoadingMoreEntries(true)
+      const page = await apiService.getJournalEntries({ ...journalEntryParams(), cursor: entriesCursor })
+      setJournalEntries((current) => [...current, ...page.items])
+      setEntriesCursor(page.has_next ? page.next_cursor ?? null : null)
+    } catch (err) {
+      console.error('Error fetching journal entries:', err)
+    } finally {
+      setLoadingMoreEntries(false)
+    }
+  }
+
   const fetchTrialBalance = async () => {
     try {
       setLoadingReport(true)
@@ -339,6 +361,11 @@ export default function Accounting() {
                         </div>
                       </Card>
                     ))}
+                    <LoadMoreButton
+                      hasMore={!!entriesCursor}
+                      loading={loadingMoreEntries}
+                      onClick={loadMoreJournalEntries}
+                    />
                   </div>
                 )}
               </div>
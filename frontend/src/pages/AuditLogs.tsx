@@ -2,6 +2,7 @@ import { useEffect, useState } from 'react'
 import Layout from '../components/layout/Layout'
 import Card from '../components/common/Card'
 import LoadingSpinner from '../components/common/LoadingSpinner'
+import LoadMoreButton from '../components/common/LoadMoreButton'
 import { apiService } from '../services/api'
 import type { AuditLog } from '../types'
 import { useToast } from '../hooks/useToast'
@@ -11,6 +12,8 @@ export default function AuditLogs() {
   const { i18n } = useTranslation()
   const [logs, setLogs] = useState<AuditLog[]>([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [filters, setFilters] = useState({
     action_type: '',
     entity_type: '',
@@ -23,17 +26,21 @@ export default function AuditLogs() {
     fetchLogs()
   }, [filters])
 
+  const buildParams = () => {
+    const params: any = { page_size: 200 }
+    if (filters.action_type) params.action_type = filters.action_type
+    if (filters.entity_type) params.entity_type = filters.entity_type
+    if (filters.start_date) params.start_date = filters.start_date
+    if (filters.end_date) params.end_date = filters.end_date
+    return params
+  }
+
   const fetchLogs = async () => {
     try {
       setLoading(true)
-      const params: any = { limit: 200 }
-      if (filters.action_type) params.action_type = filters.action_type
-      if (filters.entity_type) params.entity_type = filters.entity_type
-      if (filters.start_date) params.start_date = filters.start_date
-      if (filters.end_date) params.end_date = filters.end_date
-      
-      const data = await apiService.getAuditLogs(params)
-      setLogs(data)
+      const page = await apiService.getAuditLogs(buildParams())
+      setLogs(page.items)
+      setNextCursor(page.has_next ? page.next_cursor ?? null : null)
     } catch (err: any) {
       showToast(err.response?.data?.detail || 'خطأ في جلب سجلات التدقيق', 'error')
     } finally {
@@ -41,6 +48,20 @@ export default function AuditLogs() {
     }
   }
 
+  const loadMore = async () => {
+    if (!nextCursor) return
+    try {
+      setLoadingMore(true)
+      const page = await apiService.getAuditLogs({ ...buildParams(), cursor: nextCursor })
+      setLogs((current) => [...current, ...page.items])
+      setNextCursor(page.has_next ? page.next_cursor ?? null : null)
+    } catch (err: any) {
+      showToast(err.response?.data?.detail || 'خطأ في جلب سجلات التدقيق', 'error')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const getActionColor = (actionType: string) => {
     switch (actionType) {
       case 'create':
@@ -214,6 +235,7 @@ export default function AuditLogs() {
                   ))}
                 </tbody>
               </table>
+              <LoadMoreButton hasMore={!!nextCursor} loading={loadingMore} onClick={loadMore} />
             </div>
           )}
         </Card>
@@ -12,10 +12,14 @@ import { apiService } from '../services/api'
 import type { FeedingLog, MortalityLog, Batch, FeedType, BatchStatistics } from '../types'
 import LoadingSpinner from '../components/common/LoadingSpinner'
 import EmptyState from '../components/common/EmptyState'
+import LoadMoreButton from '../components/common/LoadMoreButton'
 
 export default function DailyOperations() {
   const [feedingLogs, setFeedingLogs] = useState<FeedingLog[]>([])
   const [mortalityLogs, setMortalityLogs] = useState<MortalityLog[]>([])
+  const [feedingCursor, setFeedingCursor] = useState<string | null>(null)
+  const [mortalityCursor, setMortalityCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [batches, setBatches] = useState<Batch[]>([])
   const [feedTypes, setFeedTypes] = useState<FeedType[]>([])
   const [loading, setLoading] = useState(true)
@@ -55,8 +59,10 @@ export default function DailyOperations() {
         apiService.getBatches(),
         apiService.getFeedTypes(),
       ])
-      setFeedingLogs(feeds)
-      setMortalityLogs(mortalities)
+      setFeedingLogs(feeds.items)
+      setFeedingCursor(feeds.has_next ? feeds.next_cursor ?? null : null)
+      setMortalityLogs(mortalities.items)
+      setMortalityCursor(mortalities.has_next ? mortalities.next_cursor ?? null : null)
       setBatches(batchesData)
       setFeedTypes(feedTypesData)
     } catch (err) {
@@ -67,6 +73,36 @@ export default function DailyOperations() {
     }
   }
 
+  const loadMoreFeedingLogs = async () => {
+    if (!feedingCursor) return
+    try {
+      setLoadingMore(true)
+      const page = await apiService.getFeedingLogs(selectedBatchId || undefined, feedingCursor)
+      setFeedingLogs((current) => [...current, ...page.items])
+      setFeedingCursor(page.has_next ? page.next_cursor ?? null : null)
+    } catch (err) {
+      console.error('Error fetching feeding logs:', err)
+      error('فشل في جلب البيانات')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  const loadMoreMortalityLogs = async () => {
+    if (!mortalityCursor) return
+    try {
+      setLoadingMore(true)
+      const page = await apiService.getMortalityLogs(selectedBatchId || undefined, mortalityCursor)
+      setMortalityLogs((current) => [...current, ...page.items])
+      setMortalityCursor(page.has_next ? page.next_cursor ?? null : null)
+    } catch (err) {
+      console.error('Error fetching mortality logs:', err)
+      error('فشل في جلب البيانات')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   // Filtered logs
   const filteredFeedingLogs = useMemo(() => {
     return feedingLogs.filter((log) =>
@@ -267,7 +303,7 @@ export default function DailyOperations() {
                   : 'border-transparent text-gray-500 hover:text-gray-700'
               }`}
             >
-              🍽️ التغذية ({feedingLogs.length})
+              🍽️ التغذية ({feedingLogs.length}{feedingCursor ? '+' : ''})
             </button>
             <button
               onClick={() => setActiveTab('mortality')}
@@ -277,7 +313,7 @@ export default function DailyOperations() {
                   : 'border-transparent text-gray-500 hover:text-gray-700'
               }`}
             >
-              💀 النفوق ({mortalityLogs.length})
+              💀 النفوق ({mortalityLogs.length}{mortalityCursor ? '+' : ''})
             </button>
             <button
               onClick={() => setActiveTab('stats')}
@@ -367,6 +403,7 @@ export default function DailyOperations() {
                         </div>
                       </Card>
                     ))}
+                    <LoadMoreButton hasMore={!!feedingCursor} loading={loadingMore} onClick={loadMoreFeedingLogs} />
                   </div>
                 )}
               </div>
@@ -441,6 +478,7 @@ export default function DailyOperations() {
                         </div>
                       </Card>
                     ))}
+                    <LoadMoreButton hasMore={!!mortalityCursor} loading={loadingMore} onClick={loadMoreMortalityLogs} />
                   </div>
                 )}
               </div>
@@ -6,6 +6,7 @@ import Modal from '../components/common/Modal'
 import { apiService } from '../services/api'
 import type { Harvest, Batch } from '../types'
 import LoadingSpinner from '../components/common/LoadingSpinner'
+import LoadMoreButton from '../components/common/LoadMoreButton'
 import EmptyState from '../components/common/EmptyState'
 import { useToast } from '../hooks/useToast'
 
@@ -13,6 +14,8 @@ export default function Harvests() {
   const [harvests, setHarvests] = useState<Harvest[]>([])
   const [batches, setBatches] = useState<Batch[]>([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [searchQuery, setSearchQuery] = useState('')
   const [selectedBatch, setSelectedBatch] = useState<number | ''>('')
   const [selectedStatus, setSelectedStatus] = useState<string>('')
@@ -37,14 +40,19 @@ export default function Harvests() {
     fetchBatches()
   }, [selectedBatch, selectedStatus])
 
+  const buildParams = () => {
+    const params: any = {}
+    if (selectedBatch) params.batch_id = selectedBatch
+    if (selectedStatus) params.status = selectedStatus
+    return params
+  }
+
   const fetchHarvests = async () => {
     try {
       setLoading(true)
-      const params: any = {}
-      if (selectedBatch) params.batch_id = selectedBatch
-      if (selectedStatus) params.status = selectedStatus
-      const data = await apiService.getHarvests(params)
-      setHarvests(data)
+      const page = await apiService.getHarvests(buildParams())
+      setHarvests(page.items)
+      setNextCursor(page.has_next ? page.next_cursor ?? null : null)
     } catch (err: any) {
       showToast(err.response?.data?.detail || 'خطأ في جلب الحصاد', 'error')
     } finally {
@@ -52,6 +60,20 @@ export default function Harvests() {
     }
   }
 
+  const loadMoreHarvests = async () => {
+    if (!nextCursor) return
+    try {
+      setLoadingMore(true)
+      const page = await apiService.getHarvests({ ...buildParams(), cursor: nextCursor })
+      setHarvests((current) => [...current, ...page.items])
+      setNextCursor(page.has_next ? page.next_cursor ?? null : null)
+    } catch (err: any) {
+      showToast(err.response?.data?.detail || 'خطأ في جلب الحصاد', 'error')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const fetchBatches = async () => {
     try {
       const data = await apiService.getBatches()
@@ -219,6 +241,9 @@ export default function Harvests() {
             ))}
           </div>
         )}
+        {!loading && (
+          <LoadMoreButton hasMore={!!nextCursor} loading={loadingMore} onClick={loadMoreHarvests} />
+        )}
 
         {/* Create/Edit Modal */}
         <Modal
@@ -6,6 +6,7 @@ import Modal from '../components/common/Modal'
 import { apiService } from '../services/api'
 import type { Invoice, SalesOrder } from '../types'
 import LoadingSpinner from '../components/common/LoadingSpinner'
+import LoadMoreButton from '../components/common/LoadMoreButton'
 import EmptyState from '../components/common/EmptyState'
 import { useToast } from '../hooks/useToast'
 
@@ -13,6 +14,8 @@ export default function Invoices() {
   const [invoices, setInvoices] = useState<Invoice[]>([])
   const [orders, setOrders] = useState<SalesOrder[]>([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [searchQuery, setSearchQuery] = useState('')
   const [selectedStatus, setSelectedStatus] = useState<string>('')
   const [selectedInvoice, setSelectedInvoice] = useState<Invoice | null>(null)
@@ -30,8 +33,9 @@ export default function Invoices() {
   const fetchInvoices = async () => {
     try {
       setLoading(true)
-      const data = await apiService.getInvoices(selectedStatus || undefined)
-      setInvoices(data)
+      const page = await apiService.getInvoices(selectedStatus || undefined)
+      setInvoices(page.items)
+      setNextCursor(page.has_next ? page.next_cursor ?? null : null)
     } catch (err: any) {
       showToast(err.response?.data?.detail || 'خطأ في جلب الفواتير', 'error')
     } finally {
@@ -39,6 +43,20 @@ export default function Invoices() {
     }
   }
 
+  const loadMoreInvoices = async () => {
+    if (!nextCursor) return
+    try {
+      setLoadingMore(true)
+      const page = await apiService.getInvoices(selectedStatus || undefined, nextCursor)
+      setInvoices((current) => [...current, ...page.items])
+      setNextCursor(page.has_next ? page.next_cursor ?? null : null)
+    } catch (err: any) {
+      showToast(err.response?.data?.detail || 'خطأ في جلب الفواتير', 'error')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const fetchOrders = async () => {
     try {
       const data = await apiService.getSalesOrders('confirmed')
@@ -171,6 +189,7 @@ export default function Invoices() {
                 </Card>
               </div>
             ))}
+            <LoadMoreButton hasMore={!!nextCursor} loading={loadingMore} onClick={loadMoreInvoices} />
           </div>
         )}
 
@@ -47,7 +47,7 @@ export default function SalesOrders() {
 
   const fetchHarvests = async () => {
     try {
-      const data = await apiService.getHarvests({ status: 'completed' })
+      const data = await apiService.getAllHarvests({ status: 'completed' })
       setHarvests(data)
     } catch (err) {
       console.error('Error fetching harvests:', err)
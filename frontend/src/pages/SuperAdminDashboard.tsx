@@ -3,7 +3,7 @@ import Layout from '../components/layout/Layout'
 import Card from '../components/common/Card'
 import LoadingSpinner from '../components/common/LoadingSpinner'
 import { apiService } from '../services/api'
-import type { SaaSStats, TenantSummary, SubscriptionPlan } from '../types'
+import type { SaaSStats, TenantSummary, SubscriptionPlan, PaginatedResponse } from '../types'
 import { useAuthStore } from '../store/authStore'
 import { Navigate } from 'react-router-dom'
 import { authUtils } from '../utils/auth'
@@ -12,7 +12,8 @@ import { useToast } from '../hooks/useToast'
 export default function SuperAdminDashboard() {
   const user = useAuthStore((state) => state.user)
   const [stats, setStats] = useState<SaaSStats | null>(null)
-  const [tenants, setTenants] = useState<TenantSummary[]>([])
+  const [tenantsPage, setTenantsPage] = useState<PaginatedResponse<TenantSummary> | null>(null)
+  const [loadingTenants, setLoadingTenants] = useState(false)
   const [plans, setPlans] = useState<SubscriptionPlan[]>([])
   const [loadingAction, setLoadingAction] = useState(false)
   const [loading, setLoading] = useState(true)
@@ -49,7 +50,7 @@ export default function SuperAdminDashboard() {
           apiService.getPlansAdmin(),
         ])
         setStats(statsRes)
-        setTenants(tenantsRes)
+        setTenantsPage(tenantsRes)
         setPlans(plansRes)
         if (plansRes.length > 0 && form.plan_id === 0) {
           setForm((f) => ({ ...f, plan_id: plansRes[0].id }))
@@ -64,15 +65,20 @@ export default function SuperAdminDashboard() {
     load()
   }, [])
 
-  const reloadTenants = async () => {
+  const reloadTenants = async (page = tenantsPage?.page ?? 1) => {
     try {
-      const tenantsRes = await apiService.getTenants()
-      setTenants(tenantsRes)
+      setLoadingTenants(true)
+      const tenantsRes = await apiService.getTenants({ page })
+      setTenantsPage(tenantsRes)
     } catch (err: any) {
       setActionError(err.response?.data?.detail || 'فشل تحديث قائمة المستأجرين')
+    } finally {
+      setLoadingTenants(false)
     }
   }
 
+  const tenants = tenantsPage?.items ?? []
+
   const handleSuspend = async (id: number) => {
     setLoadingAction(true)
     setActionError(null)
@@ -273,7 +279,7 @@ export default function SuperAdminDashboard() {
             </Card>
 
             {/* Tenants Table */}
-            <Card title="المستأجرون">
+            <Card title={`المستأجرون (${tenantsPage?.total ?? 0})`}>
               {tenants.length === 0 ? (
                 <p className="text-gray-500">لا يوجد مستأجرون حالياً.</p>
               ) : (
@@ -321,6 +327,27 @@ export default function SuperAdminDashboard() {
                       ))}
                     </tbody>
                   </table>
+                  {tenantsPage && tenantsPage.total_pages > 1 && (
+                    <div className="flex items-center justify-between pt-4 text-sm text-gray-600">
+                      <button
+                        onClick={() => reloadTenants(tenantsPage.page - 1)}
+                        disabled={!tenantsPage.has_previous || loadingTenants}
+                        className="btn-secondary text-sm py-2 px-4 disabled:opacity-50"
+                      >
+                        السابق
+                      </button>
+                      <span>
+                        صفحة {tenantsPage.page} من {tenantsPage.total_pages}
+                      </span>
+                      <button
+                        onClick={() => reloadTenants(tenantsPage.page + 1)}
+                        disabled={!tenantsPage.has_next || loadingTenants}
+                        className="btn-secondary text-sm py-2 px-4 disabled:opacity-50"
+                      >
+                        التالي
+                      </button>
+                    </div>
+                  )}
                 </div>
               )}
             </Card>
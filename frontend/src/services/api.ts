@@ -30,6 +30,8 @@ import type {
   FeedEfficiencyItem,
   MortalityAnalysisItem,
   AuditLog,
+  CursorPage,
+  PaginatedResponse,
   BiologicalAssetRevaluation,
   SubscriptionInfo,
   SubscriptionPlan,
@@ -93,6 +95,20 @@ class ApiService {
     )
   }
 
+  // جلب جميع صفحات قائمة مقسمة بـ cursor (للقوائم التي تُعرض كاملة مثل قوائم الاختيار)
+  private async getAllPages<T>(url: string, params: Record<string, any> = {}): Promise<T[]> {
+    const items: T[] = []
+    let cursor: string | null | undefined
+    do {
+      const response = await this.api.get<CursorPage<T>>(url, {
+        params: { ...params, page_size: 200, ...(cursor ? { cursor } : {}) },
+      })
+      items.push(...response.data.items)
+      cursor = response.data.has_next ? response.data.next_cursor : null
+    } while (cursor)
+    return items
+  }
+
   async login(credentials: LoginCredentials): Promise<LoginResponse> {
     const response = await this.api.post<LoginResponse>('/auth/login', credentials)
     return response.data
@@ -304,9 +320,9 @@ class ApiService {
   }
 
   // Daily Operations APIs - Feeding
-  async getFeedingLogs(batchId?: number): Promise<FeedingLog[]> {
-    const params = batchId ? { batch_id: batchId } : {}
-    const response = await this.api.get<FeedingLog[]>('/operations/feeding', { params })
+  async getFeedingLogs(batchId?: number, cursor?: string): Promise<CursorPage<FeedingLog>> {
+    const params = { ...(batchId ? { batch_id: batchId } : {}), ...(cursor ? { cursor } : {}) }
+    const response = await this.api.get<CursorPage<FeedingLog>>('/operations/feeding', { params })
     return response.data
   }
 
@@ -346,9 +362,9 @@ class ApiService {
   }
 
   // Daily Operations APIs - Mortality
-  async getMortalityLogs(batchId?: number): Promise<MortalityLog[]> {
-    const params = batchId ? { batch_id: batchId } : {}
-    const response = await this.api.get<MortalityLog[]>('/operations/mortality', { params })
+  async getMortalityLogs(batchId?: number, cursor?: string): Promise<CursorPage<MortalityLog>> {
+    const params = { ...(batchId ? { batch_id: batchId } : {}), ...(cursor ? { cursor } : {}) }
+    const response = await this.api.get<CursorPage<MortalityLog>>('/operations/mortality', { params })
     return response.data
   }
 
@@ -410,8 +426,9 @@ class ApiService {
     start_date?: string
     end_date?: string
     reference_type?: string
-  }): Promise<JournalEntry[]> {
-    const response = await this.api.get<JournalEntry[]>('/accounting/journal-entries', { params })
+    cursor?: string
+  }): Promise<CursorPage<JournalEntry>> {
+    const response = await this.api.get<CursorPage<JournalEntry>>('/accounting/journal-entries', { params })
     return response.data
   }
 
@@ -450,11 +467,15 @@ class ApiService {
   }
 
   // Sales APIs - Harvests
-  async getHarvests(params?: { batch_id?: number; status?: string }): Promise<Harvest[]> {
-    const response = await this.api.get<Harvest[]>('/sales/harvests', { params })
+  async getHarvests(params?: { batch_id?: number; status?: string; cursor?: string }): Promise<CursorPage<Harvest>> {
+    const response = await this.api.get<CursorPage<Harvest>>('/sales/harvests', { params })
     return response.data
   }
 
+  async getAllHarvests(params?: { batch_id?: number; status?: string }): Promise<Harvest[]> {
+    return this.getAllPages<Harvest>('/sales/harvests', params)
+  }
+
   async createHarvest(data: {
     batch_id: number
     harvest_date: string
@@ -491,9 +512,9 @@ class ApiService {
   }
 
   // Sales APIs - Invoices
-  async getInvoices(status?: string): Promise<Invoice[]> {
-    const params = status ? { status } : {}
-    const response = await this.api.get<Invoice[]>('/sales/invoices', { params })
+  async getInvoices(status?: string, cursor?: string): Promise<CursorPage<Invoice>> {
+    const params = { ...(status ? { status } : {}), ...(cursor ? { cursor } : {}) }
+    const response = await this.api.get<CursorPage<Invoice>>('/sales/invoices', { params })
     return response.data
   }
 
@@ -555,9 +576,10 @@ class ApiService {
     user_id?: number
     start_date?: string
     end_date?: string
-    limit?: number
-  }): Promise<AuditLog[]> {
-    const response = await this.api.get<AuditLog[]>('/audit/logs', { params })
+    page_size?: number
+    cursor?: string
+  }): Promise<CursorPage<AuditLog>> {
+    const response = await this.api.get<CursorPage<AuditLog>>('/audit/logs', { params })
     return response.data
   }
 
@@ -610,8 +632,13 @@ class ApiService {
     return response.data
   }
 
-  async getTenants(): Promise<TenantSummary[]> {
-    const response = await this.api.get<TenantSummary[]>('/saas/tenants')
+  async getTenants(params?: {
+    page?: number
+    page_size?: number
+    status?: string
+    search?: string
+  }): Promise<PaginatedResponse<TenantSummary>> {
+    const response = await this.api.get<PaginatedResponse<TenantSummary>>('/saas/tenants', { params })
     return response.data
   }
 
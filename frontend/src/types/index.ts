@@ -449,6 +449,27 @@ export interface MortalityAnalysisItem {
   status: string
 }
 
+// Offset Pagination
+export interface PaginatedResponse<T> {
+  items: T[]
+  total: number
+  page: number
+  page_size: number
+  total_pages: number
+  has_next: boolean
+  has_previous: boolean
+}
+
+// Keyset Pagination
+export interface CursorPage<T> {
+  items: T[]
+  page_size: number
+  next_cursor?: string | null
+  has_next: boolean
+  total?: number | null
+  total_is_estimate: boolean
+}
+
 // Audit Log Types
 export interface AuditLog {
   id: number
@@ -0,0 +1,247 @@
+"""
+Dashboard Query Layer
+طبقة استعلامات لوحة التحكم - المجاميع تُحسب داخل قاعدة البيانات
+
+كل مجموعة مجاميع على جدول واحد تُبنى كـ QuerySet يعيد صفاً واحداً،
+ثم تُدمج جميع المجموعات في استعلام واحد (CROSS JOIN بين صفوف المجاميع)
+فيبقى زمن الاستجابة والذاكرة ثابتين مهما زاد عدد الدفعات أو أصناف المخزون.
+
+مؤشرات أداء الدفعات (FCR، متوسط الوزن، النفوق، النمو اليومي) تُحسب كأعمدة
+في استعلام الدفعات نفسه، فيتم الترتيب واختيار أول N دفعة داخل قاعدة البيانات.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.db.models import (
+    Case, Count, F, Q, Sum, Value, When, Func, FloatField, IntegerField, DateField,
+)
+from django.db.models.functions import Cast
+
+from .report_queries import get_report_batches
+
+
+def aggregate_query(queryset, **aggregates):
+    """
+    QuerySet يعيد صفاً واحداً بالمجاميع المطلوبة (بدون GROUP BY)
+
+    Args:
+        queryset: QuerySet مُصفّى
+        **aggregates: اسم العمود -> دالة التجميع
+    """
+    return queryset.order_by().annotate(
+        _all=Value(1)
+    ).values('_all').annotate(**aggregates).values(*aggregates)
+
+
+def fetch_aggregates(*queries):
+    """
+    تنفيذ عدة استعلامات مجاميع (من aggregate_query) في رحلة واحدة لقاعدة البيانات
+
+    Returns:
+        dict: اسم العمود -> القيمة (None للمجاميع على صفوف فارغة)
+    """
+    qn = connection.ops.quote_name
+    parts, params = [], []
+    for index, query in enumerate(queries):
+        sql, query_params = query.query.sql_with_params()
+        parts.append(f'({sql}) AS {qn(f"aggregate_{index}")}')
+        params.extend(query_params)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT * FROM {" CROSS JOIN ".join(parts)}', params)
+        row = cursor.fetchone()
+        columns = [column[0] for column in cursor.description]
+    return dict(zip(columns, row))
+
+
+def _inventory_value():
+    return Sum(F('quantity') * F('unit_price'))
+
+
+def get_dashboard_stats_values():
+    """
+    إحصائيات لوحة التحكم في استعلام واحد
+
+    Returns:
+        dict: total_ponds, active_batches, total_biomass, mortality_rate,
+        total_feed_value, total_medicine_value
+    """
+    from biological.models import Pond, Batch
+    from inventory.models import FeedInventory, MedicineInventory
+
+    values = fetch_aggregates(
+        aggregate_query(Pond.objects.filter(is_active=True), total_ponds=Count('id')),
+        aggregate_query(
+            Batch.objects.filter(status='active'),
+            active_batches=Count('id'),
+            # الوزن الأولي مضروباً في نسبة الأسماك الحية
+            total_biomass=Sum(Case(
+                When(initial_count__gt=0, then=F('initial_weight') * F('current_count') / F('initial_count')),
+                default=F('initial_weight'),
+            )),
+            total_initial=Sum('initial_count'),
+            total_current=Sum('current_count'),
+        ),
+        aggregate_query(FeedInventory.objects.all(), total_feed_value=_inventory_value()),
+        aggregate_query(MedicineInventory.objects.all(), total_medicine_value=_inventory_value()),
+    )
+
+    total_initial = values['total_initial'] or 0
+    total_current = values['total_current'] or 0
+    if total_initial > 0:
+        mortality_rate = ((total_initial - total_current) / total_initial) * 100
+    else:
+        mortality_rate = 0.0
+
+    return {
+        'total_ponds': values['total_ponds'],
+        'active_batches': values['active_batches'],
+        'total_biomass': float(values['total_biomass'] or 0),
+        'mortality_rate': mortality_rate,
+        'total_feed_value': float(values['total_feed_value'] or 0),
+        'total_medicine_value': float(values['total_medicine_value'] or 0),
+    }
+
+
+def get_farm_overview_values(today):
+    """
+    معلومات المزرعة العامة في استعلام واحد
+
+    العلف والنفوق لآخر أسبوع وآخر شهر تُحسب كمجموع شرطي واحد لكل جدول.
+
+    Returns:
+        dict: active_ponds, active_batches, total_biomass_kg,
+        feed_consumption_week_kg, feed_consumption_month_kg,
+        mortality_count_week, mortality_count_month
+    """
+    from biological.models import Pond, Batch
+    from daily_operations.models import FeedingLog, MortalityLog
+
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+
+    values = fetch_aggregates(
+        aggregate_query(
+            Pond.objects.filter(is_active=True, status='active'),
+            active_ponds=Count('id'),
+        ),
+        aggregate_query(
+            Batch.objects.filter(status='active', is_active=True),
+            active_batches=Count('id'),
+            total_biomass_kg=Sum('current_weight'),
+        ),
+        aggregate_query(
+            FeedingLog.objects.filter(feeding_date__gte=month_ago, feeding_date__lte=today),
+            feed_consumption_week_kg=Sum('quantity', filter=Q(feeding_date__gte=week_ago)),
+            feed_consumption_month_kg=Sum('quantity'),
+        ),
+        aggregate_query(
+            MortalityLog.objects.filter(mortality_date__gte=month_ago, mortality_date__lte=today),
+            mortality_count_week=Sum('count', filter=Q(mortality_date__gte=week_ago)),
+            mortality_count_month=Sum('count'),
+        ),
+    )
+
+    return {
+        'active_ponds': values['active_ponds'],
+        'active_batches': values['active_batches'],
+        'total_biomass_kg': float(values['total_biomass_kg'] or Decimal('0.00')),
+        'feed_consumption_week_kg': float(values['feed_consumption_week_kg'] or Decimal('0.00')),
+        'feed_consumption_month_kg': float(values['feed_consumption_month_kg'] or Decimal('0.00')),
+        'mortality_count_week': values['mortality_count_week'] or 0,
+        'mortality_count_month': values['mortality_count_month'] or 0,
+    }
+
+
+# ==================== Batch Performance ====================
+
+# معيار الترتيب في الطلب -> العمود المحسوب
+BATCH_PERFORMANCE_SORT_FIELDS = {
+    'start_date': 'start_date',
+    'fcr': 'perf_fcr',
+    'average_weight': 'perf_average_weight',
+    'mortality_rate': 'perf_mortality_rate',
+    'weight_gain_rate_daily': 'perf_daily_gain',
+    'days_active': 'perf_days_active',
+    'current_count': 'current_count',
+    'current_weight': 'current_weight',
+}
+
+
+class DaysBetween(Func):
+    """عدد الأيام بين تاريخين (طرح date من date في PostgreSQL يعيد عدداً صحيحاً)"""
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '
+    output_field = IntegerField()
+
+
+def batch_performance_annotations(today):
+    """
+    أعمدة مؤشرات الأداء (تتطلب أعمدة العلف من feed_annotations):
+    perf_days_active, perf_weight_gain, perf_fcr, perf_average_weight,
+    perf_mortality_rate, perf_daily_gain
+
+    نفس منطق calculate_fcr و calculate_weight_gain_rate و Batch.average_weight
+    و Batch.mortality_rate.
+    """
+    return {
+        'perf_days_active': DaysBetween(Value(today, output_field=DateField()), F('start_date')),
+        'perf_weight_gain': F('current_weight') - F('initial_weight'),
+        'perf_fcr': Case(
+            When(
+                report_feed_kg__gt=0, perf_weight_gain__gt=0,
+                then=F('report_feed_kg') / F('perf_weight_gain'),
+            ),
+            default=None,
+        ),
+        'perf_average_weight': Case(
+            When(
+                current_count__gt=0, current_weight__gt=0,
+                then=F('current_weight') / F('current_count'),
+            ),
+            default=Value(Decimal('0.00')),
+        ),
+        'perf_mortality_rate': Case(
+            When(
+                initial_count__gt=0,
+                then=Cast(F('initial_count') - F('current_count'), FloatField()) * 100 / F('initial_count'),
+            ),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        'perf_daily_gain': Case(
+            When(
+                perf_weight_gain__gt=0, perf_days_active__gt=0,
+                then=F('perf_weight_gain') / F('perf_days_active'),
+            ),
+            default=None,
+        ),
+    }
+
+
+def get_batch_performance_rows(today, sort_by='start_date', descending=True, limit=None):
+    """
+    أداء الدفعات النشطة في استعلام واحد مع الترتيب وأول N داخل قاعدة البيانات
+
+    Args:
+        today: تاريخ احتساب عدد الأيام النشطة
+        sort_by: أحد مفاتيح BATCH_PERFORMANCE_SORT_FIELDS
+        descending: ترتيب تنازلي (القيم الفارغة في النهاية دائماً)
+        limit: عدد الدفعات المطلوبة (None للجميع)
+
+    Returns:
+        QuerySet: دفعات مع أعمدة report_feed_kg و perf_*
+    """
+    field = F(BATCH_PERFORMANCE_SORT_FIELDS[sort_by])
+    ordering = field.desc(nulls_last=True) if descending else field.asc(nulls_last=True)
+
+    queryset = get_report_batches(feed=True).filter(
+        status='active',
+        is_active=True,
+    ).annotate(
+        **batch_performance_annotations(today)
+    ).order_by(ordering, '-id')
+
+    if limit:
+        queryset = queryset[:limit]
+    return queryset
@@ -0,0 +1,189 @@
+"""
+Streaming Export Writers
+كتابة ملفات التصدير (CSV / XLSX) صفاً بعد صف بذاكرة ثابتة
+
+كل writer يستقبل عناوين الأعمدة ومُولّد صفوف (مثل
+queryset.values_list(...).iterator(chunk_size=...)) ويُعيد مُولّد أجزاء
+(bytes) يصلح لـ StreamingHttpResponse أو للكتابة في ملف:
+
+    chunks = iter_csv(headers, rows)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS['csv']['content_type'])
+
+XLSX يُكتب كملف zip متدفق (zipfile يدعم الكتابة لـ stream غير قابل للـ seek)
+مع inline strings، بدون مكتبة خارجية وبدون تحميل الورقة في الذاكرة.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+# عدد الصفوف المكتوبة قبل إرسال الجزء التالي
+EXPORT_FLUSH_ROWS = 500
+
+# محارف التحكم غير المسموحة في XML
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_csv(headers, rows):
+    """
+    ملف CSV (UTF-8 مع BOM ليفتحه Excel بالعربية) كأجزاء bytes
+
+    Args:
+        headers: عناوين الأعمدة
+        rows: مُولّد صفوف (tuples)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(headers)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_text(value) for value in row])
+        if count % EXPORT_FLUSH_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Stream غير قابل للـ seek يجمع ما يكتبه zipfile حتى يُسحب"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView rightToLeft="1" workbookViewId="0"/></sheetViews>'
+    '<sheetData>'
+)
+
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value):
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_INVALID_XML_CHARS.sub('', _text(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def iter_xlsx(headers, rows, sheet_name='Export'):
+    """
+    ملف XLSX بورقة واحدة كأجزاء bytes (الورقة تُكتب وتُضغط صفاً بعد صف)
+
+    Args:
+        headers: عناوين الأعمدة
+        rows: مُولّد صفوف (tuples)
+        sheet_name: اسم الورقة (حتى 31 حرفاً)
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name[:31], {'"': '&quot;'})))
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_SHEET_START + _xlsx_row(headers)).encode('utf-8'))
+            for count, row in enumerate(rows, start=1):
+                sheet.write(_xlsx_row(row).encode('utf-8'))
+                if count % EXPORT_FLUSH_ROWS == 0:
+                    yield sink.drain()
+            sheet.write(_SHEET_END.encode('utf-8'))
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': {
+        'writer': iter_csv,
+        'content_type': 'text/csv; charset=utf-8',
+    },
+    'xlsx': {
+        'writer': iter_xlsx,
+        'content_type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    },
+}
+
+
+def iter_export(file_format, headers, rows, title='Export'):
+    """
+    أجزاء ملف التصدير بالصيغة المطلوبة
+
+    Raises:
+        ValueError: صيغة غير مدعومة
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"صيغة غير مدعومة: {file_format}")
+    writer = EXPORT_FORMATS[file_format]['writer']
+    if file_format == 'xlsx':
+        return writer(headers, rows, sheet_name=title)
+    return writer(headers, rows)
@@ -0,0 +1,152 @@
+"""
+Report Query Layer
+طبقة استعلامات التقارير - كل تقرير يُبنى كـ QuerySet واحد مُعلَّق (annotated)
+
+بدلاً من تنفيذ 2-5 استعلامات لكل دفعة، تُضاف مجاميع العلف والنفوق
+وإيرادات الحصاد كأعمدة محسوبة في نفس الاستعلام:
+- العلف والنفوق من BatchRollup (LEFT JOIN)، مع subquery احتياطي
+  على السجلات الخام للدفعات التي لم يُبنَ لها صف مجاميع بعد
+- الإيرادات من subquery مجمّع على SalesOrderLine للحصادات المكتملة
+"""
+from decimal import Decimal
+from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum, Count, Value
+from django.db.models.functions import Coalesce
+
+
+AMOUNT_FIELD = models.DecimalField(max_digits=14, decimal_places=2)
+
+
+def _grouped_subquery(queryset, group_field, aggregate):
+    """
+    Subquery مجمّع لكل دفعة (صف واحد أو NULL)
+
+    Args:
+        queryset: QuerySet مُصفّى بـ OuterRef('pk')
+        group_field: حقل التجميع (مرجع الدفعة)
+        aggregate: دالة التجميع (Sum/Count)
+    """
+    return Subquery(
+        queryset.order_by().values(group_field).annotate(value=aggregate).values('value')
+    )
+
+
+def _amount(rollup_field, fallback):
+    """قيمة مبلغ من BatchRollup أو من الـ subquery الاحتياطي أو صفر"""
+    return Coalesce(
+        F(rollup_field), fallback, Value(Decimal('0.00')),
+        output_field=AMOUNT_FIELD,
+    )
+
+
+def _integer(rollup_field, fallback):
+    """قيمة عددية من BatchRollup أو من الـ subquery الاحتياطي أو صفر"""
+    return Coalesce(
+        F(rollup_field), fallback, Value(0),
+        output_field=models.IntegerField(),
+    )
+
+
+def feed_annotations():
+    """
+    أعمدة مجاميع العلف: report_feed_kg, report_feed_cost, report_feeding_count
+    """
+    from daily_operations.models import FeedingLog
+
+    logs = FeedingLog.objects.filter(batch=OuterRef('pk'))
+    return {
+        'report_feed_kg': _amount(
+            'rollup__total_feed_kg', _grouped_subquery(logs, 'batch', Sum('quantity'))
+        ),
+        'report_feed_cost': _amount(
+            'rollup__total_feed_cost', _grouped_subquery(logs, 'batch', Sum('total_cost'))
+        ),
+        'report_feeding_count': _integer(
+            'rollup__feeding_days', _grouped_subquery(logs, 'batch', Count('id'))
+        ),
+    }
+
+
+def mortality_annotations():
+    """
+    أعمدة مجاميع النفوق: report_mortality, report_mortality_count
+    """
+    from daily_operations.models import MortalityLog
+
+    logs = MortalityLog.objects.filter(batch=OuterRef('pk'))
+    return {
+        'report_mortality': _integer(
+            'rollup__total_mortality', _grouped_subquery(logs, 'batch', Sum('count'))
+        ),
+        'report_mortality_count': _integer(
+            'rollup__mortality_days', _grouped_subquery(logs, 'batch', Count('id'))
+        ),
+    }
+
+
+def revenue_annotations():
+    """
+    عمود الإيرادات: report_revenue = مجموع بنود البيع للحصادات المكتملة
+    """
+    from sales.models import SalesOrderLine
+
+    lines = SalesOrderLine.objects.filter(
+        harvest__batch=OuterRef('pk'),
+        harvest__status='completed',
+    )
+    return {
+        'report_revenue': Coalesce(
+            _grouped_subquery(lines, 'harvest__batch', Sum('line_total')),
+            Value(Decimal('0.00')),
+            output_field=AMOUNT_FIELD,
+        ),
+    }
+
+
+def get_report_batches(batch_id=None, select_related=('species', 'pond'),
+                       feed=False, mortality=False, revenue=False):
+    """
+    QuerySet الدفعات للتقارير مع المجاميع المطلوبة كأعمدة محسوبة
+
+    Args:
+        batch_id: تصفية حسب دفعة معينة (اختياري)
+        select_related: العلاقات المحملة مع الدفعة
+        feed: إضافة مجاميع العلف
+        mortality: إضافة مجاميع النفوق
+        revenue: إضافة إيرادات الحصاد
+
+    Returns:
+        QuerySet: استعلام واحد لجميع الدفعات
+    """
+    from biological.models import Batch
+
+    annotations = {}
+    if feed:
+        annotations.update(feed_annotations())
+    if mortality:
+        annotations.update(mortality_annotations())
+    if revenue:
+        annotations.update(revenue_annotations())
+
+    queryset = Batch.objects.select_related(*select_related).annotate(**annotations)
+    if batch_id:
+        queryset = queryset.filter(id=batch_id)
+    return queryset
+
+
+def report_fcr(batch):
+    """
+    FCR من مجموع العلف المحسوب في الاستعلام (نفس منطق calculate_fcr)
+
+    Returns:
+        Decimal: قيمة FCR، أو None إذا لم يكن هناك بيانات كافية
+    """
+    total_feed = batch.report_feed_kg
+    if total_feed == 0:
+        return None
+
+    weight_gain = batch.current_weight - batch.initial_weight
+    if weight_gain <= 0:
+        return None
+
+    return total_feed / weight_gain
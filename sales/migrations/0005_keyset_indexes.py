@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("biological", "0008_sensoralerts"),
+        ("sales", "0004_remove_salesorderline_sales_saleso_sales_o_idx_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="harvest",
+            index=models.Index(
+                fields=["harvest_date", "id"], name="sales_harve_harvest_114a55_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["invoice_date", "id"], name="sales_invoi_invoice_9eed4a_idx"
+            ),
+        ),
+    ]
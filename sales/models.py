@@ -81,6 +81,7 @@ class Harvest(models.Model):
         ordering = ['-harvest_date', '-created_at']
         indexes = [
             models.Index(fields=['batch', 'harvest_date']),
+            models.Index(fields=['harvest_date', 'id']),  # Keyset Pagination في API
             models.Index(fields=['status']),
         ]
     
@@ -301,6 +302,7 @@ class Invoice(models.Model):
         ordering = ['-invoice_date', '-created_at']
         indexes = [
             models.Index(fields=['invoice_number']),
+            models.Index(fields=['invoice_date', 'id']),  # Keyset Pagination في API
             models.Index(fields=['status']),
         ]
     
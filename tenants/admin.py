@@ -4,7 +4,7 @@ from django.contrib import messages
 from django.shortcuts import redirect
 from django_tenants.utils import schema_context, get_public_schema_name
 from django.db import connection
-from .models import Client, Domain, Plan, Subscription, FarmInfo
+from .models import Client, Domain, Plan, Subscription, FarmInfo, TenantDirectory
 
 
 @admin.register(Client)
@@ -237,3 +237,17 @@ class SubscriptionAdmin(admin.ModelAdmin):
     get_is_valid.short_description = "ساري المفعول"
     get_is_valid.boolean = True
 
+
+
+@admin.register(TenantDirectory)
+class TenantDirectoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'schema_name', 'domain', 'plan_name', 'subscription_status', 'current_period_end', 'user_count', 'storage_bytes', 'refreshed_at')
+    list_filter = ('subscription_status', 'is_active', 'billing_cycle')
+    search_fields = ('name', 'email', 'schema_name', 'domain')
+    
+    def has_add_permission(self, request):
+        """الدليل يُبنى تلقائياً من العملاء والاشتراكات"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -5,4 +5,6 @@ class TenantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tenants'
     verbose_name = 'إدارة العملاء'
-
+    
+    def ready(self):
+        import tenants.signals  # noqa
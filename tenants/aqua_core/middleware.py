@@ -2,9 +2,29 @@
 Django Middleware للتطبيق
 """
 from django.http import JsonResponse, HttpResponseRedirect
+from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils import timezone
+from django_tenants.middleware.main import TenantMainMiddleware
 from django_tenants.utils import get_tenant, get_public_schema_name
-from tenants.models import Subscription
+from tenants.subscription_cache import get_subscription_state
+from tenants.tenant_cache import resolve_tenant
+
+
+class CachedTenantMainMiddleware(TenantMainMiddleware):
+    """
+    TenantMainMiddleware مع cache لتحديد الـ Tenant من الـ hostname
+    
+    يستبدل استعلام Domain → Client في public schema مع كل طلب بقراءة من
+    الـ cache (tenants/tenant_cache.py)، بما في ذلك الـ hostnames غير المعروفة.
+    باقي السلوك (ضبط الـ schema والـ urlconf و SHOW_PUBLIC_IF_NO_TENANT_FOUND) كما هو.
+    """
+
+    def get_tenant(self, domain_model, hostname):
+        tenant = resolve_tenant(hostname)
+        if tenant is None:
+            raise domain_model.DoesNotExist(f'No tenant for hostname "{hostname}"')
+        return tenant
 
 
 class TenantDebugMiddleware:
@@ -88,59 +108,58 @@ class SubscriptionMiddleware:
         if not tenant or tenant.schema_name == 'public':
             return self.get_response(request)
         
-        # التحقق من حالة الاشتراك
+        # التحقق من حالة الاشتراك (من الـ cache - دون استعلام في المسار الساخن)
         try:
-            # الانتقال إلى public schema للتحقق من Subscription
-            from django.db import connection
-            from django_tenants.utils import schema_context
-            
-            with schema_context('public'):
-                subscription = Subscription.objects.filter(client=tenant).first()
-                
-                if subscription:
-                    # التحقق من حالة الاشتراك
-                    status = subscription.status
-                    
-                    # إذا كان ملغي أو معلق - منع الوصول تماماً
-                    if status in ['cancelled', 'suspended']:
-                        if request.path.startswith('/api/'):
-                            return JsonResponse({
-                                'error': 'subscription_inactive',
-                                'message': 'الاشتراك غير نشط. يرجى التواصل مع الدعم.',
-                                'status': status,
-                            }, status=403)
-                        else:
-                            from django.shortcuts import redirect
-                            return redirect('/subscription-inactive/')
-                    
-                    # إذا كان متأخر (Past Due) - السماح بالقراءة فقط
-                    elif status == 'past_due':
-                        # منع عمليات الكتابة (POST, PUT, DELETE, PATCH)
-                        if request.method in ['POST', 'PUT', 'DELETE', 'PATCH']:
-                            if request.path.startswith('/api/'):
-                                return JsonResponse({
-                                    'error': 'subscription_past_due',
-                                    'message': 'الاشتراك متأخر - يرجى تجديد الدفع للاستمرار في استخدام الخدمة.',
-                                    'status': status,
-                                }, status=403)
-                            else:
-                                from django.shortcuts import redirect
-                                return redirect('/subscription-past-due/')
-                    
-                    # إذا كان منتهي الصلاحية
-                    elif not subscription.is_valid():
-                        if request.path.startswith('/api/'):
-                            return JsonResponse({
-                                'error': 'subscription_expired',
-                                'message': 'الاشتراك منتهي أو متوقف. يرجى تجديد الاشتراك للوصول إلى الخدمة.',
-                                'status': status,
-                                'end_date': subscription.current_period_end.isoformat() if subscription.current_period_end else None,
-                            }, status=403)
-                        else:
-                            from django.shortcuts import redirect
-                            return redirect('/subscription-expired/')
+            state = get_subscription_state(tenant.pk)
+            if state:
+                blocked = self._check_subscription(request, *state)
+                if blocked is not None:
+                    return blocked
         except Exception:
             # في حالة وجود خطأ، نسمح بالوصول (لتجنب حجب النظام بالكامل)
             pass
         
         return self.get_response(request)
+    
+    def _check_subscription(self, request, status, current_period_end):
+        """
+        قرار الـ Gatekeeper من حالة الاشتراك
+        
+        Returns:
+            HttpResponse | None: استجابة الحجب، أو None للسماح بالطلب
+        """
+        # إذا كان ملغي أو معلق - منع الوصول تماماً
+        if status in ['cancelled', 'suspended']:
+            if request.path.startswith('/api/'):
+                return JsonResponse({
+                    'error': 'subscription_inactive',
+                    'message': 'الاشتراك غير نشط. يرجى التواصل مع الدعم.',
+                    'status': status,
+                }, status=403)
+            return redirect('/subscription-inactive/')
+        
+        # إذا كان متأخر (Past Due) - السماح بالقراءة فقط
+        if status == 'past_due':
+            # منع عمليات الكتابة (POST, PUT, DELETE, PATCH)
+            if request.method in ['POST', 'PUT', 'DELETE', 'PATCH']:
+                if request.path.startswith('/api/'):
+                    return JsonResponse({
+                        'error': 'subscription_past_due',
+                        'message': 'الاشتراك متأخر - يرجى تجديد الدفع للاستمرار في استخدام الخدمة.',
+                        'status': status,
+                    }, status=403)
+                return redirect('/subscription-past-due/')
+            return None
+        
+        # إذا كان منتهي الصلاحية (نفس منطق Subscription.is_valid)
+        if not current_period_end or current_period_end < timezone.now():
+            if request.path.startswith('/api/'):
+                return JsonResponse({
+                    'error': 'subscription_expired',
+                    'message': 'الاشتراك منتهي أو متوقف. يرجى تجديد الاشتراك للوصول إلى الخدمة.',
+                    'status': status,
+                    'end_date': current_period_end.isoformat() if current_period_end else None,
+                }, status=403)
+            return redirect('/subscription-expired/')
+        
+        return None
@@ -167,7 +167,7 @@ SHOW_PUBLIC_IF_NO_TENANT_FOUND = True
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware - يجب أن يكون قبل TenantMiddleware
-    'django_tenants.middleware.main.TenantMainMiddleware', # هذا هو المسؤول عن توجيه الطلب للـ Schema الصحيحة
+    'tenants.aqua_core.middleware.CachedTenantMainMiddleware', # هذا هو المسؤول عن توجيه الطلب للـ Schema الصحيحة (مع cache للـ hostname)
     'tenants.aqua_core.middleware.SubscriptionMiddleware',  # Subscription Gatekeeper
     'tenants.aqua_core.middleware.TenantDebugMiddleware',  # Debug middleware
     'audit.middleware.AuditLoggingMiddleware',  # Audit Logging Middleware
@@ -253,7 +253,7 @@ CACHE_VERSION = 1
 STATIC_URL = os.getenv('STATIC_URL', '/static/')
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -273,13 +273,20 @@ CELERY_TIMEZONE = TIME_ZONE
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
-    # تنظيف سجلات التدقيق القديمة - كل أسبوع يوم الأحد الساعة 2 صباحاً
+    # إنشاء أقسام سجلات التدقيق للأشهر القادمة - يومياً الساعة 1:15 صباحاً
+    'create-audit-partitions': {
+        'task': 'audit.create_audit_partitions',
+        'schedule': crontab(hour=1, minute=15),
+        'kwargs': {
+            'months_ahead': int(os.getenv('AUDIT_PARTITION_MONTHS_AHEAD', '3')),
+        }
+    },
+    # حذف أقسام سجلات التدقيق المنتهية (بعد أرشفتها) - كل أسبوع يوم الأحد الساعة 2 صباحاً
     'cleanup-old-audit-logs': {
         'task': 'audit.cleanup_old_logs',
         'schedule': crontab(hour=2, minute=0, day_of_week=0),  # كل أسبوع يوم الأحد
         'kwargs': {
             'retention_months': int(os.getenv('AUDIT_LOG_RETENTION_MONTHS', '12')),
-            'batch_size': int(os.getenv('AUDIT_LOG_CLEANUP_BATCH_SIZE', '1000')),
         }
     },
     # التحقق من الاشتراكات المنتهية - يومياً الساعة 3 صباحاً
@@ -287,6 +294,42 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'tenants.check_expired_subscriptions',
         'schedule': crontab(hour=3, minute=0),  # يومياً الساعة 3 صباحاً
     },
+    # إنشاء أقسام قراءات المستشعرات للأشهر القادمة - يومياً الساعة 1 صباحاً
+    'create-sensor-partitions': {
+        'task': 'biological.create_sensor_partitions',
+        'schedule': crontab(hour=1, minute=0),
+        'kwargs': {
+            'months_ahead': int(os.getenv('SENSOR_PARTITION_MONTHS_AHEAD', '3')),
+        }
+    },
+    # حذف أقسام قراءات المستشعرات المنتهية - كل أسبوع يوم الأحد الساعة 2:30 صباحاً
+    'cleanup-old-sensor-readings': {
+        'task': 'biological.cleanup_old_sensor_readings',
+        'schedule': crontab(hour=2, minute=30, day_of_week=0),
+        'kwargs': {
+            'retention_months': int(os.getenv('SENSOR_READING_RETENTION_MONTHS', '12')),
+        }
+    },
+    # تحديث مجاميع قراءات المستشعرات - كل دقيقة
+    'update-sensor-rollups': {
+        'task': 'biological.update_sensor_rollups',
+        'schedule': crontab(),  # كل دقيقة
+    },
+    # ترحيل القيود المحاسبية المعلقة - كل بضع ثوانٍ (للـ tenants التي لديها صفوف معلقة فقط)
+    'process-posting-outbox': {
+        'task': 'accounting.process_posting_outbox',
+        'schedule': float(os.getenv('ACCOUNTING_OUTBOX_INTERVAL_SECONDS', '10')),
+    },
+    # تصحيح دليل الـ Tenants (عدد المستخدمين والمساحة المستخدمة) - كل 15 دقيقة
+    'reconcile-tenant-directory': {
+        'task': 'tenants.reconcile_tenant_directory',
+        'schedule': crontab(minute='*/15'),
+    },
+    # حذف ملفات التصدير القديمة من التخزين - كل ساعة
+    'cleanup-export-files': {
+        'task': 'api.cleanup_export_files',
+        'schedule': crontab(minute=45),
+    },
 }
 
 # =================================================
@@ -450,6 +493,12 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
+# مدة تخزين بيانات مستخدم JWT (الدور والتفعيل) في Redis لـ TokenAuth (بالثواني)
+JWT_USER_CACHE_TIMEOUT = int(os.getenv('JWT_USER_CACHE_TIMEOUT', '300'))
+# مدة التخزين داخل العملية (بالثواني) - أقصر مدة لرؤية تعطيل مستخدم أو تسجيل خروج تم في عامل آخر
+JWT_USER_LOCAL_CACHE_TTL = int(os.getenv('JWT_USER_LOCAL_CACHE_TTL', '5'))
+# الحد الأقصى لعدد المفاتيح في الـ cache المحلي لكل عملية
+JWT_USER_LOCAL_CACHE_SIZE = int(os.getenv('JWT_USER_LOCAL_CACHE_SIZE', '4096'))
 
 # =================================================
 # SECURITY SETTINGS (Production)
@@ -495,7 +544,105 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@aquaerp.com')
 # AUDIT LOG RETENTION CONFIGURATION
 # =================================================
 # فترة الاحتفاظ بسجلات التدقيق (بالأشهر)
-# السجلات الأقدم من هذه الفترة سيتم حذفها تلقائياً
+# أقسام الأشهر الأقدم من هذه الفترة تُحذف كاملة تلقائياً (audit/partitions.py)
 AUDIT_LOG_RETENTION_MONTHS = int(os.getenv('AUDIT_LOG_RETENTION_MONTHS', '12'))
-# حجم الدفعة عند حذف السجلات القديمة
-AUDIT_LOG_CLEANUP_BATCH_SIZE = int(os.getenv('AUDIT_LOG_CLEANUP_BATCH_SIZE', '1000'))
\ No newline at end of file
+# عدد الأشهر القادمة التي تُنشأ أقسامها مسبقاً
+AUDIT_PARTITION_MONTHS_AHEAD = int(os.getenv('AUDIT_PARTITION_MONTHS_AHEAD', '3'))
+# تصدير الأقسام المنتهية إلى الأرشيف المضغوط قبل حذفها
+AUDIT_ARCHIVE_BEFORE_DROP = os.getenv('AUDIT_ARCHIVE_BEFORE_DROP', 'True').lower() == 'true'
+# مجلد أرشيف سجلات التدقيق داخل التخزين المشترك (default_storage / MEDIA_ROOT)
+AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR', 'audit_archive')
+# =================================================
+# DASHBOARD CACHE CONFIGURATION
+# =================================================
+# مدة تخزين قيم لوحة التحكم (بالثواني) - تُلغى فوراً عند تعديل البيانات
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '3600'))
+# =================================================
+# ACCOUNTING POSTING CONFIGURATION
+# =================================================
+# ترحيل قيود العمليات فوراً داخل الـ signal بدلاً من طابور الترحيل (للاختبارات)
+ACCOUNTING_POSTING_SYNC = os.getenv('ACCOUNTING_POSTING_SYNC', 'False').lower() == 'true'
+# عدد المستندات المرحّلة في كل transaction
+ACCOUNTING_OUTBOX_BATCH_SIZE = int(os.getenv('ACCOUNTING_OUTBOX_BATCH_SIZE', '500'))
+# عدد محاولات الترحيل قبل اعتبار المستند فاشلاً (يظهر في مؤشرات التأخر)
+ACCOUNTING_OUTBOX_MAX_ATTEMPTS = int(os.getenv('ACCOUNTING_OUTBOX_MAX_ATTEMPTS', '5'))
+# مدة الاحتفاظ بصفوف الطابور بعد ترحيلها (بالأيام)
+ACCOUNTING_OUTBOX_RETENTION_DAYS = int(os.getenv('ACCOUNTING_OUTBOX_RETENTION_DAYS', '7'))
+# عمر أقدم مستند معلق (بالثواني) الذي يُسجل بعده تحذير
+ACCOUNTING_OUTBOX_LAG_WARNING_SECONDS = int(os.getenv('ACCOUNTING_OUTBOX_LAG_WARNING_SECONDS', '300'))
+# الفاصل (بالثواني) بين المرور على جميع الـ tenants؛ بينها تُعالج الـ tenants التي لديها صفوف معلقة فقط
+ACCOUNTING_OUTBOX_SWEEP_SECONDS = int(os.getenv('ACCOUNTING_OUTBOX_SWEEP_SECONDS', '300'))
+# =================================================
+# TENANT FAN-OUT CONFIGURATION
+# =================================================
+# عدد إعادة المحاولات لكل tenant عند فشل مهمة موزعة على الـ tenants
+TENANT_FANOUT_MAX_RETRIES = int(os.getenv('TENANT_FANOUT_MAX_RETRIES', '2'))
+# الانتظار قبل إعادة المحاولة (بالثواني) - يُضرب في رقم المحاولة
+TENANT_FANOUT_RETRY_BACKOFF_SECONDS = int(os.getenv('TENANT_FANOUT_RETRY_BACKOFF_SECONDS', '5'))
+# مدة الاحتفاظ بتقدم ونتائج المهام الموزعة في Cache (بالثواني)
+TENANT_FANOUT_PROGRESS_TIMEOUT = int(os.getenv('TENANT_FANOUT_PROGRESS_TIMEOUT', '86400'))
+# =================================================
+# AUDIT LOG CONFIGURATION
+# =================================================
+# الحد الأقصى لعدد سجلات التدقيق في INSERT واحد (وفي ذاكرة الكتلة قبل كتابتها)
+AUDIT_BULK_BATCH_SIZE = int(os.getenv('AUDIT_BULK_BATCH_SIZE', '500'))
+# =================================================
+# SUBSCRIPTION CACHE CONFIGURATION
+# =================================================
+# مدة تخزين حالة الاشتراك في Redis لـ SubscriptionMiddleware (بالثواني)
+SUBSCRIPTION_CACHE_TIMEOUT = int(os.getenv('SUBSCRIPTION_CACHE_TIMEOUT', '300'))
+# مدة التخزين داخل العملية (بالثواني) - أقصى تأخر لرؤية تغيير تم في عامل آخر
+SUBSCRIPTION_LOCAL_CACHE_TTL = int(os.getenv('SUBSCRIPTION_LOCAL_CACHE_TTL', '5'))
+# الحد الأقصى لعدد العملاء في الـ cache المحلي لكل عملية
+SUBSCRIPTION_LOCAL_CACHE_SIZE = int(os.getenv('SUBSCRIPTION_LOCAL_CACHE_SIZE', '1024'))
+# =================================================
+# TENANT RESOLUTION CACHE CONFIGURATION
+# =================================================
+# مدة تخزين العميل لكل hostname في Redis (بالثواني)
+TENANT_CACHE_TIMEOUT = int(os.getenv('TENANT_CACHE_TIMEOUT', '300'))
+# مدة تخزين الـ hostnames غير المعروفة (بالثواني) - أقصر حتى لا يتأخر ظهور نطاق جديد أُضيف دون signal
+TENANT_NEGATIVE_CACHE_TIMEOUT = int(os.getenv('TENANT_NEGATIVE_CACHE_TIMEOUT', '60'))
+# مدة التخزين داخل العملية (بالثواني)
+TENANT_LOCAL_CACHE_TTL = int(os.getenv('TENANT_LOCAL_CACHE_TTL', '5'))
+# الحد الأقصى لعدد الـ hostnames في الـ cache المحلي لكل عملية
+TENANT_LOCAL_CACHE_SIZE = int(os.getenv('TENANT_LOCAL_CACHE_SIZE', '1024'))
+# =================================================
+# IOT SENSOR INGESTION CONFIGURATION
+# =================================================
+# الحد الأقصى لعدد القراءات في طلب الإدخال الجماعي الواحد
+IOT_BULK_MAX_READINGS = int(os.getenv('IOT_BULK_MAX_READINGS', '10000'))
+# الحد الأقصى لحجم جسم طلب الإدخال الجماعي (بالبايت)، يُتحقق منه قبل التحليل
+IOT_BULK_MAX_BYTES = int(os.getenv('IOT_BULK_MAX_BYTES', str(2 * 1024 * 1024)))
+# حجم دفعة الإدراج في قاعدة البيانات (bulk_create)
+IOT_BULK_INSERT_BATCH_SIZE = int(os.getenv('IOT_BULK_INSERT_BATCH_SIZE', '1000'))
+# مدة تخزين قائمة الأحواض النشطة في Cache (بالثواني)
+IOT_POND_CACHE_TIMEOUT = int(os.getenv('IOT_POND_CACHE_TIMEOUT', '300'))
+# عدد القراءات المدمجة في مجاميع المستشعرات في كل transaction
+SENSOR_ROLLUP_CHUNK_SIZE = int(os.getenv('SENSOR_ROLLUP_CHUNK_SIZE', '50000'))
+# تأخير المعالجة (بالثواني) لتفادي تخطي قراءات من transactions غير مكتملة
+SENSOR_ROLLUP_LAG_SECONDS = int(os.getenv('SENSOR_ROLLUP_LAG_SECONDS', '30'))
+# عدد الأشهر للاحتفاظ بقراءات المستشعرات الخام (تُحذف الأقسام الأقدم كاملة)
+SENSOR_READING_RETENTION_MONTHS = int(os.getenv('SENSOR_READING_RETENTION_MONTHS', '12'))
+# عدد الأشهر القادمة التي تُنشأ أقسامها مسبقاً
+SENSOR_PARTITION_MONTHS_AHEAD = int(os.getenv('SENSOR_PARTITION_MONTHS_AHEAD', '3'))
+# Redis المستخدم لبث القراءات والتنبيهات المباشرة (pub/sub)
+IOT_PUBSUB_REDIS_URL = os.getenv('IOT_PUBSUB_REDIS_URL', os.getenv('REDIS_URL', 'redis://redis:6379/1'))
+# مهلة اتصال جهة النشر بـ Redis (بالثواني) حتى لا يتأخر الإدخال عند تعطله
+IOT_PUBSUB_SOCKET_TIMEOUT = float(os.getenv('IOT_PUBSUB_SOCKET_TIMEOUT', '0.5'))
+# عدد الرسائل المعلقة لكل متصل بالبث قبل إسقاط الأقدم
+IOT_LIVE_QUEUE_SIZE = int(os.getenv('IOT_LIVE_QUEUE_SIZE', '100'))
+# الفاصل (بالثواني) بين رسائل keep-alive على اتصالات البث الخاملة
+IOT_LIVE_HEARTBEAT_SECONDS = int(os.getenv('IOT_LIVE_HEARTBEAT_SECONDS', '15'))
+# مهلة إعادة الاتصال التي يستخدمها المتصفح (EventSource) بالمللي ثانية
+IOT_LIVE_RETRY_MS = int(os.getenv('IOT_LIVE_RETRY_MS', '5000'))
+# مدة صلاحية ticket الاتصال بالبث (بالثواني) - يُستخدم مرة واحدة
+IOT_LIVE_TICKET_TTL = int(os.getenv('IOT_LIVE_TICKET_TTL', '30'))
+# =================================================
+# DATA EXPORT CONFIGURATION
+# =================================================
+# عدد الصفوف المقروءة من قاعدة البيانات في كل دفعة (server-side cursor)
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+# مدة الاحتفاظ بحالة مهام التصدير الخلفية في Cache (بالثواني)
+EXPORT_JOB_TIMEOUT = int(os.getenv('EXPORT_JOB_TIMEOUT', '86400'))
+# مدة الاحتفاظ بملفات التصدير في التخزين (بالساعات)
+EXPORT_FILE_RETENTION_HOURS = int(os.getenv('EXPORT_FILE_RETENTION_HOURS', '24'))
@@ -7,6 +7,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from ninja import NinjaAPI
 from api.router import api_router
+from api.live import sensor_live_feed
 
 # إنشاء Django Ninja API instance
 # ملاحظة: api موجود في SHARED_APPS، لذا يمكن إنشاؤه مباشرة
@@ -43,6 +44,9 @@ urlpatterns = [
     # Admin panel (سيتم تفعيله لاحقاً لكل tenant)
     path('admin/', admin.site.urls),
     
+    # البث المباشر لقياسات الأحواض (SSE - async view على عامل ASGI)
+    path('api/iot/live', sensor_live_feed, name='iot-live-feed'),
+    
     # API endpoints
     # include() يحتاج 2-tuple + namespace argument
     path('api/', include((api_urls[0], api_urls[1]), namespace=api_urls[2])),
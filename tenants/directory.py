@@ -0,0 +1,157 @@
+"""
+دليل الـ Tenants (TenantDirectory) - بناء وتحديث الـ Read Model
+
+- refresh_tenant_directory: بيانات العميل والنطاق والاشتراك لعملاء محددين
+  (أو للجميع) باستعلام واحد ثم upsert واحد
+- refresh_user_count: عدد مستخدمي tenant واحد (من signals المستخدمين)
+- reconcile_tenant_directory: تصحيح دوري كامل، يشمل عدد المستخدمين لجميع
+  الـ schemas (UNION ALL بدلاً من التنقل بين الـ schemas) والمساحة المستخدمة
+  (استعلام واحد على pg_class)
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from django_tenants.utils import schema_context, get_public_schema_name
+
+from .models import Client, Domain, TenantDirectory
+
+
+# الحقول المأخوذة من العميل والاشتراك (عدد المستخدمين والمساحة تُحدَّث منفصلة)
+DIRECTORY_FIELDS = [
+    'name', 'email', 'schema_name', 'domain', 'plan', 'plan_name', 'subscription_status',
+    'billing_cycle', 'current_period_end', 'is_active', 'created_on', 'refreshed_at',
+]
+
+# عدد الـ schemas في كل استعلام UNION ALL لعدّ المستخدمين
+USER_COUNT_CHUNK_SIZE = 200
+
+
+def refresh_tenant_directory(client_ids=None):
+    """
+    تحديث صفوف الدليل من العملاء واشتراكاتهم
+
+    Args:
+        client_ids: عملاء محددون (افتراضي: جميع العملاء)
+
+    Returns:
+        int: عدد الصفوف المحدّثة
+    """
+    clients = Client.objects.select_related('subscription__plan').annotate(
+        primary_domain=Subquery(
+            Domain.objects.filter(tenant=OuterRef('pk'), is_primary=True).values('domain')[:1]
+        ),
+    )
+    if client_ids is not None:
+        clients = clients.filter(id__in=client_ids)
+
+    rows = []
+    for client in clients:
+        subscription = client.subscription if hasattr(client, 'subscription') else None
+        plan = subscription.plan if subscription else None
+        rows.append(TenantDirectory(
+            client=client,
+            name=client.name,
+            email=client.email,
+            schema_name=client.schema_name,
+            domain=client.primary_domain or '',
+            plan=plan,
+            plan_name=(plan.name_ar or plan.name) if plan else '',
+            subscription_status=subscription.status if subscription else 'none',
+            billing_cycle=subscription.billing_cycle if subscription else '',
+            current_period_end=subscription.current_period_end if subscription else None,
+            is_active=client.is_active,
+            created_on=client.created_on,
+        ))
+
+    TenantDirectory.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['client'],
+        update_fields=DIRECTORY_FIELDS,
+        batch_size=1000,
+    )
+    return len(rows)
+
+
+def refresh_user_count(schema_name):
+    """تحديث عدد مستخدمي tenant واحد في الدليل"""
+    with schema_context(schema_name):
+        user_count = get_user_model().objects.count()
+    with schema_context(get_public_schema_name()):
+        TenantDirectory.objects.filter(schema_name=schema_name).update(user_count=user_count)
+
+
+def count_tenant_users(schema_names):
+    """
+    عدد المستخدمين لعدة schemas دون التنقل بينها (UNION ALL على جداول المستخدمين)
+
+    Returns:
+        dict: {schema_name: user_count} - الـ schemas التي لا يوجد بها جدول
+        المستخدمين (لم تُنشأ بعد) لا تظهر في النتيجة
+    """
+    qn = connection.ops.quote_name
+    table = get_user_model()._meta.db_table
+    counts = {}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT table_schema FROM information_schema.tables '
+            'WHERE table_name = %s AND table_schema = ANY(%s)',
+            [table, list(schema_names)],
+        )
+        existing = sorted(row[0] for row in cursor.fetchall())
+
+        for start in range(0, len(existing), USER_COUNT_CHUNK_SIZE):
+            chunk = existing[start:start + USER_COUNT_CHUNK_SIZE]
+            sql = ' UNION ALL '.join(
+                f'SELECT %s, COUNT(*) FROM {qn(schema_name)}.{qn(table)}' for schema_name in chunk
+            )
+            cursor.execute(sql, chunk)
+            counts.update(cursor.fetchall())
+    return counts
+
+
+def measure_tenant_storage(schema_names):
+    """
+    المساحة المستخدمة لكل schema (الجداول مع الفهارس و TOAST) في استعلام واحد
+
+    Returns:
+        dict: {schema_name: bytes}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT n.nspname, COALESCE(SUM(pg_total_relation_size(c.oid)), 0) '
+            'FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace '
+            "WHERE c.relkind IN ('r', 'm') AND n.nspname = ANY(%s) "
+            'GROUP BY n.nspname',
+            [list(schema_names)],
+        )
+        return {schema_name: int(size) for schema_name, size in cursor.fetchall()}
+
+
+def reconcile_tenant_directory():
+    """
+    إعادة بناء الدليل بالكامل (يُشغَّل دورياً لتصحيح ما فات الـ signals،
+    مثل التحديثات بـ QuerySet.update أو حذف المستخدمين المجمّع)
+
+    Returns:
+        dict: tenants, user_counts, storage_bytes (الإجمالي)
+    """
+    with schema_context(get_public_schema_name()):
+        refreshed = refresh_tenant_directory()
+
+        rows = list(TenantDirectory.objects.only('id', 'schema_name', 'user_count', 'storage_bytes'))
+        schema_names = [row.schema_name for row in rows]
+        user_counts = count_tenant_users(schema_names)
+        storage = measure_tenant_storage(schema_names)
+
+        for row in rows:
+            row.user_count = user_counts.get(row.schema_name, 0)
+            row.storage_bytes = storage.get(row.schema_name, 0)
+        TenantDirectory.objects.bulk_update(rows, ['user_count', 'storage_bytes'], batch_size=1000)
+
+    return {
+        'tenants': refreshed,
+        'user_counts': len(user_counts),
+        'storage_bytes': sum(storage.values()),
+    }
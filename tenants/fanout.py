@@ -0,0 +1,216 @@
+"""
+تشغيل مهمة لكل tenant بالتوازي (Tenant Fan-out)
+
+المهام التي تمر على جميع الـ schemas (ترحيل القيود، إعادة التقييم، الحذف
+الدوري، المجاميع) كانت تمر عليها واحداً تلو الآخر، فيزيد زمنها مع عدد
+الـ tenants. هذه الوحدة توزع دالة واحدة على الـ schemas بطريقتين:
+
+- fan_out_tenants: Celery chord - مهمة tenants.run_tenant_job لكل schema
+  (التوازي محدود بعدد عمال Celery) ثم tenants.collect_tenant_results
+  لتجميع النتائج. التقدم يُقرأ بـ get_fanout_progress.
+- run_tenants_in_processes: ProcessPoolExecutor لأوامر الإدارة.
+
+الدالة تُمرر كمسار استيراد ('accounting.tasks.process_tenant_outbox')
+وتُستدعى داخل schema_context(schema) بالمعاملات المعطاة، ويجب أن تعيد قيمة
+قابلة للتسلسل (JSON). فشل tenant يُعاد محاولته حتى TENANT_FANOUT_MAX_RETRIES
+ولا يوقف باقي الـ tenants.
+"""
+import logging
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.module_loading import import_string
+from django_tenants.utils import schema_context, get_tenant_model, get_public_schema_name
+
+logger = logging.getLogger(__name__)
+
+
+def tenant_schemas(schema_name=None):
+    """قائمة schemas المستهدفة (tenant واحد أو جميع الـ tenants)"""
+    if schema_name:
+        return [schema_name]
+    return list(
+        get_tenant_model().objects.exclude(
+            schema_name=get_public_schema_name()
+        ).values_list('schema_name', flat=True)
+    )
+
+
+def run_in_schema(func_path, schema_name, kwargs=None):
+    """استدعاء الدالة داخل schema الـ tenant"""
+    func = import_string(func_path)
+    with schema_context(schema_name):
+        return func(**(kwargs or {}))
+
+
+# ==================== Celery ====================
+
+def _progress_key(job_id):
+    return f'tenant_fanout:{job_id}'
+
+
+def record_fanout_progress(job_id, failed=False):
+    """تسجيل انتهاء tenant (بنجاح أو فشل) في عداد تقدم المهمة"""
+    key = _progress_key(job_id)
+    try:
+        cache.incr(f'{key}:done')
+        if failed:
+            cache.incr(f'{key}:failed')
+    except ValueError:
+        # انتهت صلاحية عدادات المهمة - التقدم لم يعد متاحاً دون أن يؤثر على التنفيذ
+        pass
+
+
+def fan_out_tenants(func_path, kwargs=None, schemas=None):
+    """
+    تشغيل الدالة لكل tenant كمهام Celery متوازية (chord)
+
+    Args:
+        func_path: مسار استيراد الدالة
+        kwargs: معاملات الدالة (قابلة للتسلسل JSON)
+        schemas: الـ schemas المستهدفة (افتراضي: جميع الـ tenants)
+
+    Returns:
+        str: معرف المهمة (لـ get_fanout_progress)
+    """
+    from celery import chord
+    from .tasks import run_tenant_job, collect_tenant_results
+
+    schemas = tenant_schemas() if schemas is None else list(schemas)
+    job_id = uuid.uuid4().hex
+    key = _progress_key(job_id)
+    timeout = settings.TENANT_FANOUT_PROGRESS_TIMEOUT
+    cache.set_many({
+        f'{key}:total': len(schemas),
+        f'{key}:done': 0,
+        f'{key}:failed': 0,
+        f'{key}:started_at': time.time(),
+    }, timeout=timeout)
+
+    if not schemas:
+        return job_id
+
+    chord([
+        run_tenant_job.s(job_id, func_path, schema_name, kwargs or {})
+        for schema_name in schemas
+    ])(collect_tenant_results.s(job_id, func_path))
+
+    logger.info(f"بدء تشغيل {func_path} على {len(schemas)} tenant (المهمة {job_id})")
+    return job_id
+
+
+def store_fanout_result(job_id, summary):
+    """حفظ النتيجة المجمعة للمهمة (تظهر في get_fanout_progress)"""
+    cache.set(f'{_progress_key(job_id)}:result', summary, timeout=settings.TENANT_FANOUT_PROGRESS_TIMEOUT)
+
+
+def get_fanout_progress(job_id):
+    """
+    تقدم مهمة fan_out_tenants
+
+    Returns:
+        dict: total, done, failed, elapsed_seconds, result (بعد اكتمال التجميع)
+        أو None إذا كانت المهمة غير معروفة أو انتهت صلاحية بياناتها
+    """
+    key = _progress_key(job_id)
+    values = cache.get_many([f'{key}:total', f'{key}:done', f'{key}:failed', f'{key}:started_at', f'{key}:result'])
+    if f'{key}:total' not in values:
+        return None
+
+    return {
+        'total': values[f'{key}:total'],
+        'done': values.get(f'{key}:done', 0),
+        'failed': values.get(f'{key}:failed', 0),
+        'elapsed_seconds': round(time.time() - values.get(f'{key}:started_at', time.time()), 2),
+        'result': values.get(f'{key}:result'),
+    }
+
+
+def summarize_tenant_results(outcomes):
+    """
+    تجميع نتائج الـ tenants
+
+    Args:
+        outcomes: {schema: {'status': 'success', 'result': ...} أو {'status': 'error', 'error': ...}}
+    """
+    failed = sorted(schema for schema, outcome in outcomes.items() if outcome['status'] == 'error')
+    return {
+        'tenants': outcomes,
+        'succeeded': len(outcomes) - len(failed),
+        'failed': failed,
+        'status': 'success' if not failed else 'partial',
+    }
+
+
+# ==================== Process Pool ====================
+
+def _run_with_retries(func_path, schema_name, kwargs, retries):
+    """تشغيل الدالة لـ tenant مع إعادة المحاولة (داخل العملية الفرعية)"""
+    backoff = settings.TENANT_FANOUT_RETRY_BACKOFF_SECONDS
+    attempt = 0
+    while True:
+        try:
+            return {'status': 'success', 'result': run_in_schema(func_path, schema_name, kwargs)}
+        except Exception as e:
+            if attempt >= retries:
+                logger.error(f"فشل {func_path} للـ tenant {schema_name}: {str(e)}", exc_info=True)
+                return {'status': 'error', 'error': str(e), 'attempts': attempt + 1}
+            attempt += 1
+            logger.warning(f"إعادة محاولة {func_path} للـ tenant {schema_name} ({attempt}/{retries}): {str(e)}")
+            connections.close_all()
+            time.sleep(backoff * attempt)
+
+
+def run_tenants_in_processes(func_path, kwargs=None, schemas=None, workers=1, retries=None, on_result=None):
+    """
+    تشغيل الدالة لكل tenant في عمليات متوازية (لأوامر الإدارة)
+
+    Args:
+        func_path: مسار استيراد الدالة
+        kwargs: معاملات الدالة (قابلة للتسلسل pickle)
+        schemas: الـ schemas المستهدفة (افتراضي: جميع الـ tenants)
+        workers: الحد الأقصى للعمليات المتوازية (1 = في نفس العملية)
+        retries: عدد إعادة المحاولات لكل tenant (افتراضي: TENANT_FANOUT_MAX_RETRIES)
+        on_result: دالة تُستدعى (schema, outcome, done, total) عند انتهاء كل tenant
+
+    Returns:
+        dict: نتيجة summarize_tenant_results
+    """
+    schemas = tenant_schemas() if schemas is None else list(schemas)
+    retries = settings.TENANT_FANOUT_MAX_RETRIES if retries is None else retries
+    kwargs = kwargs or {}
+    outcomes = {}
+
+    def finish(schema_name, outcome):
+        outcomes[schema_name] = outcome
+        if on_result:
+            on_result(schema_name, outcome, len(outcomes), len(schemas))
+
+    workers = min(max(workers, 1), len(schemas) or 1)
+    if workers == 1:
+        for schema_name in schemas:
+            finish(schema_name, _run_with_retries(func_path, schema_name, kwargs, retries))
+        return summarize_tenant_results(outcomes)
+
+    # لا يجب أن ترث العمليات الفرعية اتصالات قاعدة البيانات المفتوحة
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(_run_with_retries, func_path, schema_name, kwargs, retries): schema_name
+            for schema_name in schemas
+        }
+        for future in as_completed(futures):
+            schema_name = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                # انهيار العملية الفرعية نفسها (وليس خطأ داخل الدالة)
+                outcome = {'status': 'error', 'error': str(e), 'attempts': 1}
+            finish(schema_name, outcome)
+
+    return summarize_tenant_results(outcomes)
@@ -0,0 +1,46 @@
+"""
+Cache داخل العملية (LRU مع مدة صلاحية) للقراءات الساخنة في الـ middleware
+
+يُستخدم كمستوى أول أمام Redis: القيم تعيش ثوانٍ قليلة فقط، لذلك يرى كل
+عامل التغييرات التي تمت في عامل آخر بعد مدة قصيرة دون الحاجة لإلغاء موزع.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalTTLCache:
+    """LRU داخل العملية مع مدة صلاحية لكل عنصر (آمن بين الـ threads)"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,128 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0004_farminfo"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TenantDirectory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200, verbose_name="اسم الشركة")),
+                (
+                    "email",
+                    models.EmailField(max_length=254, verbose_name="البريد الإلكتروني"),
+                ),
+                (
+                    "schema_name",
+                    models.CharField(max_length=63, unique=True, verbose_name="Schema"),
+                ),
+                (
+                    "domain",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=253,
+                        verbose_name="النطاق الرئيسي",
+                    ),
+                ),
+                (
+                    "plan_name",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=100,
+                        verbose_name="اسم الباقة",
+                    ),
+                ),
+                (
+                    "subscription_status",
+                    models.CharField(
+                        default="none", max_length=20, verbose_name="حالة الاشتراك"
+                    ),
+                ),
+                (
+                    "billing_cycle",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=10,
+                        verbose_name="دورة الفوترة",
+                    ),
+                ),
+                (
+                    "current_period_end",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="نهاية الفترة الحالية"
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True, verbose_name="نشط")),
+                ("created_on", models.DateField(verbose_name="تاريخ الإنشاء")),
+                (
+                    "user_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="عدد المستخدمين"
+                    ),
+                ),
+                (
+                    "storage_bytes",
+                    models.BigIntegerField(
+                        default=0, verbose_name="المساحة المستخدمة (بايت)"
+                    ),
+                ),
+                (
+                    "refreshed_at",
+                    models.DateTimeField(auto_now=True, verbose_name="آخر تحديث"),
+                ),
+                (
+                    "client",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="directory",
+                        to="tenants.client",
+                        verbose_name="العميل",
+                    ),
+                ),
+                (
+                    "plan",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="tenants.plan",
+                        verbose_name="الباقة",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "دليل العملاء",
+                "verbose_name_plural": "دليل العملاء",
+                "ordering": ["-created_on", "-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["-created_on", "-id"], name="tenant_directory_created"
+                    ),
+                    models.Index(
+                        fields=["subscription_status", "current_period_end"],
+                        name="tenant_directory_status",
+                    ),
+                ],
+            },
+        ),
+    ]
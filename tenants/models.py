@@ -633,4 +633,55 @@ class PlatformInvoice(models.Model):
         ]
     
     def __str__(self):
-        return f"فاتورة #{self.invoice_number} - {self.subscription.client.name}"
\ No newline at end of file
+        return f"فاتورة #{self.invoice_number} - {self.subscription.client.name}"
+
+class TenantDirectory(models.Model):
+    """
+    دليل الـ Tenants (Read Model) - صف واحد لكل عميل في Public Schema
+    
+    يجمع ما تحتاجه لوحة Super Admin (النطاق، الباقة، حالة الاشتراك،
+    عدد المستخدمين، المساحة المستخدمة) حتى تُقرأ القائمة باستعلام واحد
+    بدلاً من استعلامات لكل tenant والتنقل بين الـ schemas.
+    
+    يُحدَّث من signals العملاء والاشتراكات والمستخدمين، ويُصحَّح دورياً
+    بمهمة tenants.reconcile_tenant_directory (tenants/directory.py).
+    """
+    client = models.OneToOneField(
+        Client,
+        on_delete=models.CASCADE,
+        related_name='directory',
+        verbose_name="العميل"
+    )
+    name = models.CharField(max_length=200, verbose_name="اسم الشركة")
+    email = models.EmailField(verbose_name="البريد الإلكتروني")
+    schema_name = models.CharField(max_length=63, unique=True, verbose_name="Schema")
+    domain = models.CharField(max_length=253, blank=True, default='', verbose_name="النطاق الرئيسي")
+    plan = models.ForeignKey(
+        Plan,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="الباقة"
+    )
+    plan_name = models.CharField(max_length=100, blank=True, default='', verbose_name="اسم الباقة")
+    subscription_status = models.CharField(max_length=20, default='none', verbose_name="حالة الاشتراك")
+    billing_cycle = models.CharField(max_length=10, blank=True, default='', verbose_name="دورة الفوترة")
+    current_period_end = models.DateTimeField(null=True, blank=True, verbose_name="نهاية الفترة الحالية")
+    is_active = models.BooleanField(default=True, verbose_name="نشط")
+    created_on = models.DateField(verbose_name="تاريخ الإنشاء")
+    user_count = models.PositiveIntegerField(default=0, verbose_name="عدد المستخدمين")
+    storage_bytes = models.BigIntegerField(default=0, verbose_name="المساحة المستخدمة (بايت)")
+    refreshed_at = models.DateTimeField(auto_now=True, verbose_name="آخر تحديث")
+    
+    class Meta:
+        verbose_name = "دليل العملاء"
+        verbose_name_plural = "دليل العملاء"
+        ordering = ['-created_on', '-id']
+        indexes = [
+            models.Index(fields=['-created_on', '-id'], name='tenant_directory_created'),
+            models.Index(fields=['subscription_status', 'current_period_end'], name='tenant_directory_status'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.schema_name})"
@@ -0,0 +1,87 @@
+"""
+Django Signals لتحديث دليل الـ Tenants (TenantDirectory) وإلغاء cache الاشتراكات
+وcache تحديد الـ Tenant من الـ hostname
+
+التحديث يتم بعد الـ commit حتى لا يُقرأ اشتراك أو نطاق لم يُحفظ بعد،
+ولا يُكتب في الدليل تغيير أُلغي مع rollback.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django_tenants.utils import get_public_schema_name
+
+from .models import Client, Domain, Plan, Subscription
+from .directory import refresh_tenant_directory, refresh_user_count
+from .subscription_cache import invalidate_subscription_state
+from .tenant_cache import invalidate_hostnames
+
+
+def _refresh_on_commit(client_ids):
+    client_ids = list(client_ids)
+    if client_ids:
+        transaction.on_commit(lambda: refresh_tenant_directory(client_ids))
+
+
+@receiver(post_save, sender=Client)
+def refresh_client_directory(sender, instance, **kwargs):
+    """تحديث صف العميل في الدليل (أو إنشاؤه للعميل الجديد)"""
+    _refresh_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=Client)
+def invalidate_client_hostnames(sender, instance, created, **kwargs):
+    """إلغاء العميل المخزن لجميع نطاقاته (عند الحذف تتكفل به signals الـ Domain)"""
+    if not created:
+        invalidate_hostnames(instance.domains.values_list('domain', flat=True))
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def refresh_subscription_directory(sender, instance, **kwargs):
+    """تحديث الباقة وحالة الاشتراك في الدليل وإلغاء حالة الاشتراك المخزنة للـ Gatekeeper"""
+    _refresh_on_commit([instance.client_id])
+    invalidate_subscription_state(instance.client_id)
+
+
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def refresh_domain_directory(sender, instance, **kwargs):
+    """تحديث النطاق الرئيسي في الدليل"""
+    _refresh_on_commit([instance.tenant_id])
+
+
+@receiver(pre_save, sender=Domain)
+def remember_previous_hostname(sender, instance, **kwargs):
+    """حفظ الـ hostname القديم قبل تعديله لإلغائه من الـ cache"""
+    instance._previous_domain = None
+    if instance.pk:
+        instance._previous_domain = sender.objects.filter(pk=instance.pk).values_list(
+            'domain', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def invalidate_domain_hostname(sender, instance, **kwargs):
+    """إلغاء الـ hostname (والقديم عند تعديله) بما في ذلك تخزين "غير معروف" للنطاق الجديد"""
+    invalidate_hostnames({instance.domain, getattr(instance, '_previous_domain', None)})
+
+
+@receiver(post_save, sender=Plan)
+def refresh_plan_directory(sender, instance, created, **kwargs):
+    """تحديث اسم الباقة لعملائها في الدليل"""
+    if not created:
+        _refresh_on_commit(instance.subscriptions.values_list('client_id', flat=True))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def refresh_directory_user_count(sender, instance, **kwargs):
+    """تحديث عدد مستخدمي الـ tenant عند إضافة أو حذف مستخدم"""
+    if kwargs.get('created') is False:
+        return
+    schema_name = connection.schema_name
+    if schema_name == get_public_schema_name():
+        return
+    transaction.on_commit(lambda: refresh_user_count(schema_name))
@@ -0,0 +1,76 @@
+"""
+Cache حالة الاشتراك لـ SubscriptionMiddleware (على مستويين)
+
+1. Cache داخل العملية (LRU بمدة قصيرة SUBSCRIPTION_LOCAL_CACHE_TTL): قرار
+   الـ Gatekeeper في المسار الساخن لا يكلف أي استعلام ولا رحلة لـ Redis
+2. Redis (SUBSCRIPTION_CACHE_TIMEOUT): مشترك بين جميع العمال
+
+الحالة المخزنة هي (status, current_period_end) فقط، ويُحسب انتهاء الفترة
+عند كل طلب، فلا يحتاج مرور الوقت إلى إلغاء. عدم وجود اشتراك يُخزن أيضاً.
+
+الإلغاء بعد الـ commit عند حفظ أو حذف Subscription (tenants/signals.py)،
+ويشمل ذلك انتقالات SubscriptionService ومهمة check_expired_subscriptions.
+العمال الآخرون يرون التغيير بعد انتهاء مدة الـ cache المحلي القصيرة.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django_tenants.utils import schema_context, get_public_schema_name
+
+from .local_cache import LocalTTLCache
+from .models import Subscription
+
+
+# قيمة مخزنة للعميل الذي ليس له اشتراك (لتمييزها عن عدم وجود المفتاح)
+NO_SUBSCRIPTION = 'none'
+
+
+_local_cache = LocalTTLCache(
+    maxsize=settings.SUBSCRIPTION_LOCAL_CACHE_SIZE,
+    ttl=settings.SUBSCRIPTION_LOCAL_CACHE_TTL,
+)
+
+
+def _cache_key(client_id):
+    return f'subscription:state:{client_id}'
+
+
+def _load_state(client_id):
+    with schema_context(get_public_schema_name()):
+        row = Subscription.objects.filter(client_id=client_id).values_list(
+            'status', 'current_period_end'
+        ).first()
+    return row or NO_SUBSCRIPTION
+
+
+def get_subscription_state(client_id):
+    """
+    حالة اشتراك العميل من الـ cache المحلي ثم Redis ثم قاعدة البيانات
+
+    Returns:
+        tuple | None: (status, current_period_end)، أو None إذا لم يكن للعميل اشتراك
+    """
+    key = _cache_key(client_id)
+    state = _local_cache.get(key)
+    if state is None:
+        state = cache.get(key)
+        if state is None:
+            state = _load_state(client_id)
+            cache.set(key, state, timeout=settings.SUBSCRIPTION_CACHE_TIMEOUT)
+        _local_cache.set(key, state)
+    return None if state == NO_SUBSCRIPTION else state
+
+
+def invalidate_subscription_state(client_id):
+    """إلغاء حالة اشتراك العميل من المستويين بعد اكتمال الـ transaction"""
+    def invalidate():
+        key = _cache_key(client_id)
+        _local_cache.delete(key)
+        cache.delete(key)
+
+    transaction.on_commit(invalidate)
+
+
+def clear_local_subscription_cache():
+    """مسح الـ cache المحلي للعملية (للاختبارات)"""
+    _local_cache.clear()
@@ -2,12 +2,18 @@
 Celery Tasks لتطبيق Tenants (إدارة الاشتراكات)
 """
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 import logging
 
 from tenants.models import Subscription
 from tenants.aqua_core.services.subscription_service import SubscriptionService
+from tenants.directory import reconcile_tenant_directory
+from tenants.fanout import (
+    run_in_schema, record_fanout_progress, get_fanout_progress, store_fanout_result,
+    summarize_tenant_results,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -94,3 +100,81 @@ def check_expired_subscriptions():
         'status': 'success'
     }
 
+
+
+@shared_task(bind=True, name='tenants.run_tenant_job')
+def run_tenant_job(self, job_id, func_path, schema_name, kwargs):
+    """
+    تشغيل دالة لـ tenant واحد ضمن مهمة fan_out_tenants
+    
+    الفشل يُعاد محاولته حتى TENANT_FANOUT_MAX_RETRIES مرة، ثم تُعاد نتيجة
+    خطأ بدلاً من رفع الاستثناء حتى يكتمل الـ chord ويُجمّع باقي الـ tenants.
+    
+    **Returns:**
+    - dict: {'schema', 'status': 'success', 'result'} أو {'schema', 'status': 'error', 'error'}
+    """
+    try:
+        result = run_in_schema(func_path, schema_name, kwargs)
+    except Exception as e:
+        if self.request.retries < settings.TENANT_FANOUT_MAX_RETRIES:
+            logger.warning(
+                f"إعادة محاولة {func_path} للـ tenant {schema_name} "
+                f"({self.request.retries + 1}/{settings.TENANT_FANOUT_MAX_RETRIES}): {str(e)}"
+            )
+            raise self.retry(
+                exc=e,
+                countdown=settings.TENANT_FANOUT_RETRY_BACKOFF_SECONDS * (self.request.retries + 1),
+                max_retries=settings.TENANT_FANOUT_MAX_RETRIES,
+            )
+        logger.error(f"فشل {func_path} للـ tenant {schema_name}: {str(e)}", exc_info=True)
+        record_fanout_progress(job_id, failed=True)
+        return {'schema': schema_name, 'status': 'error', 'error': str(e), 'attempts': self.request.retries + 1}
+    
+    record_fanout_progress(job_id)
+    return {'schema': schema_name, 'status': 'success', 'result': result}
+
+
+@shared_task(name='tenants.collect_tenant_results')
+def collect_tenant_results(results, job_id, func_path):
+    """
+    تجميع نتائج مهام run_tenant_job (callback الـ chord)
+    
+    **Returns:**
+    - dict: النتيجة لكل tenant وعدد الناجحة والفاشلة والمدة
+    """
+    outcomes = {
+        result['schema']: {key: value for key, value in result.items() if key != 'schema'}
+        for result in results
+    }
+    summary = summarize_tenant_results(outcomes)
+    progress = get_fanout_progress(job_id)
+    summary['duration_seconds'] = progress['elapsed_seconds'] if progress else None
+    store_fanout_result(job_id, summary)
+    
+    log = logger.warning if summary['failed'] else logger.info
+    log(
+        f"اكتمل {func_path} لـ {len(outcomes)} tenant: {summary['succeeded']} ناجح، "
+        f"{len(summary['failed'])} فاشل (المهمة {job_id})"
+    )
+    return summary
+
+
+@shared_task(name='tenants.reconcile_tenant_directory')
+def reconcile_tenant_directory_task():
+    """
+    تصحيح دليل الـ Tenants بالكامل (الاشتراكات، عدد المستخدمين، المساحة المستخدمة)
+    
+    **Returns:**
+    - dict: عدد الـ tenants المحدّثة والمدة
+    """
+    start_time = timezone.now()
+    result = reconcile_tenant_directory()
+    duration = (timezone.now() - start_time).total_seconds()
+    
+    logger.info(f"تم تحديث دليل الـ Tenants لـ {result['tenants']} tenant خلال {duration:.2f} ثانية")
+    
+    return {
+        **result,
+        'duration_seconds': round(duration, 2),
+        'status': 'success'
+    }
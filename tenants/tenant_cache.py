@@ -0,0 +1,98 @@
+"""
+Cache تحديد الـ Tenant من الـ hostname (لـ CachedTenantMainMiddleware)
+
+بدلاً من استعلام Domain → Client في public schema مع كل طلب، يُخزن العميل
+(ومعه schema_name) لكل hostname على مستويين: cache داخل العملية ثم Redis.
+
+الـ hostnames غير المعروفة تُخزن أيضاً (Negative Caching) لمدة أقصر
+TENANT_NEGATIVE_CACHE_TIMEOUT، حتى لا تصل طلبات الـ bots على subdomains
+عشوائية إلى قاعدة البيانات.
+
+الإلغاء بعد الـ commit عند حفظ أو حذف Domain أو Client (tenants/signals.py).
+
+تعطل Redis لا يوقف تحديد الـ Tenant: أخطاء الـ cache تُسجل ويُقرأ العميل
+من قاعدة البيانات مباشرة.
+"""
+import copy
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django_tenants.utils import schema_context, get_public_schema_name
+
+from .local_cache import LocalTTLCache
+from .models import Domain
+
+logger = logging.getLogger(__name__)
+
+# قيمة مخزنة للـ hostname غير المرتبط بأي tenant
+UNKNOWN_HOST = 'unknown'
+
+_local_cache = LocalTTLCache(
+    maxsize=settings.TENANT_LOCAL_CACHE_SIZE,
+    ttl=settings.TENANT_LOCAL_CACHE_TTL,
+)
+
+
+def _cache_key(hostname):
+    return f'tenant:host:{hostname}'
+
+
+def _load_tenant(hostname):
+    with schema_context(get_public_schema_name()):
+        domain = Domain.objects.select_related('tenant').filter(domain=hostname).first()
+    return domain.tenant if domain else UNKNOWN_HOST
+
+
+def resolve_tenant(hostname):
+    """
+    العميل المرتبط بالـ hostname من الـ cache المحلي ثم Redis ثم قاعدة البيانات
+
+    Returns:
+        Client | None: نسخة من العميل (آمنة للتعديل داخل الطلب)، أو None إذا
+        لم يكن الـ hostname مرتبطاً بأي tenant
+    """
+    key = _cache_key(hostname)
+    tenant = _local_cache.get(key)
+    if tenant is None:
+        try:
+            tenant = cache.get(key)
+        except Exception as e:
+            logger.warning(f"تعذر قراءة cache الـ Tenant للـ hostname {hostname}: {type(e).__name__}: {e}")
+            tenant = None
+        if tenant is None:
+            tenant = _load_tenant(hostname)
+            if tenant == UNKNOWN_HOST:
+                timeout = settings.TENANT_NEGATIVE_CACHE_TIMEOUT
+            else:
+                timeout = settings.TENANT_CACHE_TIMEOUT
+            try:
+                cache.set(key, tenant, timeout=timeout)
+            except Exception as e:
+                logger.warning(f"تعذر تخزين الـ Tenant للـ hostname {hostname} في الـ cache: {type(e).__name__}: {e}")
+        _local_cache.set(key, tenant)
+    if tenant == UNKNOWN_HOST:
+        return None
+    return copy.copy(tenant)
+
+
+def invalidate_hostnames(hostnames):
+    """إلغاء الـ hostnames من المستويين بعد اكتمال الـ transaction"""
+    keys = [_cache_key(hostname) for hostname in hostnames if hostname]
+    if not keys:
+        return
+
+    def invalidate():
+        for key in keys:
+            _local_cache.delete(key)
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            logger.error(f"تعذر إلغاء hostnames من cache الـ Tenant: {type(e).__name__}: {e}")
+
+    transaction.on_commit(invalidate)
+
+
+def clear_local_tenant_cache():
+    """مسح الـ cache المحلي للعملية (للاختبارات)"""
+    _local_cache.clear()
@@ -0,0 +1,212 @@
+"""
+Unit Tests لتطبيق Tenants
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_tenants.utils import schema_context
+
+from tenants.models import Domain, Plan, Subscription, TenantDirectory
+from tenants.directory import reconcile_tenant_directory
+from tenants.fanout import run_tenants_in_processes
+from tenants.subscription_cache import get_subscription_state, clear_local_subscription_cache
+from tenants.tenant_cache import resolve_tenant, clear_local_tenant_cache
+
+
+_attempts = {}
+
+
+def record_schema(fail_times=0):
+    """دالة اختبار: تفشل أول fail_times مرة لكل schema ثم تعيد اسم الـ schema"""
+    schema_name = connection.schema_name
+    _attempts[schema_name] = _attempts.get(schema_name, 0) + 1
+    if _attempts[schema_name] <= fail_times:
+        raise RuntimeError('فشل مؤقت')
+    return schema_name
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestTenantFanout:
+    """اختبارات تشغيل مهمة لكل tenant"""
+
+    def setup_method(self):
+        _attempts.clear()
+
+    def test_runs_in_each_schema_with_progress(self, test_tenant):
+        """الدالة تُستدعى داخل schema كل tenant مع تقرير التقدم"""
+        progress = []
+        result = run_tenants_in_processes(
+            'tenants.tests.record_schema',
+            schemas=['public', test_tenant.schema_name],
+            on_result=lambda schema, outcome, done, total: progress.append((schema, done, total)),
+        )
+
+        assert result['status'] == 'success'
+        assert result['succeeded'] == 2
+        assert result['tenants'][test_tenant.schema_name] == {
+            'status': 'success', 'result': test_tenant.schema_name,
+        }
+        assert progress == [('public', 1, 2), (test_tenant.schema_name, 2, 2)]
+
+    def test_retries_and_reports_failures(self, settings):
+        """الفشل المؤقت يُعاد محاولته، والفشل الدائم لا يوقف باقي الـ tenants"""
+        settings.TENANT_FANOUT_RETRY_BACKOFF_SECONDS = 0
+
+        result = run_tenants_in_processes(
+            'tenants.tests.record_schema', kwargs={'fail_times': 1}, schemas=['public'], retries=1,
+        )
+        assert result['tenants']['public'] == {'status': 'success', 'result': 'public'}
+
+        _attempts.clear()
+        result = run_tenants_in_processes(
+            'tenants.tests.record_schema', kwargs={'fail_times': 5}, schemas=['public'], retries=1,
+        )
+        assert result['status'] == 'partial'
+        assert result['failed'] == ['public']
+        assert result['tenants']['public']['attempts'] == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestTenantDirectory:
+    """اختبارات دليل الـ Tenants"""
+
+    def test_subscription_changes_refresh_directory(self, test_tenant, django_capture_on_commit_callbacks):
+        """حفظ الاشتراك يحدّث الباقة والحالة في الدليل"""
+        with django_capture_on_commit_callbacks(execute=True):
+            plan = Plan.objects.create(
+                name='Pro', name_ar='احترافي', price_monthly=Decimal('100.00'), price_yearly=Decimal('1000.00'),
+            )
+            subscription = Subscription.objects.create(client=test_tenant, plan=plan, status='trial')
+
+        row = TenantDirectory.objects.get(client=test_tenant)
+        assert row.schema_name == test_tenant.schema_name
+        assert row.plan_name == 'احترافي'
+        assert row.subscription_status == 'trial'
+
+        with django_capture_on_commit_callbacks(execute=True):
+            subscription.status = 'active'
+            subscription.save()
+
+        assert TenantDirectory.objects.get(client=test_tenant).subscription_status == 'active'
+
+    def test_reconcile_counts_users_without_schema_switch(self, test_tenant):
+        """التصحيح الدوري يعدّ مستخدمي جميع الـ schemas ويقيس المساحة"""
+        from django.contrib.auth import get_user_model
+
+        with schema_context(test_tenant.schema_name):
+            expected = get_user_model().objects.count()
+
+        reconcile_tenant_directory()
+
+        row = TenantDirectory.objects.get(client=test_tenant)
+        assert row.user_count == expected
+        assert row.storage_bytes > 0
+
+    def test_tenant_list_is_paginated_with_total(self, test_tenant, rf):
+        """قائمة الـ Tenants للـ Super Admin تُعيد الإجمالي وحالة الصفحات"""
+        from types import SimpleNamespace
+        from api.saas import list_tenants
+
+        request = rf.get('/')
+        request.user = SimpleNamespace(is_superuser=True)
+        total = TenantDirectory.objects.count()
+
+        page = list_tenants(request, page=1, page_size=1)
+        assert page.total == total
+        assert page.total_pages == total
+        assert len(page.items) == 1
+        assert page.has_next == (total > 1)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSubscriptionCache:
+    """اختبارات cache حالة الاشتراك لـ SubscriptionMiddleware"""
+
+    def setup_method(self):
+        from django.core.cache import cache
+        cache.clear()
+        clear_local_subscription_cache()
+
+    def test_cached_state_needs_no_queries(self, test_tenant):
+        """القراءة الثانية (وعدم وجود اشتراك) تُخدم من الـ cache بدون استعلام"""
+        assert get_subscription_state(test_tenant.pk) is None
+
+        with CaptureQueriesContext(connection) as queries:
+            assert get_subscription_state(test_tenant.pk) is None
+        assert len(queries) == 0
+
+    def test_subscription_save_invalidates_state(self, test_tenant, django_capture_on_commit_callbacks):
+        """تغيير حالة الاشتراك يظهر فوراً في نفس العملية بعد الـ commit"""
+        period_end = timezone.now() + timedelta(days=30)
+        with django_capture_on_commit_callbacks(execute=True):
+            plan = Plan.objects.create(
+                name='Basic', name_ar='أساسي', price_monthly=Decimal('50.00'), price_yearly=Decimal('500.00'),
+            )
+            subscription = Subscription.objects.create(
+                client=test_tenant, plan=plan, status='active', current_period_end=period_end,
+            )
+        assert get_subscription_state(test_tenant.pk) == ('active', period_end)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            subscription.status = 'suspended'
+            subscription.save()
+
+        assert get_subscription_state(test_tenant.pk) == ('suspended', period_end)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestTenantResolutionCache:
+    """اختبارات cache تحديد الـ Tenant من الـ hostname"""
+
+    def setup_method(self):
+        from django.core.cache import cache
+        cache.clear()
+        clear_local_tenant_cache()
+
+    def test_known_and_unknown_hosts_are_cached(self, test_tenant):
+        """العميل والـ hostname غير المعروف يُخدمان من الـ cache بدون استعلام"""
+        hostname = f'{test_tenant.schema_name}.localhost'
+        assert resolve_tenant(hostname).schema_name == test_tenant.schema_name
+        assert resolve_tenant('random-bot.localhost') is None
+
+        with CaptureQueriesContext(connection) as queries:
+            assert resolve_tenant(hostname).pk == test_tenant.pk
+            assert resolve_tenant('random-bot.localhost') is None
+        assert len(queries) == 0
+
+    def test_domain_changes_invalidate_hostnames(self, test_tenant, django_capture_on_commit_callbacks):
+        """إضافة نطاق تلغي تخزين "غير معروف"، وتعديله يلغي الـ hostname القديم"""
+        assert resolve_tenant('farm.example.com') is None
+
+        with django_capture_on_commit_callbacks(execute=True):
+            domain = Domain.objects.create(domain='farm.example.com', tenant=test_tenant, is_primary=False)
+        assert resolve_tenant('farm.example.com').pk == test_tenant.pk
+
+        with django_capture_on_commit_callbacks(execute=True):
+            domain.domain = 'farm2.example.com'
+            domain.save()
+        assert resolve_tenant('farm.example.com') is None
+        assert resolve_tenant('farm2.example.com').pk == test_tenant.pk
+
+    def test_cache_errors_fall_back_to_database(self, test_tenant, monkeypatch):
+        """تعطل الـ cache لا يمنع تحديد الـ Tenant من قاعدة البيانات"""
+        from tenants import tenant_cache
+
+        class BrokenCache:
+            def get(self, *args, **kwargs):
+                raise TypeError("AbstractConnection.__init__() got an unexpected keyword argument 'CLIENT_CLASS'")
+
+            def set(self, *args, **kwargs):
+                raise ConnectionError('redis is down')
+
+        monkeypatch.setattr(tenant_cache, 'cache', BrokenCache())
+
+        assert resolve_tenant(f'{test_tenant.schema_name}.localhost').pk == test_tenant.pk
+        assert resolve_tenant('random-bot.localhost') is None